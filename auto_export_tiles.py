@@ -1,178 +1,206 @@
 #!/usr/bin/env python3
 """
 Auto-Export Tiles
-Automatically converts TMX files to JSON when saved in Tiled
+Keeps TMX files and room JSON in sync while you edit either one
+
+Saving a .tmx in tiles/ regenerates its room JSON (and every other target in
+tiles/export_settings.json, from one parse); editing a room JSON in
+game-godot/data/rooms/ regenerates only that room's .tmx. The watcher
+remembers the content hash of every file it writes, so the events caused by
+its own writes are recognised and never convert back the other way.
+Conversions from file events (observer thread) and queued jobs (main
+thread) are serialised by one lock.
 """
 
+import hashlib
 import os
+import threading
 import time
-import json
-import xml.etree.ElementTree as ET
 from pathlib import Path
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
 
-class TiledFileHandler(FileSystemEventHandler):
-    """Handles file system events for Tiled files"""
+from build_cache import get_build_cache
+from export_metrics import ExportMetrics, SnapshotWriter, serve_metrics
+from export_targets import export_room, load_export_targets, with_output
+from hot_reload import HotReloadPublisher, RoomChangeTracker
+from json_to_tmx import NON_ROOM_FILES, json_to_tmx
+from tool_lock import WATCHER_LOCK, FileLock, InstanceLock, take_jobs
+
+def file_hash(path):
+    """sha256 of a file's contents, or None if it cannot be read"""
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+class TiledFileHandler:
+    """Handles file system events for Tiled files
+
+    Implements watchdog's handler interface (dispatch) directly so importing
+    this module does not load watchdog; only main() needs it.
+    """
     
     def __init__(self):
         self.tiles_dir = Path("tiles")
         self.rooms_dir = Path("game-godot/data/rooms")
         self.last_modified = {}
+        
+        # Held for every conversion: watchdog events arrive on the observer
+        # thread while queued jobs run on the main thread, and both update
+        # last_modified, own_writes and the hot-reload room snapshots
+        self.lock = threading.Lock()
+        
+        # Resolved path -> (origin, sha256) of every file this watcher wrote
+        self.own_writes = {}
+        
+        # hot_reload.RoomChangeTracker when a game may be listening
+        self.room_changes = None
+        
+        self.metrics = ExportMetrics()
+        
+        # Outputs written from each TMX (tiles/export_settings.json)
+        self.export_targets = load_export_targets()
+    
+    def dispatch(self, event):
+        """Route a watchdog event to its handler"""
+        self.metrics.events.inc(kind=event.event_type)
+        if event.event_type in ('modified', 'created'):
+            self.on_modified(event)
+        elif event.event_type == 'moved':
+            # Editors that save via a temp file and rename show up as moves
+            self.on_moved(event)
     
     def on_modified(self, event):
         """Called when a file is modified"""
         if event.is_directory:
             return
-        
-        file_path = Path(event.src_path)
-        
-        # Only process TMX files
-        if file_path.suffix.lower() != '.tmx':
+        self.handle_change(Path(event.src_path))
+    
+    def on_moved(self, event):
+        """Called when a file is renamed into place"""
+        if event.is_directory:
+            return
+        self.handle_change(Path(event.dest_path))
+    
+    def handle_change(self, file_path):
+        """Convert a changed TMX or room JSON in the matching direction"""
+        suffix = file_path.suffix.lower()
+        parent = file_path.parent.resolve()
+        if suffix == '.tmx' and parent == self.tiles_dir.resolve():
+            convert = self.convert_tmx_to_json
+        elif suffix == '.json' and parent == self.rooms_dir.resolve() and file_path.name not in NON_ROOM_FILES:
+            convert = self.convert_json_to_tmx
+        else:
             return
         
-        # Check if this is actually a new modification
-        current_time = time.time()
-        if file_path in self.last_modified and current_time - self.last_modified[file_path] < 1.0:
-            return  # Skip if modified within last second (avoid duplicate events)
-        
-        self.last_modified[file_path] = current_time
-        
-        # Convert TMX to JSON
-        self.convert_tmx_to_json(file_path)
+        with self.lock:
+            # Check if this is actually a new modification
+            current_time = time.time()
+            if file_path in self.last_modified and current_time - self.last_modified[file_path] < 1.0:
+                self.metrics.coalesced.inc(reason="debounce")
+                return  # Skip if modified within last second (avoid duplicate events)
+            
+            # Our own output arriving back as an event: nothing changed upstream
+            if self.is_own_write(file_path):
+                self.metrics.coalesced.inc(reason="own_write")
+                return
+            
+            self.last_modified[file_path] = current_time
+            convert(file_path)
+    
+    def is_own_write(self, file_path):
+        """True if the file still has exactly the content this watcher wrote"""
+        record = self.own_writes.get(str(file_path.resolve()))
+        if record is None:
+            return False
+        # Wait out a write in progress so a half-written file is never hashed
+        with FileLock(file_path):
+            return record[1] == file_hash(file_path)
+    
+    def record_write(self, file_path, origin):
+        """Remember the content hash of a file this watcher just wrote"""
+        self.own_writes[str(Path(file_path).resolve())] = (origin, file_hash(file_path))
     
     def convert_tmx_to_json(self, tmx_file):
         """Convert a single TMX file to JSON"""
-        try:
-            print(f"🔄 Auto-converting {tmx_file.name}...")
-            
-            # Parse TMX file
-            tree = ET.parse(tmx_file)
-            root = tree.getroot()
-            
-            # Extract map properties
-            map_width = int(root.get('width'))
-            map_height = int(root.get('height'))
-            tile_width = int(root.get('tilewidth'))
-            tile_height = int(root.get('tileheight'))
-            
-            # Create JSON structure
-            json_data = {
-                "compressionlevel": -1,
-                "height": map_height,
-                "infinite": False,
-                "layers": [],
-                "nextlayerid": 5,
-                "nextobjectid": 4,
-                "orientation": "orthogonal",
-                "renderorder": "right-down",
-                "tiledversion": "1.11.2",
-                "tileheight": tile_height,
-                "tilesets": [],
-                "tilewidth": tile_width,
-                "type": "map",
-                "version": "1.10",
-                "width": map_width,
-                "backgroundcolor": "#000000"
-            }
-            
-            # Process tilesets
-            for tileset in root.findall('tileset'):
-                tileset_data = {
-                    "firstgid": int(tileset.get('firstgid')),
-                    "source": tileset.get('source')
-                }
-                json_data["tilesets"].append(tileset_data)
-            
-            # Process layers
-            layer_id = 1
-            for layer in root.findall('layer'):
-                layer_data = {
-                    "data": "",
-                    "encoding": "csv",
-                    "height": map_height,
-                    "id": layer_id,
-                    "name": layer.get('name'),
-                    "opacity": 1,
-                    "type": "tilelayer",
-                    "visible": True,
-                    "width": map_width,
-                    "x": 0,
-                    "y": 0,
-                    "offsetx": 0,
-                    "offsety": 0,
-                    "parallaxx": 1.0,
-                    "parallaxy": 1.0,
-                    "tintcolor": "#000000"
-                }
-                
-                # Process tile data
-                data_element = layer.find('data')
-                if data_element is not None:
-                    layer_data["data"] = data_element.text.strip()
-                
-                json_data["layers"].append(layer_data)
-                layer_id += 1
-            
-            # Process object groups
-            for objectgroup in root.findall('objectgroup'):
-                objects = []
-                for obj in objectgroup.findall('object'):
-                    obj_data = {
-                        "height": int(obj.get('height', 0)),
-                        "id": int(obj.get('id', 0)),
-                        "name": obj.get('name', ''),
-                        "properties": [],
-                        "rotation": float(obj.get('rotation', 0)),
-                        "type": obj.get('type', ''),
-                        "visible": obj.get('visible', 'true').lower() == 'true',
-                        "width": int(obj.get('width', 0)),
-                        "x": float(obj.get('x', 0)),
-                        "y": float(obj.get('y', 0))
-                    }
-                    
-                    # Process properties
-                    for prop in obj.findall('properties/property'):
-                        prop_data = {
-                            "name": prop.get('name'),
-                            "type": prop.get('type', 'string'),
-                            "value": prop.get('value')
-                        }
-                        obj_data["properties"].append(prop_data)
-                    
-                    objects.append(obj_data)
-                
-                objectgroup_data = {
-                    "draworder": objectgroup.get('draworder', 'topdown'),
-                    "id": layer_id,
-                    "name": objectgroup.get('name'),
-                    "objects": objects,
-                    "opacity": 1,
-                    "type": "objectgroup",
-                    "visible": True,
-                    "x": 0,
-                    "y": 0
-                }
-                
-                json_data["layers"].append(objectgroup_data)
-                layer_id += 1
-            
-            # Write JSON file
-            json_file = self.rooms_dir / (tmx_file.stem + '.json')
-            with open(json_file, 'w') as f:
-                json.dump(json_data, f, indent=2)
-            
+        print(f"🔄 Auto-converting {tmx_file.name}...")
+        
+        # Same conversion as `tiled_workflow.py convert`, including autotiling
+        json_file = self.rooms_dir / (tmx_file.stem + '.json')
+        if self.run_conversion("tmx_to_json", tmx_file, json_file):
+            self.record_write(json_file, tmx_file.name)
+            self.publish_room_change(json_file)
             print(f"✅ Auto-converted {tmx_file.name} → {json_file.name}")
-            
-        except Exception as e:
-            print(f"❌ Error auto-converting {tmx_file.name}: {e}")
+    
+    def convert_json_to_tmx(self, json_file):
+        """Regenerate the TMX for a single hand-edited room JSON"""
+        print(f"🔄 Auto-converting {json_file.name} back to TMX...")
+        
+        # The game loads the JSON, so the edit itself is what it needs to see
+        self.publish_room_change(json_file)
+        
+        tmx_file = self.tiles_dir / (json_file.stem + '.tmx')
+        if self.run_conversion("json_to_tmx", json_file, tmx_file):
+            self.record_write(tmx_file, json_file.name)
+            print(f"✅ Auto-converted {json_file.name} → {tmx_file.name}")
+    
+    def run_conversion(self, direction, source, target):
+        """Run one conversion and record its metrics; returns its success"""
+        stats = {}
+        start = time.perf_counter()
+        if direction == "tmx_to_json":
+            # One parse, every export target; the room JSON is always among them
+            results = export_room(str(source), with_output(self.export_targets, str(target)), stats=stats)
+            for export_target, path, error in results:
+                if error:
+                    print(f"❌ {Path(source).name} -> {export_target.name}: {error}")
+                elif Path(path).resolve() != Path(target).resolve():
+                    self.record_write(path, Path(source).name)
+            ok = all(error is None for _, _, error in results)
+            cache = get_build_cache()
+            if cache is not None:
+                cache.flush()  # the watcher runs for hours; keep the shared hit statistics current
+        else:
+            ok = json_to_tmx(Path(source), Path(target), stats)
+        self.metrics.record_conversion(direction, time.perf_counter() - start, ok, stats)
+        return ok
+    
+    def publish_room_change(self, json_file):
+        """Push the room's per-layer delta to connected game clients"""
+        if self.room_changes is not None:
+            self.room_changes.publish_change(str(json_file))
+    
+    def process_queued_jobs(self):
+        """Run conversions other tools handed to this watcher"""
+        for job in take_jobs():
+            with self.lock:
+                self.run_queued_job(job)
+    
+    def run_queued_job(self, job):
+        """Run one queued conversion; the caller holds self.lock"""
+        source = Path(job["source"])
+        target = Path(job["target"])
+        self.metrics.events.inc(kind="queued")
+        if job.get("action") == "tmx_to_json":
+            print(f"🔄 Queued conversion of {source.name} (from pid {job.get('queued_by')})")
+            if self.run_conversion("tmx_to_json", source, target):
+                self.record_write(target, source.name)
+                self.publish_room_change(target)
+        elif job.get("action") == "json_to_tmx":
+            print(f"🔄 Queued conversion of {source.name} (from pid {job.get('queued_by')})")
+            if self.run_conversion("json_to_tmx", source, target):
+                self.record_write(target, source.name)
+        else:
+            print(f"⚠️  Skipping unknown queued job: {job.get('action')}")
 
 def main():
     """Start the auto-export service"""
+    from watchdog.observers import Observer
+    
     print("🚀 Starting Auto-Export Tiles Service")
     print("=" * 40)
-    print("Watching tiles/ directory for changes...")
-    print("Save any .tmx file in Tiled to auto-convert to JSON")
+    print("Watching tiles/ and game-godot/data/rooms/ for changes...")
+    print("Save a .tmx in Tiled to update its JSON, or edit a room JSON to update its .tmx")
     print("Press Ctrl+C to stop")
     print("=" * 40)
     
@@ -188,27 +216,50 @@ def main():
         print(f"❌ Rooms directory not found: {rooms_dir}")
         return
     
+    # Only one watcher may run; batch tools hand their work to it
+    instance_lock = InstanceLock(WATCHER_LOCK)
+    if not instance_lock.acquire():
+        owner = instance_lock.owner()
+        print(f"❌ Auto-export watcher already running (pid {owner['pid'] if owner else '?'})")
+        return
+    
     # Create event handler
     event_handler = TiledFileHandler()
     
+    # Metrics for long-running service installs (see export_metrics.py)
+    metrics_server = serve_metrics(event_handler.metrics)
+    snapshot_writer = SnapshotWriter(event_handler.metrics).start()
+    
+    # Push room deltas to a running game (see hot_reload.py)
+    publisher = HotReloadPublisher()
+    if publisher.start():
+        event_handler.room_changes = RoomChangeTracker(publisher)
+        event_handler.room_changes.remember_all(str(rooms_dir))
+    
     # Create observer
     observer = Observer()
     observer.schedule(event_handler, str(tiles_dir), recursive=False)
+    observer.schedule(event_handler, str(rooms_dir), recursive=False)
     
     # Start watching
     observer.start()
     
     try:
         while True:
+            event_handler.process_queued_jobs()
             time.sleep(1)
     except KeyboardInterrupt:
         print("\n🛑 Stopping auto-export service...")
         observer.stop()
+    finally:
+        snapshot_writer.stop()
+        if metrics_server is not None:
+            metrics_server.shutdown()
+        publisher.close()
+        instance_lock.release()
     
     observer.join()
     print("✅ Auto-export service stopped")
 
 if __name__ == "__main__":
     main()
-
-
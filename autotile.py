@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Autotile Export Stage
+Rewrites terrain tiles to their connected variants at export time
+
+Rules are declared on the terrain's base tile in the TSX:
+
+    <tile id="2">
+     <properties>
+      <property name="type" value="wall"/>
+      <property name="autotile" value="4"/>
+      <property name="autotile_variants" value="0:2,1:5,2:6,3:7"/>
+      <property name="autotile_edges" value="connect"/>
+     </properties>
+    </tile>
+
+autotile is the neighbourhood (4 or 8). autotile_variants maps a neighbour
+bitmask to a tile id in the same tileset; masks without an entry keep the
+base tile. autotile_edges is "connect" (default, the map edge counts as the
+same terrain) or "none".
+
+Our rooms use GID == tile id (GID n is atlas cell n, as RoomImporter draws
+them) rather than Tiled's firstgid + tile id, which only lines up with a
+tileset at firstgid 1. Rules in a tileset the map places at any other
+firstgid are rejected with a ValueError instead of being mapped onto a
+neighbouring tileset's tiles.
+
+The base tile and every variant form the terrain, so autotiling an already
+autotiled layer gives the same result. That matters because the watcher
+writes hand-edited room JSON back to TMX (json_to_tmx), variants included:
+variants in a TMX are valid terrain input, not something to strip.
+
+Bits: 4-neighbour N=1 E=2 S=4 W=8. 8-neighbour N=1 NE=2 E=4 SE=8 S=16 SW=32
+W=64 NW=128, with corner bits only set when both adjacent edges are set
+(the usual 47-tile blob reduction).
+"""
+
+import os
+import xml.etree.ElementTree as ET
+
+from room_data import GID_MASK, decode_tile_layer, encode_csv_rows, iter_tile_layers
+
+# (row offset, col offset, bit) per neighbour
+NEIGHBOURS_4 = ((-1, 0, 1), (0, 1, 2), (1, 0, 4), (0, -1, 8))
+NEIGHBOURS_8 = ((-1, 0, 1), (-1, 1, 2), (0, 1, 4), (1, 1, 8), (1, 0, 16), (1, -1, 32), (0, -1, 64), (-1, -1, 128))
+
+# Corner bit -> the two edge bits it requires
+BLOB_CORNERS = ((2, 1 | 4), (8, 4 | 16), (32, 16 | 64), (128, 64 | 1))
+
+class AutotileRule:
+    """One terrain: its base GID, neighbourhood and mask -> GID variants"""
+
+    __slots__ = ('base_gid', 'neighbours', 'variants', 'terrain_gids', 'edges_connect')
+
+    def __init__(self, base_gid, neighbours, variants, edges_connect=True):
+        self.base_gid = base_gid
+        self.neighbours = neighbours
+        self.variants = variants
+        self.terrain_gids = frozenset([base_gid, *variants.values()])
+        self.edges_connect = edges_connect
+
+def parse_variants(text):
+    """Parse "mask:tile_id,mask:tile_id" into {mask: gid} (GID == tile id)"""
+    variants = {}
+    for pair in text.replace('\n', ',').split(','):
+        if not pair.strip():
+            continue
+        mask, tile_id = pair.split(':')
+        variants[int(mask)] = int(tile_id)
+    return variants
+
+_rules_cache = {}
+
+def load_autotile_rules(tsx_path, firstgid):
+    """Read the autotile rules declared in a TSX file (cached by path and mtime)
+
+    Raises ValueError if the tileset declares rules but is not at firstgid 1.
+    """
+    try:
+        mtime = os.path.getmtime(tsx_path)
+    except OSError:
+        return []
+
+    cache_key = (os.path.abspath(tsx_path), firstgid)
+    cached = _rules_cache.get(cache_key)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    rules = []
+    root = ET.parse(tsx_path).getroot()
+    for tile in root.findall('tile'):
+        properties = {prop.get('name'): prop.get('value', prop.text or '') for prop in tile.findall('properties/property')}
+        if 'autotile' not in properties:
+            continue
+
+        neighbours = int(properties['autotile'])
+        if neighbours not in (4, 8):
+            raise ValueError(f"{tsx_path}: tile {tile.get('id')} autotile must be 4 or 8, got {neighbours}")
+
+        if firstgid != 1:
+            raise ValueError(f"{tsx_path}: autotile rules need the tileset at firstgid 1 "
+                             f"(rooms use GID == tile id), but the map places it at firstgid {firstgid}")
+
+        rules.append(AutotileRule(
+            base_gid=int(tile.get('id')),
+            neighbours=neighbours,
+            variants=parse_variants(properties.get('autotile_variants', '')),
+            edges_connect=properties.get('autotile_edges', 'connect') != 'none',
+        ))
+
+    _rules_cache[cache_key] = (mtime, rules)
+    return rules
+
+def load_room_autotile_rules(room, base_dir):
+    """Collect rules from every tileset a room references (sources relative to base_dir)"""
+    rules = []
+    for tileset in room.get('tilesets', []):
+        source = tileset.get('source')
+        if source:
+            rules.extend(load_autotile_rules(os.path.join(base_dir, source), int(tileset.get('firstgid', 1))))
+    return rules
+
+def neighbour_masks(terrain, neighbours, edges_connect):
+    """Bitmask of same-terrain neighbours for every cell of a boolean grid"""
+    import numpy as np
+
+    height, width = terrain.shape
+    padded = np.pad(terrain, 1, constant_values=edges_connect)
+    masks = np.zeros((height, width), dtype=np.uint16)
+    for row_offset, col_offset, bit in (NEIGHBOURS_4 if neighbours == 4 else NEIGHBOURS_8):
+        shifted = padded[1 + row_offset:1 + row_offset + height, 1 + col_offset:1 + col_offset + width]
+        masks |= shifted.astype(np.uint16) * bit
+
+    if neighbours == 8:
+        for corner, edges in BLOB_CORNERS:
+            masks &= ~np.where((masks & edges) == edges, 0, corner).astype(np.uint16)
+
+    return masks
+
+def apply_autotile_rules(rows, rules):
+    """Return rows with every terrain cell replaced by its variant for its neighbour mask"""
+    import numpy as np
+
+    grid = np.array(rows, dtype=np.uint32)
+    if grid.size == 0:
+        return rows
+
+    # Keep flip flags; rules match on the bare GID
+    flags = grid & ~np.uint32(GID_MASK)
+    gids = grid & np.uint32(GID_MASK)
+    result = gids.copy()
+
+    for rule in rules:
+        terrain = np.isin(gids, list(rule.terrain_gids))
+        if not terrain.any():
+            continue
+        masks = neighbour_masks(terrain, rule.neighbours, rule.edges_connect)
+
+        lookup = np.full(256 if rule.neighbours == 8 else 16, rule.base_gid, dtype=np.uint32)
+        for mask, gid in rule.variants.items():
+            lookup[mask] = gid
+        result[terrain] = lookup[masks[terrain]]
+
+    return (result | flags).tolist()
+
+def autotile_room(room, base_dir):
+    """Apply the tilesets' autotile rules to every tile layer of a room dict in place
+
+    Returns the number of layers rewritten. Rooms whose tilesets declare no
+    rules are left untouched without importing NumPy.
+    """
+    rules = load_room_autotile_rules(room, base_dir)
+    if not rules:
+        return 0
+
+    rewritten = 0
+    for layer in iter_tile_layers(room):
+        rows = decode_tile_layer(layer, keep_flags=True)
+        autotiled = apply_autotile_rules(rows, rules)
+        if autotiled == rows:
+            continue
+        if isinstance(layer.get('data'), list):
+            layer['data'] = [gid for row in autotiled for gid in row]
+        else:
+            layer['data'] = encode_csv_rows(autotiled)
+        rewritten += 1
+    return rewritten
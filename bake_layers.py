@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Bake Static Layers
+Composites static tile layers (Ground by default) into per-room PNG chunks
+
+RoomImporter otherwise creates one Sprite2D per tile. Each baked chunk is a
+single texture covering CHUNK_TILES x CHUNK_TILES tiles, blitted in one NumPy
+gather from the tileset atlas. game-godot/assets/baked/manifest.json tells
+the game which chunks to draw per room and layer.
+
+GID n is drawn from atlas cell n, matching RoomImporter.create_tile_visual.
+Each manifest layer records tiles_sha256, a digest of the tiles it was baked
+from (see tiles_digest); the game draws the chunks only while the room's
+layer still has those tiles, so a room edited but not re-baked falls back to
+per-tile drawing instead of showing a stale layer. Each layer is keyed by a hash of its tile data and the atlas, so only rooms
+that changed (or a changed tileset) are re-rendered; layers baked before in
+any checkout are restored from the shared build cache (build_cache.py).
+"""
+
+import glob
+import hashlib
+import json
+import os
+import sys
+
+from build_cache import cache_key, get_build_cache, source_version
+from room_data import decode_tile_layer, find_layer, load_room
+from room_json import write_json
+
+BAKE_VERSION = 2
+
+# 32 tiles * 32 px = 1024 px chunks, well under the 2048 px texture budget
+CHUNK_TILES = 32
+
+DEFAULT_LAYERS = ("Ground",)
+
+LFS_POINTER_PREFIX = b"version https://git-lfs"
+
+def file_digest(path):
+    """sha256 of a file's bytes"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def is_lfs_pointer(path):
+    """True if the file is a Git LFS pointer rather than the real content"""
+    with open(path, 'rb') as f:
+        return f.read(len(LFS_POINTER_PREFIX)) == LFS_POINTER_PREFIX
+
+def load_atlas_tiles(atlas_path, tile_width, tile_height):
+    """Slice the atlas into an array shaped (tiles, tile_height, tile_width, 4)"""
+    import numpy as np
+    from PIL import Image
+
+    atlas = np.asarray(Image.open(atlas_path).convert('RGBA'))
+    rows = atlas.shape[0] // tile_height
+    columns = atlas.shape[1] // tile_width
+    if rows == 0 or columns == 0:
+        raise ValueError(f"{atlas.shape[1]}x{atlas.shape[0]} px is smaller than one {tile_width}x{tile_height} tile")
+    atlas = atlas[:rows * tile_height, :columns * tile_width]
+    tiles = atlas.reshape(rows, tile_height, columns, tile_width, 4).transpose(0, 2, 1, 3, 4)
+    tiles = tiles.reshape(rows * columns, tile_height, tile_width, 4)
+
+    # Extra fully transparent tile used for GID 0 and anything outside the atlas
+    blank = np.zeros((1, tile_height, tile_width, 4), dtype=tiles.dtype)
+    return np.concatenate([tiles, blank])
+
+def render_grid(tiles, grid):
+    """Blit a (rows, cols) grid of GIDs into one RGBA image array"""
+    import numpy as np
+
+    blank_index = len(tiles) - 1
+    indices = np.where((grid > 0) & (grid < blank_index), grid, blank_index)
+    blitted = tiles[indices]
+    rows, columns, tile_height, tile_width, channels = blitted.shape
+    return blitted.transpose(0, 2, 1, 3, 4).reshape(rows * tile_height, columns * tile_width, channels)
+
+def layer_hash(layer, atlas_digest, chunk_tiles):
+    """Cache key for one layer: its tiles, the atlas and the chunk size"""
+    digest = hashlib.sha256()
+    digest.update(f"{BAKE_VERSION}:{chunk_tiles}:{atlas_digest}:{layer.get('width')}x{layer.get('height')}:".encode())
+    data = layer.get('data', '')
+    digest.update(data.encode() if isinstance(data, str) else json.dumps(data).encode())
+    return digest.hexdigest()
+
+def tiles_digest(layer):
+    """sha256 of "<width>x<height>:" and the layer's GIDs (row-major, flip flags kept) joined by commas
+
+    RoomImporter.baked_tiles_digest computes the same value from the room
+    JSON at load, whether the data is CSV text or a GID list.
+    """
+    rows = decode_tile_layer(layer, keep_flags=True)
+    text = f"{int(layer.get('width', 0))}x{int(layer.get('height', 0))}:" + ",".join(
+        str(gid) for row in rows for gid in row)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+def bake_layer(room_id, layer, tiles, out_dir, chunk_tiles, tile_width, tile_height):
+    """Write the chunks of one layer, returning their manifest entries"""
+    import numpy as np
+    from PIL import Image
+
+    grid = np.array(decode_tile_layer(layer), dtype=np.int64)
+    room_dir = os.path.join(out_dir, room_id)
+    os.makedirs(room_dir, exist_ok=True)
+
+    chunks = []
+    for chunk_row in range(0, grid.shape[0], chunk_tiles):
+        for chunk_col in range(0, grid.shape[1], chunk_tiles):
+            chunk = grid[chunk_row:chunk_row + chunk_tiles, chunk_col:chunk_col + chunk_tiles]
+            if not chunk.any():
+                continue
+
+            file_name = f"{layer['name']}_{chunk_col // chunk_tiles}_{chunk_row // chunk_tiles}.png"
+            Image.fromarray(render_grid(tiles, chunk), 'RGBA').save(os.path.join(room_dir, file_name), optimize=True)
+            chunks.append({
+                "x": chunk_col * tile_width,
+                "y": chunk_row * tile_height,
+                "file": f"{room_id}/{file_name}",
+            })
+    return chunks
+
+def remove_stale_chunks(out_dir, room_id, layer_name, keep):
+    """Delete chunk PNGs of a layer that are no longer in the manifest"""
+    for path in glob.glob(os.path.join(out_dir, room_id, f"{layer_name}_*.png")):
+        if f"{room_id}/{os.path.basename(path)}" not in keep:
+            os.remove(path)
+
+def bake_all_rooms(rooms_dir="game-godot/data/rooms", out_dir="game-godot/assets/baked",
+                   atlas_path="game-godot/assets/tiles/dunjon_tileset.png",
+                   layer_names=DEFAULT_LAYERS, chunk_tiles=CHUNK_TILES, force=False):
+    """Bake the static layers of every room, re-rendering only what changed"""
+    room_files = sorted(glob.glob(os.path.join(rooms_dir, "*.json")))
+    if not room_files:
+        print(f"❌ No JSON files found in {rooms_dir}")
+        return False
+    if not os.path.exists(atlas_path):
+        print(f"❌ Tileset atlas not found: {atlas_path}")
+        return False
+
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, "manifest.json")
+    manifest = {"version": BAKE_VERSION, "rooms": {}}
+    if os.path.exists(manifest_path) and not force:
+        with open(manifest_path, 'r') as f:
+            previous = json.load(f)
+        if previous.get("version") == BAKE_VERSION:
+            manifest = previous
+
+    atlas_digest = file_digest(atlas_path)
+    tiles_by_size = {}
+    baked_count = 0
+    restored_count = 0
+    cached_count = 0
+    cache = get_build_cache()
+    version = source_version("bake_layers")
+    seen_rooms = set()
+
+    for room_path in room_files:
+        room_id = os.path.splitext(os.path.basename(room_path))[0]
+        seen_rooms.add(room_id)
+        room = load_room(room_path)
+        tile_width = int(room.get('tilewidth', 32))
+        tile_height = int(room.get('tileheight', 32))
+        room_entry = manifest["rooms"].setdefault(room_id, {"layers": {}})
+
+        for layer_name in layer_names:
+            layer = find_layer(room, layer_name, 'tilelayer')
+            if layer is None:
+                room_entry["layers"].pop(layer_name, None)
+                continue
+
+            key = layer_hash(layer, atlas_digest, chunk_tiles)
+            previous = room_entry["layers"].get(layer_name)
+            if previous and previous.get("hash") == key and all(
+                    os.path.exists(os.path.join(out_dir, chunk["file"])) for chunk in previous["chunks"]):
+                cached_count += 1
+                continue
+
+            # Another checkout (or branch) may have baked exactly this layer already
+            entry_key = cache_key("bake", version, [key, room_id, layer_name, tile_width, tile_height])
+            meta = cache.restore("bake", entry_key, out_dir) if cache is not None else None
+            if meta is not None:
+                chunks = meta["chunks"]
+                restored_count += 1
+                print(f"♻️  Restored {room_id}/{layer_name} from the build cache: {len(chunks)} chunks")
+            else:
+                if (tile_width, tile_height) not in tiles_by_size:
+                    try:
+                        tiles_by_size[(tile_width, tile_height)] = load_atlas_tiles(atlas_path, tile_width, tile_height)
+                    except (OSError, ValueError) as e:
+                        print(f"❌ Could not load tileset atlas {atlas_path}: {e}")
+                        if is_lfs_pointer(atlas_path):
+                            print("   It is a Git LFS pointer; run 'git lfs pull' to fetch the image")
+                        return False
+
+                chunks = bake_layer(room_id, layer, tiles_by_size[(tile_width, tile_height)],
+                                    out_dir, chunk_tiles, tile_width, tile_height)
+                if cache is not None:
+                    cache.store("bake", entry_key, out_dir, [chunk["file"] for chunk in chunks], {"chunks": chunks})
+                baked_count += 1
+                print(f"🎨 Baked {room_id}/{layer_name}: {len(chunks)} chunks")
+            remove_stale_chunks(out_dir, room_id, layer_name, {chunk["file"] for chunk in chunks})
+            room_entry["layers"][layer_name] = {
+                "hash": key,
+                "tiles_sha256": tiles_digest(layer),
+                "chunk_tiles": chunk_tiles,
+                "chunks": chunks,
+            }
+
+    for room_id in set(manifest["rooms"]) - seen_rooms:
+        del manifest["rooms"][room_id]
+
+    write_json(manifest_path, manifest)
+
+    print(f"✅ Bake complete: {baked_count} layers rendered, {restored_count} from the build cache, "
+          f"{cached_count} unchanged")
+    return True
+
+def main():
+    """Bake static layers for all rooms"""
+    force = "--force" in sys.argv
+    if not bake_all_rooms(force=force):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
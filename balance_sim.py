@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""
+Balance Simulator
+Seeded offline encounters over tuning.json, enemies.json and the difficulty multipliers
+
+Each room's encounter comes from its spawn objects: an enemy_spawn is one
+enemy (a 'count' property for more), a group spawns 'count' enemies, and an
+'enemy' property picks the enemies.json id (default brute, the enemy the game
+spawns today). The count is scaled by the difficulty's spawn_rate.
+
+The model is deliberately simple. The player stands at player_spawn and
+shoots the nearest enemy within projectile range (speed x lifetime tiles)
+every attack_cooldown. Enemies walk in at their speed and attack every
+enemy_attack_cooldown once within reach (melee, or projectile range for
+snipers). A ready dash dodges an attack with dodge_chance and then cools
+down for player.dashCooldown. Enemy health, damage and speed are scaled by
+the enemies.* tuning multipliers and the difficulty; player health by the
+difficulty. Killed enemies roll health and ammo drops.
+
+Trials are advanced together in fixed time steps as NumPy arrays shaped
+(trials, enemies), in seeded batches on a process pool, so a run of
+hundreds of thousands of trials takes seconds and the same seed always
+gives the same report. Values the game does not define yet (the player
+weapon is a stub) are the sim.* parameters; any value can be changed with
+--set name=value, or swept with --sweep name=v1,v2,...
+"""
+
+import glob
+import json
+import math
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from room_data import get_object_kind, get_property, iter_objects, load_room
+
+TUNING_PATH = "game-godot/content/tuning.json"
+HUD_TUNING_PATH = "config/tuning.json"
+ENEMIES_PATH = "game-godot/content/enemies.json"
+DIFFICULTY_PATH = "game-godot/systems/DifficultyManager.gd"
+DIFFICULTIES = ("easy", "normal", "hard")
+
+TILE_SIZE = 32
+TIME_STEP = 0.05
+MAX_ENCOUNTER_S = 120.0
+BATCH_TRIALS = 20000
+DEFAULT_ENEMY = "brute"
+MELEE_RANGE_PX = 40.0          # enemy.gd attack_range_px
+RANGED_BEHAVIORS = ("sniper",)
+GROUP_DISTANCE_PX = 320.0      # spawns without a position (groups) start this far away
+SPAWN_JITTER_PX = 16.0
+
+# Not defined by the game yet (Weapon.gd / Blaster.gd are stubs)
+SIM_DEFAULTS = {
+    "sim.player_damage": 10.0,
+    "sim.accuracy": 0.7,
+    "sim.dodge_chance": 0.5,
+}
+
+def _flatten(data, prefix=""):
+    flat = {}
+    for key, value in data.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = float(value)
+    return flat
+
+def load_difficulty_multipliers(path=DIFFICULTY_PATH):
+    """Read DifficultyManager.difficulty_multipliers from the GDScript source"""
+    with open(path, 'r') as f:
+        source = f.read()
+    match = re.search(r'var difficulty_multipliers\s*:?=\s*(\{.*?\n\})', source, re.S)
+    if match is None:
+        raise ValueError(f"difficulty_multipliers not found in {path}")
+    return json.loads(match.group(1))
+
+def load_params(tuning_path=TUNING_PATH, hud_tuning_path=HUD_TUNING_PATH, enemies_path=ENEMIES_PATH):
+    """Flat name -> value dict of every tunable the simulation reads
+
+    tuning.json values keep their dotted path (player.health,
+    drops.healthChance); the cooldowns the TuningHUD loads from
+    config/tuning.json keep their own names; enemy stats are
+    enemy.<id>.<stat>.
+    """
+    params = dict(SIM_DEFAULTS)
+    with open(hud_tuning_path, 'r') as f:
+        params.update(_flatten(json.load(f)))
+    with open(tuning_path, 'r') as f:
+        params.update(_flatten(json.load(f)))
+
+    behaviors = {}
+    with open(enemies_path, 'r') as f:
+        for enemy in json.load(f):
+            params.update(_flatten(enemy.get('stats', {}), f"enemy.{enemy['id']}."))
+            behaviors[enemy['id']] = enemy.get('behavior', '')
+    return params, behaviors
+
+def apply_overrides(params, assignments):
+    """Apply name=value strings; unknown names are an error so typos do not pass silently"""
+    params = dict(params)
+    for assignment in assignments or []:
+        name, _, value = assignment.partition('=')
+        name = name.strip()
+        if name not in params:
+            raise ValueError(f"unknown parameter {name!r} (see --list-params)")
+        params[name] = float(value)
+    return params
+
+def room_spawns(room):
+    """List of (enemy_id, distance_px from player_spawn) for a room's spawn objects"""
+    objects = [obj for _, obj in iter_objects(room)]
+    player = next((obj for obj in objects if get_object_kind(obj) == 'player_spawn'), None)
+    if player is not None:
+        origin = (float(player.get('x', 0)) + float(player.get('width', 0)) / 2,
+                  float(player.get('y', 0)) + float(player.get('height', 0)) / 2)
+    else:
+        origin = (int(room.get('width', 0)) * TILE_SIZE / 2, int(room.get('height', 0)) * TILE_SIZE / 2)
+
+    spawns = []
+    for obj in objects:
+        kind = get_object_kind(obj)
+        if kind not in ('enemy_spawn', 'group'):
+            continue
+        count = int(get_property(obj, 'count', 1 if kind == 'enemy_spawn' else 0) or 0)
+        enemy_id = get_property(obj, 'enemy') or DEFAULT_ENEMY
+        if kind == 'enemy_spawn':
+            distance = math.hypot(float(obj.get('x', 0)) + float(obj.get('width', 0)) / 2 - origin[0],
+                                  float(obj.get('y', 0)) + float(obj.get('height', 0)) / 2 - origin[1])
+        else:
+            distance = GROUP_DISTANCE_PX
+        spawns.extend([(enemy_id, distance)] * count)
+    return spawns
+
+def scale_spawns(spawns, spawn_rate):
+    """Repeat or drop spawns in order to match the difficulty's spawn rate (at least one)"""
+    if not spawns:
+        return []
+    count = max(1, round(len(spawns) * spawn_rate))
+    return [spawns[index % len(spawns)] for index in range(count)]
+
+def build_encounter(spawns, params, behaviors, multipliers):
+    """Per-enemy stat arrays for one encounter at one difficulty"""
+    projectile_range = params["projectiles.speed"] * params["projectiles.lifetime"] * TILE_SIZE
+    spawns = scale_spawns(spawns, multipliers.get("spawn_rate", 1.0))
+
+    stats = {"health": [], "damage": [], "speed": [], "reach": [], "distance": []}
+    for enemy_id, distance in spawns:
+        if f"enemy.{enemy_id}.health" not in params:
+            raise ValueError(f"unknown enemy {enemy_id!r} (not in {ENEMIES_PATH})")
+        stats["health"].append(params[f"enemy.{enemy_id}.health"] * params["enemies.healthMultiplier"]
+                               * multipliers.get("enemy_health", 1.0))
+        stats["damage"].append(params[f"enemy.{enemy_id}.damage"] * params["enemies.damageMultiplier"]
+                               * multipliers.get("enemy_damage", 1.0))
+        stats["speed"].append(params[f"enemy.{enemy_id}.speed"] * multipliers.get("enemy_speed", 1.0))
+        stats["reach"].append(projectile_range if behaviors.get(enemy_id) in RANGED_BEHAVIORS else MELEE_RANGE_PX)
+        stats["distance"].append(distance)
+
+    encounter = {name: np.array(values, dtype=np.float64) for name, values in stats.items()}
+    encounter["enemies"] = [enemy_id for enemy_id, _ in spawns]
+    encounter["player_health"] = params["player.health"] * multipliers.get("player_health", 1.0)
+    encounter["projectile_range"] = projectile_range
+    for name in ("attack_cooldown", "enemy_attack_cooldown", "player.dashCooldown",
+                 "drops.healthChance", "drops.ammoChance", *SIM_DEFAULTS):
+        encounter[name] = params[name]
+    return encounter
+
+def simulate(encounter, trials, rng):
+    """Run trials of one encounter; returns per-trial result arrays
+
+    kill_time is seconds from the start of the encounter to each enemy's
+    death (NaN if it survived) and clear_time the last kill when every
+    enemy died. An encounter still running after MAX_ENCOUNTER_S counts as
+    neither cleared nor a death.
+    """
+    count = len(encounter["health"])
+    health = np.tile(encounter["health"], (trials, 1))
+    distance = np.maximum(encounter["distance"] + rng.uniform(-SPAWN_JITTER_PX, SPAWN_JITTER_PX, (trials, count)), 0.0)
+    speed, reach, damage = encounter["speed"], encounter["reach"], encounter["damage"]
+    enemy_cooldown = encounter["enemy_attack_cooldown"]
+    attack_cooldown = encounter["attack_cooldown"]
+    dash_cooldown = encounter["player.dashCooldown"]
+
+    attack_timer = rng.uniform(0.0, enemy_cooldown, (trials, count))
+    shot_timer = rng.uniform(0.0, attack_cooldown, trials)
+    dash_timer = np.zeros(trials)
+    player_health = np.full(trials, encounter["player_health"])
+    damage_taken = np.zeros(trials)
+    kill_time = np.full((trials, count), np.nan)
+    running = np.ones(trials, dtype=bool)
+    trial_rows = np.arange(trials)
+
+    for step in range(int(MAX_ENCOUNTER_S / TIME_STEP)):
+        now = (step + 1) * TIME_STEP
+        active = (health > 0) & running[:, None]
+
+        # Enemies close in, then attack on their cooldown once within reach
+        closing = active & (distance > reach)
+        distance = np.where(closing, np.maximum(distance - speed * TIME_STEP, reach), distance)
+        engaged = active & ~closing
+        attack_timer = np.where(engaged, attack_timer - TIME_STEP, attack_timer)
+        attacking = engaged & (attack_timer <= 0)
+        if attacking.any():
+            attack_timer = np.where(attacking, attack_timer + enemy_cooldown, attack_timer)
+            incoming = attacking @ damage
+            dodged = (incoming > 0) & (dash_timer <= 0) & (rng.random(trials) < encounter["sim.dodge_chance"])
+            dash_timer = np.where(dodged, dash_cooldown, dash_timer)
+            incoming = np.where(dodged, 0.0, incoming)
+            player_health -= incoming
+            damage_taken += incoming
+        dash_timer -= TIME_STEP
+
+        # The player fires at the nearest living enemy in projectile range,
+        # unless this step's attacks just killed them
+        shot_timer = np.maximum(shot_timer - TIME_STEP, 0.0)
+        target_distance = np.where(active & (distance <= encounter["projectile_range"]), distance, np.inf)
+        target = target_distance.argmin(axis=1)
+        firing = running & (player_health > 0) & (shot_timer <= 0) & np.isfinite(target_distance[trial_rows, target])
+        shot_timer = np.where(firing, attack_cooldown, shot_timer)
+        hits = np.flatnonzero(firing & (rng.random(trials) < encounter["sim.accuracy"]))
+        health[hits, target[hits]] -= encounter["sim.player_damage"]
+
+        killed = (health <= 0) & np.isnan(kill_time)
+        kill_time[killed] = now
+        running &= (player_health > 0) & (health > 0).any(axis=1)
+        if not running.any():
+            break
+
+    killed = ~np.isnan(kill_time)
+    cleared = killed.all(axis=1)
+    return {
+        "kill_time": kill_time.astype(np.float32),
+        "clear_time": np.where(cleared, np.nanmax(kill_time, axis=1, initial=0.0), np.nan).astype(np.float32),
+        "died": player_health <= 0,
+        "damage_taken": damage_taken.astype(np.float32),
+        "health_drops": (killed & (rng.random((trials, count)) < encounter["drops.healthChance"])).sum(axis=1),
+        "ammo_drops": (killed & (rng.random((trials, count)) < encounter["drops.ammoChance"])).sum(axis=1),
+    }
+
+def run_batch(task):
+    """Worker entry point: one seeded batch of trials"""
+    encounter, trials, seed_words = task
+    return simulate(encounter, trials, np.random.default_rng(np.random.SeedSequence(seed_words)))
+
+def _percentiles(values, points=(10, 50, 90)):
+    values = values[~np.isnan(values)]
+    if values.size == 0:
+        return [None] * len(points)
+    return [round(float(value), 2) for value in np.percentile(values, points)]
+
+def _distribution(counts):
+    values, frequencies = np.unique(counts, return_counts=True)
+    return {int(value): round(float(frequency) / counts.size, 4) for value, frequency in zip(values, frequencies)}
+
+def summarize(encounter, results):
+    """Report dict for one encounter from its batch results"""
+    merged = {name: np.concatenate([result[name] for result in results]) for name in results[0]}
+    trials = merged["died"].size
+    time_to_kill = {}
+    for enemy_id in dict.fromkeys(encounter["enemies"]):
+        columns = [index for index, name in enumerate(encounter["enemies"]) if name == enemy_id]
+        time_to_kill[enemy_id] = _percentiles(merged["kill_time"][:, columns].ravel())
+
+    return {
+        "trials": trials,
+        "enemies": len(encounter["enemies"]),
+        "player_health": encounter["player_health"],
+        "death_rate": round(float(merged["died"].mean()), 4),
+        "clear_rate": round(float((~np.isnan(merged["clear_time"])).mean()), 4),
+        "clear_time_s": _percentiles(merged["clear_time"]),
+        "time_to_kill_s": time_to_kill,
+        "damage_taken": _percentiles(merged["damage_taken"]),
+        "damage_taken_mean": round(float(merged["damage_taken"].mean()), 2),
+        "health_drops": _distribution(merged["health_drops"]),
+        "ammo_drops": _distribution(merged["ammo_drops"]),
+    }
+
+def load_encounters(rooms_dir, room_ids=None, custom=None):
+    """Ordered {name: spawns} for the rooms (and an optional custom enemy list) to simulate"""
+    encounters = {}
+    for file_path in sorted(glob.glob(os.path.join(rooms_dir, "*.json"))):
+        room_id = os.path.splitext(os.path.basename(file_path))[0]
+        if room_ids and room_id not in room_ids:
+            continue
+        spawns = room_spawns(load_room(file_path))
+        if spawns:
+            encounters[room_id] = spawns
+    if custom:
+        encounters["custom"] = [(enemy_id.strip(), GROUP_DISTANCE_PX) for enemy_id in custom.split(',') if enemy_id.strip()]
+    return encounters
+
+def run_simulation(encounters, params, behaviors, multipliers, difficulties=DIFFICULTIES,
+                   trials=100000, seed=0, workers=None):
+    """{encounter: {difficulty: summary}} for every encounter and difficulty"""
+    jobs = []
+    tasks = []
+    for encounter_index, (name, spawns) in enumerate(encounters.items()):
+        for difficulty_index, difficulty in enumerate(difficulties):
+            encounter = build_encounter(spawns, params, behaviors, multipliers[difficulty])
+            batches = []
+            for batch_index, start in enumerate(range(0, trials, BATCH_TRIALS)):
+                batches.append(len(tasks))
+                tasks.append((encounter, min(BATCH_TRIALS, trials - start),
+                              [seed, encounter_index, difficulty_index, batch_index]))
+            jobs.append((name, difficulty, encounter, batches))
+
+    if workers == 1 or len(tasks) < 2:
+        results = [run_batch(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(run_batch, tasks))
+
+    report = {}
+    for name, difficulty, encounter, batches in jobs:
+        report.setdefault(name, {})[difficulty] = summarize(encounter, [results[index] for index in batches])
+    return report
+
+def _format_range(values, unit=""):
+    if values[0] is None:
+        return "-"
+    return f"{values[1]:g}{unit} ({values[0]:g}-{values[2]:g})"
+
+def print_report(report, encounters):
+    for name, by_difficulty in report.items():
+        counts = {}
+        for enemy_id, _ in encounters[name]:
+            counts[enemy_id] = counts.get(enemy_id, 0) + 1
+        print(f"\n{name}: " + ", ".join(f"{count}x {enemy_id}" for enemy_id, count in counts.items()))
+        print(f"  {'difficulty':<10} {'enemies':>7} {'deaths':>7} {'cleared':>7}  {'clear time p50 (p10-p90)':<26} "
+              f"{'damage taken p50 (p10-p90)':<28} {'health drops':>12} {'ammo drops':>10}")
+        for difficulty, summary in by_difficulty.items():
+            health_drops = sum(count * share for count, share in summary["health_drops"].items())
+            ammo_drops = sum(count * share for count, share in summary["ammo_drops"].items())
+            print(f"  {difficulty:<10} {summary['enemies']:>7} {summary['death_rate']:>7.1%} {summary['clear_rate']:>7.1%}  "
+                  f"{_format_range(summary['clear_time_s'], 's'):<26} "
+                  f"{_format_range(summary['damage_taken']) + ' / ' + format(summary['player_health'], 'g'):<28} "
+                  f"{health_drops:>12.2f} {ammo_drops:>10.2f}")
+            for enemy_id, values in summary["time_to_kill_s"].items():
+                print(f"  {'':<10} time to kill {enemy_id}: {_format_range(values, 's')}")
+
+def balance_sim(rooms_dir="game-godot/data/rooms", room_ids=None, custom=None, difficulties=DIFFICULTIES,
+                trials=100000, seed=0, workers=None, overrides=None, sweep=None, json_path=None):
+    """Simulate every room with spawns at each difficulty; prints (and optionally saves) the report"""
+    try:
+        params, behaviors = load_params()
+        params = apply_overrides(params, overrides)
+        multipliers = load_difficulty_multipliers()
+        unknown = [difficulty for difficulty in difficulties if difficulty not in multipliers]
+        if unknown:
+            raise ValueError(f"unknown difficulty {', '.join(unknown)} (have {', '.join(multipliers)})")
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        return False
+
+    encounters = load_encounters(rooms_dir, room_ids, custom)
+    if not encounters:
+        print(f"❌ No rooms with enemy spawns in {rooms_dir} (use --encounter to simulate a custom one)")
+        return False
+
+    variants = [(None, params)]
+    if sweep:
+        name, _, values = sweep.partition('=')
+        try:
+            variants = [(f"{name}={value}", apply_overrides(params, [f"{name}={value}"]))
+                        for value in values.split(',') if value.strip()]
+        except ValueError as e:
+            print(f"❌ {e}")
+            return False
+
+    start = time.time()
+    full_report = {}
+    for label, variant_params in variants:
+        if label:
+            print(f"\n=== {label} ===")
+        try:
+            report = run_simulation(encounters, variant_params, behaviors, multipliers, difficulties,
+                                    trials, seed, workers)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return False
+        print_report(report, encounters)
+        full_report[label or "base"] = report
+
+    total = len(variants) * len(encounters) * len(difficulties) * trials
+    print(f"\n✅ Simulated {total:,} encounters in {time.time() - start:.1f}s (seed {seed})")
+
+    if json_path:
+        with open(json_path, 'w') as f:
+            json.dump({"seed": seed, "trials": trials, "params": params, "report": full_report}, f, indent=2)
+        print(f"📝 Report written to {json_path}")
+    return True
+
+def main():
+    """Simulate all rooms with the current tuning"""
+    if not balance_sim():
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Build Cache
+Content-addressed cache of tool outputs, shared by every checkout on the machine
+
+Tools key an output by a hash of its inputs (file contents), the tool's
+own source code and its options. On a hit the stored files are put back in
+place instead of being rebuilt, so switching branches or working in a
+second checkout does not redo conversions and bakes whose inputs were
+already built somewhere.
+
+    DUNJON_CACHE_DIR    cache location (default ~/.cache/dunjon, or $XDG_CACHE_HOME/dunjon)
+    DUNJON_CACHE_SIZE   size cap, e.g. 500M or 2G (default 1G)
+    DUNJON_CACHE_MODE   copy (default) or hardlink
+    DUNJON_CACHE=0      disable the cache
+
+Layout: entries/<ab>/<key>/entry.json lists the entry's files (stored
+under files/) and any metadata the tool wants back on a hit. An entry is
+written to a temp directory and renamed into place, so readers never see a
+partial one. Each hit touches entry.json; trim() evicts the least recently
+used entries until the cache is under 90% of the cap. Hit, miss and store
+counts per tool accumulate in stats.json.
+
+Hardlinked outputs share their inode with the cache. A tool that rewrote
+such a file in place would change the cached copy too, so every entry
+records its files' size and mtime and an entry that no longer matches is
+dropped instead of restored.
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+import uuid
+
+from tool_lock import FileLock
+
+CACHE_VERSION = 1
+DEFAULT_MAX_BYTES = 1 << 30
+TRIM_TARGET = 0.9
+MODES = ("copy", "hardlink")
+
+_SIZE_UNITS = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+
+def parse_size(text):
+    """Bytes for a size like 1048576, 500M or 2G"""
+    text = str(text).strip().upper().rstrip('B').rstrip('I')
+    unit = text[-1:] if text[-1:] in _SIZE_UNITS and not text[-1:].isdigit() else ""
+    return int(float(text[:len(text) - len(unit)]) * _SIZE_UNITS[unit])
+
+def format_size(size):
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if size < 1024 or unit == "GiB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+def default_cache_dir():
+    if os.environ.get("DUNJON_CACHE_DIR"):
+        return os.path.expanduser(os.environ["DUNJON_CACHE_DIR"])
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "dunjon")
+
+_digests = {}
+
+def file_digest(path):
+    """sha256 of a file's bytes, memoised per process by size and mtime"""
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    digest = _digests.get(memo_key)
+    if digest is None:
+        hasher = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 16), b''):
+                hasher.update(block)
+        digest = _digests[memo_key] = hasher.hexdigest()
+    return digest
+
+def source_version(*module_names):
+    """Hash of the given modules' source files: any code change gives new keys"""
+    hasher = hashlib.sha256()
+    for name in module_names:
+        module = sys.modules.get(name) or __import__(name)
+        hasher.update(file_digest(module.__file__).encode())
+    return hasher.hexdigest()[:16]
+
+def cache_key(tool, version, options=None, files=(), outputs=()):
+    """Key for one build step: tool, version, options, input file contents and output names"""
+    hasher = hashlib.sha256()
+    hasher.update(json.dumps([CACHE_VERSION, tool, version, options, sorted(outputs)],
+                             sort_keys=True, default=str).encode())
+    for path in files:
+        hasher.update(b'\0' + file_digest(path).encode())
+    return hasher.hexdigest()
+
+class BuildCache:
+    """One cache directory; safe to share between processes and checkouts"""
+
+    def __init__(self, root=None, max_bytes=None, mode=None):
+        self.root = root or default_cache_dir()
+        self.max_bytes = max_bytes if max_bytes is not None else parse_size(
+            os.environ.get("DUNJON_CACHE_SIZE", DEFAULT_MAX_BYTES))
+        self.mode = mode or os.environ.get("DUNJON_CACHE_MODE", "copy")
+        if self.mode not in MODES:
+            raise ValueError(f"DUNJON_CACHE_MODE must be one of {', '.join(MODES)}, got {self.mode!r}")
+        self.entries_dir = os.path.join(self.root, "entries")
+        self.tmp_dir = os.path.join(self.root, "tmp")
+        self.locks_dir = os.path.join(self.root, "locks")
+        self.stats_path = os.path.join(self.root, "stats.json")
+        self.counts = {}  # tool -> {"hits": n, "misses": n, "stores": n}
+        self.stored_since_trim = 0
+        self.lock = threading.Lock()
+
+    def entry_dir(self, key):
+        return os.path.join(self.entries_dir, key[:2], key)
+
+    def _count(self, tool, event, amount=1):
+        with self.lock:
+            tool_counts = self.counts.setdefault(tool, {"hits": 0, "misses": 0, "stores": 0})
+            tool_counts[event] += amount
+
+    def _read_entry(self, key):
+        try:
+            with open(os.path.join(self.entry_dir(key), "entry.json"), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def restore(self, tool, key, base_dir):
+        """Put a cached entry's files under base_dir; returns its metadata dict, or None on a miss"""
+        entry = self._read_entry(key)
+        if entry is None:
+            self._count(tool, "misses")
+            return None
+
+        files_dir = os.path.join(self.entry_dir(key), "files")
+        for item in entry["files"]:
+            try:
+                stat = os.stat(os.path.join(files_dir, item["path"]))
+            except OSError:
+                stat = None
+            if stat is None or stat.st_size != item["size"] or stat.st_mtime_ns != item["mtime_ns"]:
+                # Missing, or modified through a hardlink: never hand out a damaged entry
+                self.remove(key)
+                self._count(tool, "misses")
+                return None
+
+        try:
+            for item in entry["files"]:
+                self._place(os.path.join(files_dir, item["path"]), os.path.join(base_dir, item["path"]))
+            os.utime(os.path.join(self.entry_dir(key), "entry.json"))
+        except OSError:
+            self._count(tool, "misses")
+            return None  # e.g. evicted by another process mid-restore
+        self._count(tool, "hits")
+        return entry.get("meta") or {}
+
+    def _place(self, source, dest):
+        directory = os.path.dirname(dest)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if os.path.exists(dest) and os.path.samefile(source, dest):
+            return
+        temp = f"{dest}.{os.getpid()}.{threading.get_ident()}.cache"
+        try:
+            if self.mode == "hardlink":
+                try:
+                    os.link(source, temp)
+                except OSError:
+                    shutil.copyfile(source, temp)  # other filesystem, or no hardlink support
+            else:
+                shutil.copyfile(source, temp)
+            os.replace(temp, dest)
+        finally:
+            if os.path.exists(temp):
+                os.remove(temp)
+
+    def store(self, tool, key, base_dir, paths, meta=None):
+        """Cache the files at base_dir/<path> under key; returns True if a new entry was added"""
+        final_dir = self.entry_dir(key)
+        if os.path.exists(os.path.join(final_dir, "entry.json")):
+            return False
+
+        staging = os.path.join(self.tmp_dir, f"{os.getpid()}-{uuid.uuid4().hex}")
+        try:
+            files = []
+            for path in paths:
+                stored = os.path.join(staging, "files", path)
+                os.makedirs(os.path.dirname(stored), exist_ok=True)
+                shutil.copyfile(os.path.join(base_dir, path), stored)
+                stat = os.stat(stored)
+                files.append({"path": path, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns})
+            with open(os.path.join(staging, "entry.json"), 'w') as f:
+                json.dump({"tool": tool, "created": time.time(), "files": files, "meta": meta}, f)
+
+            os.makedirs(os.path.dirname(final_dir), exist_ok=True)
+            try:
+                os.rename(staging, final_dir)
+            except OSError:
+                return False  # another process stored the same key first
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+        self._count(tool, "stores")
+        with self.lock:
+            self.stored_since_trim += sum(item["size"] for item in files)
+        return True
+
+    def remove(self, key):
+        """Delete one entry (renamed away first so readers never see it half-deleted)"""
+        doomed = os.path.join(self.tmp_dir, f"evict-{os.getpid()}-{uuid.uuid4().hex}")
+        try:
+            os.makedirs(self.tmp_dir, exist_ok=True)
+            os.rename(self.entry_dir(key), doomed)
+        except OSError:
+            return False
+        shutil.rmtree(doomed, ignore_errors=True)
+        return True
+
+    def scan(self):
+        """[(last_used, bytes, key)] for every entry"""
+        entries = []
+        if not os.path.isdir(self.entries_dir):
+            return entries
+        for shard in os.scandir(self.entries_dir):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                try:
+                    last_used = os.stat(os.path.join(entry.path, "entry.json")).st_mtime
+                except OSError:
+                    continue
+                size = 0
+                for directory, _, names in os.walk(entry.path):
+                    for name in names:
+                        try:
+                            size += os.path.getsize(os.path.join(directory, name))
+                        except OSError:
+                            pass
+                entries.append((last_used, size, entry.name))
+        return entries
+
+    def trim(self, max_bytes=None):
+        """Evict least recently used entries until under TRIM_TARGET of the cap; returns (entries, bytes) removed"""
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        with FileLock(os.path.join(self.root, "trim"), locks_dir=self.locks_dir):
+            entries = sorted(self.scan())
+            total = sum(size for _, size, _ in entries)
+            if total <= max_bytes:
+                return 0, 0
+            removed = freed = 0
+            for _, size, key in entries:
+                if total - freed <= max_bytes * TRIM_TARGET:
+                    break
+                if self.remove(key):
+                    removed += 1
+                    freed += size
+        self._update_stats({}, removed)
+        return removed, freed
+
+    def _update_stats(self, counts, evictions=0):
+        os.makedirs(self.root, exist_ok=True)
+        with FileLock(self.stats_path, locks_dir=self.locks_dir):
+            stats = self.read_stats()
+            for tool, tool_counts in counts.items():
+                totals = stats["tools"].setdefault(tool, {"hits": 0, "misses": 0, "stores": 0})
+                for event, amount in tool_counts.items():
+                    totals[event] = totals.get(event, 0) + amount
+            stats["evictions"] += evictions
+            temp = f"{self.stats_path}.{os.getpid()}.tmp"
+            with open(temp, 'w') as f:
+                json.dump(stats, f, indent=2)
+            os.replace(temp, self.stats_path)
+
+    def read_stats(self):
+        try:
+            with open(self.stats_path, 'r') as f:
+                stats = json.load(f)
+        except (OSError, ValueError):
+            stats = {}
+        stats.setdefault("tools", {})
+        stats.setdefault("evictions", 0)
+        return stats
+
+    def flush(self):
+        """Add this process's counts to stats.json and trim if anything was stored"""
+        with self.lock:
+            counts, self.counts = self.counts, {}
+            stored, self.stored_since_trim = self.stored_since_trim, 0
+        if counts:
+            self._update_stats(counts)
+        if stored:
+            self.trim()
+
+    def clear(self):
+        """Delete every entry and the statistics"""
+        for _, _, key in self.scan():
+            self.remove(key)
+        if os.path.exists(self.stats_path):
+            os.remove(self.stats_path)
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_build_cache():
+    """The process's shared BuildCache, or None when DUNJON_CACHE=0"""
+    global _cache
+    if os.environ.get("DUNJON_CACHE", "1") == "0":
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = BuildCache()
+            atexit.register(_cache.flush)
+    return _cache
+
+def print_stats(cache):
+    """Print the cache's location, size and hit rate per tool"""
+    entries = cache.scan()
+    total = sum(size for _, size, _ in entries)
+    stats = cache.read_stats()
+    print(f"Build cache: {cache.root} ({cache.mode})")
+    print(f"  {len(entries)} entries, {format_size(total)} of {format_size(cache.max_bytes)}, "
+          f"{stats['evictions']} evicted so far")
+    if not stats["tools"]:
+        return
+    print(f"{'tool':<12} {'hits':>8} {'misses':>8} {'stores':>8} {'hit rate':>9}")
+    for tool, counts in sorted(stats["tools"].items()):
+        lookups = counts.get("hits", 0) + counts.get("misses", 0)
+        rate = f"{counts.get('hits', 0) * 100 / lookups:.0f}%" if lookups else "-"
+        print(f"{tool:<12} {counts.get('hits', 0):>8} {counts.get('misses', 0):>8} "
+              f"{counts.get('stores', 0):>8} {rate:>9}")
+
+def main():
+    """Show cache statistics"""
+    print_stats(BuildCache())
+
+if __name__ == "__main__":
+    main()
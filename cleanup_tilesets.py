@@ -8,14 +8,19 @@ import os
 import xml.etree.ElementTree as ET
 from pathlib import Path
 
+from export_trace import stage, traced_file
+
+@traced_file("cleanup_tmx")
 def cleanup_tmx_file(tmx_file):
     """Clean up a single TMX file to use only Dunjon Tiles"""
     print(f"Cleaning up {tmx_file.name}...")
     
     try:
         # Parse TMX file
+        stage("parse")
         tree = ET.parse(tmx_file)
         root = tree.getroot()
+        stage("transform")
         
         # Find all tileset elements
         tilesets = root.findall('tileset')
@@ -50,6 +55,7 @@ def cleanup_tmx_file(tmx_file):
             print(f"  Added Dunjon Tiles tileset")
         
         # Write the cleaned TMX file
+        stage("write")
         tree.write(tmx_file, encoding='utf-8', xml_declaration=True)
         
         print(f"✅ Cleaned up {tmx_file.name}")
@@ -88,8 +94,10 @@ def cleanup_all_tmx_files():
     
     if success_count == len(tmx_files):
         print("🎉 All TMX files now use only Dunjon Tiles!")
-    else:
-        print("❌ Some files failed to clean up. Check the error messages above.")
+        return True
+    
+    print("❌ Some files failed to clean up. Check the error messages above.")
+    return False
 
 def main():
     """Main function"""
@@ -98,7 +106,7 @@ def main():
     print("Removing Dungeon_wall references and ensuring Dunjon Tiles usage")
     print()
     
-    cleanup_all_tmx_files()
+    return cleanup_all_tmx_files()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Digest Log Diff
+Finds the first frame where two DigestManager logs diverge
+
+Both logs are streamed in lockstep and hashed in windows of WINDOW_FRAMES
+lines; only the current window's line offsets are kept, so memory stays
+constant however long the logs are. When a window's hashes differ, the tool
+bisects inside it by re-seeking to the recorded offsets and hashing halves,
+then parses just the divergent frame from both files and prints a structural
+diff of its state.
+
+Lines that differ only in formatting (e.g. key order) parse to the same
+state; they are reported as such and the scan continues. A divergent line
+that is not valid JSON (a log truncated by a crash, a corrupt write) is
+the divergence point: it is reported with its file and line number.
+"""
+
+import hashlib
+import json
+import sys
+import time
+
+WINDOW_FRAMES = 256
+
+MAX_REPORTED_DIFFERENCES = 50
+
+def _line_key(line):
+    """Bytes used for hashing: the line without its line ending"""
+    return line.rstrip(b'\r\n')
+
+def _read_window(file, window_frames):
+    """Read up to window_frames non-empty lines; return (offsets, digest)"""
+    offsets = []
+    digest = hashlib.blake2b(digest_size=16)
+    while len(offsets) < window_frames:
+        offset = file.tell()
+        line = file.readline()
+        if not line:
+            break
+        key = _line_key(line)
+        if not key.strip():
+            continue
+        offsets.append(offset)
+        digest.update(key)
+        digest.update(b'\n')
+    return offsets, digest.digest()
+
+def _hash_lines(file, offsets, start, stop):
+    """Hash lines offsets[start:stop] by seeking to the first and reading forward"""
+    digest = hashlib.blake2b(digest_size=16)
+    if start >= stop:
+        return digest.digest()
+    file.seek(offsets[start])
+    remaining = stop - start
+    while remaining:
+        key = _line_key(file.readline())
+        if not key.strip():
+            continue
+        digest.update(key)
+        digest.update(b'\n')
+        remaining -= 1
+    return digest.digest()
+
+def _read_line_at(file, offset):
+    file.seek(offset)
+    return _line_key(file.readline())
+
+def _file_line_number(file, offset):
+    """1-based line number of the line starting at offset (blank lines included)"""
+    file.seek(0)
+    newlines = 0
+    remaining = offset
+    while remaining:
+        block = file.read(min(remaining, 1 << 16))
+        if not block:
+            break
+        newlines += block.count(b'\n')
+        remaining -= len(block)
+    return newlines + 1
+
+def _parse_record(line):
+    """The record on a log line, or None if it is not a JSON object (corrupt or truncated)"""
+    try:
+        record = json.loads(line)
+    except ValueError:  # JSONDecodeError, or UnicodeDecodeError for garbage bytes
+        return None
+    return record if isinstance(record, dict) else None
+
+def _corrupt_line(path, file, offset):
+    return f"{path} line {_file_line_number(file, offset)}: not a valid JSON record (corrupt or truncated)"
+
+def _bisect_window(file_a, offsets_a, file_b, offsets_b):
+    """Index of the first differing line within two windows that hash differently"""
+    common = min(len(offsets_a), len(offsets_b))
+    low = 0
+    high = common
+    # Invariant: lines before low match; the first mismatch (if any) is in [low, high)
+    while high - low > 1:
+        middle = (low + high) // 2
+        if _hash_lines(file_a, offsets_a, low, middle) == _hash_lines(file_b, offsets_b, low, middle):
+            low = middle
+        else:
+            high = middle
+    if low < common and _read_line_at(file_a, offsets_a[low]) == _read_line_at(file_b, offsets_b[low]):
+        # Every common line matches: one window simply ran out of lines
+        return common
+    return low
+
+def structural_diff(a, b, path="state", out=None, limit=MAX_REPORTED_DIFFERENCES):
+    """List "path: a != b" strings for every differing leaf (up to limit)"""
+    out = [] if out is None else out
+    if len(out) >= limit:
+        return out
+
+    if isinstance(a, dict) and isinstance(b, dict):
+        for key in list(a) + [key for key in b if key not in a]:
+            child = f"{path}.{key}"
+            if key not in b:
+                out.append(f"{child}: {json.dumps(a[key])} != <missing>")
+            elif key not in a:
+                out.append(f"{child}: <missing> != {json.dumps(b[key])}")
+            else:
+                structural_diff(a[key], b[key], child, out, limit)
+            if len(out) >= limit:
+                break
+    elif isinstance(a, list) and isinstance(b, list):
+        for i in range(max(len(a), len(b))):
+            child = f"{path}[{i}]"
+            if i >= len(b):
+                out.append(f"{child}: {json.dumps(a[i])} != <missing>")
+            elif i >= len(a):
+                out.append(f"{child}: <missing> != {json.dumps(b[i])}")
+            else:
+                structural_diff(a[i], b[i], child, out, limit)
+            if len(out) >= limit:
+                break
+    elif a != b or type(a) is not type(b):
+        out.append(f"{path}: {json.dumps(a)} != {json.dumps(b)}")
+    return out
+
+def find_divergence(log_a, log_b, window_frames=WINDOW_FRAMES):
+    """Return None if the logs match, else a dict describing the first divergent frame"""
+    with open(log_a, 'rb') as file_a, open(log_b, 'rb') as file_b:
+        line_number = 0
+        position_a = 0
+        position_b = 0
+        formatting_only = 0
+        while True:
+            file_a.seek(position_a)
+            file_b.seek(position_b)
+            offsets_a, digest_a = _read_window(file_a, window_frames)
+            offsets_b, digest_b = _read_window(file_b, window_frames)
+            next_a, next_b = file_a.tell(), file_b.tell()
+            if not offsets_a and not offsets_b:
+                return {"identical": True, "frames": line_number, "formatting_only": formatting_only}
+
+            if digest_a == digest_b:
+                line_number += len(offsets_a)
+                position_a, position_b = next_a, next_b
+                continue
+
+            index = _bisect_window(file_a, offsets_a, file_b, offsets_b)
+            if index >= min(len(offsets_a), len(offsets_b)):
+                shorter = log_a if len(offsets_a) < len(offsets_b) else log_b
+                longer_offsets, longer_file = (offsets_b, file_b) if shorter == log_a else (offsets_a, file_a)
+                longer = log_b if shorter == log_a else log_a
+                record = _parse_record(_read_line_at(longer_file, longer_offsets[index]))
+                return {
+                    "identical": False,
+                    "line": line_number + index,
+                    "frame": record.get("frame") if record else None,
+                    "ended": shorter,
+                    "differences": [] if record else [_corrupt_line(longer, longer_file, longer_offsets[index])],
+                }
+
+            record_a = _parse_record(_read_line_at(file_a, offsets_a[index]))
+            record_b = _parse_record(_read_line_at(file_b, offsets_b[index]))
+            if record_a is None or record_b is None:
+                return {
+                    "identical": False,
+                    "line": line_number + index,
+                    "frame": (record_a or record_b or {}).get("frame"),
+                    "ended": None,
+                    "differences": [_corrupt_line(path, file, offsets[index])
+                                    for path, file, offsets, record in ((log_a, file_a, offsets_a, record_a),
+                                                                         (log_b, file_b, offsets_b, record_b))
+                                    if record is None],
+                }
+
+            differences = structural_diff(record_a.get("state"), record_b.get("state"))
+            if record_a.get("frame") != record_b.get("frame"):
+                differences.insert(0, f"frame: {record_a.get('frame')} != {record_b.get('frame')}")
+            if differences:
+                return {
+                    "identical": False,
+                    "line": line_number + index,
+                    "frame": record_a.get("frame"),
+                    "ended": None,
+                    "differences": differences,
+                }
+
+            # Same state, different bytes: resume right after this line
+            formatting_only += 1
+            line_number += index + 1
+            file_a.seek(offsets_a[index])
+            file_a.readline()
+            file_b.seek(offsets_b[index])
+            file_b.readline()
+            position_a, position_b = file_a.tell(), file_b.tell()
+
+def diff_digest_logs(log_a, log_b, window_frames=WINDOW_FRAMES):
+    """Compare two digest logs and print the result; returns True if they match"""
+    start = time.perf_counter()
+    result = find_divergence(log_a, log_b, window_frames)
+    elapsed = time.perf_counter() - start
+
+    if result["identical"]:
+        print(f"✅ Logs match: {result['frames']} frames compared in {elapsed:.2f} s")
+        if result["formatting_only"]:
+            print(f"⚠️  {result['formatting_only']} frames differ only in formatting")
+        return True
+
+    frame = "?" if result["frame"] is None else result["frame"]
+    if result["ended"]:
+        print(f"❌ {result['ended']} ends early: first missing frame is {frame} "
+              f"(line {result['line'] + 1})")
+    else:
+        print(f"❌ First divergence at frame {frame} (line {result['line'] + 1}), "
+              f"found in {elapsed:.2f} s")
+    for difference in result["differences"]:
+        print(f"   {difference}")
+    if len(result["differences"]) >= MAX_REPORTED_DIFFERENCES:
+        print(f"   ... (showing the first {MAX_REPORTED_DIFFERENCES} differences)")
+    return False
+
+def main():
+    """Compare two digest logs given on the command line"""
+    if len(sys.argv) < 3:
+        print("Usage: python digest_diff.py <digest_a.jsonl> <digest_b.jsonl> [window_frames]")
+        sys.exit(1)
+
+    window_frames = int(sys.argv[3]) if len(sys.argv) > 3 else WINDOW_FRAMES
+    if not diff_digest_logs(sys.argv[1], sys.argv[2], window_frames):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
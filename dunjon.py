@@ -0,0 +1,533 @@
+#!/usr/bin/env python3
+"""
+Dunjon Tools
+Single entry point for the Tiled -> Godot content pipeline scripts
+
+Usage: python dunjon.py [--profile-startup] [--trace PATH] [--profile] <command> [options]
+
+Each command imports its implementation (and any heavy dependency such as
+watchdog or PIL) only when it runs, so cheap commands like validate stay fast.
+"""
+
+import sys
+import time
+
+_PROCESS_START = time.perf_counter()
+
+class ImportProfiler:
+    """Records how long each module import takes (self and cumulative time)"""
+
+    def __init__(self):
+        self.timings = []
+        self._stack = []
+        self._original_import = None
+
+    def install(self):
+        """Start timing imports by wrapping builtins.__import__"""
+        import builtins
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+
+    def uninstall(self):
+        """Restore the original import function"""
+        import builtins
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        # Already-loaded modules and relative imports cost nothing worth reporting
+        if level or name in sys.modules:
+            return self._original_import(name, globals, locals, fromlist, level)
+
+        self._stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += elapsed
+            self.timings.append((name, elapsed - children, elapsed))
+
+    def report(self, startup_s, command_s, limit=25):
+        """Print the slowest imports, startup time and command run time"""
+        total_self = sum(self_s for _, self_s, _ in self.timings)
+        print()
+        print("Startup profile")
+        print("=" * 50)
+        print(f"{'module':<32} {'self ms':>8} {'cum ms':>8}")
+        for name, self_s, cumulative_s in sorted(self.timings, key=lambda t: t[1], reverse=True)[:limit]:
+            print(f"{name:<32} {self_s * 1000:>8.2f} {cumulative_s * 1000:>8.2f}")
+        print("-" * 50)
+        print(f"{len(self.timings)} modules imported, {total_self * 1000:.2f} ms in imports")
+        print(f"Startup (script start to command start): {startup_s * 1000:.2f} ms")
+        print(f"Command run time (including lazy imports): {command_s * 1000:.2f} ms")
+
+def cmd_convert(args):
+    """Convert all TMX files in tiles/ to room JSON"""
+    import tiled_workflow
+    return tiled_workflow.convert_all_tmx_files(handoff=not args.local)
+
+def cmd_validate(args):
+    """Validate room JSON (and optionally TMX) files"""
+    import validate_rooms
+    is_valid = validate_rooms.validate_all_rooms(args.rooms_dir)
+
+    if args.tmx:
+        import validate_tmx_files
+        print()
+        is_valid = validate_tmx_files.validate_all_tmx_files(args.tiles_dir) and is_valid
+
+    if args.semantic:
+        import room_semantics
+        print()
+        is_valid = room_semantics.check_all_rooms(args.rooms_dir, args.workers) and is_valid
+
+    return is_valid
+
+def cmd_watch(args):
+    """Run the TMX <-> JSON auto-export watcher"""
+    import auto_export_tiles
+    auto_export_tiles.main()
+    return True
+
+def cmd_atlas(args):
+    """Rebuild the Dunjon Tiles atlas image"""
+    import importlib.util
+    import os
+
+    script_path = os.path.join(args.tiles_dir, "create_dunjon_tileset.py")
+    spec = importlib.util.spec_from_file_location("create_dunjon_tileset", script_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.create_dunjon_tileset(args.tiles_dir)
+
+def cmd_migrate(args):
+    """Run a one-off content migration"""
+    if args.step == "tiles-32":
+        import update_rooms_to_32x32
+        update_rooms_to_32x32.main()
+        return True
+    if args.step == "cleanup-tilesets":
+        import cleanup_tilesets
+        return cleanup_tilesets.main()
+    if args.step == "json-to-tmx":
+        import json_to_tmx
+        return json_to_tmx.convert_all_json_to_tmx(handoff=not args.local)
+    return False
+
+def cmd_visibility(args):
+    """Precompute per-room line-of-sight tables from Collision"""
+    import room_visibility
+    return room_visibility.build_all_visibility(args.rooms_dir, args.out_dir, args.workers, args.max_matrix_tiles)
+
+def cmd_bake(args):
+    """Bake static tile layers into per-room PNG chunks"""
+    import bake_layers
+    return bake_layers.bake_all_rooms(args.rooms_dir, args.out_dir, args.atlas, tuple(args.layers),
+                                      args.chunk_tiles, args.force)
+
+def cmd_minimap(args):
+    """Render every room into one world minimap atlas"""
+    import minimap_atlas
+    return minimap_atlas.build_minimap(args.rooms_dir, args.out_dir, args.tsx, args.pixels_per_tile)
+
+def cmd_recording(args):
+    """Convert, verify and inspect binary input recordings (.djrec)"""
+    import os
+    import recording_codec
+
+    if args.action == "encode":
+        out_path = args.out or os.path.splitext(args.path)[0] + ".djrec"
+        frames = recording_codec.jsonl_to_recording(args.path, out_path)
+        print(f"✅ {args.path} -> {out_path}: {frames} frames, "
+              f"{os.path.getsize(args.path)} -> {os.path.getsize(out_path)} bytes")
+    elif args.action == "decode":
+        out_path = args.out or os.path.splitext(args.path)[0] + ".jsonl"
+        frames = recording_codec.recording_to_jsonl(args.path, out_path)
+        print(f"✅ {args.path} -> {out_path}: {frames} frames")
+    elif args.action == "verify":
+        problems = recording_codec.verify_recording(args.path, args.out)
+        for problem in problems:
+            print(f"❌ {problem}")
+        if problems:
+            return False
+        print(f"✅ {args.path} is valid")
+    elif args.action == "info":
+        for key, value in recording_codec.recording_info(args.path).items():
+            print(f"{key}: {value}")
+    else:
+        import json
+        with recording_codec.RecordingReader(args.path) as reader:
+            for count, record in enumerate(reader.frames(args.start)):
+                if count >= args.count:
+                    break
+                print(json.dumps(record))
+    return True
+
+def cmd_digest_diff(args):
+    """Find the first frame where two digest logs diverge"""
+    import digest_diff
+    return digest_diff.diff_digest_logs(args.log_a, args.log_b, args.window)
+
+def shard_spec(text):
+    """argparse type for --shard: "I/N" (1-based) -> (zero-based index, count)"""
+    import argparse
+    try:
+        index, count = (int(part) for part in text.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{text!r} is not of the form I/N, e.g. 2/4") from None
+    if not 0 <= index - 1 < count:
+        raise argparse.ArgumentTypeError(f"shard {text!r} is out of range; I must be between 1 and N")
+    return index - 1, count
+
+def cmd_replay(args):
+    """Run a directory of recordings through the game in parallel"""
+    import replay_harness
+    shard_index, shard_count = args.shard
+    return replay_harness.run_harness(args.recordings_dir, args.runner, args.workers, args.timeout, args.retries,
+                                      args.fail_fast, shard_index, shard_count, args.report, args.baseline)
+
+def cmd_locks(args):
+    """Show running tool instances and queued watcher jobs"""
+    import tool_lock
+    tool_lock.main()
+    return True
+
+def cmd_listen(args):
+    """Print the watcher's hot-reload notifications (reference client)"""
+    import hot_reload
+    return hot_reload.listen(args.host, args.port)
+
+def cmd_pack(args):
+    """Export rooms with identical layers stored once (content-addressed layer store)"""
+    import layer_store
+    if not layer_store.pack_rooms(args.rooms_dir, args.out_dir, args.json_profile):
+        return False
+    return layer_store.verify_packed_rooms(args.rooms_dir, args.out_dir) if args.verify else True
+
+def cmd_export(args):
+    """Parse each TMX once and write every target in tiles/export_settings.json"""
+    import export_targets
+    return export_targets.export_all(args.tiles_dir, args.settings, args.target, args.workers)
+
+def cmd_sprites(args):
+    """Pack character animation frames into trimmed, deduplicated sprite sheets"""
+    import sprite_packer
+    frame_size = (args.frame_size, args.frame_size) if args.frame_size else None
+    return sprite_packer.pack_all_sprites(args.dirs or sprite_packer.DEFAULT_SOURCE_DIRS, args.out_dir,
+                                          frame_size, args.workers, args.force)
+
+def cmd_verify_conversions(args):
+    """Differential fuzzing: optimised converters against their reference paths"""
+    import verify_conversions
+    if args.replay:
+        return all([verify_conversions.replay(path) for path in args.replay])
+    return verify_conversions.verify_conversions(args.cases, args.seed, args.workers, args.check, args.max_size)
+
+def cmd_balance(args):
+    """Simulate room encounters per difficulty from tuning.json and enemies.json (needs numpy)"""
+    import balance_sim
+    if args.list_params:
+        params, _ = balance_sim.load_params()
+        for name, value in params.items():
+            print(f"{name} = {value:g}")
+        return True
+    return balance_sim.balance_sim(args.rooms_dir, args.room, args.encounter, args.difficulty or balance_sim.DIFFICULTIES,
+                                   args.trials, args.seed, args.workers, args.set, args.sweep, args.json)
+
+def cmd_save(args):
+    """Convert, inspect, upgrade and validate save files (.djsav <-> JSON)"""
+    import os
+    import save_codec
+
+    if args.action == "validate":
+        return save_codec.validate_saves(args.paths or [save_codec.FIXTURES_GLOB], args.schema, args.workers)
+    if args.action == "upgrade":
+        return save_codec.upgrade_saves(args.paths, args.workers)
+    if len(args.paths) != 1 and not (args.action in ("encode", "decode") and len(args.paths) == 2):
+        print(f"❌ save {args.action} takes one input file (encode/decode: plus an optional output path)")
+        return False
+
+    path = args.paths[0]
+    try:
+        if args.action == "encode":
+            out_path = args.paths[1] if len(args.paths) > 1 else os.path.splitext(path)[0] + ".djsav"
+            json_size, save_size = save_codec.json_to_save(path, out_path)
+            print(f"✅ {path} -> {out_path}: {json_size} -> {save_size} bytes")
+        elif args.action == "decode":
+            out_path = args.paths[1] if len(args.paths) > 1 else os.path.splitext(path)[0] + ".json"
+            save_codec.save_to_json(path, out_path)
+            print(f"✅ {path} -> {out_path}")
+        else:
+            for key, value in save_codec.save_info(path).items():
+                print(f"{key}: {value}")
+    except (OSError, ValueError) as e:
+        print(f"❌ {path}: {e}")
+        return False
+    return True
+
+def cmd_cache(args):
+    """Show the shared build cache's size and hit rate, or trim / clear it"""
+    import build_cache
+    cache = build_cache.BuildCache()
+    if args.action == "clear":
+        cache.clear()
+        print(f"✅ Cleared {cache.root}")
+    elif args.action == "trim":
+        removed, freed = cache.trim()
+        print(f"✅ Evicted {removed} entries ({build_cache.format_size(freed)})")
+    else:
+        build_cache.print_stats(cache)
+    return True
+
+def cmd_bench(args):
+    """Time TMX -> JSON conversion, room validation and JSON encoding per output profile"""
+    import contextlib
+    import io
+    import os
+    import json
+    import tempfile
+    import room_json
+    import tiled_workflow
+    import validate_rooms
+
+    tmx_files = sorted(f for f in os.listdir(args.tiles_dir) if f.endswith('.tmx'))
+    if not tmx_files:
+        print(f"❌ No TMX files found in {args.tiles_dir}")
+        return False
+
+    print(f"Benchmarking {len(tmx_files)} rooms x {args.iterations} iterations")
+    print("=" * 50)
+
+    convert_s = 0.0
+    validate_s = 0.0
+    with tempfile.TemporaryDirectory() as out_dir:
+        for _ in range(args.iterations):
+            for tmx_file in tmx_files:
+                json_path = os.path.join(out_dir, tmx_file.replace('.tmx', '.json'))
+
+                # Silence the per-file progress prints, they dominate small files
+                with contextlib.redirect_stdout(io.StringIO()):
+                    start = time.perf_counter()
+                    tiled_workflow.tmx_to_json(os.path.join(args.tiles_dir, tmx_file), json_path)
+                    convert_s += time.perf_counter() - start
+
+                    start = time.perf_counter()
+                    validate_rooms.validate_room_file(json_path)
+                    validate_s += time.perf_counter() - start
+
+        rooms = []
+        for tmx_file in tmx_files:
+            with open(os.path.join(out_dir, tmx_file.replace('.tmx', '.json')), 'r') as f:
+                rooms.append(json.load(f))
+
+    runs = len(tmx_files) * args.iterations
+    print(f"convert:  {convert_s * 1000 / runs:8.3f} ms/room  ({convert_s:.3f} s total)")
+    print(f"validate: {validate_s * 1000 / runs:8.3f} ms/room  ({validate_s:.3f} s total)")
+    print()
+    room_json.print_benchmark(room_json.benchmark_profiles(rooms, args.iterations))
+    return True
+
+def build_parser():
+    """Create the argument parser with one subparser per command"""
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="dunjon", description="Dunjon content pipeline tools")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="report per-module import time when the command finishes")
+    parser.add_argument("--trace", metavar="PATH",
+                        help="write per-file/per-stage spans as a Chrome trace (chrome://tracing, Perfetto)")
+    parser.add_argument("--profile", action="store_true",
+                        help="profile each converted/validated file and report the hot spots")
+    commands = parser.add_subparsers(dest="command", metavar="<command>")
+    commands.required = True
+
+    convert = commands.add_parser("convert", help=cmd_convert.__doc__)
+    convert.add_argument("--local", action="store_true",
+                         help="convert in this process even if the auto-export watcher is running")
+    convert.set_defaults(handler=cmd_convert)
+
+    validate = commands.add_parser("validate", help=cmd_validate.__doc__)
+    validate.add_argument("--rooms-dir", default="game-godot/data/rooms")
+    validate.add_argument("--tiles-dir", default="tiles")
+    validate.add_argument("--tmx", action="store_true", help="also validate TMX sources")
+    validate.add_argument("--semantic", action="store_true",
+                          help="also check reachability and spawn/door placement (needs numpy)")
+    validate.add_argument("--workers", type=int, default=None, help="processes for --semantic")
+    validate.set_defaults(handler=cmd_validate)
+
+    watch = commands.add_parser("watch", help=cmd_watch.__doc__)
+    watch.set_defaults(handler=cmd_watch)
+
+    atlas = commands.add_parser("atlas", help=cmd_atlas.__doc__)
+    atlas.add_argument("--tiles-dir", default="tiles")
+    atlas.set_defaults(handler=cmd_atlas)
+
+    migrate = commands.add_parser("migrate", help=cmd_migrate.__doc__)
+    migrate.add_argument("step", choices=["tiles-32", "cleanup-tilesets", "json-to-tmx"])
+    migrate.add_argument("--local", action="store_true",
+                         help="json-to-tmx: convert in this process even if the watcher is running")
+    migrate.set_defaults(handler=cmd_migrate)
+
+    visibility = commands.add_parser("visibility", help=cmd_visibility.__doc__)
+    visibility.add_argument("--rooms-dir", default="game-godot/data/rooms")
+    visibility.add_argument("--out-dir", default="game-godot/data/visibility")
+    visibility.add_argument("--workers", type=int, default=None)
+    visibility.add_argument("--max-matrix-tiles", type=int, default=1024,
+                            help="rooms with more open tiles store key-point masks instead of a full LOS matrix")
+    visibility.set_defaults(handler=cmd_visibility)
+
+    bake = commands.add_parser("bake", help=cmd_bake.__doc__)
+    bake.add_argument("--rooms-dir", default="game-godot/data/rooms")
+    bake.add_argument("--out-dir", default="game-godot/assets/baked")
+    bake.add_argument("--atlas", default="game-godot/assets/tiles/dunjon_tileset.png")
+    bake.add_argument("--layers", nargs="+", default=["Ground"])
+    bake.add_argument("--chunk-tiles", type=int, default=32)
+    bake.add_argument("--force", action="store_true", help="ignore the cache and re-render everything")
+    bake.set_defaults(handler=cmd_bake)
+
+    minimap = commands.add_parser("minimap", help=cmd_minimap.__doc__)
+    minimap.add_argument("--rooms-dir", default="game-godot/data/rooms")
+    minimap.add_argument("--out-dir", default="game-godot/assets/minimap")
+    minimap.add_argument("--tsx", default="tiles/dunjon_tileset.tsx")
+    minimap.add_argument("--pixels-per-tile", type=int, default=2)
+    minimap.set_defaults(handler=cmd_minimap)
+
+    recording = commands.add_parser("recording", help=cmd_recording.__doc__)
+    recording.add_argument("action", choices=["encode", "decode", "verify", "info", "frames"])
+    recording.add_argument("path")
+    recording.add_argument("out", nargs="?", default=None,
+                           help="output path for encode/decode, source JSONL to compare against for verify")
+    recording.add_argument("--start", type=int, default=None, help="first frame to print (frames)")
+    recording.add_argument("--count", type=int, default=20, help="number of frames to print (frames)")
+    recording.set_defaults(handler=cmd_recording)
+
+    digest = commands.add_parser("digest-diff", help=cmd_digest_diff.__doc__)
+    digest.add_argument("log_a")
+    digest.add_argument("log_b")
+    digest.add_argument("--window", type=int, default=256, help="frames hashed per window before bisecting")
+    digest.set_defaults(handler=cmd_digest_diff)
+
+    replay = commands.add_parser("replay", help=cmd_replay.__doc__)
+    replay.add_argument("--recordings-dir", default="recordings")
+    replay.add_argument("--runner", default="godot --headless --path game-godot -- --replay {recording}",
+                        help="command template; {recording} and {digest} are replaced with paths")
+    replay.add_argument("--workers", type=int, default=None)
+    replay.add_argument("--timeout", type=float, default=300, help="seconds per attempt")
+    replay.add_argument("--retries", type=int, default=0)
+    replay.add_argument("--fail-fast", action="store_true", help="skip remaining recordings after the first failure")
+    replay.add_argument("--shard", type=shard_spec, default="1/1", help="run shard I of N, e.g. 2/4")
+    replay.add_argument("--report", default="replay_report.json")
+    replay.add_argument("--baseline", default=None, help="previous report; flag recordings whose digest changed")
+    replay.set_defaults(handler=cmd_replay)
+
+    locks = commands.add_parser("locks", help=cmd_locks.__doc__)
+    locks.set_defaults(handler=cmd_locks)
+
+    listen = commands.add_parser("listen", help=cmd_listen.__doc__)
+    listen.add_argument("--host", default="127.0.0.1")
+    listen.add_argument("--port", type=int, default=47631)
+    listen.set_defaults(handler=cmd_listen)
+
+    pack = commands.add_parser("pack", help=cmd_pack.__doc__)
+    pack.add_argument("--rooms-dir", default="game-godot/data/rooms")
+    pack.add_argument("--out-dir", default="game-godot/data/packed")
+    pack.add_argument("--json-profile", choices=["pretty", "minified"], default="minified")
+    pack.add_argument("--verify", action="store_true", help="expand every packed room and compare it to its source")
+    pack.set_defaults(handler=cmd_pack)
+
+    export = commands.add_parser("export", help=cmd_export.__doc__)
+    export.add_argument("--tiles-dir", default="tiles")
+    export.add_argument("--settings", default="tiles/export_settings.json")
+    export.add_argument("--target", action="append", help="only export the named target (repeatable)")
+    export.add_argument("--workers", type=int, help="threads writing targets (default: one per target)")
+    export.set_defaults(handler=cmd_export)
+
+    sprites = commands.add_parser("sprites", help=cmd_sprites.__doc__)
+    sprites.add_argument("dirs", nargs="*", help="character frame directories (default: game-godot/assets/Brute)")
+    sprites.add_argument("--out-dir", default="game-godot/assets/sprites")
+    sprites.add_argument("--frame-size", type=int, help="resize frames to N x N px (overrides sprites.json)")
+    sprites.add_argument("--workers", type=int, default=None)
+    sprites.add_argument("--force", action="store_true", help="ignore the source hashes and repack everything")
+    sprites.set_defaults(handler=cmd_sprites)
+
+    verify = commands.add_parser("verify-conversions", help=cmd_verify_conversions.__doc__)
+    verify.add_argument("--cases", type=int, default=2000)
+    verify.add_argument("--seed", type=int, help="reuse a seed to repeat a run (default: current time)")
+    verify.add_argument("--workers", type=int, default=None)
+    verify.add_argument("--check", action="append", help="only run the named check (repeatable)")
+    verify.add_argument("--max-size", type=int, default=24, help="largest random map side in tiles")
+    verify.add_argument("--replay", nargs="+", metavar="FILE", help="re-run saved reproducers instead")
+    verify.set_defaults(handler=cmd_verify_conversions)
+
+    balance = commands.add_parser("balance", help=cmd_balance.__doc__)
+    balance.add_argument("--rooms-dir", default="game-godot/data/rooms")
+    balance.add_argument("--room", action="append", help="only simulate the named room (repeatable)")
+    balance.add_argument("--encounter", help="also simulate a custom encounter, e.g. brute,charger,sniper")
+    balance.add_argument("--difficulty", action="append", help="only this difficulty (repeatable)")
+    balance.add_argument("--trials", type=int, default=100000, help="trials per room and difficulty")
+    balance.add_argument("--seed", type=int, default=0)
+    balance.add_argument("--workers", type=int, default=None)
+    balance.add_argument("--set", action="append", metavar="NAME=VALUE", help="override a parameter (repeatable)")
+    balance.add_argument("--sweep", metavar="NAME=V1,V2,...", help="run once per value of one parameter")
+    balance.add_argument("--json", metavar="FILE", help="also write the report as JSON")
+    balance.add_argument("--list-params", action="store_true", help="print every parameter and its value")
+    balance.set_defaults(handler=cmd_balance)
+
+    save = commands.add_parser("save", help=cmd_save.__doc__)
+    save.add_argument("action", choices=["encode", "decode", "info", "validate", "upgrade"])
+    save.add_argument("paths", nargs="*", help="files or glob patterns (validate defaults to test/fixtures/save*.json)")
+    save.add_argument("--schema", default="schemas/save-schema.json", help="schema to validate against")
+    save.add_argument("--workers", type=int, default=None)
+    save.set_defaults(handler=cmd_save)
+
+    cache = commands.add_parser("cache", help=cmd_cache.__doc__)
+    cache.add_argument("action", nargs="?", choices=["stats", "trim", "clear"], default="stats")
+    cache.set_defaults(handler=cmd_cache)
+
+    bench = commands.add_parser("bench", help=cmd_bench.__doc__)
+    bench.add_argument("--tiles-dir", default="tiles")
+    bench.add_argument("--iterations", type=int, default=20)
+    bench.set_defaults(handler=cmd_bench)
+
+    return parser
+
+def main(argv=None):
+    """Parse arguments and run the selected command"""
+    argv = sys.argv[1:] if argv is None else argv
+
+    profiler = None
+    if "--profile-startup" in argv:
+        profiler = ImportProfiler()
+        profiler.install()
+
+    args = build_parser().parse_args(argv)
+    startup_s = time.perf_counter() - _PROCESS_START
+
+    if args.trace or args.profile:
+        import export_trace
+        if args.profile:
+            export_trace.enable_profiling()
+        else:
+            export_trace.enable_tracing()
+
+    try:
+        is_ok = args.handler(args)
+    finally:
+        if profiler is not None:
+            profiler.uninstall()
+            profiler.report(startup_s, time.perf_counter() - _PROCESS_START - startup_s)
+        if args.trace or args.profile:
+            if args.trace:
+                export_trace.write_chrome_trace(args.trace)
+            if args.profile:
+                export_trace.print_profile_report()
+            export_trace.disable_tracing()
+
+    return 0 if is_ok is not False else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Export Metrics
+Counters and latency histograms for the auto-export watcher
+
+ExportMetrics holds the watcher's metrics. serve_metrics() exposes them on
+http://127.0.0.1:9464/metrics in the Prometheus text format, and
+SnapshotWriter dumps the same values to .dunjon/metrics.json (in the repo
+root, whatever the working directory) every few seconds for machines
+without a scraper. Recording a value is a dict update under a lock, so
+instrumentation costs microseconds per conversion.
+"""
+
+import bisect
+import json
+import os
+import threading
+import time
+
+from tool_lock import STATE_DIR
+
+DEFAULT_METRICS_PORT = 9464
+SNAPSHOT_PATH = os.path.join(STATE_DIR, "metrics.json")
+SNAPSHOT_INTERVAL_S = 15.0
+
+# Seconds; conversions of a room take milliseconds, a slow disk can take seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(label_names, label_values, extra=()):
+    pairs = list(zip(label_names, label_values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label(value)}"' for name, value in pairs) + "}"
+
+class Counter:
+    """Monotonic count, optionally split by labels"""
+
+    kind = "counter"
+
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self):
+        with self.lock:
+            return [(self.name, key, (), value) for key, value in sorted(self.values.items())]
+
+    def snapshot(self):
+        with self.lock:
+            return {",".join(key) or "total": value for key, value in sorted(self.values.items())}
+
+class Gauge(Counter):
+    """Value that can go up and down"""
+
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self.lock:
+            self.values[key] = value
+
+class Histogram:
+    """Cumulative-bucket latency histogram, optionally split by labels"""
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, label_names=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self.series = {}  # label values -> [bucket counts..., +Inf count, sum]
+        self.lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def samples(self):
+        samples = []
+        with self.lock:
+            items = sorted((key, list(series)) for key, series in self.series.items())
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series[:-1]):
+                cumulative += count
+                le = "+Inf" if bound == float('inf') else repr(bound)
+                samples.append((self.name + "_bucket", key, (("le", le),), cumulative))
+            samples.append((self.name + "_count", key, (), cumulative))
+            samples.append((self.name + "_sum", key, (), series[-1]))
+        return samples
+
+    def snapshot(self):
+        result = {}
+        with self.lock:
+            items = sorted((key, list(series)) for key, series in self.series.items())
+        for key, series in items:
+            count = sum(series[:-1])
+            result[",".join(key) or "total"] = {
+                "count": count,
+                "sum_s": round(series[-1], 6),
+                "mean_s": round(series[-1] / count, 6) if count else 0.0,
+                "buckets": dict(zip([*map(repr, self.buckets), "+Inf"], series[:-1])),
+            }
+        return result
+
+class ExportMetrics:
+    """The auto-export watcher's metrics"""
+
+    def __init__(self):
+        self.started = time.time()
+        self.events = Counter("dunjon_watcher_events_total", "File system events received", ("kind",))
+        self.coalesced = Counter("dunjon_watcher_events_coalesced_total",
+                                 "Events dropped without converting", ("reason",))
+        self.conversions = Counter("dunjon_conversions_total", "Conversions run", ("direction", "result"))
+        self.conversion_seconds = Histogram("dunjon_conversion_seconds", "Wall time per conversion", ("direction",))
+        self.parse_seconds = Histogram("dunjon_parse_seconds", "Time spent parsing the source file", ("direction",))
+        self.bytes_written = Counter("dunjon_bytes_written_total", "Bytes written by conversions", ("direction",))
+        self.errors = Counter("dunjon_errors_total", "Conversion errors by exception type", ("type",))
+        self.last_conversion = Gauge("dunjon_last_conversion_timestamp_seconds",
+                                     "Unix time of the last successful conversion")
+        self.metrics = [self.events, self.coalesced, self.conversions, self.conversion_seconds,
+                        self.parse_seconds, self.bytes_written, self.errors, self.last_conversion]
+
+    def record_conversion(self, direction, seconds, ok, stats):
+        """Record one conversion from its wall time and the converter's stats dict"""
+        self.conversions.inc(direction=direction, result="ok" if ok else "error")
+        self.conversion_seconds.observe(seconds, direction=direction)
+        if "parse_s" in stats:
+            self.parse_seconds.observe(stats["parse_s"], direction=direction)
+        if stats.get("bytes_written"):
+            self.bytes_written.inc(stats["bytes_written"], direction=direction)
+        if stats.get("error"):
+            self.errors.inc(type=stats["error"])
+        if ok:
+            self.last_conversion.set(time.time())
+
+    def prometheus_text(self):
+        """Render every metric in the Prometheus text exposition format"""
+        lines = [
+            "# HELP dunjon_watcher_uptime_seconds Seconds since the watcher started",
+            "# TYPE dunjon_watcher_uptime_seconds gauge",
+            f"dunjon_watcher_uptime_seconds {time.time() - self.started:.3f}",
+        ]
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, key, extra, value in metric.samples():
+                lines.append(f"{name}{_format_labels(metric.label_names, key, extra)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        """All metric values as a JSON-serialisable dict"""
+        return {
+            "timestamp": time.time(),
+            "uptime_s": round(time.time() - self.started, 3),
+            "metrics": {metric.name: metric.snapshot() for metric in self.metrics},
+        }
+
+def serve_metrics(metrics, host="127.0.0.1", port=DEFAULT_METRICS_PORT):
+    """Serve /metrics from a background thread; returns the server or None if the port is taken"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] == "/metrics":
+                body = metrics.prometheus_text().encode('utf-8')
+                content_type = "text/plain; version=0.0.4; charset=utf-8"
+            elif self.path.split('?')[0] == "/metrics.json":
+                body = json.dumps(metrics.snapshot(), indent=2).encode('utf-8')
+                content_type = "application/json"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # keep the watcher's console for conversion messages
+
+    try:
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+    except OSError as e:
+        print(f"⚠️  Metrics endpoint disabled: cannot listen on {host}:{port} ({e})")
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    print(f"📈 Metrics on http://{host}:{server.server_address[1]}/metrics")
+    return server
+
+class SnapshotWriter:
+    """Writes metrics.snapshot() to a JSON file every interval_s seconds"""
+
+    def __init__(self, metrics, path=SNAPSHOT_PATH, interval_s=SNAPSHOT_INTERVAL_S):
+        self.metrics = metrics
+        self.path = path
+        self.interval_s = interval_s
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="metrics-snapshot", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def _run(self):
+        while not self.stopped.wait(self.interval_s):
+            self.write()
+
+    def write(self):
+        """Write one snapshot atomically"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(self.metrics.snapshot(), f, indent=2)
+        os.replace(temp_path, self.path)
+
+    def stop(self):
+        self.stopped.set()
+        self.write()
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Export Targets
+Parse each TMX once and write every target listed in tiles/export_settings.json
+
+Each entry of "exportSettings" is one target:
+
+    {
+      "name": "Shipping JSON",
+      "fileExtension": "json",
+      "exportFormat": "json",                 json or tmx
+      "exportPath": "../build/rooms/",        relative to the settings file
+      "exportOptions": {
+        "encoding": "csv",                    csv, array or base64 (tile layer data)
+        "compression": "none",                none, zlib or gzip (base64 only)
+        "profile": "minified",                room_json profile, default pretty
+        "objects": "binary",                  dicts, columns or binary (object groups)
+        "includeTileset": false
+      }
+    }
+
+encoding and compression follow Tiled's JSON options: "array" writes the
+plain GID list, "base64" the little-endian uint32 GIDs, optionally zlib or
+gzip compressed. objects picks how object groups are written: "dicts" is
+Tiled's object list, "columns" and "binary" store the group as a
+room_objects.ObjectTable (column JSON, or its binary blob in base64) under
+"objecttable". RoomImporter reads csv and object lists, so the dev target
+must stay csv/dicts; room_data.load_room() reads every form.
+
+export_room() parses the TMX once (tiled_workflow.parse_tmx) and writes
+every target from that one room dict on a thread pool. Without a settings
+file the only target is the pretty CSV JSON in game-godot/data/rooms.
+
+Outputs go through the shared build cache (build_cache.py), keyed by the
+TMX, the tilesets next to it, the target's options and the converter
+source; when every target is a hit the TMX is not parsed at all.
+"""
+
+import base64
+import copy
+import glob
+import gzip
+import json
+import os
+import struct
+import sys
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from build_cache import cache_key, get_build_cache, source_version
+from export_trace import stage, traced_file
+from json_to_tmx import write_tmx_file
+from room_data import decode_tile_layer, iter_tile_layers
+from room_json import PROFILES
+from room_objects import OBJECT_FORMS, pack_object_layer
+from tiled_workflow import parse_tmx, write_room_json
+from tool_lock import FileLock
+
+DEFAULT_SETTINGS_PATH = os.path.join("tiles", "export_settings.json")
+DEFAULT_ROOMS_DIR = os.path.join("game-godot", "data", "rooms")
+
+# Modules whose code decides what a target's output looks like
+CACHE_SOURCE_MODULES = ("export_targets", "tiled_workflow", "json_to_tmx", "autotile",
+                        "room_data", "room_json", "room_objects")
+
+FORMATS = ("json", "tmx")
+ENCODINGS = ("csv", "array", "base64")
+COMPRESSIONS = ("none", "zlib", "gzip")
+
+class ExportTarget:
+    """One output of the export pipeline"""
+
+    def __init__(self, name, out_dir, extension="json", export_format="json",
+                 encoding="csv", compression="none", profile="pretty", objects="dicts"):
+        self.name = name
+        self.out_dir = out_dir
+        self.extension = extension
+        self.format = export_format
+        self.encoding = encoding
+        self.compression = compression
+        self.profile = profile
+        self.objects = objects
+
+    def output_path(self, tmx_file):
+        stem = os.path.splitext(os.path.basename(tmx_file))[0]
+        return os.path.join(self.out_dir, f"{stem}.{self.extension}")
+
+    def __repr__(self):
+        return (f"ExportTarget({self.name!r}, {self.out_dir!r}, {self.format}, "
+                f"{self.encoding}/{self.compression}, {self.profile}, {self.objects})")
+
+def default_targets():
+    """The built-in target: pretty CSV room JSON for the game"""
+    return [ExportTarget("Godot JSON Export", DEFAULT_ROOMS_DIR)]
+
+def load_export_targets(settings_path=DEFAULT_SETTINGS_PATH):
+    """Read the targets from export_settings.json
+
+    Returns default_targets() when the file does not exist. Invalid entries
+    are reported and skipped.
+    """
+    if not os.path.exists(settings_path):
+        return default_targets()
+    with open(settings_path, 'r') as f:
+        settings = json.load(f)
+
+    base_dir = os.path.dirname(settings_path)
+    targets = []
+    for entry in settings.get("exportSettings", []):
+        name = entry.get("name", "unnamed")
+        options = entry.get("exportOptions", {})
+        target = ExportTarget(
+            name,
+            os.path.normpath(os.path.join(base_dir, entry.get("exportPath", "."))),
+            extension=entry.get("fileExtension", "json").lstrip('.'),
+            export_format=entry.get("exportFormat", "json"),
+            encoding=options.get("encoding", "csv"),
+            compression=options.get("compression", "none") or "none",
+            profile=options.get("profile", "pretty"),
+            objects=options.get("objects", "dicts"),
+        )
+
+        problem = None
+        if target.format not in FORMATS:
+            problem = f"exportFormat {target.format!r} is not one of {', '.join(FORMATS)}"
+        elif target.encoding not in ENCODINGS:
+            problem = f"encoding {target.encoding!r} is not one of {', '.join(ENCODINGS)}"
+        elif target.compression not in COMPRESSIONS:
+            problem = f"compression {target.compression!r} is not one of {', '.join(COMPRESSIONS)}"
+        elif target.compression != "none" and target.encoding != "base64":
+            problem = "compression needs base64 encoding"
+        elif target.profile not in PROFILES:
+            problem = f"profile {target.profile!r} is not one of {', '.join(PROFILES)}"
+        elif target.objects not in OBJECT_FORMS:
+            problem = f"objects {target.objects!r} is not one of {', '.join(OBJECT_FORMS)}"
+        elif target.format == "tmx" and target.encoding != "csv":
+            problem = "tmx targets only support csv encoding"
+        elif target.format == "tmx" and target.objects != "dicts":
+            problem = "tmx targets only support dicts objects"
+        if problem:
+            print(f"❌ Export target {name!r} skipped: {problem}")
+            continue
+        if options.get("includeTileset"):
+            print(f"⚠️  Export target {name!r}: includeTileset is not supported, tilesets stay external")
+        targets.append(target)
+    return targets
+
+def encode_layer_data(layer, encoding, compression="none"):
+    """Re-encode one tile layer's data in place (csv, array or base64)"""
+    if encoding == "csv":
+        return
+    rows = decode_tile_layer(layer, keep_flags=True)
+    gids = [gid for row in rows for gid in row]
+    if encoding == "array":
+        layer['data'] = gids
+        layer['encoding'] = "csv"  # Tiled's name for the plain GID list
+        return
+
+    raw = struct.pack(f"<{len(gids)}I", *gids)
+    if compression == "zlib":
+        raw = zlib.compress(raw)
+    elif compression == "gzip":
+        raw = gzip.compress(raw, mtime=0)  # mtime=0 keeps the output reproducible
+    layer['data'] = base64.b64encode(raw).decode('ascii')
+    layer['encoding'] = "base64"
+    if compression != "none":
+        layer['compression'] = compression
+
+def room_for_target(room, target):
+    """The room dict as this target writes it (room itself when nothing changes)"""
+    if target.encoding == "csv" and target.objects == "dicts":
+        return room
+    room = copy.copy(room)
+    room['layers'] = [pack_object_layer(layer, target.objects) if layer.get('type') == 'objectgroup'
+                      else dict(layer) for layer in room.get('layers', [])]
+    if target.encoding != "csv":
+        for layer in iter_tile_layers(room):
+            encode_layer_data(layer, target.encoding, target.compression)
+    return room
+
+@traced_file("export_target")
+def write_target(tmx_file, room, target):
+    """Write one target's output for a room parsed from tmx_file; returns bytes written"""
+    path = target.output_path(tmx_file)
+    if os.path.abspath(path) == os.path.abspath(tmx_file):
+        raise ValueError(f"target {target.name!r} would overwrite its source {tmx_file}")
+    os.makedirs(target.out_dir, exist_ok=True)
+    data = room_for_target(room, target)
+    if target.format == "tmx":
+        return write_tmx_file(data, path)
+    return write_room_json(data, path, target.profile)
+
+def with_output(targets, json_file):
+    """targets plus a default JSON target for json_file if none writes it already"""
+    wanted = os.path.abspath(json_file)
+    stem = os.path.splitext(os.path.basename(json_file))[0]
+    if any(os.path.abspath(target.output_path(stem)) == wanted for target in targets):
+        return targets
+    return targets + [ExportTarget("Godot JSON Export", os.path.dirname(json_file) or ".")]
+
+def _cache_keys(tmx_file, targets):
+    """Build cache key per target: TMX and sibling TSX contents, options, converter source"""
+    inputs = [tmx_file] + sorted(glob.glob(os.path.join(os.path.dirname(tmx_file) or ".", "*.tsx")))
+    version = source_version(*CACHE_SOURCE_MODULES)
+    return [cache_key("export", version,
+                      [target.format, target.extension, target.encoding, target.compression, target.profile,
+                       target.objects],
+                      inputs, [os.path.basename(target.output_path(tmx_file))])
+            for target in targets]
+
+def _restore_target(cache, key, tmx_file, target):
+    """Written bytes if target's output came from the cache, else None"""
+    path = target.output_path(tmx_file)
+    if os.path.abspath(path) == os.path.abspath(tmx_file):
+        return None  # write_target reports this
+    with FileLock(path):
+        if cache.restore("export", key, target.out_dir) is None:
+            return None
+    return os.path.getsize(path)
+
+@traced_file("export_room")
+def export_room(tmx_file, targets, executor=None, stats=None):
+    """Parse a TMX once and write it to every target
+
+    Targets are written concurrently on executor (a ThreadPoolExecutor; one
+    is created for the call when there are several targets and none is
+    given). Returns a list of (target, output_path, error) with error None
+    on success. stats receives parse_s, bytes_written and error like
+    tmx_to_json's, plus cache_hits.
+    """
+    stats = {} if stats is None else stats
+    stats["cache_hits"] = 0
+    outcomes = {}  # target index -> (bytes written, error)
+
+    cache = get_build_cache()
+    keys = [None] * len(targets)
+    if cache is not None:
+        stage("cache")
+        try:
+            keys = _cache_keys(tmx_file, targets)
+            for index, target in enumerate(targets):
+                written = _restore_target(cache, keys[index], tmx_file, target)
+                if written is not None:
+                    outcomes[index] = (written, None)
+                    stats["cache_hits"] += 1
+        except OSError:
+            keys = [None] * len(targets)  # an unreadable input fails below with a proper message
+
+    pending = [index for index in range(len(targets)) if index not in outcomes]
+    if pending:
+        try:
+            room = parse_tmx(tmx_file, stats)
+        except Exception as e:
+            stats["error"] = type(e).__name__
+            return [(target, target.output_path(tmx_file), f"parse failed: {e}") for target in targets]
+        stage("targets")
+
+        def run(index):
+            target = targets[index]
+            try:
+                written = write_target(tmx_file, room, target)
+            except Exception as e:
+                return 0, f"{type(e).__name__}: {e}"
+            if keys[index] is not None:
+                try:
+                    cache.store("export", keys[index], target.out_dir, [os.path.basename(target.output_path(tmx_file))])
+                except OSError:
+                    pass  # a full or read-only cache never fails the conversion
+            return written, None
+
+        if len(pending) <= 1 and executor is None:
+            done = [run(index) for index in pending]
+        elif executor is not None:
+            done = list(executor.map(run, pending))
+        else:
+            with ThreadPoolExecutor(max_workers=len(pending), thread_name_prefix="export") as pool:
+                done = list(pool.map(run, pending))
+        outcomes.update(zip(pending, done))
+
+    results = []
+    stats["bytes_written"] = 0
+    for index, target in enumerate(targets):
+        written, error = outcomes[index]
+        stats["bytes_written"] += written
+        if error and "error" not in stats:
+            stats["error"] = error.split(':')[0]
+        results.append((target, target.output_path(tmx_file), error))
+    return results
+
+def export_all(tiles_dir="tiles", settings_path=DEFAULT_SETTINGS_PATH, target_names=None, workers=None):
+    """Export every TMX in tiles_dir to every configured target"""
+    targets = load_export_targets(settings_path)
+    if target_names:
+        targets = [target for target in targets if target.name in target_names]
+    if not targets:
+        print("❌ No export targets configured")
+        return False
+
+    tmx_files = sorted(os.path.join(tiles_dir, name) for name in os.listdir(tiles_dir) if name.endswith('.tmx'))
+    if not tmx_files:
+        print(f"❌ No TMX files found in {tiles_dir}")
+        return False
+
+    print(f"Exporting {len(tmx_files)} TMX files to {len(targets)} target(s):")
+    for target in targets:
+        print(f"  - {target.name}: {target.format} {target.encoding}/{target.compression} "
+              f"{target.profile} {target.objects} -> {target.out_dir}")
+    print()
+
+    failures = 0
+    with ThreadPoolExecutor(max_workers=workers or len(targets), thread_name_prefix="export") as pool:
+        for tmx_file in tmx_files:
+            results = export_room(tmx_file, targets, pool)
+            errors = [(target, error) for target, _, error in results if error]
+            for target, error in errors:
+                print(f"❌ {os.path.basename(tmx_file)} -> {target.name}: {error}")
+            failures += bool(errors)
+            if not errors:
+                print(f"✅ {os.path.basename(tmx_file)} -> {len(results)} target(s)")
+
+    print(f"\n✅ Export complete: {len(tmx_files) - failures}/{len(tmx_files)} files exported")
+    return failures == 0
+
+def main():
+    """Export all TMX files to the targets in tiles/export_settings.json"""
+    if not export_all(target_names=sys.argv[1:] or None):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Export Tracing
+Stage spans for the converters and validators, written as Chrome trace events
+
+Converters are decorated with @traced_file("tmx_to_json"), which opens one
+span per file (cat="file"), and mark their stages with stage("parse"),
+stage("transform"), stage("encode"), stage("write"): each call closes the
+previous stage span and opens the next. Anything else can be wrapped in
+`with span("name"):`. While tracing is off (the default) these return at
+once or hand back a shared no-op context manager, so instrumentation costs a
+global lookup per stage.
+
+enable_tracing() records every span; write_chrome_trace() saves them in the
+trace-event format chrome://tracing and Perfetto open. enable_profiling()
+additionally runs cProfile and tracemalloc around each file span and
+print_profile_report() lists the slowest files, total time per stage and the
+hottest functions.
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+
+class _NoSpan:
+    """Context manager that does nothing (tracing disabled)"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NO_SPAN = _NoSpan()
+
+_tracer = None
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'cat', 'args', 'start', 'profiling')
+
+    def __init__(self, tracer, name, cat, args):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.profiling = False
+
+    def __enter__(self):
+        if self.cat == "file" and self.tracer.profiler is not None:
+            self.profiling = self.tracer.profiler.begin()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        end = time.perf_counter()
+        if exc_type is not None:
+            self.args = dict(self.args, error=exc_type.__name__)
+        self.tracer.record(self, end)
+        if self.profiling:
+            self.tracer.profiler.end(self.args.get("file", self.name), end - self.start)
+        return False
+
+class Tracer:
+    """Collects completed spans as Chrome "X" (complete) events"""
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.events = []
+        self.lock = threading.Lock()
+        self.profiler = None
+        self.local = threading.local()
+
+    def span(self, name, cat, args):
+        return _Span(self, name, cat, args)
+
+    def start_stage(self, name):
+        self.end_stage()
+        self.local.stage = _Span(self, name, "stage", {}).__enter__()
+
+    def end_stage(self):
+        current = getattr(self.local, 'stage', None)
+        if current is not None:
+            self.local.stage = None
+            current.__exit__(None, None, None)
+
+    def record(self, span, end):
+        event = {
+            "name": span.name,
+            "cat": span.cat,
+            "ph": "X",
+            "ts": round((span.start - self.origin) * 1e6, 3),
+            "dur": round((end - span.start) * 1e6, 3),
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+        }
+        if span.args:
+            event["args"] = span.args
+        with self.lock:
+            self.events.append(event)
+
+class FileProfiler:
+    """cProfile + tracemalloc around each top-level file span"""
+
+    def __init__(self):
+        import cProfile
+        import tracemalloc
+
+        self.profile = cProfile.Profile()
+        self.tracemalloc = tracemalloc
+        self.files = []  # (file, seconds, peak_bytes)
+        self.depth = 0
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def begin(self):
+        # cProfile and the depth count are per process; worker threads are not profiled
+        if threading.current_thread() is not threading.main_thread():
+            return False
+        self.depth += 1
+        if self.depth > 1:
+            return True
+        self.tracemalloc.reset_peak()
+        self.profile.enable()
+        return True
+
+    def end(self, file, seconds):
+        self.depth -= 1
+        if self.depth:
+            return
+        self.profile.disable()
+        _, peak = self.tracemalloc.get_traced_memory()
+        self.files.append((file, seconds, peak))
+
+def span(name, cat="stage", **args):
+    """Time a stage: `with span("parse", file=path):` (no-op unless tracing is enabled)"""
+    if _tracer is None:
+        return _NO_SPAN
+    return _tracer.span(name, cat, args)
+
+def stage(name):
+    """End the current stage of the enclosing traced file and start the next one"""
+    if _tracer is not None:
+        _tracer.start_stage(name)
+
+def traced_file(name):
+    """Decorator: trace each call as one file span (first argument is the file)"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(path, *args, **kwargs):
+            tracer = _tracer
+            if tracer is None:
+                return func(path, *args, **kwargs)
+            outer_stage = getattr(tracer.local, 'stage', None)
+            tracer.local.stage = None
+            try:
+                with tracer.span(name, "file", {"file": str(path)}):
+                    try:
+                        return func(path, *args, **kwargs)
+                    finally:
+                        tracer.end_stage()
+            finally:
+                tracer.local.stage = outer_stage
+        return wrapper
+    return decorate
+
+def enable_tracing():
+    """Start recording spans; returns the Tracer"""
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer()
+    return _tracer
+
+def enable_profiling():
+    """Record spans and profile every file span"""
+    tracer = enable_tracing()
+    if tracer.profiler is None:
+        tracer.profiler = FileProfiler()
+    return tracer
+
+def disable_tracing():
+    global _tracer
+    if _tracer is not None and _tracer.profiler is not None:
+        _tracer.profiler.tracemalloc.stop()
+    _tracer = None
+
+def write_chrome_trace(path):
+    """Write the recorded spans as a Chrome trace-event JSON file"""
+    if _tracer is None:
+        return False
+    with _tracer.lock:
+        events = list(_tracer.events)
+    with open(path, 'w') as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+    print(f"📝 Wrote {len(events)} spans to {path} (open in chrome://tracing or ui.perfetto.dev)")
+    return True
+
+def print_profile_report(limit=10):
+    """Print the slowest files, time per stage and the hottest functions"""
+    if _tracer is None:
+        return
+    import pstats
+
+    with _tracer.lock:
+        events = list(_tracer.events)
+
+    stage_totals = {}
+    for event in events:
+        if event["cat"] != "file":
+            total = stage_totals.setdefault(event["name"], [0, 0.0])
+            total[0] += 1
+            total[1] += event["dur"] / 1000
+
+    print()
+    print("Profile")
+    print("=" * 66)
+    profiler = _tracer.profiler
+    if profiler is not None and profiler.files:
+        print(f"{'slowest files':<40} {'ms':>10} {'peak KiB':>12}")
+        for file, seconds, peak in sorted(profiler.files, key=lambda item: item[1], reverse=True)[:limit]:
+            print(f"{os.path.basename(str(file)):<40} {seconds * 1000:>10.2f} {peak / 1024:>12.1f}")
+        print("-" * 66)
+
+    print(f"{'stage':<40} {'calls':>10} {'total ms':>12}")
+    for name, (calls, total_ms) in sorted(stage_totals.items(), key=lambda item: item[1][1], reverse=True):
+        print(f"{name:<40} {calls:>10} {total_ms:>12.2f}")
+
+    if profiler is not None and profiler.files:
+        print("-" * 66)
+        print("Hottest functions (cumulative):")
+        stats = pstats.Stats(profiler.profile)
+        stats.sort_stats("cumulative").print_stats(limit)
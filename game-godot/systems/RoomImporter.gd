@@ -10,6 +10,12 @@ var enemy_scene: PackedScene
 # Track spawned entities to prevent duplicates
 var spawned_entities: Array[Node] = []
 
+# Baked static layers (written by bake_layers.py), keyed by room id
+const BAKED_MANIFEST_PATH = "res://assets/baked/manifest.json"
+var baked_manifest: Dictionary = {}
+var has_loaded_baked_manifest := false
+var current_room_id: String = ""
+
 func import_room_from_json(room_data: Dictionary, parent_node: Node) -> void:
 	"""Import a room from JSON data and add entities to the parent node"""
 	
@@ -66,6 +72,10 @@ func parse_tile_layer(layer: Dictionary, parent_node: Node) -> void:
 		print_debug("[RoomImporter] ⚠️ No tile data found in layer: ", layer.name)
 		return
 	
+	# Prefer pre-rendered chunks over one sprite per tile
+	if try_draw_baked_layer(layer, parent_node):
+		return
+	
 	# Create a Control node for ColorRect children
 	var layer_control = Control.new()
 	layer_control.name = layer.name
@@ -92,6 +102,85 @@ func parse_tile_layer(layer: Dictionary, parent_node: Node) -> void:
 			if tile_id > 0:  # Skip empty tiles (0)
 				create_tile_visual(tile_id, x, y, layer_control)
 
+func load_baked_manifest() -> void:
+	"""Load the baked layer manifest once, if it exists"""
+	
+	has_loaded_baked_manifest = true
+	if not FileAccess.file_exists(BAKED_MANIFEST_PATH):
+		return
+	
+	var manifest = JSON.parse_string(FileAccess.get_file_as_string(BAKED_MANIFEST_PATH))
+	if typeof(manifest) == TYPE_DICTIONARY and manifest.has("rooms"):
+		baked_manifest = manifest.rooms
+
+func try_draw_baked_layer(layer: Dictionary, parent_node: Node) -> bool:
+	"""Draw a layer from its baked chunks; returns false if it has none"""
+	
+	# Collision tiles also need physics bodies, so they are never baked
+	if layer.name == "Collision" or current_room_id == "":
+		return false
+	
+	if not has_loaded_baked_manifest:
+		load_baked_manifest()
+	
+	if not baked_manifest.has(current_room_id):
+		return false
+	var room_layers = baked_manifest[current_room_id].get("layers", {})
+	if not room_layers.has(layer.name):
+		return false
+	
+	# Chunks baked from other tiles (room edited since the last bake) would be stale
+	if room_layers[layer.name].get("tiles_sha256", "") != baked_tiles_digest(layer):
+		push_warning("Baked layer " + current_room_id + "/" + layer.name + " is out of date, drawing tiles instead (run: python dunjon.py bake)")
+		return false
+	
+	var layer_node = Node2D.new()
+	layer_node.name = layer.name
+	parent_node.add_child(layer_node)
+	
+	for chunk in room_layers[layer.name].chunks:
+		var texture = load("res://assets/baked/" + chunk.file)
+		if not texture:
+			push_warning("Missing baked chunk: " + chunk.file)
+			continue
+		var sprite = Sprite2D.new()
+		sprite.texture = texture
+		sprite.centered = false
+		# Per-tile sprites are centered on (x * 32, y * 32), so match that offset
+		sprite.position = Vector2(chunk.x, chunk.y) - Vector2(16, 16)
+		layer_node.add_child(sprite)
+	
+	print_debug("[RoomImporter] 🎨 Drew baked layer: ", layer.name, " (", room_layers[layer.name].chunks.size(), " chunks)")
+	return true
+
+func baked_tiles_digest(layer: Dictionary) -> String:
+	"""sha256 of the layer's tiles, computed like bake_layers.tiles_digest() for the manifest"""
+	
+	var width = int(layer.get("width", 0))
+	var height = int(layer.get("height", 0))
+	var data = layer.get("data", "")
+	var gids = PackedStringArray()
+	
+	if typeof(data) == TYPE_ARRAY:
+		# Tiled's own JSON: a flat GID list
+		for y in range(height):
+			for x in range(width):
+				var index = y * width + x
+				gids.append(str(int(data[index])) if index < data.size() else "0")
+	else:
+		# Our exporters' CSV: one row per line, short rows padded with 0
+		var lines = str(data).split("\n")
+		for y in range(height):
+			var cells = PackedStringArray()
+			if y < lines.size():
+				for cell in lines[y].split(","):
+					if cell.strip_edges() != "":
+						cells.append(cell.strip_edges())
+			for x in range(width):
+				gids.append(str(cells[x].to_int()) if x < cells.size() else "0")
+	
+	return (str(width) + "x" + str(height) + ":" + ",".join(gids)).sha256_text()
+
 func create_tile_visual(tile_id: int, x: int, y: int, parent: Control) -> void:
 	"""Create a visual representation of a tile using Dunjon Tiles tileset"""
 	
@@ -144,8 +233,28 @@ func create_tile_visual(tile_id: int, x: int, y: int, parent: Control) -> void:
 			
 			# print_debug("[RoomImporter] Wall tile and collision at: ", tile_position)
 		_:
-			# Default fallback for unknown tile IDs
-			create_tile_visual_fallback(tile_id, tile_position, parent)
+			# Autotile variants are resolved by the exporter, so just draw the atlas cell
+			var columns = int(tileset_texture.get_width() / 32)
+			var rows = int(tileset_texture.get_height() / 32)
+			if tile_id < columns * rows:
+				sprite.region_enabled = true
+				sprite.region_rect = Rect2((tile_id % columns) * 32, (tile_id / columns) * 32, 32, 32)
+				parent.add_child(sprite)
+				
+				# Variants on the Collision layer still block movement
+				if parent.name == "Collision":
+					var static_body = StaticBody2D.new()
+					static_body.position = tile_position + Vector2(16, 16)  # Center collision
+					parent.add_child(static_body)
+					
+					var collision_shape = CollisionShape2D.new()
+					var rectangle_shape = RectangleShape2D.new()
+					rectangle_shape.size = Vector2(32, 32)  # Full tile size for collision
+					collision_shape.shape = rectangle_shape
+					static_body.add_child(collision_shape)
+			else:
+				# Default fallback for unknown tile IDs
+				create_tile_visual_fallback(tile_id, tile_position, parent)
 
 func create_tile_visual_fallback(tile_id: int, tile_position: Vector2, parent: Control) -> void:
 	"""Fallback method using individual assets or colored rectangles"""
@@ -319,6 +428,7 @@ func load_room_from_file(file_path: String, parent_node: Node) -> bool:
 	"""Load a room from a JSON file and import it"""
 	
 	print_debug("[RoomImporter] 📂 Loading room from file: ", file_path)
+	current_room_id = file_path.get_file().get_basename()
 	
 	if not FileAccess.file_exists(file_path):
 		push_error("Room file not found: " + file_path)
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Hot Reload Channel
+Pushes per-room change notifications from the exporter to a running game
+
+The watcher runs a HotReloadPublisher: a TCP server on 127.0.0.1 that sends
+newline-delimited JSON to every connected client. After each conversion it
+publishes a room_delta message:
+
+    {"type": "room_delta", "version": 1, "room": "A1", "reload": false,
+     "layers": {
+       "Ground":   {"cells": [{"x": 3, "y": 4, "w": 2, "h": 1, "gids": [2, 2]}]},
+       "Entities": {"added": [<object>], "removed": [<id>],
+                    "moved": [{"id": 1, "x": 320.0, "y": 256.0}], "changed": [<object>]}
+     }}
+
+Changed cells are merged into rectangles (gids row-major). Objects are
+matched by id within their layer. "reload": true means the room's shape or
+layer list changed and the client should reload the whole room instead.
+Clients receive {"type": "hello"} on connect. listen() is a reference client.
+"""
+
+import json
+import os
+import socket
+import sys
+import threading
+
+from room_data import decode_tile_layer
+
+PROTOCOL_VERSION = 1
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 47631
+
+def changed_rectangles(old_rows, new_rows):
+    """Rectangles (x, y, w, h) covering every cell that differs between two grids
+
+    Each row's changed cells are split into runs; runs with the same span on
+    consecutive rows are merged into one rectangle.
+    """
+    rectangles = []
+    open_runs = {}  # (x, w) -> [x, y, w, h] still growing downwards
+    for y, (old_row, new_row) in enumerate(zip(old_rows, new_rows)):
+        runs = []
+        x = 0
+        width = len(new_row)
+        while x < width:
+            if old_row[x] == new_row[x]:
+                x += 1
+                continue
+            start = x
+            while x < width and old_row[x] != new_row[x]:
+                x += 1
+            runs.append((start, x - start))
+
+        next_open = {}
+        for run in runs:
+            rectangle = open_runs.pop(run, None)
+            if rectangle is None:
+                rectangle = [run[0], y, run[1], 0]
+            rectangle[3] += 1
+            next_open[run] = rectangle
+        rectangles.extend(open_runs.values())
+        open_runs = next_open
+    rectangles.extend(open_runs.values())
+    return sorted(tuple(rectangle) for rectangle in rectangles)
+
+def tile_layer_delta(old_layer, new_layer):
+    """Changed-cell rectangles for one tile layer"""
+    old_rows = decode_tile_layer(old_layer, keep_flags=True)
+    new_rows = decode_tile_layer(new_layer, keep_flags=True)
+    cells = []
+    for x, y, w, h in changed_rectangles(old_rows, new_rows):
+        gids = [gid for row in new_rows[y:y + h] for gid in row[x:x + w]]
+        cells.append({"x": x, "y": y, "w": w, "h": h, "gids": gids})
+    return {"cells": cells} if cells else None
+
+def _object_key(obj, index):
+    return obj.get('id', f"{obj.get('name', '')}#{index}")
+
+def object_layer_delta(old_layer, new_layer):
+    """Added, removed, moved and changed objects for one object group"""
+    old_objects = {_object_key(obj, i): obj for i, obj in enumerate(old_layer.get('objects', []))}
+    new_objects = {_object_key(obj, i): obj for i, obj in enumerate(new_layer.get('objects', []))}
+
+    delta = {"added": [], "removed": [], "moved": [], "changed": []}
+    for key, obj in new_objects.items():
+        old = old_objects.get(key)
+        if old is None:
+            delta["added"].append(obj)
+        elif old != obj:
+            rest_old = {k: v for k, v in old.items() if k not in ('x', 'y')}
+            rest_new = {k: v for k, v in obj.items() if k not in ('x', 'y')}
+            if rest_old == rest_new:
+                delta["moved"].append({"id": key, "x": obj.get('x'), "y": obj.get('y')})
+            else:
+                delta["changed"].append(obj)
+    delta["removed"] = [key for key in old_objects if key not in new_objects]
+
+    delta = {name: entries for name, entries in delta.items() if entries}
+    return delta or None
+
+def _layer_shape(room):
+    return (room.get('width'), room.get('height'),
+            [(layer.get('name'), layer.get('type')) for layer in room.get('layers', [])])
+
+def room_delta(room_id, old_room, new_room):
+    """Build the room_delta message between two versions of a room dict
+
+    old_room may be None (room not seen before), which asks for a reload.
+    """
+    message = {"type": "room_delta", "version": PROTOCOL_VERSION, "room": room_id, "reload": False, "layers": {}}
+    if old_room is None or _layer_shape(old_room) != _layer_shape(new_room):
+        message["reload"] = True
+        return message
+
+    for old_layer, new_layer in zip(old_room['layers'], new_room['layers']):
+        if new_layer.get('type') == 'tilelayer':
+            delta = tile_layer_delta(old_layer, new_layer)
+        elif new_layer.get('type') == 'objectgroup':
+            delta = object_layer_delta(old_layer, new_layer)
+        else:
+            delta = None if old_layer == new_layer else {"replaced": new_layer}
+        if delta:
+            message["layers"][new_layer.get('name')] = delta
+    return message
+
+class HotReloadPublisher:
+    """Localhost TCP server broadcasting newline-delimited JSON messages"""
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.host = host
+        self.port = port
+        self.clients = []
+        self.lock = threading.Lock()
+        self.server = None
+        self.thread = None
+
+    def start(self):
+        """Bind and start accepting clients; returns False if the port is taken"""
+        try:
+            self.server = socket.create_server((self.host, self.port))
+        except OSError as e:
+            print(f"⚠️  Hot reload disabled: cannot listen on {self.host}:{self.port} ({e})")
+            return False
+        self.port = self.server.getsockname()[1]
+        self.thread = threading.Thread(target=self._accept_loop, name="hot-reload", daemon=True)
+        self.thread.start()
+        print(f"📡 Hot reload publishing on {self.host}:{self.port}")
+        return True
+
+    def _accept_loop(self):
+        while True:
+            try:
+                client, _ = self.server.accept()
+            except OSError:
+                return  # server closed
+            client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            # A stalled client is dropped rather than blocking the watcher
+            client.settimeout(1.0)
+            with self.lock:
+                self.clients.append(client)
+            self._send(client, {"type": "hello", "version": PROTOCOL_VERSION})
+
+    def _send(self, client, message):
+        try:
+            client.sendall(json.dumps(message, separators=(',', ':')).encode('utf-8') + b'\n')
+            return True
+        except OSError:
+            with self.lock:
+                if client in self.clients:
+                    self.clients.remove(client)
+            client.close()
+            return False
+
+    def publish(self, message):
+        """Send a message to every connected client; returns how many received it"""
+        with self.lock:
+            clients = list(self.clients)
+        return sum(self._send(client, message) for client in clients)
+
+    def close(self):
+        if self.server is not None:
+            self.server.close()
+        with self.lock:
+            for client in self.clients:
+                client.close()
+            self.clients.clear()
+
+class RoomChangeTracker:
+    """Remembers the last published version of each room to compute deltas"""
+
+    def __init__(self, publisher):
+        self.publisher = publisher
+        self.rooms = {}
+
+    def remember_all(self, rooms_dir):
+        """Record every room currently in rooms_dir"""
+        for name in sorted(os.listdir(rooms_dir)):
+            if name.endswith('.json'):
+                self.remember(os.path.join(rooms_dir, name))
+
+    def remember(self, room_path):
+        """Record a room's current content (call before overwriting it)"""
+        room_id = os.path.splitext(os.path.basename(room_path))[0]
+        if room_id in self.rooms:
+            return
+        try:
+            with open(room_path, 'r') as f:
+                self.rooms[room_id] = json.load(f)
+        except (OSError, ValueError):
+            self.rooms[room_id] = None
+
+    def publish_change(self, room_path):
+        """Diff the room on disk against the remembered version and publish it"""
+        room_id = os.path.splitext(os.path.basename(room_path))[0]
+        try:
+            with open(room_path, 'r') as f:
+                new_room = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Hot reload: cannot read {room_path}: {e}")
+            return None
+
+        message = room_delta(room_id, self.rooms.get(room_id), new_room)
+        self.rooms[room_id] = new_room
+        if message["reload"] or message["layers"]:
+            receivers = self.publisher.publish(message)
+            if receivers:
+                print(f"📡 Pushed {room_id} change to {receivers} client(s)")
+        return message
+
+def listen(host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """Reference client: print every message from the publisher"""
+    try:
+        connection = socket.create_connection((host, port))
+    except OSError as e:
+        print(f"❌ Cannot connect to {host}:{port}: {e}")
+        return False
+
+    print(f"📡 Listening to {host}:{port} (Ctrl+C to stop)")
+    try:
+        with connection, connection.makefile('r', encoding='utf-8') as stream:
+            for line in stream:
+                message = json.loads(line)
+                if message.get("type") == "room_delta":
+                    summary = "reload" if message["reload"] else ", ".join(
+                        f"{name}: {', '.join(f'{len(v)} {k}' for k, v in delta.items())}"
+                        for name, delta in message["layers"].items())
+                    print(f"🔄 {message['room']}: {summary}")
+                print(json.dumps(message))
+        print("🛑 Publisher closed the connection")
+    except KeyboardInterrupt:
+        pass
+    return True
+
+def main():
+    """Run the reference listen client"""
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PORT
+    if not listen(port=port):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
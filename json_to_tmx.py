@@ -6,118 +6,248 @@ Converts existing JSON room files back to TMX files for editing in Tiled
 
 import os
 import json
-import xml.etree.ElementTree as ET
+import threading
+import time
 from pathlib import Path
 
-def json_to_tmx(json_file, tmx_file):
-    """Convert a JSON room file to TMX format"""
+from export_trace import stage, traced_file
+from tool_lock import WATCHER_LOCK, FileLock, enqueue_job, running_instance
+
+# JSON files in the rooms directory that are not rooms
+NON_ROOM_FILES = ['enemies.json', 'options.json', 'tuning.json']
+
+# The map element's fixed attributes, in Tiled's order
+MAP_VERSION = '1.10'
+MAP_TILED_VERSION = '1.11.2'
+
+def fix_csv_line(line):
+    """Make a non-empty CSV row end with a comma (Tiled's row format)"""
+    if line.endswith(','):
+        return line
+    if line.strip() and not line.strip().endswith(','):
+        line = line.strip() + ','
+    return line
+
+def iter_csv_lines(layer):
+    """Yield a tile layer's data as TMX CSV lines, without building a copy
+
+    The data is either the CSV string tmx_to_json writes or a flat list of
+    GIDs (Tiled's own JSON format), which is written row by row.
+    """
+    data = layer['data']
+    if isinstance(data, str):
+        start = 0
+        while True:
+            end = data.find('\n', start)
+            if end < 0:
+                yield fix_csv_line(data[start:])
+                return
+            yield fix_csv_line(data[start:end])
+            start = end + 1
+    else:
+        width = layer['width']
+        for row_start in range(0, len(data), width):
+            yield ','.join(map(str, data[row_start:row_start + width])) + ','
+
+def iter_layer_text(layer):
+    """Yield a tile layer's <data> text in pieces (CSV rows and newlines)"""
+    if layer['encoding'] != 'csv':
+        yield layer['data']
+        return
+    for index, line in enumerate(iter_csv_lines(layer)):
+        if index:
+            yield '\n'
+        yield line
+
+def _map_attributes(data):
+    return [
+        ('version', MAP_VERSION),
+        ('tiledversion', MAP_TILED_VERSION),
+        ('orientation', 'orthogonal'),
+        ('renderorder', 'right-down'),
+        ('width', str(data['width'])),
+        ('height', str(data['height'])),
+        ('tilewidth', str(data['tilewidth'])),
+        ('tileheight', str(data['tileheight'])),
+        ('infinite', '0'),
+        ('nextlayerid', str(data['nextlayerid'])),
+        ('nextobjectid', str(data['nextobjectid'])),
+    ]
+
+def _tileset_attributes(tileset):
+    # Fix tileset path - remove ../tiles/ prefix if present
+    source_path = tileset['source']
+    if source_path.startswith('../tiles/'):
+        source_path = source_path.replace('../tiles/', '')
+    return [('firstgid', str(tileset['firstgid'])), ('source', source_path)]
+
+def _object_attributes(obj):
+    attributes = [
+        ('id', str(obj['id'])),
+        ('name', obj['name']),
+        ('type', obj['type']),
+        ('x', str(obj['x'])),
+        ('y', str(obj['y'])),
+        ('width', str(obj['width'])),
+        ('height', str(obj['height'])),
+        ('visible', str(obj['visible']).lower()),
+    ]
+    if obj.get('rotation', 0) != 0:
+        attributes.append(('rotation', str(obj['rotation'])))
+    return attributes
+
+def _property_value(value):
+    # Typed JSON values back to Tiled's text: true/false, not Python's True/False
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return '' if value is None else str(value)
+
+def _property_attributes(prop):
+    return [('name', prop['name']), ('type', prop['type']), ('value', _property_value(prop['value']))]
+
+def _escape_attribute(value):
+    # Same escapes, in the same order, as ElementTree's serializer
+    if '&' in value:
+        value = value.replace('&', '&amp;')
+    if '<' in value:
+        value = value.replace('<', '&lt;')
+    if '>' in value:
+        value = value.replace('>', '&gt;')
+    if '"' in value:
+        value = value.replace('"', '&quot;')
+    if '\r' in value:
+        value = value.replace('\r', '&#13;')
+    if '\n' in value:
+        value = value.replace('\n', '&#10;')
+    if '\t' in value:
+        value = value.replace('\t', '&#09;')
+    return value
+
+def _escape_text(text):
+    if '&' in text:
+        text = text.replace('&', '&amp;')
+    if '<' in text:
+        text = text.replace('<', '&lt;')
+    if '>' in text:
+        text = text.replace('>', '&gt;')
+    return text
+
+def _open_tag(tag, attributes, depth, empty=False):
+    formatted = ''.join(f' {name}="{_escape_attribute(value)}"' for name, value in attributes)
+    return f"\n{' ' * depth}<{tag}{formatted}{' />' if empty else '>'}"
+
+def write_tmx_stream(data, out):
+    """Write a room dict as TMX to a text stream, element by element
+
+    Produces the same text as the ElementTree reference,
+    tmx_reference.render_tmx() (one-space indent, short empty elements),
+    without building a tree: tile data is written a
+    CSV row at a time straight from the layer.
+    """
+    write = out.write
+    write("<?xml version='1.0' encoding='utf-8'?>\n")
+    
+    tilesets = data.get('tilesets', [])
+    layers = [layer for layer in data.get('layers', []) if layer['type'] in ('tilelayer', 'objectgroup')]
+    if not tilesets and not layers:
+        write(_open_tag('map', _map_attributes(data), 0, empty=True)[1:])
+        return
+    write(_open_tag('map', _map_attributes(data), 0)[1:])
+    
+    for tileset in tilesets:
+        write(_open_tag('tileset', _tileset_attributes(tileset), 1, empty=True))
+    
+    for layer_id, layer in enumerate(layers, start=1):
+        if layer['type'] == 'tilelayer':
+            write(_open_tag('layer', [('id', str(layer_id)), ('name', layer['name']),
+                                      ('width', str(layer['width'])), ('height', str(layer['height']))], 1))
+            data_attributes = [('encoding', layer['encoding'])]
+            pieces = iter_layer_text(layer)
+            for piece in pieces:
+                # Leading empty pieces add nothing; an all-empty text is a short empty element
+                if piece:
+                    write(_open_tag('data', data_attributes, 2))
+                    write(_escape_text(piece))
+                    for piece in pieces:
+                        write(_escape_text(piece))
+                    write('</data>')
+                    break
+            else:
+                write(_open_tag('data', data_attributes, 2, empty=True))
+            write('\n </layer>')
+        
+        else:
+            objects = layer.get('objects', [])
+            attributes = [('id', str(layer_id)), ('name', layer['name']),
+                          ('draworder', layer.get('draworder', 'topdown'))]
+            write(_open_tag('objectgroup', attributes, 1, empty=not objects))
+            if not objects:
+                continue
+            for obj in objects:
+                properties = obj.get('properties')
+                write(_open_tag('object', _object_attributes(obj), 2, empty=not properties))
+                if not properties:
+                    continue
+                write('\n   <properties>')
+                for prop in properties:
+                    write(_open_tag('property', _property_attributes(prop), 4, empty=True))
+                write('\n   </properties>')
+                write('\n  </object>')
+            write('\n </objectgroup>')
+    write('\n</map>')
+
+def write_tmx_file(data, tmx_file):
+    """Stream a room dict to tmx_file via a temp file; returns bytes written
+
+    The temp file is moved into place, so Tiled never sees a half-written map.
+    """
+    stage("write")
+    temp_file = f"{tmx_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with FileLock(tmx_file):
+        try:
+            with open(temp_file, 'w', encoding='utf-8', errors='xmlcharrefreplace', newline='\n') as f:
+                write_tmx_stream(data, f)
+            os.replace(temp_file, tmx_file)
+        finally:
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+    return os.path.getsize(tmx_file)
+
+@traced_file("json_to_tmx")
+def json_to_tmx(json_file, tmx_file, stats=None):
+    """Convert a JSON room file to TMX format
+
+    If a stats dict is given it receives parse_s, bytes_written and, on
+    failure, error (the exception type name).
+    """
     print(f"Converting {json_file.name} to {tmx_file.name}...")
+    stats = {} if stats is None else stats
     
     try:
         # Load JSON data
+        stage("parse")
+        parse_start = time.perf_counter()
         with open(json_file, 'r') as f:
             data = json.load(f)
-        
-        # Create TMX root element
-        root = ET.Element('map')
-        root.set('version', '1.10')
-        root.set('tiledversion', '1.11.2')
-        root.set('orientation', 'orthogonal')
-        root.set('renderorder', 'right-down')
-        root.set('width', str(data['width']))
-        root.set('height', str(data['height']))
-        root.set('tilewidth', str(data['tilewidth']))
-        root.set('tileheight', str(data['tileheight']))
-        root.set('infinite', '0')
-        root.set('nextlayerid', str(data['nextlayerid']))
-        root.set('nextobjectid', str(data['nextobjectid']))
-        
-        # Add tilesets
-        for tileset in data.get('tilesets', []):
-            tileset_elem = ET.SubElement(root, 'tileset')
-            tileset_elem.set('firstgid', str(tileset['firstgid']))
-            # Fix tileset path - remove ../tiles/ prefix if present
-            source_path = tileset['source']
-            if source_path.startswith('../tiles/'):
-                source_path = source_path.replace('../tiles/', '')
-            tileset_elem.set('source', source_path)
-        
-        # Add layers
-        layer_id = 1
-        for layer in data.get('layers', []):
-            if layer['type'] == 'tilelayer':
-                layer_elem = ET.SubElement(root, 'layer')
-                layer_elem.set('id', str(layer_id))
-                layer_elem.set('name', layer['name'])
-                layer_elem.set('width', str(layer['width']))
-                layer_elem.set('height', str(layer['height']))
-                
-                # Add data element
-                data_elem = ET.SubElement(layer_elem, 'data')
-                data_elem.set('encoding', layer['encoding'])
-                
-                # Fix CSV format - ensure proper line endings and trailing commas
-                csv_data = layer['data']
-                if layer['encoding'] == 'csv':
-                    # Split into lines and ensure each line ends with a comma
-                    lines = csv_data.split('\n')
-                    fixed_lines = []
-                    for line in lines:
-                        if line.strip() and not line.strip().endswith(','):
-                            line = line.strip() + ','
-                        fixed_lines.append(line)
-                    csv_data = '\n'.join(fixed_lines)
-                
-                data_elem.text = csv_data
-                
-                layer_id += 1
-            
-            elif layer['type'] == 'objectgroup':
-                objectgroup_elem = ET.SubElement(root, 'objectgroup')
-                objectgroup_elem.set('id', str(layer_id))
-                objectgroup_elem.set('name', layer['name'])
-                objectgroup_elem.set('draworder', layer.get('draworder', 'topdown'))
-                
-                # Add objects
-                for obj in layer.get('objects', []):
-                    obj_elem = ET.SubElement(objectgroup_elem, 'object')
-                    obj_elem.set('id', str(obj['id']))
-                    obj_elem.set('name', obj['name'])
-                    obj_elem.set('type', obj['type'])
-                    obj_elem.set('x', str(obj['x']))
-                    obj_elem.set('y', str(obj['y']))
-                    obj_elem.set('width', str(obj['width']))
-                    obj_elem.set('height', str(obj['height']))
-                    obj_elem.set('visible', str(obj['visible']).lower())
-                    
-                    if obj.get('rotation', 0) != 0:
-                        obj_elem.set('rotation', str(obj['rotation']))
-                    
-                    # Add properties
-                    if obj.get('properties'):
-                        properties_elem = ET.SubElement(obj_elem, 'properties')
-                        for prop in obj['properties']:
-                            prop_elem = ET.SubElement(properties_elem, 'property')
-                            prop_elem.set('name', prop['name'])
-                            prop_elem.set('type', prop['type'])
-                            prop_elem.set('value', str(prop['value']))
-                
-                layer_id += 1
+        stats["parse_s"] = time.perf_counter() - parse_start
         
         # Write TMX file
-        tree = ET.ElementTree(root)
-        ET.indent(tree, space=" ", level=0)
-        tree.write(tmx_file, encoding='utf-8', xml_declaration=True)
+        stats["bytes_written"] = write_tmx_file(data, tmx_file)
         
         print(f"✅ Successfully converted {json_file.name} to {tmx_file.name}")
         return True
         
     except Exception as e:
+        stats["error"] = type(e).__name__
         print(f"❌ Error converting {json_file.name}: {e}")
         return False
 
-def convert_all_json_to_tmx():
-    """Convert all JSON room files to TMX files"""
+def convert_all_json_to_tmx(handoff=True):
+    """Convert all JSON room files to TMX files
+
+    If the auto-export watcher is running, the files are queued for it
+    instead (handoff=False converts in this process regardless).
+    """
     rooms_dir = Path("game-godot/data/rooms")
     tiles_dir = Path("tiles")
     
@@ -130,7 +260,7 @@ def convert_all_json_to_tmx():
         return False
     
     # Find all JSON files
-    json_files = [f for f in rooms_dir.glob("*.json") if f.name not in ['enemies.json', 'options.json', 'tuning.json']]
+    json_files = [f for f in rooms_dir.glob("*.json") if f.name not in NON_ROOM_FILES]
     
     if not json_files:
         print("❌ No room JSON files found")
@@ -140,6 +270,13 @@ def convert_all_json_to_tmx():
     for json_file in json_files:
         print(f"  - {json_file.name}")
     
+    watcher = running_instance(WATCHER_LOCK) if handoff else None
+    if watcher and watcher["pid"] != os.getpid():
+        for json_file in json_files:
+            enqueue_job("json_to_tmx", json_file, tiles_dir / (json_file.stem + '.tmx'))
+        print(f"\n🔄 Handed {len(json_files)} files to the running auto-export watcher (pid {watcher['pid']})")
+        return True
+    
     print("\nConverting files...")
     success_count = 0
     
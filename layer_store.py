@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Layer Store
+Content-addressed export of room layers, so identical layers ship once
+
+Many rooms share whole layers verbatim (the walled Collision border, the
+plain Ground floor, A1/A1_new variants). pack_rooms() writes:
+
+    <out>/layers/<key>.json   one tile layer or object group, stored once
+    <out>/rooms/<room>.json   the room with each layer replaced by a reference
+    <out>/index.json          rooms -> layer keys, and which rooms use each layer
+
+A reference keeps the layer's name, type and id so a loader can pick
+layers without fetching them:
+
+    {"name": "Collision", "type": "tilelayer", "id": 2, "layer": "<key>"}
+
+Layer ids are numbered per room, so the stored layer has its id zeroed and
+the reference carries the real one; the same Collision layer at id 2 in
+one room and id 3 in another is stored once. The key is a hash of the
+stored layer's encoded bytes, so a layer file never
+changes once written; loaders can cache layers by key across room loads
+(LayerStore does). expand_room() rebuilds the full room, equal to the
+source room (after minifying when the store uses the minified profile).
+
+pack_rooms() goes through the shared build cache (build_cache.py): each
+room's packed file and layer files are keyed by the room file, the profile
+and this module's source, so an unchanged room is restored instead of
+re-encoded.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import sys
+
+from build_cache import cache_key, get_build_cache, source_version
+from room_data import load_room
+from room_json import dumps, minify_room
+
+STORE_VERSION = 2
+
+# 128 bits of sha256: collisions are not a practical concern for a game's rooms
+KEY_HEX_DIGITS = 32
+
+def layer_key(encoded):
+    """Content key for a layer's encoded JSON text"""
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()[:KEY_HEX_DIGITS]
+
+def is_layer_ref(layer):
+    return isinstance(layer, dict) and 'layer' in layer and 'data' not in layer and 'objects' not in layer
+
+class LayerStore:
+    """Layer files under <root>/layers, read through a per-key cache"""
+
+    def __init__(self, root, profile="minified"):
+        self.root = root
+        self.layers_dir = os.path.join(root, "layers")
+        self.profile = profile
+        self.cache = {}
+
+    def path(self, key):
+        return os.path.join(self.layers_dir, key + ".json")
+
+    def put(self, layer):
+        """Store a layer if it is not there yet; returns (key, bytes, written)"""
+        # Layers are stored as given; pack_room() minifies the room first
+        encoded = dumps(layer, self.profile)
+        key = layer_key(encoded)
+        path = self.path(key)
+        if os.path.exists(path):
+            return key, len(encoded), False
+
+        os.makedirs(self.layers_dir, exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w') as f:
+            f.write(encoded)
+        os.replace(temp_path, path)
+        return key, len(encoded), True
+
+    def get(self, key):
+        """The layer stored under key (cached; treat it as read-only)"""
+        layer = self.cache.get(key)
+        if layer is None:
+            with open(self.path(key), 'r') as f:
+                layer = json.load(f)
+            self.cache[key] = layer
+        return layer
+
+    def keys(self):
+        return {os.path.basename(path)[:-5] for path in glob.glob(os.path.join(self.layers_dir, "*.json"))}
+
+def pack_room(room, store):
+    """Store every layer of a room and return the room with layer references"""
+    if store.profile == "minified":
+        room = minify_room(room)
+    packed = dict(room)
+    packed['layers'] = []
+    written = 0
+    for layer in room.get('layers', []):
+        if 'id' in layer:
+            key, _, is_new = store.put(dict(layer, id=0))
+            reference = {"name": layer.get('name'), "type": layer.get('type'), "id": layer['id'], "layer": key}
+        else:
+            key, _, is_new = store.put(layer)
+            reference = {"name": layer.get('name'), "type": layer.get('type'), "layer": key}
+        written += is_new
+        packed['layers'].append(reference)
+    return packed, written
+
+def expand_room(packed, store):
+    """Rebuild a full room dict from a packed room"""
+    room = dict(packed)
+    room['layers'] = [_expand_layer(layer, store) if is_layer_ref(layer) else layer
+                      for layer in packed.get('layers', [])]
+    return room
+
+def _expand_layer(reference, store):
+    layer = store.get(reference['layer'])
+    return dict(layer, id=reference['id']) if 'id' in reference else layer
+
+def load_packed_room(out_dir, room_id, store=None):
+    """Load and expand one room from a packed export"""
+    store = store or LayerStore(out_dir)
+    with open(os.path.join(out_dir, "rooms", room_id + ".json"), 'r') as f:
+        return expand_room(json.load(f), store)
+
+def _room_files(rooms_dir):
+    from json_to_tmx import NON_ROOM_FILES
+
+    return [path for path in sorted(glob.glob(os.path.join(rooms_dir, "*.json")))
+            if os.path.basename(path) not in NON_ROOM_FILES]
+
+def pack_rooms(rooms_dir="game-godot/data/rooms", out_dir="game-godot/data/packed", profile="minified"):
+    """Export every room with its layers deduplicated into a layer store"""
+    room_files = _room_files(rooms_dir)
+    if not room_files:
+        print(f"❌ No room JSON files found in {rooms_dir}")
+        return False
+
+    store = LayerStore(out_dir, profile)
+    rooms_out = os.path.join(out_dir, "rooms")
+    os.makedirs(rooms_out, exist_ok=True)
+
+    index = {"version": STORE_VERSION, "profile": profile, "rooms": {}, "layers": {}}
+    source_bytes = 0
+    room_bytes = 0
+    written = 0
+    restored = 0
+    cache = get_build_cache()
+    version = source_version("layer_store", "room_data", "room_json")
+    for room_path in room_files:
+        room_id = os.path.splitext(os.path.basename(room_path))[0]
+        room_file = os.path.join("rooms", room_id + ".json")
+        entry_key = None
+        meta = None
+        if cache is not None:
+            entry_key = cache_key("pack", version, [STORE_VERSION, profile], [room_path], [room_file])
+            meta = cache.restore("pack", entry_key, out_dir)
+
+        if meta is not None:
+            layers = meta["layers"]
+            source_bytes += meta["source_bytes"]
+            room_bytes += meta["room_bytes"]
+            restored += 1
+        else:
+            room = load_room(room_path)
+            source_size = len(dumps(room, profile))
+            packed, new_layers = pack_room(room, store)
+            written += new_layers
+            encoded = dumps(packed, profile)
+            with open(os.path.join(out_dir, room_file), 'w') as f:
+                f.write(encoded)
+            layers = packed['layers']
+            source_bytes += source_size
+            room_bytes += len(encoded)
+            if cache is not None:
+                layer_files = [os.path.join("layers", layer['layer'] + ".json") for layer in layers]
+                cache.store("pack", entry_key, out_dir, [room_file] + list(dict.fromkeys(layer_files)),
+                            {"layers": layers, "source_bytes": source_size, "room_bytes": len(encoded)})
+
+        index["rooms"][room_id] = [layer['layer'] for layer in layers]
+        for layer in layers:
+            entry = index["layers"].setdefault(layer['layer'], {"name": layer['name'], "type": layer['type'], "rooms": []})
+            if room_id not in entry["rooms"]:
+                entry["rooms"].append(room_id)
+
+    # Drop rooms and layers that are no longer exported
+    for path in glob.glob(os.path.join(rooms_out, "*.json")):
+        if os.path.basename(path)[:-5] not in index["rooms"]:
+            os.remove(path)
+    for key in store.keys() - set(index["layers"]):
+        os.remove(store.path(key))
+
+    layer_bytes = 0
+    for key, entry in index["layers"].items():
+        entry["bytes"] = os.path.getsize(store.path(key))
+        layer_bytes += entry["bytes"]
+
+    with open(os.path.join(out_dir, "index.json"), 'w') as f:
+        f.write(dumps(index, profile))
+
+    references = sum(len(keys) for keys in index["rooms"].values())
+    packed_bytes = room_bytes + layer_bytes
+    print(f"✅ Packed {len(index['rooms'])} rooms: {references} layers -> {len(index['layers'])} unique "
+          f"({written} new, {restored} rooms from the build cache), {profile} profile")
+    print(f"   {source_bytes} bytes as plain rooms -> {packed_bytes} bytes packed "
+          f"({packed_bytes * 100 / max(source_bytes, 1):.0f}%)")
+    return True
+
+def verify_packed_rooms(rooms_dir="game-godot/data/rooms", out_dir="game-godot/data/packed"):
+    """Check that every packed room expands back to its source room"""
+    with open(os.path.join(out_dir, "index.json"), 'r') as f:
+        profile = json.load(f).get("profile", "minified")
+    store = LayerStore(out_dir, profile)
+
+    problems = 0
+    for room_path in _room_files(rooms_dir):
+        room_id = os.path.splitext(os.path.basename(room_path))[0]
+        expected = load_room(room_path)
+        if profile == "minified":
+            expected = minify_room(expected)
+        try:
+            actual = load_packed_room(out_dir, room_id, store)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"❌ {room_id}: cannot expand ({e})")
+            problems += 1
+            continue
+        if dumps(actual, profile) != dumps(expected, profile):
+            print(f"❌ {room_id}: expanded room differs from {room_path}")
+            problems += 1
+
+    if problems:
+        return False
+    print(f"✅ Every packed room expands to its source ({len(store.cache)} shared layers loaded)")
+    return True
+
+def main():
+    """Pack all rooms, then verify the result"""
+    profile = "pretty" if "--pretty" in sys.argv else "minified"
+    if not pack_rooms(profile=profile) or not verify_packed_rooms():
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Minimap Atlas
+Renders a small thumbnail of every room and packs them into one world atlas
+
+Each tile becomes PIXELS_PER_TILE pixels coloured by its GID class (the
+tileset tile's "type" property, with GID n read as tile n like
+RoomImporter does). Doors are drawn on top. Rooms are placed by door
+connectivity: a door object with a "target" property naming another room
+puts that room on the matching side (north/south/east/west from the door's
+"dir" property or name). Unconnected rooms are laid out in rows underneath.
+
+Thumbnails go through the shared build cache (build_cache.py), keyed by
+the room file, the tileset's tile classes and this module's source, so
+only changed rooms are re-rendered; composing the atlas itself is a blit
+per room. Writes minimap.png and minimap.json (room rectangles) to the
+output directory.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import xml.etree.ElementTree as ET
+from collections import deque
+
+from build_cache import cache_key, get_build_cache, source_version
+from room_data import decode_tile_layer, get_object_kind, get_property, iter_objects, iter_tile_layers, load_room
+from room_json import write_json
+
+MINIMAP_VERSION = 1
+
+PIXELS_PER_TILE = 2
+
+# Spacing between placed rooms, in atlas pixels
+ROOM_GAP_PX = 2
+
+PALETTE = {
+    "empty": (0, 0, 0, 0),
+    "ground": (139, 69, 19, 255),
+    "wall": (64, 64, 64, 255),
+    "door": (230, 190, 60, 255),
+    "unknown": (128, 128, 128, 255),
+}
+
+DIRECTIONS = {
+    "north": (0, -1),
+    "south": (0, 1),
+    "east": (1, 0),
+    "west": (-1, 0),
+}
+
+def load_tile_classes(tsx_path):
+    """Map tile id -> class name from the tileset's "type" properties"""
+    classes = {}
+    if not os.path.exists(tsx_path):
+        return classes
+    for tile in ET.parse(tsx_path).getroot().findall('tile'):
+        for prop in tile.findall('properties/property'):
+            if prop.get('name') == 'type':
+                classes[int(tile.get('id'))] = prop.get('value')
+    return classes
+
+def class_lookup(tile_classes, max_gid):
+    """Array mapping GID -> RGBA colour"""
+    import numpy as np
+
+    lookup = np.tile(np.array(PALETTE["unknown"], dtype=np.uint8), (max_gid + 1, 1))
+    lookup[0] = PALETTE["empty"]
+    for tile_id, class_name in tile_classes.items():
+        if tile_id <= max_gid:
+            lookup[tile_id] = PALETTE.get(class_name, PALETTE["unknown"])
+    return lookup
+
+def render_thumbnail(room, tile_classes, pixels_per_tile=PIXELS_PER_TILE):
+    """Render a room to an RGBA array of (height * ppt, width * ppt)"""
+    import numpy as np
+
+    height = int(room.get('height', 0))
+    width = int(room.get('width', 0))
+    image = np.zeros((height, width, 4), dtype=np.uint8)
+
+    # Later layers draw over earlier ones, like in the game
+    for layer in iter_tile_layers(room):
+        grid = np.array(decode_tile_layer(layer), dtype=np.int64).reshape(height, width)
+        if not grid.any():
+            continue
+        lookup = class_lookup(tile_classes, int(grid.max()))
+        colours = lookup[grid]
+        drawn = grid > 0
+        image[drawn] = colours[drawn]
+
+    tile_width = int(room.get('tilewidth', 32))
+    tile_height = int(room.get('tileheight', 32))
+    for _, obj in iter_objects(room):
+        if not is_door(obj):
+            continue
+        col = int((float(obj.get('x', 0)) + float(obj.get('width', 0)) / 2) // tile_width)
+        row = int((float(obj.get('y', 0)) + float(obj.get('height', 0)) / 2) // tile_height)
+        if 0 <= row < height and 0 <= col < width:
+            image[row, col] = PALETTE["door"]
+
+    if pixels_per_tile > 1:
+        image = image.repeat(pixels_per_tile, axis=0).repeat(pixels_per_tile, axis=1)
+    return image
+
+def is_door(obj):
+    return get_object_kind(obj) == 'door' or obj.get('name', '').startswith('door_')
+
+def door_links(room):
+    """(direction, target_room_id) for every door that names its target"""
+    links = []
+    for _, obj in iter_objects(room):
+        if not is_door(obj):
+            continue
+        target = get_property(obj, 'target') or get_property(obj, 'to')
+        direction = get_property(obj, 'dir') or obj.get('name', '')[len('door_'):]
+        if target and direction in DIRECTIONS:
+            links.append((direction, target))
+    return links
+
+def _overlaps(rect, placed):
+    x, y, w, h = rect
+    for other_x, other_y, other_w, other_h in placed:
+        if x < other_x + other_w + ROOM_GAP_PX and other_x < x + w + ROOM_GAP_PX and \
+                y < other_y + other_h + ROOM_GAP_PX and other_y < y + h + ROOM_GAP_PX:
+            return True
+    return False
+
+def layout_rooms(sizes, links):
+    """Place rooms (id -> (w, h) px) following door links; returns id -> (x, y)"""
+    positions = {}
+    placed = []
+
+    for root in sorted(sizes):
+        if root in positions:
+            continue
+
+        # Each connected component is laid out on its own, then shelved below the others
+        component = {root: (0, 0)}
+        component_rects = [(0, 0, *sizes[root])]
+        queue = deque([root])
+        while queue:
+            room_id = queue.popleft()
+            x, y = component[room_id]
+            width, height = sizes[room_id]
+            for direction, target in links.get(room_id, ()):
+                if target not in sizes or target in component or target in positions:
+                    continue
+                step_x, step_y = DIRECTIONS[direction]
+                target_w, target_h = sizes[target]
+                target_x = x + (width - target_w) // 2 if step_x == 0 else (
+                    x + width + ROOM_GAP_PX if step_x > 0 else x - target_w - ROOM_GAP_PX)
+                target_y = y + (height - target_h) // 2 if step_y == 0 else (
+                    y + height + ROOM_GAP_PX if step_y > 0 else y - target_h - ROOM_GAP_PX)
+
+                # Keep walking in the door's direction until the room fits
+                while _overlaps((target_x, target_y, target_w, target_h), component_rects):
+                    target_x += step_x * (target_w + ROOM_GAP_PX)
+                    target_y += step_y * (target_h + ROOM_GAP_PX)
+
+                component[target] = (target_x, target_y)
+                component_rects.append((target_x, target_y, target_w, target_h))
+                queue.append(target)
+
+        min_x = min(x for x, _, _, _ in component_rects)
+        min_y = min(y for _, y, _, _ in component_rects)
+        offset_y = max((y + h for _, y, _, h in placed), default=-ROOM_GAP_PX) + ROOM_GAP_PX
+        for room_id, (x, y) in component.items():
+            positions[room_id] = (x - min_x, y - min_y + offset_y)
+            placed.append((x - min_x, y - min_y + offset_y, *sizes[room_id]))
+
+    return _pack_singletons(positions, sizes, links)
+
+def _pack_singletons(positions, sizes, links):
+    """Repack rooms with no links into shelves instead of one tall column"""
+    linked = {room_id for room_id, targets in links.items() if targets} | \
+        {target for targets in links.values() for _, target in targets}
+    singles = sorted(room_id for room_id in positions if room_id not in linked)
+    if len(singles) < 2:
+        return positions
+
+    others = {room_id: pos for room_id, pos in positions.items() if room_id not in singles}
+    top = max((y + sizes[room_id][1] for room_id, (_, y) in others.items()), default=-ROOM_GAP_PX) + ROOM_GAP_PX
+    shelf_width = max(max((x + sizes[room_id][0] for room_id, (x, _) in others.items()), default=0),
+                      int((sum(w * h for w, h in (sizes[r] for r in singles))) ** 0.5) * 2)
+
+    x = 0
+    y = top
+    shelf_height = 0
+    for room_id in singles:
+        width, height = sizes[room_id]
+        if x and x + width > shelf_width:
+            x = 0
+            y += shelf_height + ROOM_GAP_PX
+            shelf_height = 0
+        others[room_id] = (x, y)
+        x += width + ROOM_GAP_PX
+        shelf_height = max(shelf_height, height)
+    return others
+
+def build_minimap(rooms_dir="game-godot/data/rooms", out_dir="game-godot/assets/minimap",
+                  tsx_path="tiles/dunjon_tileset.tsx", pixels_per_tile=PIXELS_PER_TILE):
+    """Render changed room thumbnails, lay out the world and write the atlas + index"""
+    import numpy as np
+    from PIL import Image
+
+    room_files = sorted(glob.glob(os.path.join(rooms_dir, "*.json")))
+    if not room_files:
+        print(f"❌ No JSON files found in {rooms_dir}")
+        return False
+
+    os.makedirs(out_dir, exist_ok=True)
+    tile_classes = load_tile_classes(tsx_path)
+    tileset_digest = hashlib.sha256(json.dumps(sorted(tile_classes.items())).encode()).hexdigest()
+    cache = get_build_cache()
+    version = source_version("minimap_atlas", "room_data")
+
+    thumbnails = {}
+    links = {}
+    rendered_count = 0
+    with tempfile.TemporaryDirectory(prefix="dunjon-minimap-") as work_dir:
+        for room_path in room_files:
+            room_id = os.path.splitext(os.path.basename(room_path))[0]
+            thumb_name = room_id + ".png"
+            entry_key = None
+            if cache is not None:
+                entry_key = cache_key("minimap", version, [MINIMAP_VERSION, pixels_per_tile, tileset_digest],
+                                      [room_path], [thumb_name])
+                meta = cache.restore("minimap", entry_key, work_dir)
+                if meta is not None:
+                    thumbnails[room_id] = np.asarray(Image.open(os.path.join(work_dir, thumb_name)).convert('RGBA'))
+                    links[room_id] = [tuple(link) for link in meta["links"]]
+                    continue
+
+            room = load_room(room_path)
+            thumbnails[room_id] = render_thumbnail(room, tile_classes, pixels_per_tile)
+            links[room_id] = door_links(room)
+            rendered_count += 1
+            if cache is not None:
+                Image.fromarray(thumbnails[room_id], 'RGBA').save(os.path.join(work_dir, thumb_name))
+                cache.store("minimap", entry_key, work_dir, [thumb_name], {"links": links[room_id]})
+
+    sizes = {room_id: (image.shape[1], image.shape[0]) for room_id, image in thumbnails.items()}
+    positions = layout_rooms(sizes, links)
+
+    atlas_width = max(x + sizes[room_id][0] for room_id, (x, _) in positions.items())
+    atlas_height = max(y + sizes[room_id][1] for room_id, (_, y) in positions.items())
+    atlas = np.zeros((atlas_height, atlas_width, 4), dtype=np.uint8)
+    index = {
+        "version": MINIMAP_VERSION,
+        "pixels_per_tile": pixels_per_tile,
+        "width": atlas_width,
+        "height": atlas_height,
+        "rooms": {},
+    }
+    for room_id in sorted(positions):
+        x, y = positions[room_id]
+        width, height = sizes[room_id]
+        atlas[y:y + height, x:x + width] = thumbnails[room_id]
+        index["rooms"][room_id] = {"x": x, "y": y, "w": width, "h": height}
+
+    Image.fromarray(atlas, 'RGBA').save(os.path.join(out_dir, "minimap.png"), optimize=True)
+    write_json(os.path.join(out_dir, "minimap.json"), index)
+
+    print(f"✅ Minimap: {len(positions)} rooms ({rendered_count} re-rendered), atlas {atlas_width}x{atlas_height}")
+    if max(atlas_width, atlas_height) > 2048:
+        print("⚠️  Atlas exceeds the 2048 px texture budget; consider fewer pixels per tile")
+    return True
+
+def main():
+    """Build the minimap atlas for all rooms"""
+    if not build_minimap():
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
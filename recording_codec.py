@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+"""
+Recording Codec
+Bit-packed, run-length encoded input recordings (.djrec) and JSONL converters
+
+RecordingManager writes one JSON line per frame with the same boolean keys
+spelled out each time. A .djrec file stores each frame's inputs as two
+bitmasks (which keys are present, which are true) over a key table, and
+collapses consecutive identical frames into one run, so a held button costs a
+few bytes no matter how long it is held.
+
+Layout (all integers unsigned LEB128 varints unless noted):
+
+    header   "DJRC" version:u8 reserved:u8
+    runs     head [present] [gap] values
+             head = run_length << 2 | gap_flag << 1 | present_changed
+    footer   key_count (key_len key_utf8)*
+             index_count (frame_delta offset_delta present)*
+    trailer  footer_offset:u64le frame_count:u64le "DJRE"
+
+A run's frames are numbered from the previous run's end plus gap. Index
+entries point at the run covering every INDEX_INTERVAL-th frame (frame and
+offset before that run, plus the present mask in effect), so seeking decodes
+at most one interval. Readers stream the body in fixed-size blocks.
+"""
+
+import bisect
+import json
+import os
+import struct
+import sys
+
+MAGIC = b"DJRC"
+TRAILER_MAGIC = b"DJRE"
+FORMAT_VERSION = 1
+
+HEADER = struct.Struct('<4sBB')
+TRAILER = struct.Struct('<QQ4s')
+
+INDEX_INTERVAL = 1024
+
+READ_BLOCK_SIZE = 1 << 16
+
+class RecordingFormatError(ValueError):
+    """Raised when a .djrec file is truncated or malformed"""
+
+def encode_varint(value, out):
+    """Append value as a LEB128 varint to a bytearray"""
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def decode_varint(data, pos):
+    """Decode a varint from bytes at pos, returning (value, new_pos)"""
+    result = 0
+    shift = 0
+    while True:
+        if pos >= len(data):
+            raise RecordingFormatError("truncated varint")
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+class RecordingWriter:
+    """Streaming encoder: feed frames one at a time, close() writes the footer"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'wb')
+        self.file.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0))
+        self.offset = HEADER.size
+        self.keys = []
+        self.key_bits = {}
+        self.index = []
+        self.frame_count = 0
+        self.buffer = bytearray()
+
+        self.next_frame = 0          # frame number the next run starts at
+        self.written_present = 0     # present mask as of the last written run
+        self.run = None              # [start_frame, present, values, length]
+        self.next_index_frame = 0
+
+    def _mask(self, inputs):
+        present = 0
+        values = 0
+        for key, value in inputs.items():
+            if not isinstance(value, bool):
+                raise ValueError(f"input '{key}' must be a bool, got {value!r}")
+            bit = self.key_bits.get(key)
+            if bit is None:
+                bit = self.key_bits[key] = 1 << len(self.keys)
+                self.keys.append(key)
+            present |= bit
+            if value:
+                values |= bit
+        return present, values
+
+    def write_frame(self, frame, inputs):
+        """Append one frame; frame numbers must increase"""
+        present, values = self._mask(inputs)
+        run = self.run
+        if run and frame == run[0] + run[3] and run[1] == present and run[2] == values:
+            run[3] += 1
+        else:
+            if run:
+                self._flush_run()
+            if frame < self.next_frame:
+                raise ValueError(f"frame {frame} is out of order (expected >= {self.next_frame})")
+            self.run = [frame, present, values, 1]
+        self.frame_count += 1
+
+    def _flush_run(self):
+        start, present, values, length = self.run
+        gap = start - self.next_frame
+
+        # Index the run if it covers the next checkpoint frame
+        if start + length > self.next_index_frame:
+            self.index.append((self.next_frame, self.offset + len(self.buffer), self.written_present))
+            self.next_index_frame = (start + length) // INDEX_INTERVAL * INDEX_INTERVAL + INDEX_INTERVAL
+
+        present_changed = present != self.written_present
+        encode_varint(length << 2 | (gap > 0) << 1 | present_changed, self.buffer)
+        if present_changed:
+            encode_varint(present, self.buffer)
+            self.written_present = present
+        if gap:
+            encode_varint(gap, self.buffer)
+        encode_varint(values, self.buffer)
+
+        self.next_frame = start + length
+        if len(self.buffer) >= READ_BLOCK_SIZE:
+            self.file.write(self.buffer)
+            self.offset += len(self.buffer)
+            self.buffer = bytearray()
+
+    def close(self):
+        """Flush the last run and write key table, seek index and trailer"""
+        if self.file is None:
+            return
+        if self.run:
+            self._flush_run()
+            self.run = None
+
+        footer_offset = self.offset + len(self.buffer)
+        footer = self.buffer
+        encode_varint(len(self.keys), footer)
+        for key in self.keys:
+            encoded = key.encode('utf-8')
+            encode_varint(len(encoded), footer)
+            footer.extend(encoded)
+
+        encode_varint(len(self.index), footer)
+        last_frame = 0
+        last_offset = 0
+        for frame, offset, present in self.index:
+            encode_varint(frame - last_frame, footer)
+            encode_varint(offset - last_offset, footer)
+            encode_varint(present, footer)
+            last_frame, last_offset = frame, offset
+
+        footer.extend(TRAILER.pack(footer_offset, self.frame_count, TRAILER_MAGIC))
+        self.file.write(footer)
+        self.file.close()
+        self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class RecordingReader:
+    """Streaming decoder with frame seeking through the footer index"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        self.file_size = os.fstat(self.file.fileno()).st_size
+        if self.file_size < HEADER.size + TRAILER.size:
+            raise RecordingFormatError(f"{path}: too short to be a recording")
+
+        magic, version, _ = HEADER.unpack(self.file.read(HEADER.size))
+        if magic != MAGIC:
+            raise RecordingFormatError(f"{path}: not a .djrec file")
+        if version != FORMAT_VERSION:
+            raise RecordingFormatError(f"{path}: unsupported version {version}")
+
+        self.file.seek(self.file_size - TRAILER.size)
+        self.footer_offset, self.frame_count, trailer_magic = TRAILER.unpack(self.file.read(TRAILER.size))
+        if trailer_magic != TRAILER_MAGIC or not HEADER.size <= self.footer_offset <= self.file_size - TRAILER.size:
+            raise RecordingFormatError(f"{path}: missing or corrupt trailer (unfinished recording?)")
+        self._read_footer()
+
+    def _read_footer(self):
+        self.file.seek(self.footer_offset)
+        footer = self.file.read(self.file_size - TRAILER.size - self.footer_offset)
+        key_count, pos = decode_varint(footer, 0)
+        self.keys = []
+        for _ in range(key_count):
+            length, pos = decode_varint(footer, pos)
+            self.keys.append(footer[pos:pos + length].decode('utf-8'))
+            pos += length
+
+        index_count, pos = decode_varint(footer, pos)
+        self.index = []
+        frame = 0
+        offset = 0
+        for _ in range(index_count):
+            frame_delta, pos = decode_varint(footer, pos)
+            offset_delta, pos = decode_varint(footer, pos)
+            present, pos = decode_varint(footer, pos)
+            frame += frame_delta
+            offset += offset_delta
+            self.index.append((frame, offset, present))
+        self.index_frames = [frame for frame, _, _ in self.index]
+
+        # Upper bound on one encoded run: head, present, gap and values varints
+        self.max_run_bytes = 2 * 10 + 2 * (len(self.keys) // 7 + 1)
+
+    def _inputs(self, present, values):
+        inputs = {}
+        for bit, key in enumerate(self.keys):
+            if present >> bit & 1:
+                inputs[key] = bool(values >> bit & 1)
+        return inputs
+
+    def runs(self, offset=HEADER.size, next_frame=0, present=0):
+        """Yield (start_frame, length, inputs) for each run from a body offset"""
+        self.file.seek(offset)
+        data = b''
+        pos = 0
+        remaining = self.footer_offset - offset
+        while remaining > 0 or pos < len(data):
+            # Keep at least one whole run in the buffer
+            if len(data) - pos < self.max_run_bytes and remaining > 0:
+                block = self.file.read(min(READ_BLOCK_SIZE, remaining))
+                remaining -= len(block)
+                data = data[pos:] + block
+                pos = 0
+
+            head, pos = decode_varint(data, pos)
+            if head & 1:
+                present, pos = decode_varint(data, pos)
+            if head & 2:
+                gap, pos = decode_varint(data, pos)
+                next_frame += gap
+            values, pos = decode_varint(data, pos)
+            length = head >> 2
+            yield next_frame, length, self._inputs(present, values)
+            next_frame += length
+
+    def frames(self, start_frame=None):
+        """Yield {"frame", "inputs"} dicts, optionally starting at start_frame"""
+        offset, next_frame, present = HEADER.size, 0, 0
+        if start_frame is not None and self.index:
+            position = bisect.bisect_right(self.index_frames, start_frame) - 1
+            if position >= 0:
+                next_frame, offset, present = self.index[position]
+
+        for run_start, length, inputs in self.runs(offset, next_frame, present):
+            first = run_start if start_frame is None else max(run_start, start_frame)
+            for frame in range(first, run_start + length):
+                yield {"frame": frame, "inputs": dict(inputs)}
+
+    def frame(self, frame_number):
+        """Return the inputs recorded at frame_number, or None if it was not recorded"""
+        for record in self.frames(frame_number):
+            return record["inputs"] if record["frame"] == frame_number else None
+        return None
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def iter_jsonl_frames(jsonl_path):
+    """Stream {"frame", "inputs"} records from a JSONL recording"""
+    with open(jsonl_path, 'r') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{jsonl_path}:{line_number}: {e}") from e
+            yield record
+
+def jsonl_to_recording(jsonl_path, out_path):
+    """Convert a JSONL recording to .djrec; returns the number of frames"""
+    with RecordingWriter(out_path) as writer:
+        for record in iter_jsonl_frames(jsonl_path):
+            writer.write_frame(int(record["frame"]), record.get("inputs", {}))
+        return writer.frame_count
+
+def recording_to_jsonl(recording_path, out_path):
+    """Convert a .djrec file back to JSONL in RecordingManager's layout"""
+    count = 0
+    with RecordingReader(recording_path) as reader, open(out_path, 'w') as out:
+        for record in reader.frames():
+            out.write(json.dumps(record, separators=(',', ':')) + '\n')
+            count += 1
+    return count
+
+def verify_recording(recording_path, jsonl_path=None):
+    """Check a .djrec file's structure and index, and optionally its frames against a JSONL source
+
+    Returns a list of problems (empty when the file is good).
+    """
+    problems = []
+    try:
+        reader = RecordingReader(recording_path)
+    except (OSError, RecordingFormatError) as e:
+        return [str(e)]
+
+    with reader:
+        try:
+            decoded = 0
+            checkpoints = {}
+            for record in reader.frames():
+                if decoded % INDEX_INTERVAL == 0:
+                    checkpoints[record["frame"]] = record["inputs"]
+                decoded += 1
+            if decoded != reader.frame_count:
+                problems.append(f"trailer says {reader.frame_count} frames, body decodes {decoded}")
+
+            for frame, offset, _ in reader.index:
+                if not HEADER.size <= offset < reader.footer_offset:
+                    problems.append(f"index entry for frame {frame} points outside the body ({offset})")
+
+            # Seeking through the index must agree with a full decode
+            for frame, inputs in checkpoints.items():
+                if reader.frame(frame) != inputs:
+                    problems.append(f"seeking to frame {frame} disagrees with a full decode")
+                    break
+        except RecordingFormatError as e:
+            problems.append(str(e))
+
+        if jsonl_path and not problems:
+            source = iter_jsonl_frames(jsonl_path)
+            for record in reader.frames():
+                expected = next(source, None)
+                if expected is None:
+                    problems.append(f"frame {record['frame']} is not in {jsonl_path}")
+                    break
+                if int(expected["frame"]) != record["frame"] or expected.get("inputs", {}) != record["inputs"]:
+                    problems.append(f"frame {expected['frame']} differs: {expected.get('inputs')} != {record['inputs']}")
+                    break
+            else:
+                if next(source, None) is not None:
+                    problems.append(f"{jsonl_path} has frames missing from the recording")
+
+    return problems
+
+def recording_info(recording_path):
+    """Summary dict: frames, runs, keys, sizes"""
+    with RecordingReader(recording_path) as reader:
+        run_count = sum(1 for _ in reader.runs())
+        last_frame = -1
+        for start, length, _ in reader.runs():
+            last_frame = start + length - 1
+        return {
+            "frames": reader.frame_count,
+            "last_frame": last_frame,
+            "runs": run_count,
+            "keys": reader.keys,
+            "index_entries": len(reader.index),
+            "bytes": reader.file_size,
+        }
+
+def main():
+    """Usage: recording_codec.py encode|decode|verify|info <file> [out]"""
+    if len(sys.argv) < 3 or sys.argv[1] not in ("encode", "decode", "verify", "info"):
+        print("Usage: python recording_codec.py encode <in.jsonl> [out.djrec]")
+        print("       python recording_codec.py decode <in.djrec> [out.jsonl]")
+        print("       python recording_codec.py verify <in.djrec> [source.jsonl]")
+        print("       python recording_codec.py info <in.djrec>")
+        sys.exit(1)
+
+    action, path = sys.argv[1], sys.argv[2]
+    extra = sys.argv[3] if len(sys.argv) > 3 else None
+    if action == "encode":
+        out_path = extra or os.path.splitext(path)[0] + ".djrec"
+        frames = jsonl_to_recording(path, out_path)
+        print(f"✅ {path} -> {out_path}: {frames} frames, {os.path.getsize(path)} -> {os.path.getsize(out_path)} bytes")
+    elif action == "decode":
+        out_path = extra or os.path.splitext(path)[0] + ".jsonl"
+        frames = recording_to_jsonl(path, out_path)
+        print(f"✅ {path} -> {out_path}: {frames} frames")
+    elif action == "verify":
+        problems = verify_recording(path, extra)
+        for problem in problems:
+            print(f"❌ {problem}")
+        if problems:
+            sys.exit(1)
+        print(f"✅ {path} is valid")
+    else:
+        for key, value in recording_info(path).items():
+            print(f"{key}: {value}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Replay Harness
+Runs a directory of input recordings through the game in parallel
+
+Each recording is run by a runner command (headless Godot by default, the
+same invocation as tools/replay-runner.js). The command is a template:
+{recording} is replaced with the recording's absolute path and {digest} with
+the digest log Main.gd writes next to it (<name>.digest.jsonl). Any stand-in
+script that takes a recording and writes a digest works, so the harness can
+be exercised without Godot.
+
+Recordings are split into deterministic shards (for splitting across CI
+machines) and each shard runs on N concurrent workers. Exit codes, timings,
+retry counts and digest hashes go into one JSON report. Passing a previous
+report as a baseline flags recordings whose digest changed.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import shlex
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+DEFAULT_RUNNER = "godot --headless --path game-godot -- --replay {recording}"
+
+DEFAULT_TIMEOUT_S = 300
+
+# Characters of runner output kept in the report for failed runs
+OUTPUT_TAIL_CHARS = 2000
+
+def find_recordings(recordings_dir="recordings"):
+    """Sorted input recordings in a directory (digest logs and last.jsonl excluded)"""
+    recordings = []
+    for path in sorted(glob.glob(os.path.join(recordings_dir, "*.jsonl"))):
+        name = os.path.basename(path)
+        if name.endswith(".digest.jsonl") or name == "last.jsonl":
+            continue
+        recordings.append(path)
+    return recordings
+
+def shard_recordings(recordings, shard_index=0, shard_count=1):
+    """Every shard_count-th recording starting at shard_index"""
+    if not 0 <= shard_index < shard_count:
+        raise ValueError(f"shard {shard_index} is out of range for {shard_count} shards")
+    return recordings[shard_index::shard_count]
+
+def digest_path_for(recording_path):
+    """Where Main.gd writes the digest log for a recording"""
+    return recording_path.replace(".jsonl", ".digest.jsonl")
+
+def hash_digest_log(path):
+    """(sha256, frame_count) of a digest log, or (None, 0) if it was not written"""
+    if not os.path.exists(path):
+        return None, 0
+    digest = hashlib.sha256()
+    frames = 0
+    with open(path, 'rb') as f:
+        for line in f:
+            line = line.rstrip(b'\r\n')
+            if line.strip():
+                digest.update(line + b'\n')
+                frames += 1
+    return digest.hexdigest(), frames
+
+def build_command(runner, recording_path):
+    """Expand the runner template into an argument list"""
+    recording_path = os.path.abspath(recording_path)
+    return [
+        part.replace("{recording}", recording_path).replace("{digest}", digest_path_for(recording_path))
+        for part in shlex.split(runner, posix=os.name != 'nt')
+    ]
+
+def run_recording(recording_path, runner=DEFAULT_RUNNER, timeout_s=DEFAULT_TIMEOUT_S, retries=0):
+    """Run one recording (retrying failures) and return its report entry"""
+    command = build_command(runner, recording_path)
+    digest_path = digest_path_for(os.path.abspath(recording_path))
+    result = {"recording": recording_path, "command": command, "attempts": 0}
+
+    start = time.perf_counter()
+    for attempt in range(retries + 1):
+        result["attempts"] = attempt + 1
+        if os.path.exists(digest_path):
+            os.remove(digest_path)
+
+        attempt_start = time.perf_counter()
+        try:
+            completed = subprocess.run(command, capture_output=True, text=True, errors='replace', timeout=timeout_s)
+            result["status"] = "passed" if completed.returncode == 0 else "failed"
+            result["exit_code"] = completed.returncode
+            output = completed.stdout + completed.stderr
+        except subprocess.TimeoutExpired as e:
+            result["status"] = "timeout"
+            result["exit_code"] = None
+            # The partial output is bytes even with text=True, and either stream may be None
+            output = "".join(part.decode('utf-8', 'replace') if isinstance(part, bytes) else part
+                             for part in (e.stdout, e.stderr) if part)
+        except OSError as e:
+            result["status"] = "error"
+            result["exit_code"] = None
+            output = f"{type(e).__name__}: {e}"
+        result["attempt_s"] = round(time.perf_counter() - attempt_start, 3)
+
+        if result["status"] == "passed":
+            result.pop("output_tail", None)
+            break
+        result["output_tail"] = output[-OUTPUT_TAIL_CHARS:]
+
+    result["duration_s"] = round(time.perf_counter() - start, 3)
+    result["digest_sha256"], result["digest_frames"] = hash_digest_log(digest_path)
+    return result
+
+def load_baseline_digests(baseline_path):
+    """recording -> digest hash from a previous report"""
+    with open(baseline_path, 'r') as f:
+        report = json.load(f)
+    return {os.path.basename(entry["recording"]): entry.get("digest_sha256") for entry in report.get("results", [])}
+
+def run_harness(recordings_dir="recordings", runner=DEFAULT_RUNNER, workers=None, timeout_s=DEFAULT_TIMEOUT_S,
+                retries=0, fail_fast=False, shard_index=0, shard_count=1, report_path="replay_report.json",
+                baseline_path=None):
+    """Run every recording in the shard and write a JSON report; returns True if all passed"""
+    recordings = shard_recordings(find_recordings(recordings_dir), shard_index, shard_count)
+    if not recordings:
+        print(f"❌ No recordings found in {recordings_dir}")
+        return False
+
+    workers = workers or min(len(recordings), os.cpu_count() or 1)
+    baseline = load_baseline_digests(baseline_path) if baseline_path else {}
+    print(f"🔄 Running {len(recordings)} recordings (shard {shard_index + 1}/{shard_count}) on {workers} workers")
+
+    start = time.perf_counter()
+    results = []
+    stopped = False
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_recording, path, runner, timeout_s, retries): path for path in recordings}
+        for future in as_completed(futures):
+            if future.cancelled():
+                continue
+            result = future.result()
+
+            expected = baseline.get(os.path.basename(result["recording"]))
+            if result["status"] == "passed" and expected and expected != result["digest_sha256"]:
+                result["status"] = "digest_changed"
+                result["baseline_sha256"] = expected
+            results.append(result)
+
+            icon = "✅" if result["status"] == "passed" else "❌"
+            print(f"{icon} {os.path.basename(result['recording'])}: {result['status']} "
+                  f"(exit {result['exit_code']}, {result['duration_s']:.2f} s, attempts {result['attempts']})")
+
+            if result["status"] != "passed" and fail_fast and not stopped:
+                stopped = True
+                for other in futures:
+                    other.cancel()
+                print("⚠️  Fail-fast: remaining recordings skipped")
+
+    finished = {result["recording"] for result in results}
+    for path in recordings:
+        if path not in finished:
+            results.append({"recording": path, "status": "skipped"})
+    results.sort(key=lambda entry: entry["recording"])
+
+    summary = {}
+    for result in results:
+        summary[result["status"]] = summary.get(result["status"], 0) + 1
+
+    report = {
+        "runner": runner,
+        "workers": workers,
+        "shard": [shard_index, shard_count],
+        "timeout_s": timeout_s,
+        "retries": retries,
+        "wall_s": round(time.perf_counter() - start, 3),
+        "summary": summary,
+        "results": results,
+    }
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    passed = summary.get("passed", 0)
+    print(f"{'🎉' if passed == len(recordings) else '❌'} {passed}/{len(recordings)} passed "
+          f"in {report['wall_s']:.2f} s - report: {report_path}")
+    return passed == len(recordings)
+
+def main():
+    """Run all recordings in recordings/ with the default runner"""
+    if not run_harness():
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
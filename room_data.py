@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Room Data Helpers
+Shared accessors for Tiled room JSON (layers, tile grids, objects, properties)
+"""
+
+import json
+
+# Tiled stores flip/rotation flags in the top bits of each GID
+GID_FLAG_MASK = 0xE0000000
+GID_MASK = 0x1FFFFFFF
+
+def load_room(file_path):
+    """Load a room JSON file into a dict (object tables expanded to object lists)"""
+    with open(file_path, 'r') as f:
+        room = json.load(f)
+    if isinstance(room, dict) and any('objecttable' in layer for layer in room.get('layers', [])):
+        from room_objects import expand_object_tables
+        expand_object_tables(room)
+    return room
+
+def find_layer(room, name, layer_type=None):
+    """Return the first layer called name (optionally of layer_type), or None"""
+    for layer in room.get('layers', []):
+        if layer.get('name') == name and (layer_type is None or layer.get('type') == layer_type):
+            return layer
+    return None
+
+def iter_tile_layers(room):
+    """Yield every tile layer in the room"""
+    for layer in room.get('layers', []):
+        if layer.get('type') == 'tilelayer':
+            yield layer
+
+def iter_objects(room, layer_names=None):
+    """Yield (layer_name, object) for objects in every (or the named) object group"""
+    for layer in room.get('layers', []):
+        if layer.get('type') != 'objectgroup':
+            continue
+        if layer_names is not None and layer.get('name') not in layer_names:
+            continue
+        for obj in layer.get('objects', []):
+            yield layer.get('name'), obj
+
+def decode_tile_layer(layer, keep_flags=False):
+    """Decode a tile layer's data into a list of rows of GIDs
+
+    Accepts both the CSV string our exporters write and the plain integer
+    list Tiled itself writes for JSON maps. Flip flags are stripped unless
+    keep_flags is set. Short or missing rows are padded with 0 so the grid
+    is always width x height.
+    """
+    width = int(layer.get('width', 0))
+    height = int(layer.get('height', 0))
+    data = layer.get('data', '')
+    mask = 0xFFFFFFFF if keep_flags else GID_MASK
+
+    if isinstance(data, list):
+        values = [gid & mask for gid in data]
+        rows = [values[y * width:(y + 1) * width] for y in range(height)]
+    else:
+        rows = []
+        for line in data.split('\n')[:height]:
+            cells = [cell for cell in line.split(',') if cell.strip()]
+            rows.append([int(cell) & mask for cell in cells[:width]])
+
+    while len(rows) < height:
+        rows.append([])
+    for row in rows:
+        if len(row) < width:
+            row.extend([0] * (width - len(row)))
+    return rows
+
+def encode_csv_rows(rows):
+    """Encode rows in the CSV layout our exporters write (trailing comma on all but the last row)"""
+    return ',\n'.join(','.join(str(gid) for gid in row) for row in rows)
+
+def get_property(obj, name, default=None):
+    """Return the value of a named custom property on an object"""
+    for prop in obj.get('properties', []):
+        if prop.get('name') == name:
+            return prop.get('value')
+    return default
+
+def get_object_kind(obj):
+    """Return an object's gameplay type, preferring the 'type' property
+
+    RoomImporter reads the 'type' property, so it wins over Tiled's own
+    object type/class field.
+    """
+    return get_property(obj, 'type') or obj.get('type', '')
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Room Spatial Index
+Uniform grid hash over a room's objects and tile layers for placement queries
+
+Built once per room and shared by the validators (validate_rooms,
+room_semantics) and the visibility export (room_visibility) so rules such
+as "spawn not inside a wall" or "door on the room edge" are answered from a
+few grid cells instead of nested scans over every object and tile.
+
+The other exporters visit each object exactly once (export_targets and
+layer_store copy object groups whole, the minimap draws every door,
+bake_layers only reads tiles), so they have no lookups for it to speed up
+and building it would be pure overhead.
+"""
+
+import math
+
+from room_data import decode_tile_layer, get_object_kind, iter_objects, iter_tile_layers
+
+class IndexedObject:
+    """An object from an object group with its bounding box in pixels"""
+
+    __slots__ = ('layer', 'obj', 'left', 'top', 'right', 'bottom')
+
+    def __init__(self, layer, obj):
+        self.layer = layer
+        self.obj = obj
+        self.left = float(obj.get('x', 0))
+        self.top = float(obj.get('y', 0))
+        self.right = self.left + float(obj.get('width', 0))
+        self.bottom = self.top + float(obj.get('height', 0))
+
+    @property
+    def kind(self):
+        return get_object_kind(self.obj)
+
+    @property
+    def center(self):
+        return ((self.left + self.right) / 2, (self.top + self.bottom) / 2)
+
+    def contains(self, x, y):
+        """True if the point lies inside the box (zero-size boxes match their anchor)"""
+        if self.right == self.left and self.bottom == self.top:
+            return x == self.left and y == self.top
+        return self.left <= x < self.right and self.top <= y < self.bottom
+
+    def overlaps(self, left, top, right, bottom):
+        """True if the box intersects the half-open rect [left, right) x [top, bottom)"""
+        if self.right == self.left and self.bottom == self.top:
+            return left <= self.left < right and top <= self.top < bottom
+        return self.left < right and left < self.right and self.top < bottom and top < self.bottom
+
+    def distance_to(self, x, y):
+        """Euclidean distance from the point to the closest edge of the box"""
+        dx = max(self.left - x, 0.0, x - self.right)
+        dy = max(self.top - y, 0.0, y - self.bottom)
+        return math.hypot(dx, dy)
+
+class RoomSpatialIndex:
+    """Grid hash sized to the room's tiles over objects plus decoded tile layers"""
+
+    def __init__(self, room, object_layers=('Entities', 'Metadata')):
+        self.tile_width = int(room.get('tilewidth', 32))
+        self.tile_height = int(room.get('tileheight', 32))
+        self.width_tiles = int(room.get('width', 0))
+        self.height_tiles = int(room.get('height', 0))
+        self.width_px = self.width_tiles * self.tile_width
+        self.height_px = self.height_tiles * self.tile_height
+
+        self.objects = []
+        self.objects_by_kind = {}
+        self._cells = {}
+        self._cell_bounds = None
+        self.tile_layers = {}
+
+        for layer in iter_tile_layers(room):
+            self.tile_layers[layer.get('name')] = decode_tile_layer(layer)
+
+        for layer_name, obj in iter_objects(room, object_layers):
+            self._insert(IndexedObject(layer_name, obj))
+
+    def _cell_range(self, left, top, right, bottom):
+        """Cells touched by a box; zero-size boxes map to the cell of their anchor"""
+        first_col = math.floor(left / self.tile_width)
+        first_row = math.floor(top / self.tile_height)
+        last_col = max(first_col, math.ceil(right / self.tile_width) - 1)
+        last_row = max(first_row, math.ceil(bottom / self.tile_height) - 1)
+        return first_col, first_row, last_col, last_row
+
+    def _insert(self, entry):
+        self.objects.append(entry)
+        self.objects_by_kind.setdefault(entry.kind, []).append(entry)
+
+        first_col, first_row, last_col, last_row = self._cell_range(entry.left, entry.top, entry.right, entry.bottom)
+        for row in range(first_row, last_row + 1):
+            for col in range(first_col, last_col + 1):
+                self._cells.setdefault((col, row), []).append(entry)
+
+        if self._cell_bounds is None:
+            self._cell_bounds = (first_col, first_row, last_col, last_row)
+        else:
+            min_col, min_row, max_col, max_row = self._cell_bounds
+            self._cell_bounds = (min(min_col, first_col), min(min_row, first_row),
+                                 max(max_col, last_col), max(max_row, last_row))
+
+    def _candidates(self, left, top, right, bottom):
+        """Unique objects registered in the cells a box touches"""
+        seen = set()
+        first_col, first_row, last_col, last_row = self._cell_range(left, top, right, bottom)
+        for row in range(first_row, last_row + 1):
+            for col in range(first_col, last_col + 1):
+                for entry in self._cells.get((col, row), ()):
+                    if id(entry) not in seen:
+                        seen.add(id(entry))
+                        yield entry
+
+    # Object queries
+
+    def objects_at(self, x, y):
+        """Objects whose box contains the point (x, y)"""
+        return [entry for entry in self._candidates(x, y, x, y) if entry.contains(x, y)]
+
+    def objects_in_rect(self, x, y, width, height):
+        """Objects whose box overlaps the rect at (x, y) of the given size"""
+        right = x + width
+        bottom = y + height
+        return [entry for entry in self._candidates(x, y, right, bottom) if entry.overlaps(x, y, right, bottom)]
+
+    def objects_of_kind(self, kind):
+        """Objects whose gameplay type (see get_object_kind) equals kind"""
+        return list(self.objects_by_kind.get(kind, ()))
+
+    def nearest_object(self, x, y, max_distance=None, predicate=None):
+        """Closest object to (x, y), searching outward ring by ring over grid cells"""
+        if not self.objects:
+            return None
+
+        center_col = math.floor(x / self.tile_width)
+        center_row = math.floor(y / self.tile_height)
+        cell_size = min(self.tile_width, self.tile_height)
+        min_col, min_row, max_col, max_row = self._cell_bounds
+        max_ring = max(abs(min_col - center_col), abs(max_col - center_col),
+                       abs(min_row - center_row), abs(max_row - center_row))
+        if max_distance is not None:
+            max_ring = min(max_ring, int(max_distance // cell_size) + 1)
+
+        best = None
+        best_distance = math.inf
+        seen = set()
+        for ring in range(max_ring + 1):
+            # Anything in a farther ring is at least (ring - 1) cells away
+            if best is not None and (ring - 1) * cell_size > best_distance:
+                break
+            for col, row in self._ring_cells(center_col, center_row, ring):
+                for entry in self._cells.get((col, row), ()):
+                    if id(entry) in seen:
+                        continue
+                    seen.add(id(entry))
+                    if predicate is not None and not predicate(entry):
+                        continue
+                    distance = entry.distance_to(x, y)
+                    if distance < best_distance:
+                        best = entry
+                        best_distance = distance
+
+        if best is None or (max_distance is not None and best_distance > max_distance):
+            return None
+        return best
+
+    @staticmethod
+    def _ring_cells(center_col, center_row, ring):
+        if ring == 0:
+            yield center_col, center_row
+            return
+        for col in range(center_col - ring, center_col + ring + 1):
+            yield col, center_row - ring
+            yield col, center_row + ring
+        for row in range(center_row - ring + 1, center_row + ring):
+            yield center_col - ring, row
+            yield center_col + ring, row
+
+    # Tile queries
+
+    def tile_at(self, layer_name, x, y):
+        """GID of the tile under pixel (x, y) in a layer (0 if empty or out of bounds)"""
+        rows = self.tile_layers.get(layer_name)
+        col = math.floor(x / self.tile_width)
+        row = math.floor(y / self.tile_height)
+        if rows is None or not (0 <= row < self.height_tiles and 0 <= col < self.width_tiles):
+            return 0
+        return rows[row][col]
+
+    def tiles_in_rect(self, layer_name, x, y, width, height):
+        """Yield (col, row, gid) for non-empty tiles of a layer overlapping the rect"""
+        rows = self.tile_layers.get(layer_name)
+        if rows is None:
+            return
+        first_col, first_row, last_col, last_row = self._cell_range(x, y, x + width, y + height)
+        for row in range(max(first_row, 0), min(last_row, self.height_tiles - 1) + 1):
+            for col in range(max(first_col, 0), min(last_col, self.width_tiles - 1) + 1):
+                gid = rows[row][col]
+                if gid:
+                    yield col, row, gid
+
+    def is_blocked(self, entry, layer_name='Collision'):
+        """True if any tile of the layer lies under the object's box"""
+        width = entry.right - entry.left
+        height = entry.bottom - entry.top
+        return next(self.tiles_in_rect(layer_name, entry.left, entry.top, width, height), None) is not None
+
+    # Bounds queries
+
+    def is_inside_room(self, entry):
+        """True if the object's box lies fully inside the map"""
+        return (entry.left >= 0 and entry.top >= 0 and
+                entry.right <= self.width_px and entry.bottom <= self.height_px and
+                entry.left < self.width_px and entry.top < self.height_px)
+
+    def is_on_edge(self, entry):
+        """True if the object's box touches the outer row/column of tiles"""
+        first_col, first_row, last_col, last_row = self._cell_range(entry.left, entry.top, entry.right, entry.bottom)
+        return (first_col <= 0 or first_row <= 0 or
+                last_col >= self.width_tiles - 1 or last_row >= self.height_tiles - 1)
+
+def build_room_index(room):
+    """Build the spatial index for a loaded room dict"""
+    return RoomSpatialIndex(room)
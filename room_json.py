@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Room JSON Serialization
+One place that turns room (and other tool) dicts into JSON text
+
+Two output profiles:
+
+    pretty    indent=2, every field kept. Byte-identical to
+              json.dump(data, f, indent=2); used for the checked-in rooms
+              so diffs stay readable.
+    minified  no whitespace, and fields equal to Tiled's defaults dropped
+              (layer opacity/visible/offsets/parallax, object rotation and
+              visibility, empty property lists...). For shipping builds:
+              smaller files and less for RoomImporter to parse. Everything
+              the game reads (sizes, layer names/types/data, object x/y,
+              properties) is always kept.
+
+orjson is used when it is installed. Its output is only accepted when it is
+guaranteed to match the stdlib's (pure ASCII without DEL, no exponent floats,
+no null that could have been a NaN); anything else is re-encoded with the
+stdlib, so both backends produce the same bytes.
+"""
+
+import json
+import re
+import sys
+import time
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+PROFILES = ("pretty", "minified")
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+# Values Tiled assumes when a field is missing
+MAP_DEFAULTS = {
+    "compressionlevel": -1,
+    "infinite": False,
+    "orientation": "orthogonal",
+    "renderorder": "right-down",
+}
+LAYER_DEFAULTS = {
+    "opacity": 1,
+    "visible": True,
+    "x": 0,
+    "y": 0,
+    "offsetx": 0,
+    "offsety": 0,
+    "parallaxx": 1,
+    "parallaxy": 1,
+    "draworder": "topdown",
+}
+OBJECT_DEFAULTS = {
+    "rotation": 0,
+    "visible": True,
+}
+
+# orjson writes these floats differently (1e16 / 0.00001 vs 1e+16 / 1e-05).
+# Folding digits and signs to '0' turns every candidate into '0e0' or
+# '0.0000', two plain substring tests; the regex confirms a hit.
+_ORJSON_MISMATCH = re.compile(rb'\d[eE][-+]?\d|0\.0000')
+_FOLD_DIGITS = bytes.maketrans(b'123456789+-', b'0' * 11)
+
+def _orjson_matches_stdlib(encoded):
+    # orjson escapes the same control characters as json (and the same way),
+    # except DEL, which it writes raw where json writes \u007f
+    if not encoded.isascii() or b'\x7f' in encoded or b'null' in encoded:
+        return False
+    folded = encoded.translate(_FOLD_DIGITS)
+    if b'0e0' in folded or b'0.0000' in folded:
+        return _ORJSON_MISMATCH.search(encoded) is None
+    return True
+
+def _is_default(value, default):
+    # 1 == 1.0 is a default, True == 1 is not
+    return value == default and isinstance(value, bool) == isinstance(default, bool)
+
+def _drop_defaults(data, defaults):
+    return {key: value for key, value in data.items()
+            if not (key in defaults and _is_default(value, defaults[key]))}
+
+def minify_room(room):
+    """Copy of a room dict without the fields that equal Tiled's defaults"""
+    if not isinstance(room, dict) or not isinstance(room.get('layers'), list):
+        return room
+
+    minified = _drop_defaults(room, MAP_DEFAULTS)
+    layers = []
+    for layer in room['layers']:
+        layer = _drop_defaults(layer, LAYER_DEFAULTS)
+        if not layer.get('properties', True):
+            del layer['properties']
+        if 'objects' in layer:
+            objects = []
+            for obj in layer['objects']:
+                obj = _drop_defaults(obj, OBJECT_DEFAULTS)
+                if not obj.get('properties', True):
+                    del obj['properties']
+                objects.append(obj)
+            layer['objects'] = objects
+        layers.append(layer)
+    minified['layers'] = layers
+    return minified
+
+def _stdlib_dumps(data, profile):
+    if profile == "pretty":
+        return json.dumps(data, indent=2)
+    return json.dumps(data, separators=(',', ':'))
+
+def dumps(data, profile="pretty", backend=None):
+    """Encode data as JSON text in the given profile
+
+    The minified profile only changes the structure of room dicts; other
+    data is just written without whitespace.
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown JSON profile {profile!r} (expected one of {', '.join(PROFILES)})")
+    if profile == "minified":
+        data = minify_room(data)
+
+    backend = backend or BACKEND
+    if backend == "orjson" and orjson is not None:
+        try:
+            encoded = orjson.dumps(data, option=orjson.OPT_INDENT_2 if profile == "pretty" else 0)
+        except TypeError:
+            encoded = None  # e.g. non-string keys or huge ints; the stdlib handles them
+        if encoded is not None and _orjson_matches_stdlib(encoded):
+            return encoded.decode('ascii')
+    return _stdlib_dumps(data, profile)
+
+def write_json(path, data, profile="pretty"):
+    """Encode data and write it to path; returns the number of characters written"""
+    text = dumps(data, profile)
+    with open(path, 'w') as f:
+        f.write(text)
+    return len(text)
+
+def benchmark_profiles(rooms, iterations=20):
+    """Encode time, decode time and size per profile and backend
+
+    rooms is a list of room dicts. Returns a list of result dicts.
+    """
+    backends = ["json"] + (["orjson"] if orjson is not None else [])
+    results = []
+    for profile in PROFILES:
+        for backend in backends:
+            texts = [dumps(room, profile, backend) for room in rooms]
+            start = time.perf_counter()
+            for _ in range(iterations):
+                for room in rooms:
+                    dumps(room, profile, backend)
+            encode_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for _ in range(iterations):
+                for text in texts:
+                    json.loads(text)
+            decode_s = time.perf_counter() - start
+
+            runs = len(rooms) * iterations
+            results.append({
+                "profile": profile,
+                "backend": backend,
+                "encode_ms": encode_s * 1000 / runs,
+                "decode_ms": decode_s * 1000 / runs,
+                "bytes": sum(len(text) for text in texts) / len(rooms),
+            })
+    return results
+
+def print_benchmark(results):
+    """Print benchmark_profiles() results as a table"""
+    baseline = next((r["bytes"] for r in results if r["profile"] == "pretty"), None)
+    print(f"{'profile':<10} {'backend':<8} {'encode ms/room':>15} {'parse ms/room':>14} {'bytes/room':>11} {'size':>6}")
+    for r in results:
+        size = f"{r['bytes'] * 100 / baseline:5.0f}%" if baseline else ""
+        print(f"{r['profile']:<10} {r['backend']:<8} {r['encode_ms']:>15.3f} {r['decode_ms']:>14.3f} "
+              f"{r['bytes']:>11.0f} {size:>6}")
+
+def main():
+    """Benchmark the profiles on the rooms in game-godot/data/rooms"""
+    import glob
+    import os
+
+    from json_to_tmx import NON_ROOM_FILES
+
+    rooms_dir = sys.argv[1] if len(sys.argv) > 1 else "game-godot/data/rooms"
+    rooms = []
+    for path in sorted(glob.glob(os.path.join(rooms_dir, "*.json"))):
+        if os.path.basename(path) not in NON_ROOM_FILES:
+            with open(path, 'r') as f:
+                rooms.append(json.load(f))
+    if not rooms:
+        print(f"❌ No rooms found in {rooms_dir}")
+        sys.exit(1)
+
+    print(f"JSON profiles on {len(rooms)} rooms (fast backend: {BACKEND})")
+    print("=" * 70)
+    print_benchmark(benchmark_profiles(rooms))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,488 @@
+#!/usr/bin/env python3
+"""
+Room Object Tables
+Typed custom properties and a compact column store for object groups
+
+Tiled declares a type on every custom property (string, int, float, bool,
+color, file, object, class) but writes the value as text in TMX.
+coerce_property() turns that text into the JSON value Tiled itself would
+write, once, at conversion time, so the game never re-parses "3" or
+"true".
+
+ObjectTable holds one object group as parallel arrays instead of a dict
+per object: numbers in array.array columns, names, types and string
+values interned in one string table, and properties stored flat with a
+start offset per object. A map with thousands of entities costs a few
+dozen bytes per object instead of several hundred. A table converts back
+to Tiled object dicts, and serializes as column JSON or as a little-endian
+binary blob (to_bytes / from_bytes).
+
+Export targets choose how object groups are written with the "objects"
+export option (see export_targets.py): "dicts" keeps Tiled's object list,
+"columns" and "binary" replace it with an "objecttable" key holding
+to_columns() or the base64 to_bytes() blob. expand_object_tables() turns
+either back into object lists; room_data.load_room() calls it, so every
+tool reads all three forms.
+"""
+
+import array
+import base64
+import json
+import os
+import struct
+import sys
+
+PROPERTY_TYPES = ("string", "int", "float", "bool", "color", "file", "object", "class")
+
+# Object fields kept in columns; anything else (gid, polygon, template...) is kept per object
+OBJECT_FIELDS = ("height", "id", "name", "properties", "rotation", "type", "visible", "width", "x", "y")
+
+TABLE_VERSION = 1
+BINARY_MAGIC = b'DJOT'
+
+def _coerce_bool(value):
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in ("true", "1"):
+        return True
+    if text in ("false", "0", ""):
+        return False
+    raise ValueError(f"{value!r} is not a valid bool")
+
+def _coerce_color(value):
+    # Tiled writes #AARRGGBB (or #RRGGBB); an empty string means unset
+    text = str(value).strip()
+    if not text:
+        return ""
+    digits = text[1:] if text.startswith('#') else text
+    if len(digits) not in (6, 8) or any(c not in "0123456789abcdefABCDEF" for c in digits):
+        raise ValueError(f"{value!r} is not a valid color")
+    return "#" + digits.lower()
+
+def _coerce_int(value):
+    if isinstance(value, bool):
+        raise ValueError(f"{value!r} is not a valid int")
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    try:
+        return int(str(value).strip() or 0)
+    except ValueError:
+        raise ValueError(f"{value!r} is not a valid int") from None
+
+def _coerce_float(value):
+    if isinstance(value, bool):
+        raise ValueError(f"{value!r} is not a valid float")
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).strip() or 0)
+    except ValueError:
+        raise ValueError(f"{value!r} is not a valid float") from None
+
+_COERCE = {
+    "int": _coerce_int,
+    "float": _coerce_float,
+    "bool": _coerce_bool,
+    "color": _coerce_color,
+    "object": _coerce_int,  # object id, 0 for none
+}
+
+def coerce_property(value, prop_type="string"):
+    """The JSON value for a property of the declared Tiled type
+
+    Raises ValueError when the value does not parse as that type. string,
+    file and unknown types keep the value as text; class values (nested
+    property dicts) are passed through.
+    """
+    coerce = _COERCE.get(prop_type)
+    if coerce is not None:
+        return coerce(value)
+    if prop_type == "class" or value is None:
+        return value
+    return value if isinstance(value, str) else str(value)
+
+def coerce_properties(properties):
+    """Coerce a Tiled property list in place; returns it"""
+    for prop in properties:
+        try:
+            prop['value'] = coerce_property(prop.get('value'), prop.get('type', 'string'))
+        except ValueError as e:
+            raise ValueError(f"property {prop.get('name')!r}: {e}") from None
+    return properties
+
+class RoomObject:
+    """Read-only view of one row of an ObjectTable"""
+
+    __slots__ = ('table', 'index')
+
+    def __init__(self, table, index):
+        self.table = table
+        self.index = index
+
+    id = property(lambda self: self.table.ids[self.index])
+    x = property(lambda self: self.table.xs[self.index])
+    y = property(lambda self: self.table.ys[self.index])
+    width = property(lambda self: self.table.widths[self.index])
+    height = property(lambda self: self.table.heights[self.index])
+    name = property(lambda self: self.table.strings[self.table.names[self.index]])
+    type = property(lambda self: self.table.strings[self.table.types[self.index]])
+
+    @property
+    def kind(self):
+        """Gameplay type: the 'type' property, else the object's type (like get_object_kind)"""
+        return self.get('type') or self.type
+
+    def get(self, name, default=None):
+        """Value of a custom property"""
+        table = self.table
+        key = table.string_ids.get(name)
+        if key is not None:
+            for p in range(table.prop_start[self.index], table.prop_start[self.index + 1]):
+                if table.prop_names[p] == key:
+                    return table.prop_values[p]
+        return default
+
+    def to_dict(self):
+        return self.table.object_dict(self.index)
+
+    def __repr__(self):
+        return f"RoomObject(id={self.id}, name={self.name!r}, kind={self.kind!r}, x={self.x}, y={self.y})"
+
+class ObjectTable:
+    """One object group stored as columns"""
+
+    __slots__ = ('layer', 'strings', 'string_ids', 'ids', 'names', 'types', 'xs', 'ys', 'widths', 'heights',
+                 'rotations', 'visible', 'prop_start', 'prop_names', 'prop_types', 'prop_values', 'extras')
+
+    def __init__(self, layer=""):
+        self.layer = layer
+        self.strings = []
+        self.string_ids = {}
+        self.ids = array.array('q')
+        self.names = array.array('I')
+        self.types = array.array('I')
+        self.xs = array.array('d')
+        self.ys = array.array('d')
+        self.widths = array.array('d')
+        self.heights = array.array('d')
+        self.rotations = array.array('d')
+        self.visible = bytearray()
+        self.prop_start = array.array('I', [0])
+        self.prop_names = array.array('I')
+        self.prop_types = array.array('B')
+        self.prop_values = []
+        self.extras = {}  # row -> fields outside OBJECT_FIELDS
+
+    def intern(self, text):
+        """Index of text in the string table, adding it if needed"""
+        key = self.string_ids.get(text)
+        if key is None:
+            key = self.string_ids[text] = len(self.strings)
+            self.strings.append(sys.intern(text))
+        return key
+
+    def append(self, obj):
+        """Add a Tiled object dict; property values are coerced to their declared types"""
+        self.ids.append(int(obj.get('id', 0)))
+        self.names.append(self.intern(obj.get('name', '')))
+        self.types.append(self.intern(obj.get('type', '')))
+        self.xs.append(obj.get('x', 0))
+        self.ys.append(obj.get('y', 0))
+        self.widths.append(obj.get('width', 0))
+        self.heights.append(obj.get('height', 0))
+        self.rotations.append(obj.get('rotation', 0))
+        self.visible.append(1 if obj.get('visible', True) else 0)
+        for prop in obj.get('properties', []):
+            prop_type = prop.get('type', 'string')
+            if prop_type not in PROPERTY_TYPES:
+                raise ValueError(f"object {obj.get('id')}: unknown property type {prop_type!r}")
+            value = coerce_property(prop.get('value'), prop_type)
+            self.prop_names.append(self.intern(prop['name']))
+            self.prop_types.append(PROPERTY_TYPES.index(prop_type))
+            if isinstance(value, str):
+                value = self.strings[self.intern(value)]
+            self.prop_values.append(value)
+        self.prop_start.append(len(self.prop_names))
+        extra = {key: value for key, value in obj.items() if key not in OBJECT_FIELDS}
+        if extra:
+            self.extras[len(self.ids) - 1] = extra
+
+    @classmethod
+    def from_layer(cls, layer):
+        """Build a table from an objectgroup layer dict"""
+        table = cls(layer.get('name', ''))
+        for obj in layer.get('objects', []):
+            table.append(obj)
+        return table
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        if not -len(self) <= index < len(self):
+            raise IndexError(index)
+        return RoomObject(self, index % len(self))
+
+    def __iter__(self):
+        return (RoomObject(self, index) for index in range(len(self)))
+
+    def by_kind(self, kind):
+        """Objects whose gameplay type is kind"""
+        return [obj for obj in self if obj.kind == kind]
+
+    def object_dict(self, index):
+        """Row index as a Tiled object dict (keys in Tiled's order)"""
+        properties = [
+            {"name": self.strings[self.prop_names[p]], "type": PROPERTY_TYPES[self.prop_types[p]],
+             "value": self.prop_values[p]}
+            for p in range(self.prop_start[index], self.prop_start[index + 1])
+        ]
+        obj = {
+            "height": _whole(self.heights[index]),
+            "id": self.ids[index],
+            "name": self.strings[self.names[index]],
+            "properties": properties,
+            "rotation": self.rotations[index],
+            "type": self.strings[self.types[index]],
+            "visible": bool(self.visible[index]),
+            "width": _whole(self.widths[index]),
+            "x": self.xs[index],
+            "y": self.ys[index],
+        }
+        extra = self.extras.get(index)
+        if extra:
+            obj = dict(sorted({**obj, **extra}.items()))
+        return obj
+
+    def to_objects(self):
+        """Every row as Tiled object dicts"""
+        return [self.object_dict(index) for index in range(len(self))]
+
+    def to_columns(self):
+        """Column JSON form (see from_columns)"""
+        return {
+            "version": TABLE_VERSION,
+            "layer": self.layer,
+            "strings": list(self.strings),
+            "id": self.ids.tolist(),
+            "name": self.names.tolist(),
+            "type": self.types.tolist(),
+            "x": self.xs.tolist(),
+            "y": self.ys.tolist(),
+            "width": self.widths.tolist(),
+            "height": self.heights.tolist(),
+            "rotation": self.rotations.tolist(),
+            "visible": list(self.visible),
+            "properties": {
+                "start": self.prop_start.tolist(),
+                "name": self.prop_names.tolist(),
+                "type": self.prop_types.tolist(),
+                "value": list(self.prop_values),
+            },
+            "extra": {str(row): extra for row, extra in sorted(self.extras.items())},
+        }
+
+    @classmethod
+    def from_columns(cls, columns):
+        if columns.get("version") != TABLE_VERSION:
+            raise ValueError(f"unsupported object table version {columns.get('version')!r}")
+        table = cls(columns.get("layer", ""))
+        for text in columns["strings"]:
+            table.intern(text)
+        table.ids = array.array('q', columns["id"])
+        table.names = array.array('I', columns["name"])
+        table.types = array.array('I', columns["type"])
+        table.xs = array.array('d', columns["x"])
+        table.ys = array.array('d', columns["y"])
+        table.widths = array.array('d', columns["width"])
+        table.heights = array.array('d', columns["height"])
+        table.rotations = array.array('d', columns["rotation"])
+        table.visible = bytearray(columns["visible"])
+        properties = columns["properties"]
+        table.prop_start = array.array('I', properties["start"])
+        table.prop_names = array.array('I', properties["name"])
+        table.prop_types = array.array('B', properties["type"])
+        table.prop_values = [table.strings[table.string_ids[v]] if isinstance(v, str) else v
+                             for v in properties["value"]]
+        table.extras = {int(row): extra for row, extra in columns.get("extra", {}).items()}
+        return table
+
+    def to_bytes(self):
+        """Binary form: header, string table, then each column little-endian"""
+        strings = [text.encode('utf-8') for text in self.strings]
+        out = [BINARY_MAGIC, struct.pack('<HIII', TABLE_VERSION, len(self.strings), len(self), len(self.prop_names))]
+        out.append(_pack_text(self.layer.encode('utf-8')))
+        out += [_pack_text(text) for text in strings]
+        for column in (self.ids, self.names, self.types, self.xs, self.ys, self.widths, self.heights,
+                       self.rotations, self.prop_start, self.prop_names, self.prop_types):
+            out.append(_le_bytes(column))
+        out.append(bytes(self.visible))
+        for type_index, value in zip(self.prop_types, self.prop_values):
+            out.append(_pack_value(PROPERTY_TYPES[type_index], value, self.string_ids))
+        out.append(_pack_text(json.dumps({str(row): extra for row, extra in sorted(self.extras.items())},
+                                         separators=(',', ':')).encode('utf-8') if self.extras else b''))
+        return b''.join(out)
+
+    @classmethod
+    def from_bytes(cls, blob):
+        if blob[:4] != BINARY_MAGIC:
+            raise ValueError("not an object table (bad magic)")
+        version, string_count, row_count, prop_count = struct.unpack_from('<HIII', blob, 4)
+        if version != TABLE_VERSION:
+            raise ValueError(f"unsupported object table version {version}")
+        offset = 4 + struct.calcsize('<HIII')
+        layer, offset = _unpack_text(blob, offset)
+        table = cls(layer.decode('utf-8'))
+        for _ in range(string_count):
+            text, offset = _unpack_text(blob, offset)
+            table.intern(text.decode('utf-8'))
+
+        def column(typecode, count):
+            nonlocal offset
+            values = array.array(typecode)
+            size = values.itemsize * count
+            values.frombytes(blob[offset:offset + size])
+            if sys.byteorder == 'big':
+                values.byteswap()
+            offset += size
+            return values
+
+        table.ids = column('q', row_count)
+        table.names = column('I', row_count)
+        table.types = column('I', row_count)
+        table.xs = column('d', row_count)
+        table.ys = column('d', row_count)
+        table.widths = column('d', row_count)
+        table.heights = column('d', row_count)
+        table.rotations = column('d', row_count)
+        table.prop_start = column('I', row_count + 1)
+        table.prop_names = column('I', prop_count)
+        table.prop_types = column('B', prop_count)
+        table.visible = bytearray(blob[offset:offset + row_count])
+        offset += row_count
+        for type_index in table.prop_types:
+            value, offset = _unpack_value(PROPERTY_TYPES[type_index], blob, offset, table.strings)
+            table.prop_values.append(value)
+        extras, offset = _unpack_text(blob, offset)
+        table.extras = {int(row): extra for row, extra in json.loads(extras).items()} if extras else {}
+        return table
+
+def _whole(value):
+    return int(value) if value.is_integer() else value
+
+def _le_bytes(values):
+    if sys.byteorder == 'big' and values.itemsize > 1:
+        values = array.array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+def _pack_text(data):
+    return struct.pack('<I', len(data)) + data
+
+def _unpack_text(blob, offset):
+    (length,) = struct.unpack_from('<I', blob, offset)
+    offset += 4
+    return bytes(blob[offset:offset + length]), offset + length
+
+def _pack_value(prop_type, value, string_ids):
+    if prop_type in ("int", "object"):
+        return struct.pack('<q', value)
+    if prop_type == "float":
+        return struct.pack('<d', value)
+    if prop_type == "bool":
+        return b'\x01' if value else b'\x00'
+    # Text values are string table indices; class dicts (and unset values) are JSON
+    if isinstance(value, str):
+        return b'\x00' + struct.pack('<I', string_ids[value])
+    return b'\x01' + _pack_text(json.dumps(value, separators=(',', ':')).encode('utf-8'))
+
+def _unpack_value(prop_type, blob, offset, strings):
+    if prop_type in ("int", "object"):
+        return struct.unpack_from('<q', blob, offset)[0], offset + 8
+    if prop_type == "float":
+        return struct.unpack_from('<d', blob, offset)[0], offset + 8
+    if prop_type == "bool":
+        return blob[offset] == 1, offset + 1
+    if blob[offset] == 0:
+        return strings[struct.unpack_from('<I', blob, offset + 1)[0]], offset + 5
+    text, offset = _unpack_text(blob, offset + 1)
+    return json.loads(text), offset
+
+OBJECT_FORMS = ("dicts", "columns", "binary")
+
+def pack_object_layer(layer, form):
+    """Copy of an objectgroup layer with its objects written in form (one of OBJECT_FORMS)"""
+    if form == "dicts":
+        return layer
+    if form not in OBJECT_FORMS:
+        raise ValueError(f"unknown object form {form!r}")
+    table = ObjectTable.from_layer(layer)
+    packed = {key: value for key, value in layer.items() if key != 'objects'}
+    if form == "columns":
+        packed['objecttable'] = table.to_columns()
+    else:
+        packed['objecttable'] = base64.b64encode(table.to_bytes()).decode('ascii')
+    return packed
+
+def expand_object_tables(room):
+    """Replace every packed "objecttable" in room with its object list, in place; returns room"""
+    layers = room.get('layers', [])
+    for index, layer in enumerate(layers):
+        packed = layer.get('objecttable')
+        if packed is None:
+            continue
+        if isinstance(packed, str):
+            table = ObjectTable.from_bytes(base64.b64decode(packed))
+        else:
+            table = ObjectTable.from_columns(packed)
+        layer = {key: value for key, value in layer.items() if key != 'objecttable'}
+        layer['objects'] = table.to_objects()
+        layers[index] = dict(sorted(layer.items()))
+    return room
+
+def room_object_tables(room):
+    """An ObjectTable per object group of a room dict, by layer name"""
+    return {layer.get('name', ''): ObjectTable.from_layer(layer)
+            for layer in room.get('layers', []) if layer.get('type') == 'objectgroup'}
+
+def main():
+    """Build the object tables of every room and compare their sizes with plain dicts"""
+    import glob
+    import tracemalloc
+
+    from json_to_tmx import NON_ROOM_FILES
+    from room_data import load_room
+
+    rooms_dir = sys.argv[1] if len(sys.argv) > 1 else "game-godot/data/rooms"
+    room_files = [path for path in sorted(glob.glob(os.path.join(rooms_dir, "*.json")))
+                  if os.path.basename(path) not in NON_ROOM_FILES]
+    if not room_files:
+        print(f"❌ No rooms found in {rooms_dir}")
+        sys.exit(1)
+
+    print(f"{'room':<16} {'objects':>8} {'props':>6} {'dict KiB':>9} {'table KiB':>10} {'json B':>8} {'binary B':>9}")
+    for path in room_files:
+        room = load_room(path)
+        tracemalloc.start()
+        objects = [obj for layer in room.get('layers', []) if layer.get('type') == 'objectgroup'
+                   for obj in json.loads(json.dumps(layer.get('objects', [])))]
+        dict_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        tracemalloc.start()
+        tables = room_object_tables(room)
+        table_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        json_size = sum(len(json.dumps(t.to_columns(), separators=(',', ':'))) for t in tables.values())
+        binary_size = sum(len(t.to_bytes()) for t in tables.values())
+        props = sum(len(t.prop_names) for t in tables.values())
+        print(f"{os.path.basename(path)[:-5]:<16} {len(objects):>8} {props:>6} {dict_bytes / 1024:>9.1f} "
+              f"{table_bytes / 1024:>10.1f} {json_size:>8} {binary_size:>9}")
+        del objects
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Room Semantic Checks
+Verifies rooms are playable, not just well-formed: everything reachable from
+player_spawn, no spawns embedded in Collision, doors on the boundary with an
+open tile on their inner side
+
+Ground/Collision are loaded into NumPy grids and labelled into connected
+regions with a vectorized union-find over horizontal walkable runs, so the
+cost is a handful of array passes per room rather than a Python loop per
+tile. Many rooms are checked in parallel processes.
+"""
+
+import glob
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from room_data import decode_tile_layer, find_layer, load_room
+from room_index import build_room_index
+
+MAX_REPORTED_ISLANDS = 20
+
+def room_grids(room):
+    """Return (walkable, collision) boolean grids shaped (height, width)"""
+    height = int(room.get('height', 0))
+    width = int(room.get('width', 0))
+
+    collision_layer = find_layer(room, 'Collision', 'tilelayer')
+    if collision_layer is not None:
+        collision = np.array(decode_tile_layer(collision_layer), dtype=np.uint32).reshape(height, width) != 0
+    else:
+        collision = np.zeros((height, width), dtype=bool)
+
+    ground_layer = find_layer(room, 'Ground', 'tilelayer')
+    if ground_layer is not None:
+        ground = np.array(decode_tile_layer(ground_layer), dtype=np.uint32).reshape(height, width) != 0
+    else:
+        ground = np.ones((height, width), dtype=bool)
+
+    return ground & ~collision, collision
+
+def _row_runs(walkable):
+    """Number the horizontal walkable runs in row-major order
+
+    Returns (run_ids, run_starts): run_ids has each walkable cell's run
+    number (-1 elsewhere) and run_starts the flat index of each run's first cell.
+    """
+    height, width = walkable.shape
+    flat_walkable = walkable.ravel()
+
+    # A run starts at every walkable cell whose left neighbour is blocked or off-row
+    starts = flat_walkable.copy()
+    starts[1:] &= ~flat_walkable[:-1]
+    starts[::width] = flat_walkable[::width]
+
+    run_ids = np.where(flat_walkable, np.cumsum(starts) - 1, -1)
+    return run_ids.reshape(height, width), np.flatnonzero(starts)
+
+def _connect_runs(run_count, first, second):
+    """Union-find over runs, vectorized: return each run's smallest connected run
+
+    Every round hooks the larger root of each still-split edge onto the
+    smaller one, then pointer-jumps until each run points straight at its
+    root. Parents only ever decrease, so a root is its component's minimum.
+    """
+    parent = np.arange(run_count)
+    while first.size:
+        root_first, root_second = parent[first], parent[second]
+        split = root_first != root_second
+        first, second = first[split], second[split]
+        root_first, root_second = root_first[split], root_second[split]
+        np.minimum.at(parent, np.maximum(root_first, root_second), np.minimum(root_first, root_second))
+        while True:
+            jumped = parent[parent]
+            if np.array_equal(jumped, parent):
+                break
+            parent = jumped
+    return parent
+
+def label_regions(walkable):
+    """Label 4-connected walkable regions; blocked cells get -1
+
+    Each horizontal run is one union-find node and every vertically adjacent
+    pair of walkable cells links two runs. A region's label is the flat index
+    of its first cell in row-major order. The work is a few array passes per
+    union-find round, independent of how winding a region is.
+    """
+    height, width = walkable.shape
+    labels = np.full((height, width), -1)
+    if not walkable.any():
+        return labels
+
+    run_ids, run_starts = _row_runs(walkable)
+    linked = walkable[:-1] & walkable[1:]
+    roots = _connect_runs(len(run_starts), run_ids[:-1][linked], run_ids[1:][linked])
+    labels[walkable] = run_starts[roots[run_ids[walkable]]]
+    return labels
+
+def flood_fill(walkable, start, labels=None):
+    """Boolean mask of walkable cells 4-connected to start (row, col)"""
+    if labels is None:
+        labels = label_regions(walkable)
+    row, col = start
+    if not walkable[row, col]:
+        return np.zeros_like(walkable)
+    return labels == labels[row, col]
+
+def find_islands(walkable, reached, labels=None):
+    """Return (size, (col, row)) for each walkable region not connected to reached"""
+    if labels is None:
+        labels = label_regions(walkable)
+    stranded = labels[walkable & ~reached]
+    if stranded.size == 0:
+        return []
+
+    # A region's label is its smallest flat index, i.e. its first cell
+    region_labels, sizes = np.unique(stranded, return_counts=True)
+    width = walkable.shape[1]
+    return [(int(size), (int(label) % width, int(label) // width)) for label, size in zip(region_labels, sizes)]
+
+def _object_cell(index, entry):
+    """Tile (col, row) under the centre of an object's box"""
+    center_x, center_y = entry.center
+    return int(center_x // index.tile_width), int(center_y // index.tile_height)
+
+def _inward_cells(col, row, width, height):
+    """Tiles one step into the room from a boundary tile (two for a corner)"""
+    cells = []
+    if col == 0:
+        cells.append((1, row))
+    if col == width - 1:
+        cells.append((width - 2, row))
+    if row == 0:
+        cells.append((col, 1))
+    if row == height - 1:
+        cells.append((col, height - 2))
+    return [(c, r) for c, r in cells if 0 <= c < width and 0 <= r < height]
+
+def check_room(room):
+    """Run semantic checks on a room dict, returning (errors, warnings)"""
+    errors = []
+    warnings = []
+
+    index = build_room_index(room)
+    walkable, collision = room_grids(room)
+    height, width = walkable.shape
+
+    def in_bounds(col, row):
+        return 0 <= col < width and 0 <= row < height
+
+    player_spawns = index.objects_of_kind('player_spawn')
+    if not player_spawns:
+        errors.append("No player_spawn object")
+        return errors, warnings
+    if len(player_spawns) > 1:
+        warnings.append(f"{len(player_spawns)} player_spawn objects, using the first")
+
+    spawn_col, spawn_row = _object_cell(index, player_spawns[0])
+    if not in_bounds(spawn_col, spawn_row):
+        errors.append(f"player_spawn tile ({spawn_col}, {spawn_row}) is outside the room")
+        return errors, warnings
+    if collision[spawn_row, spawn_col]:
+        errors.append(f"player_spawn tile ({spawn_col}, {spawn_row}) is embedded in Collision")
+        return errors, warnings
+    if not walkable[spawn_row, spawn_col]:
+        errors.append(f"player_spawn tile ({spawn_col}, {spawn_row}) has no Ground")
+        return errors, warnings
+
+    labels = label_regions(walkable)
+    reached = flood_fill(walkable, (spawn_row, spawn_col), labels)
+
+    for entry in index.objects_of_kind('enemy_spawn'):
+        name = entry.obj.get('name', 'unnamed')
+        col, row = _object_cell(index, entry)
+        if not in_bounds(col, row):
+            errors.append(f"Enemy spawn {name} tile ({col}, {row}) is outside the room")
+        elif collision[row, col]:
+            errors.append(f"Enemy spawn {name} tile ({col}, {row}) is embedded in Collision")
+        elif not reached[row, col]:
+            errors.append(f"Enemy spawn {name} tile ({col}, {row}) is unreachable from player_spawn")
+
+    for entry in index.objects:
+        name = entry.obj.get('name', '')
+        if not (name.startswith('door_') or entry.kind == 'door'):
+            continue
+        col, row = _object_cell(index, entry)
+        if not in_bounds(col, row):
+            errors.append(f"Door {name} tile ({col}, {row}) is outside the room")
+            continue
+        if col not in (0, width - 1) and row not in (0, height - 1):
+            errors.append(f"Door {name} tile ({col}, {row}) is not on the room boundary")
+            if collision[row, col]:
+                errors.append(f"Door {name} tile ({col}, {row}) is embedded in Collision")
+        else:
+            # Boundary doors are cut into the wall, so only the tile inside the room must be open
+            inward = _inward_cells(col, row, width, height)
+            if inward and all(collision[r, c] for c, r in inward):
+                errors.append(f"Door {name} tile ({col}, {row}) opens onto Collision at {inward[0]}")
+
+        # Doors sit on the boundary, so a reachable neighbour is enough
+        neighbours = [(col, row), (col - 1, row), (col + 1, row), (col, row - 1), (col, row + 1)]
+        if not any(in_bounds(c, r) and reached[r, c] for c, r in neighbours):
+            errors.append(f"Door {name} tile ({col}, {row}) is unreachable from player_spawn")
+
+    islands = find_islands(walkable, reached, labels)
+    for size, (col, row) in islands[:MAX_REPORTED_ISLANDS]:
+        warnings.append(f"Unreachable island of {size} tiles starting at ({col}, {row})")
+    if len(islands) > MAX_REPORTED_ISLANDS:
+        warnings.append(f"... and {len(islands) - MAX_REPORTED_ISLANDS} more unreachable islands")
+
+    return errors, warnings
+
+def check_room_file(file_path):
+    """Load and check one room file; returns (file_path, errors, warnings)"""
+    try:
+        room = load_room(file_path)
+        errors, warnings = check_room(room)
+    except Exception as e:
+        errors, warnings = [f"Check failed: {type(e).__name__}: {e}"], []
+    return file_path, errors, warnings
+
+def check_rooms(room_files, workers=None):
+    """Check many rooms in parallel, yielding results in input order"""
+    room_files = list(room_files)
+    if workers == 1 or len(room_files) < 2:
+        for file_path in room_files:
+            yield check_room_file(file_path)
+        return
+
+    chunk_size = max(1, len(room_files) // ((workers or os.cpu_count() or 1) * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(check_room_file, room_files, chunksize=chunk_size)
+
+def check_all_rooms(rooms_dir="game-godot/data/rooms", workers=None):
+    """Semantically check every room in rooms_dir, returning True when none have errors"""
+    room_files = sorted(glob.glob(os.path.join(rooms_dir, "*.json")))
+    if not room_files:
+        print(f"❌ No JSON files found in {rooms_dir}")
+        return False
+
+    print(f"Semantic check of {len(room_files)} room files...")
+    print("=" * 50)
+
+    failed_count = 0
+    for file_path, errors, warnings in check_rooms(room_files, workers):
+        if errors:
+            failed_count += 1
+            print(f"❌ {os.path.basename(file_path)}: {len(errors)} errors")
+            for error in errors:
+                print(f"   - {error}")
+        elif warnings:
+            print(f"⚠️  {os.path.basename(file_path)}: {len(warnings)} warnings")
+        else:
+            print(f"✅ {os.path.basename(file_path)}")
+        for warning in warnings:
+            print(f"   - {warning}")
+
+    print("=" * 50)
+    print(f"Semantic check complete: {len(room_files) - failed_count} passed, {failed_count} failed")
+    return failed_count == 0
+
+def main():
+    """Semantically check all room files"""
+    rooms_dir = sys.argv[1] if len(sys.argv) > 1 else "game-godot/data/rooms"
+    if not check_all_rooms(rooms_dir):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
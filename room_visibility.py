@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Room Visibility Tables
+Precomputes line of sight from the Collision layer so the game never raycasts
+
+Small rooms get a full tile-to-tile LOS bitset over every open tile. Larger
+rooms get a visibility mask per key point (player_spawn, enemy spawns,
+doors). Bitsets are packed, zlib-compressed and base64-encoded into
+game-godot/data/visibility/<room>.json. Rooms are processed in parallel and a
+per-room stats table reports output size and build time.
+
+A ray between two tile centres is blocked if any Collision tile lies under
+it; rays are supersampled at three points per tile crossed. Targets are traced in
+chunks, so memory stays bounded however large the room is.
+"""
+
+import base64
+import glob
+import os
+import sys
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from room_data import load_room
+from room_index import build_room_index
+from room_json import write_json
+from room_semantics import room_grids
+
+VISIBILITY_VERSION = 1
+
+# Open tiles above this use key-point masks instead of the full N x N matrix
+MAX_MATRIX_TILES = 1024
+
+SAMPLES_PER_TILE = 3
+
+# Rays are traced in chunks of targets so at most this many sample points are in memory
+MAX_CHUNK_SAMPLES = 1 << 18
+
+def encode_bits(mask):
+    """Pack a boolean array into base64(zlib(bits))"""
+    packed = np.packbits(np.asarray(mask, dtype=bool).ravel())
+    return base64.b64encode(zlib.compress(packed.tobytes(), 9)).decode('ascii')
+
+def decode_bits(text, count):
+    """Inverse of encode_bits: return a flat boolean array of count bits"""
+    packed = np.frombuffer(zlib.decompress(base64.b64decode(text)), dtype=np.uint8)
+    return np.unpackbits(packed, count=count).astype(bool)
+
+def visible_from(opaque, source, targets):
+    """Boolean array: is each target (row, col) visible from source (row, col)"""
+    targets = np.asarray(targets, dtype=np.float64).reshape(-1, 2)
+    if targets.size == 0:
+        return np.zeros(0, dtype=bool)
+
+    height, width = opaque.shape
+    source = np.asarray(source, dtype=np.float64)
+    source_cell = np.rint(source).astype(np.int64)
+    longest = int(np.abs(targets - source).max())
+    steps = np.linspace(0.0, 1.0, longest * SAMPLES_PER_TILE + 2)
+
+    visible = np.empty(len(targets), dtype=bool)
+    chunk_size = max(1, MAX_CHUNK_SAMPLES // len(steps))
+    for start in range(0, len(targets), chunk_size):
+        chunk = targets[start:start + chunk_size]
+
+        # (targets, samples, 2) points along each ray, rounded to the tile they fall in
+        points = source + (chunk - source)[:, None, :] * steps[None, :, None]
+        cells = np.rint(points).astype(np.int64)
+        np.clip(cells[..., 0], 0, height - 1, out=cells[..., 0])
+        np.clip(cells[..., 1], 0, width - 1, out=cells[..., 1])
+        blocked = opaque[cells[..., 0], cells[..., 1]]
+
+        # The end tiles themselves may be walls (e.g. a door set into the wall)
+        in_source = (cells == source_cell).all(axis=-1)
+        in_target = (cells == np.rint(chunk).astype(np.int64)[:, None, :]).all(axis=-1)
+        blocked &= ~(in_source | in_target)
+        visible[start:start + chunk_size] = ~blocked.any(axis=1)
+    return visible
+
+def los_matrix(opaque):
+    """Return (open_mask, matrix) where matrix[i, j] is LOS between open tiles i and j"""
+    open_mask = ~opaque
+    open_cells = np.argwhere(open_mask)
+    matrix = np.zeros((len(open_cells), len(open_cells)), dtype=bool)
+    for i, cell in enumerate(open_cells):
+        # Only compute the upper triangle; rays are symmetric
+        matrix[i, i:] = visible_from(opaque, cell, open_cells[i:])
+    matrix |= matrix.T
+    return open_mask, matrix
+
+def key_points(room, index=None):
+    """(name, row, col) for player_spawn, enemy spawns and doors"""
+    index = index or build_room_index(room)
+    points = []
+    for entry in index.objects:
+        name = entry.obj.get('name', '')
+        if entry.kind in ('player_spawn', 'enemy_spawn', 'door') or name.startswith('door_'):
+            center_x, center_y = entry.center
+            col = int(center_x // index.tile_width)
+            row = int(center_y // index.tile_height)
+            if 0 <= col < index.width_tiles and 0 <= row < index.height_tiles:
+                points.append((name or entry.kind, row, col))
+    return points
+
+def build_visibility(room, max_matrix_tiles=MAX_MATRIX_TILES):
+    """Build the visibility payload dict for a room"""
+    _, opaque = room_grids(room)
+    height, width = opaque.shape
+    open_count = int((~opaque).sum())
+
+    payload = {
+        "version": VISIBILITY_VERSION,
+        "width": width,
+        "height": height,
+    }
+
+    if open_count <= max_matrix_tiles:
+        open_mask, matrix = los_matrix(opaque)
+        payload["mode"] = "matrix"
+        payload["open_tiles"] = encode_bits(open_mask)
+        payload["open_count"] = open_count
+        payload["los"] = encode_bits(matrix)
+    else:
+        all_cells = np.argwhere(np.ones_like(opaque))
+        payload["mode"] = "points"
+        payload["points"] = []
+        for name, row, col in key_points(room):
+            visible = visible_from(opaque, (row, col), all_cells).reshape(height, width)
+            payload["points"].append({"name": name, "col": col, "row": row, "visible": encode_bits(visible)})
+
+    return payload
+
+def build_room_visibility(job):
+    """Worker: build and write one room's table, returning its stats row"""
+    room_path, out_dir, max_matrix_tiles = job
+    room_id = os.path.splitext(os.path.basename(room_path))[0]
+    out_path = os.path.join(out_dir, room_id + '.json')
+    start = time.perf_counter()
+    try:
+        payload = build_visibility(load_room(room_path), max_matrix_tiles)
+        payload["room"] = room_id
+        write_json(out_path, payload)
+    except Exception as e:
+        return {"room": room_id, "error": f"{type(e).__name__}: {e}"}
+
+    return {
+        "room": room_id,
+        "mode": payload["mode"],
+        "tiles": payload["width"] * payload["height"],
+        "bytes": os.path.getsize(out_path),
+        "build_ms": (time.perf_counter() - start) * 1000,
+    }
+
+def build_all_visibility(rooms_dir="game-godot/data/rooms", out_dir="game-godot/data/visibility",
+                         workers=None, max_matrix_tiles=MAX_MATRIX_TILES):
+    """Build visibility tables for every room in parallel and print a stats report"""
+    room_files = sorted(glob.glob(os.path.join(rooms_dir, "*.json")))
+    if not room_files:
+        print(f"❌ No JSON files found in {rooms_dir}")
+        return False
+
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = [(path, out_dir, max_matrix_tiles) for path in room_files]
+
+    print(f"Building visibility for {len(room_files)} rooms...")
+    print("=" * 56)
+    print(f"{'room':<16} {'mode':<8} {'tiles':>7} {'bytes':>9} {'build ms':>10}")
+
+    start = time.perf_counter()
+    failed_count = 0
+    total_bytes = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for stats in pool.map(build_room_visibility, jobs):
+            if "error" in stats:
+                failed_count += 1
+                print(f"❌ {stats['room']}: {stats['error']}")
+                continue
+            total_bytes += stats["bytes"]
+            print(f"{stats['room']:<16} {stats['mode']:<8} {stats['tiles']:>7} {stats['bytes']:>9} {stats['build_ms']:>10.1f}")
+
+    print("=" * 56)
+    print(f"Built {len(room_files) - failed_count}/{len(room_files)} rooms, "
+          f"{total_bytes} bytes, {time.perf_counter() - start:.2f} s wall")
+    return failed_count == 0
+
+def main():
+    """Build visibility tables for all rooms"""
+    if not build_all_visibility():
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
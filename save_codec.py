@@ -0,0 +1,600 @@
+#!/usr/bin/env python3
+"""
+Save Codec
+Compact, versioned save files (.djsav), JSON converters, migrations and bulk validation
+
+SaveSystem.write_save stores the whole state as indented JSON. A .djsav file
+stores the same data in the order schemas/save-schema.json declares it, so
+property names and type markers are not repeated: every object is a presence
+mask over its declared properties followed by their values, written by type
+(zigzag varint integers, length-prefixed strings, one byte per bool). A value
+that does not fit its declared type, or a property the schema does not list,
+is written with a tagged generic encoding instead, so any JSON save converts
+losslessly and an invalid save is still reported by the validator rather
+than lost by the codec.
+
+Layout (integers unsigned LEB128 varints unless noted):
+
+    header   "DJSV" format:u8 flags:u8 save_version:u16le layout:u32le
+             body_length:u32le body_crc32:u32le
+    payload  body, zlib-compressed when flags & 1
+    object   present_mask generic_mask values... extra_count (key value)*
+
+layout is a CRC of the schema's shape (property names, order and types), so
+a file is only decoded with the schema it was written with. save_version
+numbers the save's data layout: decode upgrades older saves through the
+MIGRATIONS chain (one function per version step). When the schema changes,
+bump SAVE_VERSION, register a migration from the previous version and keep
+the previous schema in SCHEMA_HISTORY so old files still decode.
+"""
+
+import copy
+import glob
+import json
+import os
+import struct
+import sys
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+from recording_codec import RecordingFormatError, decode_varint, encode_varint
+
+MAGIC = b"DJSV"
+FORMAT_VERSION = 1
+SAVE_VERSION = 1
+
+HEADER = struct.Struct('<4sBBHIII')
+FLOAT = struct.Struct('<d')
+FLAG_ZLIB = 0x01
+
+SCHEMA_PATH = "schemas/save-schema.json"
+SCHEMA_HISTORY = {1: SCHEMA_PATH}  # save_version -> schema its payload was laid out with
+FIXTURES_GLOB = "test/fixtures/save*.json"
+VALIDATE_CHUNK = 64
+
+# Generic value tags
+TAG_NULL, TAG_FALSE, TAG_TRUE, TAG_INT, TAG_FLOAT, TAG_STRING, TAG_ARRAY, TAG_OBJECT = range(8)
+
+MIGRATIONS = {}  # from_version -> function(data) returning the data at from_version + 1
+
+class SaveFormatError(ValueError):
+    """Raised when a .djsav file is truncated, corrupt or cannot be upgraded"""
+
+def migration(from_version):
+    """Register a function upgrading save data from from_version to from_version + 1"""
+    def register(function):
+        MIGRATIONS[from_version] = function
+        return function
+    return register
+
+def migrate(data, version, target=None):
+    """Upgrade save data from version to target (default SAVE_VERSION) through the migration chain"""
+    target = SAVE_VERSION if target is None else target
+    if version > target:
+        raise SaveFormatError(f"save version {version} is newer than this codec (version {target})")
+    while version < target:
+        step = MIGRATIONS.get(version)
+        if step is None:
+            raise SaveFormatError(f"no migration from save version {version}")
+        data = step(copy.deepcopy(data))
+        version += 1
+    return data
+
+_schemas = {}
+
+def load_schema(path=SCHEMA_PATH):
+    if path not in _schemas:
+        with open(path, 'r') as f:
+            _schemas[path] = json.load(f)
+    return _schemas[path]
+
+def schema_layout(schema):
+    """The parts of a schema that decide the payload layout, as nested lists"""
+    schema_type = schema.get('type') if isinstance(schema, dict) else None
+    if schema_type == 'object' and isinstance(schema.get('properties'), dict):
+        return ['object', [[name, schema_layout(sub)] for name, sub in schema['properties'].items()]]
+    if schema_type == 'array' and isinstance(schema.get('items'), dict):
+        return ['array', schema_layout(schema['items'])]
+    if schema_type in ('integer', 'number', 'string', 'boolean', 'null'):
+        return schema_type
+    return 'any'  # untyped, union types and free-form objects/arrays
+
+def layout_id(layout):
+    return zlib.crc32(json.dumps(layout, separators=(',', ':')).encode())
+
+def _zigzag(value):
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+def _unzigzag(value):
+    return value // 2 if value % 2 == 0 else -(value + 1) // 2
+
+def _encode_string(text, out):
+    encoded = text.encode('utf-8')
+    encode_varint(len(encoded), out)
+    out += encoded
+
+def _decode_string(data, pos):
+    length, pos = decode_varint(data, pos)
+    if pos + length > len(data):
+        raise SaveFormatError("truncated string")
+    return data[pos:pos + length].decode('utf-8'), pos + length
+
+def _fits(value, layout):
+    """True if value can be written with the typed encoding for layout"""
+    kind = layout if isinstance(layout, str) else layout[0]
+    if kind == 'integer':
+        return type(value) is int
+    if kind == 'number':
+        return type(value) is float
+    if kind == 'string':
+        return type(value) is str
+    if kind == 'boolean':
+        return type(value) is bool
+    if kind == 'null':
+        return value is None
+    if kind == 'object':
+        return type(value) is dict
+    if kind == 'array':
+        return type(value) is list and all(_fits(item, layout[1]) for item in value)
+    return False
+
+def _encode_any(value, out):
+    if value is None:
+        out.append(TAG_NULL)
+    elif value is True or value is False:
+        out.append(TAG_TRUE if value else TAG_FALSE)
+    elif type(value) is int:
+        out.append(TAG_INT)
+        encode_varint(_zigzag(value), out)
+    elif type(value) is float:
+        out.append(TAG_FLOAT)
+        out += FLOAT.pack(value)
+    elif type(value) is str:
+        out.append(TAG_STRING)
+        _encode_string(value, out)
+    elif type(value) is list:
+        out.append(TAG_ARRAY)
+        encode_varint(len(value), out)
+        for item in value:
+            _encode_any(item, out)
+    elif type(value) is dict:
+        out.append(TAG_OBJECT)
+        encode_varint(len(value), out)
+        for key, item in value.items():
+            _encode_string(key, out)
+            _encode_any(item, out)
+    else:
+        raise SaveFormatError(f"cannot encode {type(value).__name__} in a save")
+
+def _decode_any(data, pos):
+    if pos >= len(data):
+        raise SaveFormatError("truncated value")
+    tag = data[pos]
+    pos += 1
+    if tag == TAG_NULL:
+        return None, pos
+    if tag in (TAG_FALSE, TAG_TRUE):
+        return tag == TAG_TRUE, pos
+    if tag == TAG_INT:
+        value, pos = decode_varint(data, pos)
+        return _unzigzag(value), pos
+    if tag == TAG_FLOAT:
+        return FLOAT.unpack_from(data, pos)[0], pos + FLOAT.size
+    if tag == TAG_STRING:
+        return _decode_string(data, pos)
+    if tag == TAG_ARRAY:
+        count, pos = decode_varint(data, pos)
+        items = []
+        for _ in range(count):
+            item, pos = _decode_any(data, pos)
+            items.append(item)
+        return items, pos
+    if tag == TAG_OBJECT:
+        count, pos = decode_varint(data, pos)
+        result = {}
+        for _ in range(count):
+            key, pos = _decode_string(data, pos)
+            result[key], pos = _decode_any(data, pos)
+        return result, pos
+    raise SaveFormatError(f"unknown value tag {tag}")
+
+def _encode_typed(value, layout, out):
+    kind = layout if isinstance(layout, str) else layout[0]
+    if kind == 'integer':
+        encode_varint(_zigzag(value), out)
+    elif kind == 'number':
+        out += FLOAT.pack(value)
+    elif kind == 'string':
+        _encode_string(value, out)
+    elif kind == 'boolean':
+        out.append(1 if value else 0)
+    elif kind == 'object':
+        fields = layout[1]
+        present = generic = 0
+        for bit, (name, sub) in enumerate(fields):
+            if name in value:
+                present |= 1 << bit
+                if not _fits(value[name], sub):
+                    generic |= 1 << bit
+        encode_varint(present, out)
+        encode_varint(generic, out)
+        for bit, (name, sub) in enumerate(fields):
+            if generic >> bit & 1:
+                _encode_any(value[name], out)
+            elif present >> bit & 1:
+                _encode_typed(value[name], sub, out)
+        names = {name for name, _ in fields}
+        extras = [key for key in value if key not in names]
+        encode_varint(len(extras), out)
+        for key in extras:
+            _encode_string(key, out)
+            _encode_any(value[key], out)
+    elif kind == 'array':
+        encode_varint(len(value), out)
+        for item in value:
+            _encode_typed(item, layout[1], out)
+    elif kind != 'null':
+        _encode_any(value, out)
+
+def _decode_typed(data, pos, layout):
+    kind = layout if isinstance(layout, str) else layout[0]
+    if kind == 'integer':
+        value, pos = decode_varint(data, pos)
+        return _unzigzag(value), pos
+    if kind == 'number':
+        return FLOAT.unpack_from(data, pos)[0], pos + FLOAT.size
+    if kind == 'string':
+        return _decode_string(data, pos)
+    if kind == 'boolean':
+        if pos >= len(data):
+            raise SaveFormatError("truncated value")
+        return data[pos] != 0, pos + 1
+    if kind == 'null':
+        return None, pos
+    if kind == 'object':
+        present, pos = decode_varint(data, pos)
+        generic, pos = decode_varint(data, pos)
+        result = {}
+        for bit, (name, sub) in enumerate(layout[1]):
+            if generic >> bit & 1:
+                result[name], pos = _decode_any(data, pos)
+            elif present >> bit & 1:
+                result[name], pos = _decode_typed(data, pos, sub)
+        extra_count, pos = decode_varint(data, pos)
+        for _ in range(extra_count):
+            key, pos = _decode_string(data, pos)
+            result[key], pos = _decode_any(data, pos)
+        return result, pos
+    if kind == 'array':
+        count, pos = decode_varint(data, pos)
+        items = []
+        for _ in range(count):
+            item, pos = _decode_typed(data, pos, layout[1])
+            items.append(item)
+        return items, pos
+    return _decode_any(data, pos)
+
+def encode_save(data, save_version=None, schema_path=None, compress=True):
+    """Encode a save dict as .djsav bytes (at SAVE_VERSION unless save_version is given)"""
+    save_version = SAVE_VERSION if save_version is None else save_version
+    if type(data) is not dict:
+        raise SaveFormatError("a save must be a JSON object")
+    layout = schema_layout(load_schema(schema_path or SCHEMA_HISTORY[save_version]))
+    body = bytearray()
+    if _fits(data, layout):
+        _encode_typed(data, layout, body)
+    else:
+        _encode_any(data, body)
+    body = bytes(body)
+
+    flags = 0
+    payload = body
+    if compress:
+        compressed = zlib.compress(body, 9)
+        if len(compressed) < len(body):
+            flags |= FLAG_ZLIB
+            payload = compressed
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, flags, save_version, layout_id(layout), len(body), zlib.crc32(body))
+    return header + payload
+
+def read_header(blob):
+    """(flags, save_version, layout_id, body_length, body_crc32) from a .djsav file's bytes"""
+    if len(blob) < HEADER.size:
+        raise SaveFormatError("file is shorter than the header")
+    magic, format_version, flags, save_version, layout, body_length, body_crc = HEADER.unpack_from(blob)
+    if magic != MAGIC:
+        raise SaveFormatError("not a .djsav file (bad magic)")
+    if format_version != FORMAT_VERSION:
+        raise SaveFormatError(f"unsupported .djsav format version {format_version}")
+    if flags & ~FLAG_ZLIB:
+        raise SaveFormatError(f"unknown flags {flags:#04x}")
+    return flags, save_version, layout, body_length, body_crc
+
+def decode_save(blob, upgrade=True):
+    """Decode .djsav bytes; returns (data, save_version), upgraded to SAVE_VERSION unless upgrade is False"""
+    flags, save_version, layout, body_length, body_crc = read_header(blob)
+    body = blob[HEADER.size:]
+    if flags & FLAG_ZLIB:
+        try:
+            body = zlib.decompress(body)
+        except zlib.error as e:
+            raise SaveFormatError(f"corrupt payload: {e}") from e
+    if len(body) != body_length or zlib.crc32(body) != body_crc:
+        raise SaveFormatError("payload checksum mismatch (truncated or corrupt file)")
+
+    schema_path = SCHEMA_HISTORY.get(save_version)
+    if schema_path is None:
+        raise SaveFormatError(f"no schema known for save version {save_version}")
+    expected_layout = schema_layout(load_schema(schema_path))
+    if layout_id(expected_layout) != layout:
+        raise SaveFormatError(f"written with a different layout of {schema_path} than the current file")
+
+    try:
+        data, pos = _decode_typed(body, 0, expected_layout)
+    except (RecordingFormatError, struct.error, UnicodeDecodeError, IndexError) as e:
+        raise SaveFormatError(f"corrupt payload: {e}") from e
+    if pos != len(body):
+        raise SaveFormatError(f"{len(body) - pos} trailing bytes after the save")
+
+    if upgrade and save_version != SAVE_VERSION:
+        return migrate(data, save_version), SAVE_VERSION
+    return data, save_version
+
+def dumps_save_json(data):
+    """JSON text in SaveSystem.write_save's layout (JSON.stringify(data, "  ") sorts keys)"""
+    return json.dumps(data, indent=2, sort_keys=True, ensure_ascii=False)
+
+def load_save_file(path, upgrade=True):
+    """Read a save from .json or .djsav; returns the data dict"""
+    if path.endswith('.djsav'):
+        with open(path, 'rb') as f:
+            return decode_save(f.read(), upgrade)[0]
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def json_to_save(json_path, out_path):
+    """Convert a JSON save to .djsav; returns (json_bytes, djsav_bytes)"""
+    with open(json_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    blob = encode_save(data)
+    with open(out_path, 'wb') as f:
+        f.write(blob)
+    return os.path.getsize(json_path), len(blob)
+
+def save_to_json(save_path, out_path):
+    """Convert a .djsav file (upgraded to the current version) back to JSON"""
+    data = load_save_file(save_path)
+    with open(out_path, 'w', encoding='utf-8') as f:
+        f.write(dumps_save_json(data))
+    return data
+
+def save_info(save_path):
+    """Summary dict: versions, sizes, compression"""
+    with open(save_path, 'rb') as f:
+        blob = f.read()
+    flags, save_version, layout, body_length, body_crc = read_header(blob)
+    data, _ = decode_save(blob, upgrade=False)
+    return {
+        "save_version": save_version,
+        "current_version": SAVE_VERSION,
+        "layout": f"{layout:08x}",
+        "compressed": bool(flags & FLAG_ZLIB),
+        "body_bytes": body_length,
+        "bytes": len(blob),
+        "json_bytes": len(dumps_save_json(data).encode('utf-8')),
+    }
+
+# Validation: jsonschema when installed, otherwise the draft-07 subset our schemas use
+
+_JSON_TYPES = {
+    'object': lambda value: type(value) is dict,
+    'array': lambda value: type(value) is list,
+    'string': lambda value: type(value) is str,
+    'boolean': lambda value: type(value) is bool,
+    'null': lambda value: value is None,
+    'integer': lambda value: type(value) is int or (type(value) is float and value.is_integer()),
+    'number': lambda value: type(value) in (int, float),
+}
+
+def schema_errors(data, schema, path=""):
+    """Errors for data against a schema using type, enum, const, properties, required,
+    additionalProperties, items and the numeric, length and size bounds"""
+    if not isinstance(schema, dict):
+        return []
+    where = path or "/"
+    schema_type = schema.get('type')
+    if schema_type is not None:
+        types = schema_type if isinstance(schema_type, list) else [schema_type]
+        if not any(_JSON_TYPES.get(name, lambda value: True)(data) for name in types):
+            return [f"{where} must be {' or '.join(types)}"]
+
+    errors = []
+    if 'enum' in schema and data not in schema['enum']:
+        errors.append(f"{where} must be one of {schema['enum']}")
+    if 'const' in schema and data != schema['const']:
+        errors.append(f"{where} must be {schema['const']!r}")
+
+    if type(data) in (int, float):
+        if 'minimum' in schema and data < schema['minimum']:
+            errors.append(f"{where} must be >= {schema['minimum']}")
+        if 'maximum' in schema and data > schema['maximum']:
+            errors.append(f"{where} must be <= {schema['maximum']}")
+        if 'exclusiveMinimum' in schema and data <= schema['exclusiveMinimum']:
+            errors.append(f"{where} must be > {schema['exclusiveMinimum']}")
+        if 'exclusiveMaximum' in schema and data >= schema['exclusiveMaximum']:
+            errors.append(f"{where} must be < {schema['exclusiveMaximum']}")
+    elif type(data) is str:
+        if 'minLength' in schema and len(data) < schema['minLength']:
+            errors.append(f"{where} must have at least {schema['minLength']} characters")
+        if 'maxLength' in schema and len(data) > schema['maxLength']:
+            errors.append(f"{where} must have at most {schema['maxLength']} characters")
+    elif type(data) is list:
+        if 'minItems' in schema and len(data) < schema['minItems']:
+            errors.append(f"{where} must have at least {schema['minItems']} items")
+        if 'maxItems' in schema and len(data) > schema['maxItems']:
+            errors.append(f"{where} must have at most {schema['maxItems']} items")
+        if isinstance(schema.get('items'), dict):
+            for index, item in enumerate(data):
+                errors.extend(schema_errors(item, schema['items'], f"{path}/{index}"))
+    elif type(data) is dict:
+        properties = schema.get('properties', {})
+        for name in schema.get('required', []):
+            if name not in data:
+                errors.append(f"{where} must have required property '{name}'")
+        additional = schema.get('additionalProperties', True)
+        for name, value in data.items():
+            if name in properties:
+                errors.extend(schema_errors(value, properties[name], f"{path}/{name}"))
+            elif additional is False:
+                errors.append(f"{where} must not have additional property '{name}'")
+            elif isinstance(additional, dict):
+                errors.extend(schema_errors(value, additional, f"{path}/{name}"))
+    return errors
+
+_validators = {}
+
+def get_validator(schema_path=SCHEMA_PATH):
+    """function(data) -> list of error strings, built once per process"""
+    if schema_path not in _validators:
+        schema = load_schema(schema_path)
+        try:
+            import jsonschema
+        except ImportError:
+            _validators[schema_path] = lambda data: schema_errors(data, schema)
+        else:
+            validator = jsonschema.Draft7Validator(schema)
+            _validators[schema_path] = lambda data: [
+                f"/{'/'.join(str(part) for part in error.absolute_path)} {error.message}"
+                for error in validator.iter_errors(data)]
+    return _validators[schema_path]
+
+def validate_files(task):
+    """Worker entry point: [(path, errors)] for a chunk of save files"""
+    paths, schema_path = task
+    validate = get_validator(schema_path)
+    results = []
+    for path in paths:
+        try:
+            errors = validate(load_save_file(path))
+        except (OSError, ValueError) as e:
+            errors = [str(e)]
+        results.append((path, errors))
+    return results
+
+def expand_paths(patterns):
+    """Sorted files matching glob patterns (plain paths are kept as they are)"""
+    paths = set()
+    for pattern in patterns:
+        paths.update(glob.glob(pattern) or ([pattern] if os.path.isfile(pattern) else []))
+    return sorted(paths)
+
+def _run_chunks(function, chunks, workers):
+    if workers == 1 or len(chunks) < 2:
+        return [function(chunk) for chunk in chunks]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(function, chunks))
+
+def validate_saves(patterns=(FIXTURES_GLOB,), schema_path=SCHEMA_PATH, workers=None):
+    """Validate every matching .json/.djsav save against the schema in parallel"""
+    paths = expand_paths(patterns)
+    if not paths:
+        print(f"❌ No save files match {', '.join(patterns)}")
+        return False
+
+    chunks = [(paths[start:start + VALIDATE_CHUNK], schema_path) for start in range(0, len(paths), VALIDATE_CHUNK)]
+    results = _run_chunks(validate_files, chunks, workers)
+
+    failed = 0
+    for path, errors in (item for chunk in results for item in chunk):
+        if errors:
+            failed += 1
+            print(f"❌ {path}")
+            for error in errors:
+                print(f"   - {error}")
+    if failed:
+        print(f"❌ {failed} of {len(paths)} saves failed validation against {schema_path}")
+        return False
+    print(f"✅ {len(paths)} saves valid against {schema_path}")
+    return True
+
+def upgrade_save_file(path):
+    """Rewrite an older .djsav file at SAVE_VERSION; returns the version it had"""
+    with open(path, 'rb') as f:
+        blob = f.read()
+    version = read_header(blob)[1]
+    if version != SAVE_VERSION:
+        data, _ = decode_save(blob)
+        temp_path = path + ".tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(encode_save(data))
+        os.replace(temp_path, path)
+    return version
+
+def upgrade_files(paths):
+    """Worker entry point: [(path, old_version, error)] for a chunk of .djsav files"""
+    results = []
+    for path in paths:
+        try:
+            results.append((path, upgrade_save_file(path), None))
+        except (OSError, ValueError) as e:
+            results.append((path, None, str(e)))
+    return results
+
+def upgrade_saves(patterns, workers=None):
+    """Migrate every matching .djsav file to SAVE_VERSION in place, in parallel"""
+    paths = [path for path in expand_paths(patterns) if path.endswith('.djsav')]
+    if not paths:
+        print(f"❌ No .djsav files match {', '.join(patterns)}")
+        return False
+
+    chunks = [paths[start:start + VALIDATE_CHUNK] for start in range(0, len(paths), VALIDATE_CHUNK)]
+    upgraded = failed = 0
+    for path, version, error in (item for chunk in _run_chunks(upgrade_files, chunks, workers) for item in chunk):
+        if error:
+            failed += 1
+            print(f"❌ {path}: {error}")
+        elif version != SAVE_VERSION:
+            upgraded += 1
+            print(f"🔄 {path}: version {version} -> {SAVE_VERSION}")
+    print(f"{'❌' if failed else '✅'} {upgraded} upgraded, {len(paths) - upgraded - failed} already current, {failed} failed")
+    return failed == 0
+
+def main():
+    """Usage: save_codec.py encode|decode|info|validate|upgrade <file>..."""
+    if len(sys.argv) < 2 or sys.argv[1] not in ("encode", "decode", "info", "validate", "upgrade"):
+        print("Usage: python save_codec.py encode <save.json> [out.djsav]")
+        print("       python save_codec.py decode <save.djsav> [out.json]")
+        print("       python save_codec.py info <save.djsav>")
+        print("       python save_codec.py validate [pattern ...]")
+        print("       python save_codec.py upgrade <pattern> ...")
+        sys.exit(1)
+
+    action, paths = sys.argv[1], sys.argv[2:]
+    if action == "validate":
+        if not validate_saves(paths or [FIXTURES_GLOB]):
+            sys.exit(1)
+        return
+    if action == "upgrade":
+        if not upgrade_saves(paths):
+            sys.exit(1)
+        return
+    if not paths:
+        print("❌ No file given")
+        sys.exit(1)
+
+    path = paths[0]
+    extra = paths[1] if len(paths) > 1 else None
+    if action == "encode":
+        out_path = extra or os.path.splitext(path)[0] + ".djsav"
+        json_size, save_size = json_to_save(path, out_path)
+        print(f"✅ {path} -> {out_path}: {json_size} -> {save_size} bytes")
+    elif action == "decode":
+        out_path = extra or os.path.splitext(path)[0] + ".json"
+        save_to_json(path, out_path)
+        print(f"✅ {path} -> {out_path}")
+    else:
+        for key, value in save_info(path).items():
+            print(f"{key}: {value}")
+
+if __name__ == "__main__":
+    main()
@@ -115,10 +115,18 @@ pause
     with open("start_auto_export.bat", "w") as f:
         f.write(start_script)
     
-    # Stop script
+    # Stop script (stops the watcher that holds the lock, else falls back to the window title)
     stop_script = """@echo off
 echo Stopping Dunjon Auto Export Service...
-taskkill /f /im python.exe /fi "WINDOWTITLE eq Dunjon Auto Export*"
+cd /d "{}"
+set WATCHER_PID=
+if exist ".dunjon\\locks\\watcher.lock" set /p WATCHER_PID=<".dunjon\\locks\\watcher.lock"
+if defined WATCHER_PID (
+    taskkill /f /pid %WATCHER_PID%
+    del ".dunjon\\locks\\watcher.lock"
+) else (
+    taskkill /f /im python.exe /fi "WINDOWTITLE eq Dunjon Auto Export*"
+)
 echo Service stopped
 pause
 """.format(os.getcwd())
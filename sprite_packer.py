@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+"""
+Sprite Sheet Packer
+Packs a character's animation frames into one trimmed, deduplicated PNG sheet
+
+Each character is a directory of frames (game-godot/assets/Brute). Its
+animations come from, in order of preference:
+
+    sprites.json          an explicit spec (see below)
+    <dir>/<animation>/    one subdirectory per animation, frames in name order
+    loose files           "Brute 1 left walking.png": frames grouped by their
+                          description, ordered by number; known descriptions
+                          map to the game's names (walk_left ...)
+
+sprites.json:
+
+    {
+      "frame_size": [32, 32],             resize every frame first (optional)
+      "remove_background": true,          key out the white JPG background
+      "animations": {
+        "walk_left": {"speed": 8.0, "frames": ["Brute 1 left walking.png", ...]},
+        "idle_down": {"speed": 1.0, "frames": [{"file": "Grunt 3 idle middle.png", "duration": 3.0}, ...]}
+      }
+    }
+
+Frames are decoded to RGBA (so JPGs end up lossless from here on), keyed
+with the same thresholds as enemy.gd's remove_white_background, resized
+like process_individual_frame, trimmed to their opaque pixels and
+deduplicated by content. game-godot/assets/sprites/<character>.png gets the
+unique frames shelf-packed; <character>.json indexes every frame (sheet
+region, trim margin, pivot) and <character>.tres is a ready SpriteFrames
+resource of AtlasTextures whose margins restore the untrimmed frame size, so
+AnimatedSprite2D offsets stay valid.
+
+Characters are packed in parallel. A character is skipped while the hash of
+its sources and settings matches its index, and restored from the shared
+build cache (build_cache.py) when it was packed before in any checkout.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from build_cache import cache_key, get_build_cache, source_version
+from room_json import write_json
+
+PACKER_VERSION = 2
+
+DEFAULT_SOURCE_DIRS = (os.path.join("game-godot", "assets", "Brute"),)
+DEFAULT_OUT_DIR = os.path.join("game-godot", "assets", "sprites")
+SPEC_FILE = "sprites.json"
+
+FRAME_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp', '.bmp')
+
+# Transparent gap between packed frames so filtering never samples a neighbour
+PADDING = 1
+
+# Loose-file descriptions used by enemy.gd and setup_brute_animations.gd
+DESCRIPTION_ANIMATIONS = {
+    "down idle": "idle_down",
+    "left idle": "idle_left",
+    "right idle": "idle_right",
+    "up idle": "idle_up",
+    "down walking": "walk_down",
+    "down-facing walking": "walk_down",
+    "left walking": "walk_left",
+    "right walking": "walk_right",
+    "up walking": "walk_up",
+}
+
+# Speeds from Enemy.tscn; anything else gets Godot's default of 5 fps
+ANIMATION_SPEEDS = {"idle": 4.0, "walk": 8.0}
+DEFAULT_SPEED = 5.0
+
+_LOOSE_FRAME = re.compile(r'^(?P<prefix>.+?)\s+(?P<number>\d+(?:\.\d+)?)\s+(?P<description>.+)$')
+
+def file_digest(path):
+    """sha256 of a file's bytes"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _slug(text):
+    return re.sub(r'[^a-z0-9]+', '_', text.lower()).strip('_')
+
+def _natural_key(name):
+    return [int(part) if part.isdigit() else part.lower() for part in re.split(r'(\d+)', name)]
+
+def _is_frame(name):
+    return name.lower().endswith(FRAME_EXTENSIONS)
+
+def default_speed(animation):
+    return ANIMATION_SPEEDS.get(animation.split('_')[0], DEFAULT_SPEED)
+
+def _animation(name, frames, speed=None):
+    return {"name": name, "speed": float(default_speed(name) if speed is None else speed), "frames": frames}
+
+def discover_animations(char_dir):
+    """The character's settings and animations, each {"name", "speed", "frames": [(path, duration)]}"""
+    spec_path = os.path.join(char_dir, SPEC_FILE)
+    if os.path.exists(spec_path):
+        with open(spec_path, 'r') as f:
+            spec = json.load(f)
+        animations = []
+        for name, entry in spec.get("animations", {}).items():
+            frames = []
+            for frame in entry.get("frames", []):
+                if isinstance(frame, str):
+                    frame = {"file": frame}
+                frames.append((os.path.join(char_dir, frame["file"]), float(frame.get("duration", 1.0))))
+            animations.append(_animation(name, frames, entry.get("speed")))
+        settings = {
+            "frame_size": spec.get("frame_size"),
+            "remove_background": spec.get("remove_background"),
+        }
+        return settings, animations
+
+    settings = {"frame_size": None, "remove_background": None}
+    entries = sorted(os.listdir(char_dir), key=_natural_key)
+    subdirs = [name for name in entries if os.path.isdir(os.path.join(char_dir, name))]
+    animations = []
+    for name in subdirs:
+        frames = [(os.path.join(char_dir, name, file), 1.0)
+                  for file in sorted(os.listdir(os.path.join(char_dir, name)), key=_natural_key) if _is_frame(file)]
+        if frames:
+            animations.append(_animation(_slug(name), frames))
+    if animations:
+        return settings, animations
+
+    groups = {}
+    for file in entries:
+        match = _LOOSE_FRAME.match(os.path.splitext(file)[0])
+        if not _is_frame(file) or not match:
+            continue
+        description = ' '.join(match.group('description').split()).lower()
+        name = DESCRIPTION_ANIMATIONS.get(description) or _slug(description)
+        groups.setdefault(name, []).append((float(match.group('number')), match.group('prefix'), file))
+    for name, files in groups.items():
+        frames = [(os.path.join(char_dir, file), 1.0) for _, _, file in sorted(files)]
+        animations.append(_animation(name, frames))
+    return settings, animations
+
+def source_hash(animations, settings, options):
+    """Cache key for a character: packer version, settings, animation layout and frame bytes"""
+    digest = hashlib.sha256()
+    layout = [[a["name"], a["speed"], [[os.path.basename(p), d] for p, d in a["frames"]]] for a in animations]
+    digest.update(json.dumps([PACKER_VERSION, settings, options, layout], sort_keys=True).encode())
+    for path in sorted({path for a in animations for path, _ in a["frames"]}):
+        digest.update(os.path.basename(path).encode())
+        digest.update(file_digest(path).encode())
+    return digest.hexdigest()
+
+def remove_white_background(pixels):
+    """Make near-white pixels transparent, with enemy.gd's thresholds (in place)"""
+    import numpy as np
+
+    rgb = pixels[..., :3].astype(np.int16)
+    brightness = rgb.sum(axis=-1)
+    saturation = rgb.max(axis=-1) - rgb.min(axis=-1)
+    # brightness > 0.9 and saturation < 0.1, or every channel > 0.95 (on 0..255)
+    background = ((brightness > 0.9 * 255 * 3) & (saturation < 0.1 * 255)) | (rgb > 0.95 * 255).all(axis=-1)
+    pixels[background] = 0
+    return int(background.sum())
+
+def load_frame(path, frame_size=None, remove_background=None):
+    """Decode a frame to an RGBA array, keyed and resized like enemy.gd
+
+    remove_background None keys only frames without an alpha channel (JPGs).
+    """
+    import numpy as np
+    from PIL import Image
+
+    with Image.open(path) as image:
+        has_alpha = 'A' in image.getbands() or 'transparency' in image.info
+        pixels = np.array(image.convert('RGBA'))
+    if remove_background or (remove_background is None and not has_alpha):
+        remove_white_background(pixels)
+    if frame_size:
+        width, height = frame_size
+        resized = Image.fromarray(pixels, 'RGBA').resize((int(width), int(height)), Image.LANCZOS)
+        pixels = np.array(resized)
+    # Colour under fully transparent pixels is invisible; clear it so equal frames hash equal
+    pixels[pixels[..., 3] == 0] = 0
+    return pixels
+
+def trim_frame(pixels):
+    """Crop to the opaque pixels; returns (trimmed, left, top)
+
+    A fully transparent frame keeps one transparent pixel.
+    """
+    import numpy as np
+
+    opaque = pixels[..., 3] > 0
+    rows = np.flatnonzero(opaque.any(axis=1))
+    columns = np.flatnonzero(opaque.any(axis=0))
+    if not len(rows):
+        return pixels[:1, :1], 0, 0
+    top, bottom = rows[0], rows[-1] + 1
+    left, right = columns[0], columns[-1] + 1
+    return pixels[top:bottom, left:right], int(left), int(top)
+
+def frame_key(trimmed):
+    """Content key for a trimmed frame"""
+    height, width = trimmed.shape[:2]
+    digest = hashlib.sha256(f"{width}x{height}:".encode())
+    digest.update(trimmed.tobytes())
+    return digest.hexdigest()[:16]
+
+def pack_shelves(sizes, padding=PADDING):
+    """Shelf-pack (width, height) boxes, tallest first; returns (positions, sheet_width, sheet_height)"""
+    if not sizes:
+        return [], 1, 1
+    area = sum((w + padding) * (h + padding) for w, h in sizes)
+    shelf_width = max(max(w for w, _ in sizes), int(area ** 0.5 + 0.5))
+
+    positions = [None] * len(sizes)
+    x = y = shelf_height = sheet_width = 0
+    for index in sorted(range(len(sizes)), key=lambda i: (-sizes[i][1], -sizes[i][0], i)):
+        width, height = sizes[index]
+        if x and x + width > shelf_width:
+            x = 0
+            y += shelf_height + padding
+            shelf_height = 0
+        positions[index] = (x, y)
+        sheet_width = max(sheet_width, x + width)
+        x += width + padding
+        shelf_height = max(shelf_height, height)
+    return positions, sheet_width, y + shelf_height
+
+def res_path(path):
+    """res:// path of a file inside the Godot project, or None outside one"""
+    directory = os.path.dirname(os.path.abspath(path))
+    while True:
+        if os.path.exists(os.path.join(directory, "project.godot")):
+            return "res://" + os.path.relpath(os.path.abspath(path), directory).replace(os.sep, '/')
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return None
+        directory = parent
+
+def _rect2(values):
+    return "Rect2(" + ", ".join(str(v) for v in values) + ")"
+
+def sprite_frames_tres(index, texture_path):
+    """A Godot 4 SpriteFrames resource with one AtlasTexture per unique frame"""
+    keys = list(index["sheet_frames"])
+    sub_ids = {key: f"AtlasTexture_{n}" for n, key in enumerate(keys)}
+    lines = [f'[gd_resource type="SpriteFrames" load_steps={len(keys) + 2} format=3]', "",
+             f'[ext_resource type="Texture2D" path="{texture_path}" id="1_sheet"]', ""]
+    for key in keys:
+        frame = index["sheet_frames"][key]
+        lines += [f'[sub_resource type="AtlasTexture" id="{sub_ids[key]}"]',
+                  'atlas = ExtResource("1_sheet")',
+                  f'region = {_rect2(frame["region"])}']
+        if any(frame["margin"]):
+            lines.append(f'margin = {_rect2(frame["margin"])}')
+        lines.append("")
+
+    animations = []
+    for name, animation in index["animations"].items():
+        frames = ", ".join('{\n"duration": %r,\n"texture": SubResource("%s")\n}'
+                           % (float(frame["duration"]), sub_ids[frame["frame"]]) for frame in animation["frames"])
+        animations.append('{\n"frames": [%s],\n"loop": true,\n"name": &"%s",\n"speed": %r\n}'
+                          % (frames, name, float(animation["speed"])))
+    lines += ["[resource]", "animations = [" + ", ".join(animations) + "]", ""]
+    return "\n".join(lines)
+
+def pack_character(job):
+    """Worker: pack one character directory, returning its stats row"""
+    char_dir, out_dir, options, force = job
+    character = os.path.basename(os.path.normpath(char_dir))
+    start = time.perf_counter()
+    try:
+        import numpy as np
+        from PIL import Image
+
+        settings, animations = discover_animations(char_dir)
+        if not animations:
+            return {"character": character, "error": "no frames found"}
+        if options.get("frame_size"):
+            settings["frame_size"] = options["frame_size"]
+        key = source_hash(animations, settings, options)
+
+        sheet_path = os.path.join(out_dir, character + ".png")
+        index_path = os.path.join(out_dir, character + ".json")
+        tres_path = os.path.join(out_dir, character + ".tres")
+        if not force and os.path.exists(index_path) and os.path.exists(sheet_path):
+            with open(index_path, 'r') as f:
+                previous = json.load(f)
+            if previous.get("source_hash") == key:
+                return _index_stats(character, previous, sheet_path, "unchanged", start)
+
+        # The same frames may have been packed in another checkout
+        texture = res_path(sheet_path)
+        outputs = [os.path.basename(path) for path in (sheet_path, index_path, tres_path if texture else None) if path]
+        entry_key = cache_key("sprites", source_version("sprite_packer"), [key, texture], outputs=outputs)
+        cache = get_build_cache()
+        if cache is not None and not force and cache.restore("sprites", entry_key, out_dir) is not None:
+            with open(index_path, 'r') as f:
+                return _index_stats(character, json.load(f), sheet_path, "build cache", start)
+
+        # Decode each source file once, however many animations use it
+        loaded = {}
+        unique = {}  # frame key -> trimmed pixels
+        for animation in animations:
+            for path, _ in animation["frames"]:
+                if path in loaded:
+                    continue
+                pixels = load_frame(path, settings["frame_size"], settings["remove_background"])
+                trimmed, left, top = trim_frame(pixels)
+                fkey = frame_key(trimmed)
+                unique.setdefault(fkey, trimmed)
+                loaded[path] = (fkey, pixels.shape[1], pixels.shape[0], left, top)
+
+        keys = list(unique)
+        positions, sheet_width, sheet_height = pack_shelves(
+            [(unique[k].shape[1], unique[k].shape[0]) for k in keys])
+        position_of = dict(zip(keys, positions))
+        sheet = np.zeros((sheet_height, sheet_width, 4), dtype=np.uint8)
+        for fkey, (x, y) in position_of.items():
+            trimmed = unique[fkey]
+            sheet[y:y + trimmed.shape[0], x:x + trimmed.shape[1]] = trimmed
+
+        # One AtlasTexture per (pixels, placement): identical pixels drawn at
+        # different offsets share a sheet region but need their own margin
+        sheet_frames = {}
+        frames = {}
+        frame_ids = {}  # source path -> sheet frame id
+        for path, (fkey, width, height, left, top) in loaded.items():
+            x, y = position_of[fkey]
+            trim_width, trim_height = unique[fkey].shape[1], unique[fkey].shape[0]
+            # AtlasTexture.margin: offset into the original frame plus the trimmed-away size
+            margin = [left, top, width - trim_width, height - trim_height]
+            frame_id = fkey if sheet_frames.get(fkey, {}).get("margin", margin) == margin else \
+                f"{fkey}@{'_'.join(str(v) for v in margin)}"
+            sheet_frames.setdefault(frame_id, {
+                "region": [x, y, trim_width, trim_height],
+                "margin": margin,
+                "source_size": [width, height],
+                "pivot": [width / 2 - left, height / 2 - top],
+            })
+            frame_ids[path] = frame_id
+            frames[os.path.basename(path)] = {"frame": frame_id, "source_size": [width, height],
+                                              "trim_offset": [left, top]}
+
+        index = {
+            "version": PACKER_VERSION,
+            "character": character,
+            "image": os.path.basename(sheet_path),
+            "size": [sheet_width, sheet_height],
+            "source_hash": key,
+            "frame_count": len(loaded),
+            "sheet_frames": sheet_frames,
+            "frames": frames,
+            "animations": {
+                animation["name"]: {
+                    "speed": animation["speed"],
+                    "loop": True,
+                    "frames": [{"frame": frame_ids[path], "duration": duration}
+                               for path, duration in animation["frames"]],
+                }
+                for animation in animations
+            },
+        }
+
+        os.makedirs(out_dir, exist_ok=True)
+        Image.fromarray(sheet, 'RGBA').save(sheet_path, optimize=True)
+        if texture:
+            with open(tres_path, 'w', newline='\n') as f:
+                f.write(sprite_frames_tres(index, texture))
+        write_json(index_path, index)
+        if cache is not None:
+            cache.store("sprites", entry_key, out_dir, outputs)
+    except Exception as e:
+        return {"character": character, "error": f"{type(e).__name__}: {e}"}
+    finally:
+        # Pool workers exit without running atexit hooks, so hand the counts over here
+        if get_build_cache() is not None:
+            get_build_cache().flush()
+
+    stats = _index_stats(character, index, sheet_path, "built", start)
+    stats["tres"] = bool(texture)
+    return stats
+
+def _index_stats(character, index, sheet_path, status, start):
+    return {
+        "character": character,
+        "status": status,
+        "frames": index["frame_count"],
+        "unique": len(index["sheet_frames"]),
+        "size": index["size"],
+        "bytes": os.path.getsize(sheet_path),
+        "build_ms": (time.perf_counter() - start) * 1000,
+    }
+
+def pack_all_sprites(source_dirs=DEFAULT_SOURCE_DIRS, out_dir=DEFAULT_OUT_DIR, frame_size=None,
+                     workers=None, force=False):
+    """Pack every character directory in parallel and print a stats report"""
+    char_dirs = []
+    for source in source_dirs:
+        char_dirs += sorted(glob.glob(source)) if glob.has_magic(source) else [source]
+    char_dirs = [path for path in char_dirs
+                 if os.path.isdir(path) and os.path.abspath(path) != os.path.abspath(out_dir)]
+    if not char_dirs:
+        print(f"❌ No character directories found in {', '.join(source_dirs)}")
+        return False
+
+    options = {"frame_size": list(frame_size) if frame_size else None, "padding": PADDING}
+    jobs = [(path, out_dir, options, force) for path in char_dirs]
+
+    print(f"Packing sprites for {len(char_dirs)} character(s) into {out_dir}...")
+    print("=" * 66)
+    print(f"{'character':<16} {'frames':>7} {'unique':>7} {'sheet':>11} {'bytes':>9} {'build ms':>10}")
+
+    failed_count = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for stats in pool.map(pack_character, jobs):
+            if "error" in stats:
+                failed_count += 1
+                print(f"❌ {stats['character']}: {stats['error']}")
+                continue
+            sheet = "x".join(str(v) for v in stats["size"])
+            if stats["status"] != "built":
+                note = f"  ({stats['status']})"
+            else:
+                note = "" if stats["tres"] else "  (no project.godot, .tres skipped)"
+            print(f"{stats['character']:<16} {stats['frames']:>7} {stats['unique']:>7} {sheet:>11} "
+                  f"{stats['bytes']:>9} {stats['build_ms']:>10.1f}{note}")
+
+    print("=" * 66)
+    print(f"{'❌' if failed_count else '✅'} Packed {len(char_dirs) - failed_count}/{len(char_dirs)} characters")
+    return failed_count == 0
+
+def main():
+    """Pack the sprite sheets of the given character directories (default: Brute)"""
+    source_dirs = [arg for arg in sys.argv[1:] if not arg.startswith('--')] or DEFAULT_SOURCE_DIRS
+    if not pack_all_sprites(source_dirs, force="--force" in sys.argv):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,13 @@
 @echo off
 echo Stopping Dunjon Auto Export Service...
-taskkill /f /im python.exe /fi "WINDOWTITLE eq Dunjon Auto Export*"
+cd /d "%~dp0"
+set WATCHER_PID=
+if exist ".dunjon\locks\watcher.lock" set /p WATCHER_PID=<".dunjon\locks\watcher.lock"
+if defined WATCHER_PID (
+    taskkill /f /pid %WATCHER_PID%
+    del ".dunjon\locks\watcher.lock"
+) else (
+    taskkill /f /im python.exe /fi "WINDOWTITLE eq Dunjon Auto Export*"
+)
 echo Service stopped
 pause
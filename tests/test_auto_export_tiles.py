@@ -0,0 +1,45 @@
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import auto_export_tiles
+from auto_export_tiles import TiledFileHandler
+
+def test_event_and_queued_conversions_never_overlap(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "tiles").mkdir()
+    (tmp_path / "game-godot" / "data" / "rooms").mkdir(parents=True)
+    handler = TiledFileHandler()
+
+    running = []
+    overlaps = []
+
+    def slow_conversion(direction, source, target):
+        running.append(direction)
+        if len(running) > 1:
+            overlaps.append(list(running))
+        time.sleep(0.01)
+        Path(target).write_text(str(source))
+        running.remove(direction)
+        return True
+
+    monkeypatch.setattr(handler, "run_conversion", slow_conversion)
+    jobs = [{"action": "tmx_to_json", "source": str(tmp_path / "tiles" / f"Q{i}.tmx"),
+             "target": str(tmp_path / "game-godot" / "data" / "rooms" / f"Q{i}.json")} for i in range(20)]
+    monkeypatch.setattr(auto_export_tiles, "take_jobs", lambda: jobs)
+
+    def events():
+        for i in range(20):
+            handler.handle_change(tmp_path / "tiles" / f"E{i}.tmx")
+
+    observer = threading.Thread(target=events)
+    observer.start()
+    handler.process_queued_jobs()
+    observer.join()
+
+    assert not overlaps
+    assert len(handler.own_writes) == 40
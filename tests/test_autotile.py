@@ -0,0 +1,67 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from autotile import autotile_room, load_autotile_rules
+from json_to_tmx import write_tmx_file
+from room_data import decode_tile_layer, find_layer, load_room
+from tiled_workflow import parse_tmx
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TSX_PATH = os.path.join(REPO_DIR, "tiles", "dunjon_tileset.tsx")
+A1_PATH = os.path.join(REPO_DIR, "game-godot", "data", "rooms", "A1.json")
+
+WALL_RULE = '''  <property name="type" value="wall"/>
+   <property name="autotile" value="4"/>
+   <property name="autotile_variants" value="0:3,15:4"/>'''
+
+def _tileset_with_wall_rule(tmp_path):
+    """The real tileset with a 4-neighbour rule declared on its wall tile (id 2)"""
+    with open(TSX_PATH, 'r') as f:
+        source = f.read()
+    assert '<property name="type" value="wall"/>' in source
+    tsx_path = tmp_path / "dunjon_tileset.tsx"
+    tsx_path.write_text(source.replace('  <property name="type" value="wall"/>', WALL_RULE))
+    return tsx_path
+
+def test_rule_gids_match_tile_ids(tmp_path):
+    rules = load_autotile_rules(str(_tileset_with_wall_rule(tmp_path)), firstgid=1)
+    assert len(rules) == 1
+    assert rules[0].base_gid == 2
+    assert rules[0].variants == {0: 3, 15: 4}
+
+def test_walls_in_a1_are_autotiled(tmp_path):
+    _tileset_with_wall_rule(tmp_path)
+    room = load_room(A1_PATH)
+    before = decode_tile_layer(find_layer(room, "Collision"))
+    wall_cells = [(y, x) for y, row in enumerate(before) for x, gid in enumerate(row) if gid == 2]
+    assert wall_cells
+
+    assert autotile_room(room, str(tmp_path)) >= 1
+    after = decode_tile_layer(find_layer(room, "Collision"))
+    assert {after[y][x] for y, x in wall_cells} <= {2, 3, 4}
+    assert any(after[y][x] != 2 for y, x in wall_cells)
+    assert all(gid == 0 for y, row in enumerate(after) for x, gid in enumerate(row) if (y, x) not in wall_cells)
+
+def test_rules_outside_firstgid_1_are_rejected(tmp_path):
+    tsx_path = str(_tileset_with_wall_rule(tmp_path))
+    with pytest.raises(ValueError, match="firstgid 1"):
+        load_autotile_rules(tsx_path, firstgid=12)
+    # A tileset without rules may sit anywhere
+    assert load_autotile_rules(TSX_PATH, firstgid=12) == []
+
+def test_variants_written_back_to_tmx_are_stable(tmp_path):
+    _tileset_with_wall_rule(tmp_path)
+    room = load_room(A1_PATH)
+    room['tilesets'] = [{"firstgid": 1, "source": "dunjon_tileset.tsx"}]
+    autotile_room(room, str(tmp_path))
+    autotiled = decode_tile_layer(find_layer(room, "Collision"))
+
+    # The watcher's JSON -> TMX sync writes the variants into the TMX
+    tmx_path = str(tmp_path / "A1.tmx")
+    write_tmx_file(room, tmx_path)
+    converted = parse_tmx(tmx_path)
+    assert decode_tile_layer(find_layer(converted, "Collision")) == autotiled
@@ -0,0 +1,53 @@
+import json
+import os
+import shutil
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+
+from bake_layers import bake_all_rooms, tiles_digest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+A1_PATH = os.path.join(REPO_DIR, "game-godot", "data", "rooms", "A1.json")
+
+def _bake(tmp_path, atlas_path):
+    rooms_dir = tmp_path / "rooms"
+    rooms_dir.mkdir()
+    shutil.copy(A1_PATH, rooms_dir)
+    return bake_all_rooms(str(rooms_dir), str(tmp_path / "baked"), str(atlas_path), force=True)
+
+def test_unreadable_atlas_fails_cleanly(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv("DUNJON_CACHE", "0")
+    atlas_path = tmp_path / "atlas.png"
+    atlas_path.write_bytes(b"version https://git-lfs.github.com/spec/v1\noid sha256:00\nsize 1\n")
+    assert _bake(tmp_path, atlas_path) is False
+    output = capsys.readouterr().out
+    assert "❌ Could not load tileset atlas" in output
+    assert "git lfs pull" in output
+
+def test_atlas_smaller_than_a_tile_fails_cleanly(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv("DUNJON_CACHE", "0")
+    atlas_path = tmp_path / "atlas.png"
+    Image.new('RGBA', (8, 8)).save(atlas_path)
+    assert _bake(tmp_path, atlas_path) is False
+    assert "smaller than one 32x32 tile" in capsys.readouterr().out
+
+def test_real_atlas_bakes(tmp_path, monkeypatch):
+    monkeypatch.setenv("DUNJON_CACHE", "0")
+    atlas_path = tmp_path / "atlas.png"
+    Image.new('RGBA', (128, 128), (10, 20, 30, 255)).save(atlas_path)
+    assert _bake(tmp_path, atlas_path) is True
+    manifest = json.loads((tmp_path / "baked" / "manifest.json").read_text())
+    with open(A1_PATH, 'r') as f:
+        ground = next(layer for layer in json.load(f)["layers"] if layer["name"] == "Ground")
+    assert manifest["rooms"]["A1"]["layers"]["Ground"]["tiles_sha256"] == tiles_digest(ground)
+
+def test_tiles_digest_follows_the_tiles_not_the_encoding():
+    csv_layer = {"width": 3, "height": 2, "data": "1,2,3,\n4, 5 ,2147483654"}
+    list_layer = {"width": 3, "height": 2, "data": [1, 2, 3, 4, 5, 2147483654]}
+    short_layer = {"width": 3, "height": 2, "data": "1,2,3,\n4,5"}
+    assert tiles_digest(csv_layer) == tiles_digest(list_layer)
+    assert tiles_digest(short_layer) == tiles_digest({"width": 3, "height": 2, "data": [1, 2, 3, 4, 5, 0]})
+    assert tiles_digest(csv_layer) != tiles_digest(short_layer)
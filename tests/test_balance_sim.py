@@ -0,0 +1,61 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from balance_sim import SPAWN_JITTER_PX, TIME_STEP, run_simulation, simulate
+
+def _encounter(enemy_health, enemy_damage, player_health=100.0, distance=100.0, accuracy=1.0, dodge_chance=0.0):
+    """One stationary enemy already in reach, firing on the same cooldown as the player"""
+    return {
+        "health": np.array([enemy_health]),
+        "damage": np.array([enemy_damage]),
+        "speed": np.array([0.0]),
+        "reach": np.array([distance + SPAWN_JITTER_PX]),
+        "distance": np.array([distance]),
+        "enemies": ["brute"],
+        "player_health": player_health,
+        "projectile_range": 1000.0,
+        "attack_cooldown": 0.5,
+        "enemy_attack_cooldown": 0.5,
+        "player.dashCooldown": 1.0,
+        "drops.healthChance": 0.0,
+        "drops.ammoChance": 1.0,
+        "sim.player_damage": 10.0,
+        "sim.accuracy": accuracy,
+        "sim.dodge_chance": dodge_chance,
+    }
+
+def test_same_seed_gives_the_same_report():
+    params = {"projectiles.speed": 10.0, "projectiles.lifetime": 2.0, "enemy.brute.health": 40.0,
+              "enemy.brute.damage": 5.0, "enemy.brute.speed": 60.0, "enemies.healthMultiplier": 1.0,
+              "enemies.damageMultiplier": 1.0, "player.health": 100.0, "attack_cooldown": 0.5,
+              "enemy_attack_cooldown": 1.0, "player.dashCooldown": 1.0, "drops.healthChance": 0.3,
+              "drops.ammoChance": 0.5, "sim.player_damage": 10.0, "sim.accuracy": 0.7, "sim.dodge_chance": 0.5}
+    encounters = {"room": [("brute", 200.0), ("brute", 300.0)]}
+    multipliers = {"normal": {}}
+    args = (encounters, params, {"brute": "chase"}, multipliers, ("normal",), 5000)
+    first = run_simulation(*args, seed=3, workers=1)
+    assert first == run_simulation(*args, seed=3, workers=1)
+    assert first != run_simulation(*args, seed=4, workers=1)
+
+def test_perfect_aim_without_dodges_is_deterministic():
+    # 30 health at 10 per shot: the third shot kills, two cooldowns after the
+    # first one (shots fall on the time step grid, so allow a step per cooldown)
+    result = simulate(_encounter(enemy_health=30.0, enemy_damage=1.0), 2000, np.random.default_rng(0))
+    assert not result["died"].any()
+    assert not np.isnan(result["clear_time"]).any()
+    assert (result["clear_time"] >= 1.0).all() and (result["clear_time"] <= 1.5 + 3 * TIME_STEP).all()
+    # Every enemy attack lands, one per 0.5 s until the kill
+    assert set(np.unique(result["damage_taken"]).tolist()) <= {2.0, 3.0, 4.0}
+    assert (result["ammo_drops"] == 1).all()
+
+def test_a_dead_player_does_not_finish_the_encounter():
+    # Both sides kill with one hit; when they act in the same step the enemy attacks first
+    result = simulate(_encounter(enemy_health=10.0, enemy_damage=100.0), 20000, np.random.default_rng(1))
+    cleared = ~np.isnan(result["clear_time"])
+    assert result["died"].any() and cleared.any()
+    assert not (result["died"] & cleared).any()
+    assert (result["died"] | cleared).all()
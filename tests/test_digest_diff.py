@@ -0,0 +1,41 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from digest_diff import diff_digest_logs, find_divergence
+
+def _write_log(path, frames, tail=""):
+    with open(path, 'w') as f:
+        for frame in frames:
+            f.write(json.dumps({"frame": frame, "state": {"hp": 100 - frame % 7}}) + "\n")
+        f.write(tail)
+    return str(path)
+
+def test_reports_first_divergent_frame(tmp_path):
+    log_a = _write_log(tmp_path / "a.jsonl", range(1000))
+    log_b = tmp_path / "b.jsonl"
+    lines = open(log_a).read().splitlines()
+    lines[612] = json.dumps({"frame": 612, "state": {"hp": -1}})
+    log_b.write_text("\n".join(lines) + "\n")
+    result = find_divergence(log_a, str(log_b), window_frames=64)
+    assert result["frame"] == 612 and result["line"] == 612
+    assert result["differences"] == ["state.hp: 97 != -1"]
+
+def test_truncated_last_line_is_the_divergence_point(tmp_path, capsys):
+    log_a = _write_log(tmp_path / "a.jsonl", range(300))
+    log_b = _write_log(tmp_path / "b.jsonl", range(299), tail='{"frame": 299, "sta')
+    result = find_divergence(log_a, log_b, window_frames=64)
+    assert result["line"] == 299 and result["ended"] is None
+    assert result["differences"] == [f"{log_b} line 300: not a valid JSON record (corrupt or truncated)"]
+    assert not diff_digest_logs(log_a, log_b, 64)
+    assert f"{log_b} line 300" in capsys.readouterr().out
+
+def test_corrupt_line_in_the_longer_log_is_reported(tmp_path):
+    log_a = _write_log(tmp_path / "a.jsonl", range(10))
+    # Blank lines are skipped by the scan but counted in the reported line number
+    log_b = _write_log(tmp_path / "b.jsonl", range(10), tail="\n\n\x00\x00garbage\n")
+    result = find_divergence(log_a, log_b)
+    assert result["ended"] == log_a and result["frame"] is None
+    assert result["differences"] == [f"{log_b} line 13: not a valid JSON record (corrupt or truncated)"]
@@ -0,0 +1,19 @@
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from dunjon import shard_spec
+
+def test_shard_spec_is_one_based():
+    assert shard_spec("1/1") == (0, 1)
+    assert shard_spec("2/4") == (1, 4)
+    assert shard_spec("4/4") == (3, 4)
+
+@pytest.mark.parametrize("text", ["2", "1/2/3", "a/b", "", "0/4", "5/4", "1/0", "-1/4"])
+def test_shard_spec_rejects_bad_shards(text):
+    with pytest.raises(argparse.ArgumentTypeError):
+        shard_spec(text)
@@ -0,0 +1,80 @@
+import base64
+import gzip
+import json
+import os
+import struct
+import sys
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from export_targets import DEFAULT_ROOMS_DIR, ExportTarget, load_export_targets, room_for_target
+from room_data import encode_csv_rows
+
+ROWS = [[1, 2, 0], [0x80000003, 5, 6]]
+
+def _write_settings(tmp_path, entries):
+    path = tmp_path / "tiles" / "export_settings.json"
+    path.parent.mkdir()
+    path.write_text(json.dumps({"exportSettings": entries}))
+    return str(path)
+
+def test_valid_targets_are_loaded_relative_to_the_settings_file(tmp_path):
+    settings = _write_settings(tmp_path, [
+        {"name": "Dev", "exportPath": "../game/rooms/"},
+        {"name": "Shipping", "fileExtension": ".room", "exportPath": "../build",
+         "exportOptions": {"encoding": "base64", "compression": "gzip", "profile": "minified",
+                           "objects": "binary"}},
+    ])
+    dev, shipping = load_export_targets(settings)
+    assert (dev.out_dir, dev.format, dev.encoding, dev.compression, dev.profile, dev.objects) == \
+        (str(tmp_path / "game" / "rooms"), "json", "csv", "none", "pretty", "dicts")
+    assert (shipping.out_dir, shipping.extension, shipping.encoding, shipping.compression) == \
+        (str(tmp_path / "build"), "room", "base64", "gzip")
+    assert shipping.output_path("tiles/A1.tmx") == os.path.join(str(tmp_path / "build"), "A1.room")
+
+def test_invalid_targets_are_reported_and_skipped(tmp_path, capsys):
+    invalid = [
+        {"name": "bad format", "exportFormat": "yaml"},
+        {"name": "bad encoding", "exportOptions": {"encoding": "hex"}},
+        {"name": "bad compression", "exportOptions": {"encoding": "base64", "compression": "zstd"}},
+        {"name": "csv compressed", "exportOptions": {"compression": "zlib"}},
+        {"name": "bad profile", "exportOptions": {"profile": "tiny"}},
+        {"name": "bad objects", "exportOptions": {"objects": "rows"}},
+        {"name": "tmx base64", "exportFormat": "tmx", "exportOptions": {"encoding": "base64"}},
+        {"name": "tmx columns", "exportFormat": "tmx", "exportOptions": {"objects": "columns"}},
+    ]
+    targets = load_export_targets(_write_settings(tmp_path, invalid + [{"name": "good"}]))
+    assert [target.name for target in targets] == ["good"]
+    output = capsys.readouterr().out
+    for entry in invalid:
+        assert f"❌ Export target {entry['name']!r} skipped" in output
+
+def test_missing_settings_file_gives_the_default_target(tmp_path):
+    (target,) = load_export_targets(str(tmp_path / "missing.json"))
+    assert target.out_dir == DEFAULT_ROOMS_DIR and target.encoding == "csv"
+
+def _room():
+    return {"width": 3, "height": 2, "layers": [
+        {"type": "tilelayer", "name": "Ground", "width": 3, "height": 2, "encoding": "csv",
+         "data": encode_csv_rows(ROWS)},
+    ]}
+
+def test_base64_encodings_hold_little_endian_gids():
+    expected = struct.pack("<6I", *[gid for row in ROWS for gid in row])
+    decompress = {"none": lambda raw: raw, "zlib": zlib.decompress, "gzip": gzip.decompress}
+    for compression, unpack in decompress.items():
+        room = _room()
+        layer = room_for_target(room, ExportTarget("t", ".", encoding="base64", compression=compression))["layers"][0]
+        assert layer["encoding"] == "base64"
+        assert layer.get("compression", "none") == compression
+        assert unpack(base64.b64decode(layer["data"])) == expected
+        assert room["layers"][0]["data"] == encode_csv_rows(ROWS), "the source room was modified"
+
+def test_gzip_output_is_reproducible():
+    target = ExportTarget("t", ".", encoding="base64", compression="gzip")
+    assert room_for_target(_room(), target) == room_for_target(_room(), target)
+
+def test_array_encoding_is_the_plain_gid_list():
+    layer = room_for_target(_room(), ExportTarget("t", ".", encoding="array"))["layers"][0]
+    assert layer["data"] == [1, 2, 0, 0x80000003, 5, 6] and layer["encoding"] == "csv"
@@ -0,0 +1,93 @@
+import copy
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hot_reload import changed_rectangles, object_layer_delta, room_delta, tile_layer_delta
+from room_data import encode_csv_rows
+
+def _tile_layer(name, rows):
+    return {"type": "tilelayer", "name": name, "width": len(rows[0]), "height": len(rows),
+            "encoding": "csv", "data": encode_csv_rows(rows)}
+
+def test_rectangles_cover_exactly_the_changed_cells():
+    rng = random.Random(0)
+    for _ in range(300):
+        width, height = rng.randint(1, 12), rng.randint(1, 12)
+        old = [[rng.randint(0, 2) for _ in range(width)] for _ in range(height)]
+        new = [[gid if rng.random() < 0.7 else rng.randint(0, 2) for gid in row] for row in old]
+        covered = {}
+        for x, y, w, h in changed_rectangles(old, new):
+            assert w > 0 and h > 0
+            for row in range(y, y + h):
+                for col in range(x, x + w):
+                    assert (col, row) not in covered, "rectangles overlap"
+                    covered[(col, row)] = True
+        assert set(covered) == {(col, row) for row in range(height) for col in range(width)
+                                if old[row][col] != new[row][col]}
+
+def test_matching_runs_on_consecutive_rows_merge():
+    old = [[0] * 6 for _ in range(4)]
+    new = copy.deepcopy(old)
+    for row in (1, 2, 3):
+        new[row][2] = new[row][3] = 5
+    new[0][5] = new[1][5] = 1
+    new[3][0] = 1
+    assert changed_rectangles(old, new) == [(0, 3, 1, 1), (2, 1, 2, 3), (5, 0, 1, 2)]
+
+def test_tile_delta_applied_to_the_old_layer_gives_the_new_one():
+    rng = random.Random(1)
+    for _ in range(100):
+        width, height = rng.randint(1, 10), rng.randint(1, 10)
+        old = [[rng.randint(0, 3) for _ in range(width)] for _ in range(height)]
+        # Flip flags must survive the delta
+        new = [[gid | 0x80000000 if rng.random() < 0.1 else gid for gid in row] for row in old]
+        delta = tile_layer_delta(_tile_layer("Ground", old), _tile_layer("Ground", new))
+        patched = copy.deepcopy(old)
+        for cell in (delta or {"cells": []})["cells"]:
+            gids = iter(cell["gids"])
+            for row in range(cell["y"], cell["y"] + cell["h"]):
+                for col in range(cell["x"], cell["x"] + cell["w"]):
+                    patched[row][col] = next(gids)
+        assert patched == new
+        assert (delta is None) == (old == new)
+
+def _objects_layer(objects):
+    return {"type": "objectgroup", "name": "Entities", "objects": objects}
+
+def _obj(object_id, x, y, hp=10):
+    return {"id": object_id, "name": f"obj{object_id}", "type": "enemy_spawn", "x": x, "y": y,
+            "properties": [{"name": "hp", "type": "int", "value": hp}]}
+
+def test_object_delta_reports_added_removed_moved_and_changed():
+    old = _objects_layer([_obj(1, 0, 0), _obj(2, 32, 32), _obj(3, 64, 64), _obj(4, 96, 96)])
+    new = _objects_layer([_obj(1, 0, 0), _obj(2, 48, 32), _obj(3, 64, 64, hp=20), _obj(5, 128, 0)])
+    assert object_layer_delta(old, new) == {
+        "added": [_obj(5, 128, 0)],
+        "removed": [4],
+        "moved": [{"id": 2, "x": 48, "y": 32}],
+        "changed": [_obj(3, 64, 64, hp=20)],
+    }
+    assert object_layer_delta(old, copy.deepcopy(old)) is None
+
+def test_room_delta_only_lists_changed_layers():
+    ground = [[1, 1, 1], [1, 1, 1]]
+    old_room = {"width": 3, "height": 2,
+                "layers": [_tile_layer("Ground", ground), _objects_layer([_obj(1, 0, 0)])]}
+    new_room = copy.deepcopy(old_room)
+    new_room["layers"][1]["objects"][0]["x"] = 32
+    message = room_delta("A1", old_room, new_room)
+    assert message["reload"] is False
+    assert message["layers"] == {"Entities": {"moved": [{"id": 1, "x": 32, "y": 0}]}}
+
+def test_shape_changes_and_new_rooms_ask_for_a_reload():
+    room = {"width": 3, "height": 2, "layers": [_tile_layer("Ground", [[1, 1, 1], [1, 1, 1]])]}
+    resized = copy.deepcopy(room)
+    resized["width"] = 4
+    extra_layer = copy.deepcopy(room)
+    extra_layer["layers"].append(_objects_layer([]))
+    for old, new in ((None, room), (room, resized), (room, extra_layer)):
+        message = room_delta("A1", old, new)
+        assert message["reload"] is True and message["layers"] == {}
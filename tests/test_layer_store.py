@@ -0,0 +1,45 @@
+import copy
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from layer_store import LayerStore, expand_room, pack_room
+from room_json import dumps, minify_room
+
+def _room(collision_id):
+    return {
+        "height": 2, "width": 3, "tilewidth": 32, "tileheight": 32, "type": "map",
+        "layers": [
+            {"data": "1,1,1,\n1,1,1,", "encoding": "csv", "height": 2, "id": 1, "name": "Ground",
+             "opacity": 1, "type": "tilelayer", "visible": True, "width": 3, "x": 0, "y": 0},
+            {"data": "2,2,2,\n2,0,2,", "encoding": "csv", "height": 2, "id": collision_id, "name": "Collision",
+             "opacity": 1, "type": "tilelayer", "visible": True, "width": 3, "x": 0, "y": 0},
+            {"draworder": "topdown", "id": collision_id + 1, "name": "Entities", "opacity": 1,
+             "type": "objectgroup", "visible": True, "x": 0, "y": 0,
+             "objects": [{"height": 32, "id": 1, "name": "player", "properties": [], "rotation": 0,
+                          "type": "player_spawn", "visible": True, "width": 32, "x": 32.0, "y": 0.0}]},
+        ],
+    }
+
+def test_pack_then_expand_gives_back_the_room(tmp_path):
+    for profile in ("pretty", "minified"):
+        store = LayerStore(str(tmp_path / profile), profile)
+        room = _room(2)
+        packed, written = pack_room(copy.deepcopy(room), store)
+        assert written == 3
+        assert all(set(layer) == {"name", "type", "id", "layer"} for layer in packed["layers"])
+        store.cache.clear()
+        expected = minify_room(room) if profile == "minified" else room
+        assert dumps(expand_room(packed, store), profile) == dumps(expected, profile)
+
+def test_identical_layers_with_different_ids_are_stored_once(tmp_path):
+    store = LayerStore(str(tmp_path))
+    first, _ = pack_room(_room(2), store)
+    second, written = pack_room(_room(5), store)
+    assert written == 0
+    assert [layer["layer"] for layer in first["layers"]] == [layer["layer"] for layer in second["layers"]]
+    assert len(store.keys()) == 3
+    expanded = expand_room(second, store)
+    assert [layer["id"] for layer in expanded["layers"]] == [1, 5, 6]
+    assert [layer["id"] for layer in expand_room(first, store)["layers"]] == [1, 2, 3]
@@ -0,0 +1,77 @@
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from recording_codec import (INDEX_INTERVAL, RecordingFormatError, RecordingReader, jsonl_to_recording,
+                             recording_to_jsonl, verify_recording)
+
+KEYS = ("move_left", "move_right", "move_up", "move_down", "attack", "dodge")
+
+def _random_frames(rng, count):
+    """Held inputs, gaps in the frame numbers and keys that appear partway through"""
+    frames = []
+    frame = 0
+    inputs = {}
+    while len(frames) < count:
+        if rng.random() < 0.05:
+            frame += rng.randint(1, 3 * INDEX_INTERVAL if rng.random() < 0.1 else 20)
+        if rng.random() < 0.2:
+            inputs = {key: rng.random() < 0.5 for key in rng.sample(KEYS, rng.randint(0, len(KEYS)))}
+        for _ in range(rng.choice((1, 1, 5, 200))):
+            frames.append({"frame": frame, "inputs": dict(inputs)})
+            frame += 1
+    return frames
+
+def _write_jsonl(path, frames):
+    with open(path, 'w') as f:
+        for record in frames:
+            f.write(json.dumps(record) + "\n")
+    return str(path)
+
+def test_encode_decode_round_trip(tmp_path):
+    frames = _random_frames(random.Random(0), 6 * INDEX_INTERVAL)
+    source = _write_jsonl(tmp_path / "input.jsonl", frames)
+    recording = str(tmp_path / "input.djrec")
+    assert jsonl_to_recording(source, recording) == len(frames)
+    assert verify_recording(recording, source) == []
+
+    decoded = str(tmp_path / "decoded.jsonl")
+    assert recording_to_jsonl(recording, decoded) == len(frames)
+    with open(decoded) as f:
+        assert [json.loads(line) for line in f] == frames
+    assert os.path.getsize(recording) < os.path.getsize(source) / 10
+
+def test_seek_agrees_with_a_full_decode(tmp_path):
+    rng = random.Random(1)
+    frames = _random_frames(rng, 8 * INDEX_INTERVAL)
+    recording = str(tmp_path / "input.djrec")
+    jsonl_to_recording(_write_jsonl(tmp_path / "input.jsonl", frames), recording)
+    by_frame = {record["frame"]: record["inputs"] for record in frames}
+    last_frame = frames[-1]["frame"]
+
+    with RecordingReader(recording) as reader:
+        assert len(reader.index) > 1
+        targets = [rng.randint(0, last_frame + 10) for _ in range(300)]
+        targets += [frame for frame, _, _ in reader.index] + [0, last_frame, last_frame + 1]
+        for target in targets:
+            assert reader.frame(target) == by_frame.get(target), target
+            following = next(reader.frames(target), None)
+            expected = next(({"frame": frame, "inputs": by_frame[frame]}
+                             for frame in sorted(by_frame) if frame >= target), None)
+            assert following == expected, target
+
+def test_unfinished_recording_is_rejected(tmp_path):
+    recording = str(tmp_path / "input.djrec")
+    jsonl_to_recording(_write_jsonl(tmp_path / "input.jsonl", _random_frames(random.Random(2), 100)), recording)
+    with open(recording, 'rb') as f:
+        data = f.read()
+    with open(recording, 'wb') as f:
+        f.write(data[:-5])
+    with pytest.raises(RecordingFormatError):
+        RecordingReader(recording)
+    assert verify_recording(recording)
@@ -0,0 +1,68 @@
+import json
+import os
+import sys
+import textwrap
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from replay_harness import run_harness, run_recording
+
+# Stand-in for headless Godot: behaviour is chosen by the recording's name
+RUNNER_SCRIPT = textwrap.dedent('''
+    import os, sys, time
+    recording, digest = sys.argv[1], sys.argv[2]
+    name = os.path.basename(recording)
+    attempts_path = recording + ".attempts"
+    attempt = int(open(attempts_path).read()) + 1 if os.path.exists(attempts_path) else 1
+    open(attempts_path, "w").write(str(attempt))
+    if name.startswith("slow"):
+        print("still loading", flush=True)
+        time.sleep(30)
+    if name.startswith("flaky") and attempt == 1:
+        print("crashed on first attempt")
+        sys.exit(3)
+    if name.startswith("broken"):
+        print("always crashes")
+        sys.exit(1)
+    with open(digest, "w") as f:
+        f.write('{"frame": 0, "state": {}}\\n{"frame": 1, "state": {}}\\n')
+''')
+
+def _setup(tmp_path, names):
+    script = tmp_path / "runner.py"
+    script.write_text(RUNNER_SCRIPT)
+    recordings = tmp_path / "recordings"
+    recordings.mkdir()
+    for name in names:
+        (recordings / f"{name}.jsonl").write_text('{"frame": 0, "inputs": {}}\n')
+    return f'"{sys.executable}" "{script}" {{recording}} {{digest}}', recordings
+
+def test_failed_run_is_retried(tmp_path):
+    runner, recordings = _setup(tmp_path, ["flaky"])
+    result = run_recording(str(recordings / "flaky.jsonl"), runner, timeout_s=30, retries=1)
+    assert result["status"] == "passed" and result["attempts"] == 2
+    assert result["digest_frames"] == 2 and "output_tail" not in result
+
+def test_failure_without_retries_keeps_the_output(tmp_path):
+    runner, recordings = _setup(tmp_path, ["flaky"])
+    result = run_recording(str(recordings / "flaky.jsonl"), runner, timeout_s=30, retries=0)
+    assert result["status"] == "failed" and result["exit_code"] == 3 and result["attempts"] == 1
+    assert "crashed on first attempt" in result["output_tail"]
+    assert result["digest_sha256"] is None
+
+def test_hung_run_times_out_on_every_attempt(tmp_path):
+    runner, recordings = _setup(tmp_path, ["slow"])
+    result = run_recording(str(recordings / "slow.jsonl"), runner, timeout_s=0.5, retries=1)
+    assert result["status"] == "timeout" and result["exit_code"] is None
+    assert result["attempts"] == 2 and result["duration_s"] < 10
+    assert "still loading" in result["output_tail"]
+
+def test_report_counts_each_outcome(tmp_path):
+    runner, recordings = _setup(tmp_path, ["broken", "flaky", "ok", "slow"])
+    report_path = tmp_path / "report.json"
+    assert not run_harness(str(recordings), runner, workers=4, timeout_s=0.5, retries=1,
+                           report_path=str(report_path))
+    report = json.loads(report_path.read_text())
+    assert report["summary"] == {"failed": 1, "passed": 2, "timeout": 1}
+    attempts = {os.path.basename(entry["recording"]): entry["attempts"] for entry in report["results"]}
+    assert attempts == {"broken.jsonl": 2, "flaky.jsonl": 2, "ok.jsonl": 1, "slow.jsonl": 2}
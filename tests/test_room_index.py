@@ -0,0 +1,93 @@
+import math
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from room_index import IndexedObject, RoomSpatialIndex
+
+def _random_room(rng):
+    tile = rng.choice((16, 32))
+    width, height = rng.randint(1, 20), rng.randint(1, 20)
+    objects = []
+    for object_id in range(1, rng.randint(0, 40) + 1):
+        size = rng.choice((0, 0, tile // 2, tile, tile * 3))
+        objects.append({
+            "id": object_id, "name": f"obj{object_id}", "type": rng.choice(("enemy_spawn", "door", "")),
+            # Some objects sit outside the map, like stray objects in real rooms
+            "x": rng.uniform(-2 * tile, (width + 2) * tile), "y": rng.uniform(-2 * tile, (height + 2) * tile),
+            "width": size, "height": rng.choice((size, 0, tile)),
+        })
+    collision = [rng.choice((0, 0, 3)) for _ in range(width * height)]
+    return {
+        "width": width, "height": height, "tilewidth": tile, "tileheight": tile,
+        "layers": [
+            {"type": "tilelayer", "name": "Collision", "width": width, "height": height,
+             "encoding": "csv", "data": ",".join(map(str, collision))},
+            {"type": "objectgroup", "name": "Entities", "objects": objects},
+        ],
+    }
+
+def _random_point(rng, index):
+    return (rng.uniform(-3 * index.tile_width, index.width_px + 3 * index.tile_width),
+            rng.uniform(-3 * index.tile_height, index.height_px + 3 * index.tile_height))
+
+def _ids(entries):
+    return sorted(entry.obj["id"] for entry in entries)
+
+def test_point_and_rect_queries_match_a_full_scan():
+    rng = random.Random(0)
+    for _ in range(200):
+        index = RoomSpatialIndex(_random_room(rng))
+        for _ in range(20):
+            x, y = _random_point(rng, index)
+            assert _ids(index.objects_at(x, y)) == _ids(e for e in index.objects if e.contains(x, y))
+            # Object anchors are the points a query is most likely to get wrong
+            if index.objects:
+                anchor = rng.choice(index.objects)
+                x, y = anchor.left, anchor.top
+                assert _ids(index.objects_at(x, y)) == _ids(e for e in index.objects if e.contains(x, y))
+
+            width, height = rng.uniform(0, 4 * index.tile_width), rng.uniform(0, 4 * index.tile_height)
+            expected = _ids(e for e in index.objects if e.overlaps(x, y, x + width, y + height))
+            assert _ids(index.objects_in_rect(x, y, width, height)) == expected
+
+def test_nearest_object_matches_a_full_scan():
+    rng = random.Random(1)
+    for _ in range(200):
+        index = RoomSpatialIndex(_random_room(rng))
+        for _ in range(20):
+            x, y = _random_point(rng, index)
+            max_distance = rng.choice((None, rng.uniform(0, 3 * index.tile_width)))
+            best = min((e.distance_to(x, y) for e in index.objects), default=math.inf)
+            nearest = index.nearest_object(x, y, max_distance)
+            if best == math.inf or (max_distance is not None and best > max_distance):
+                assert nearest is None
+            else:
+                assert nearest is not None and nearest.distance_to(x, y) == best
+
+            doors = [e for e in index.objects if e.kind == "door"]
+            best_door = min((e.distance_to(x, y) for e in doors), default=None)
+            nearest_door = index.nearest_object(x, y, predicate=lambda e: e.kind == "door")
+            assert (nearest_door and nearest_door.distance_to(x, y)) == best_door
+
+def _blocked_by_scan(index, entry):
+    """Any Collision tile whose square overlaps the box (degenerate boxes as a sliver)"""
+    rows = index.tile_layers["Collision"]
+    right = max(entry.right, entry.left + 1e-9)
+    bottom = max(entry.bottom, entry.top + 1e-9)
+    for row in range(index.height_tiles):
+        for col in range(index.width_tiles):
+            tile = IndexedObject("", {"x": col * index.tile_width, "y": row * index.tile_height,
+                                      "width": index.tile_width, "height": index.tile_height})
+            if rows[row][col] and tile.overlaps(entry.left, entry.top, right, bottom):
+                return True
+    return False
+
+def test_blocked_objects_match_a_full_scan():
+    rng = random.Random(2)
+    for _ in range(100):
+        index = RoomSpatialIndex(_random_room(rng))
+        for entry in index.objects:
+            assert index.is_blocked(entry) == _blocked_by_scan(index, entry)
@@ -0,0 +1,22 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from room_json import dumps, orjson
+
+CONTROL_TEXT = "".join(chr(c) for c in range(0x20)) + "x\x7fy"
+
+@pytest.mark.skipif(orjson is None, reason="orjson is not installed")
+@pytest.mark.parametrize("profile", ["pretty", "minified"])
+def test_backends_agree_on_control_characters(profile):
+    data = {"name": CONTROL_TEXT, "properties": [{"name": "del\x7f", "value": 1.5}]}
+    assert dumps(data, profile, "orjson") == dumps(data, profile, "json")
+    assert "\\u007f" in dumps(data, profile, "orjson")
+
+def test_pretty_matches_json_dump():
+    data = {"name": CONTROL_TEXT, "width": 3}
+    assert dumps(data) == json.dumps(data, indent=2)
@@ -0,0 +1,40 @@
+import json
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from room_objects import ObjectTable, coerce_property
+
+def test_float_properties_are_always_floats():
+    for value in (3, 3.0, "3", " 3 ", "3.0"):
+        coerced = coerce_property(value, "float")
+        assert coerced == 3.0 and type(coerced) is float, value
+
+def test_json_and_binary_tables_agree_on_float_properties():
+    obj = {"id": 1, "name": "slime", "type": "enemy_spawn", "x": 0, "y": 0,
+           "properties": [{"name": "speed", "type": "float", "value": 3}]}
+    table = ObjectTable("Entities")
+    table.append(obj)
+    from_json = table.to_objects()[0]["properties"][0]["value"]
+    from_binary = ObjectTable.from_bytes(table.to_bytes()).to_objects()[0]["properties"][0]["value"]
+    assert type(from_json) is float and type(from_binary) is float
+
+def test_object_table_targets_load_back_as_object_lists(tmp_path):
+    from export_targets import ExportTarget, write_target
+    from room_data import load_room
+    from tiled_workflow import parse_tmx
+
+    tmx_file = os.path.join(ROOT, "tiles", "A1.tmx")
+    room = parse_tmx(tmx_file)
+    loaded = {}
+    for objects in ("dicts", "columns", "binary"):
+        target = ExportTarget(objects, str(tmp_path / objects), objects=objects)
+        write_target(tmx_file, room, target)
+        with open(target.output_path(tmx_file)) as f:
+            layers = json.load(f)["layers"]
+        groups = [layer for layer in layers if layer["type"] == "objectgroup"]
+        assert groups and all(("objects" in layer) == (objects == "dicts") for layer in groups)
+        loaded[objects] = load_room(target.output_path(tmx_file))
+    assert loaded["columns"] == loaded["dicts"] and loaded["binary"] == loaded["dicts"]
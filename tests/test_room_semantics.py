@@ -0,0 +1,94 @@
+import os
+import sys
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from room_semantics import check_room, find_islands, label_regions
+
+def _bfs_labels(walkable):
+    """Reference labelling: each region labelled with its first cell's flat index"""
+    height, width = walkable.shape
+    labels = np.full((height, width), -1)
+    for row in range(height):
+        for col in range(width):
+            if not walkable[row, col] or labels[row, col] != -1:
+                continue
+            label = row * width + col
+            labels[row, col] = label
+            queue = deque([(row, col)])
+            while queue:
+                y, x = queue.popleft()
+                for ny, nx in ((y - 1, x), (y + 1, x), (y, x - 1), (y, x + 1)):
+                    if 0 <= ny < height and 0 <= nx < width and walkable[ny, nx] and labels[ny, nx] == -1:
+                        labels[ny, nx] = label
+                        queue.append((ny, nx))
+    return labels
+
+def _serpentine(size):
+    """One corridor winding across every other row"""
+    walkable = np.zeros((size, size), dtype=bool)
+    walkable[::2] = True
+    for turn, row in enumerate(range(1, size, 2)):
+        walkable[row, size - 1 if turn % 2 == 0 else 0] = True
+    return walkable
+
+def test_labels_match_flood_fill_on_random_grids():
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        height, width = rng.integers(1, 30, size=2)
+        walkable = rng.random((height, width)) < rng.random()
+        assert np.array_equal(label_regions(walkable), _bfs_labels(walkable))
+
+def test_serpentine_corridor_is_one_region():
+    for walkable in (_serpentine(1000), _serpentine(1000).T):
+        labels = label_regions(walkable)
+        assert np.unique(labels[walkable]).tolist() == [0]
+        assert (labels[~walkable] == -1).all()
+
+def test_islands_report_their_first_cell():
+    walkable = np.zeros((4, 6), dtype=bool)
+    walkable[0, :2] = True
+    walkable[2:, 3:] = True
+    reached = np.zeros_like(walkable)
+    reached[0, :2] = True
+    assert find_islands(walkable, reached) == [(6, (3, 2))]
+
+def _walled_room(door_x, door_y, blocked=()):
+    """6x5 room of 32 px tiles: Ground everywhere, Collision on the border and at blocked cells"""
+    width, height = 6, 5
+    collision = [[1 if col in (0, width - 1) or row in (0, height - 1) or (col, row) in blocked else 0
+                  for col in range(width)] for row in range(height)]
+
+    def layer(name, rows):
+        return {"type": "tilelayer", "name": name, "width": width, "height": height, "encoding": "csv",
+                "data": "\n".join(",".join(map(str, row)) + "," for row in rows)}
+
+    def obj(name, kind, x, y):
+        return {"id": 1, "name": name, "type": kind, "x": x, "y": y, "width": 32, "height": 32,
+                "properties": [{"name": "type", "type": "string", "value": kind}]}
+
+    return {
+        "width": width, "height": height, "tilewidth": 32, "tileheight": 32,
+        "layers": [
+            layer("Ground", [[1] * width for _ in range(height)]),
+            layer("Collision", collision),
+            {"type": "objectgroup", "name": "Entities", "objects": [obj("player_spawn", "player_spawn", 64, 64)]},
+            {"type": "objectgroup", "name": "Metadata", "objects": [obj("door_north", "door", door_x, door_y)]},
+        ],
+    }
+
+def test_boundary_door_in_the_wall_is_fine():
+    assert check_room(_walled_room(96, 0)) == ([], [])
+
+def test_boundary_door_opening_onto_collision_is_an_error():
+    errors, _ = check_room(_walled_room(96, 0, blocked={(3, 1)}))
+    assert errors == ["Door door_north tile (3, 0) opens onto Collision at (3, 1)",
+                      "Door door_north tile (3, 0) is unreachable from player_spawn"]
+
+def test_door_inside_the_room_is_an_error():
+    errors, _ = check_room(_walled_room(96, 64, blocked={(3, 2)}))
+    assert errors == ["Door door_north tile (3, 2) is not on the room boundary",
+                      "Door door_north tile (3, 2) is embedded in Collision"]
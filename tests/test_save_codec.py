@@ -0,0 +1,109 @@
+import json
+import os
+import struct
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pytest
+
+import save_codec
+from save_codec import (HEADER, SaveFormatError, decode_save, encode_save, migrate, migration, read_header,
+                        upgrade_save_file)
+
+SCHEMA_V1 = os.path.join(ROOT, save_codec.SCHEMA_PATH)
+
+SAVE = {
+    "player": {"name": "Héro ✨", "level": 12},
+    "inventory": [{"item": "potion", "count": 3}, "key", 2.5, None, True],
+    "room": "A3",
+    "health": 6,
+    "stamina": 100,
+    "options": {"volume": 0.8, "keys": {"attack": "J"}},
+}
+
+@pytest.fixture(autouse=True)
+def schema_from_repo(monkeypatch):
+    """Resolve the schema from the repo root whatever the working directory"""
+    monkeypatch.setattr(save_codec, "SCHEMA_HISTORY", {1: SCHEMA_V1})
+
+def test_round_trip_keeps_every_value():
+    for compress in (True, False):
+        blob = encode_save(SAVE, compress=compress)
+        assert decode_save(blob) == (SAVE, save_codec.SAVE_VERSION)
+    # Values that do not fit the schema take the generic encoding instead of being lost
+    odd = dict(SAVE, health="full", player={"name": "x", "level": 1, "title": "new"}, extra=[1])
+    assert decode_save(encode_save(odd))[0] == odd
+    assert len(encode_save(SAVE)) < len(save_codec.dumps_save_json(SAVE).encode('utf-8'))
+
+def test_corrupt_files_raise_save_format_errors():
+    blob = encode_save(SAVE, compress=False)
+    flipped = bytearray(blob)
+    flipped[-3] ^= 0xFF
+    newer = bytearray(blob)
+    struct.pack_into('<H', newer, 6, save_codec.SAVE_VERSION + 1)
+    corrupt = {
+        "truncated header": blob[:HEADER.size - 1],
+        "truncated payload": blob[:-4],
+        "flipped byte": bytes(flipped),
+        "bad magic": b"NOPE" + blob[4:],
+        "bad compressed payload": encode_save(SAVE)[:HEADER.size] + b"not zlib",
+        "unknown save version": bytes(newer),
+    }
+    for name, data in corrupt.items():
+        with pytest.raises(SaveFormatError):
+            decode_save(data)
+            pytest.fail(name)
+
+def _schema_v2(tmp_path):
+    """Version 2 of the schema: player.level renamed to player.xp_level, gold added"""
+    with open(SCHEMA_V1) as f:
+        schema = json.load(f)
+    player = schema["properties"]["player"]
+    player["properties"] = {"name": {"type": "string"}, "xp_level": {"type": "integer"}}
+    player["required"] = ["name", "xp_level"]
+    schema["properties"]["gold"] = {"type": "integer"}
+    path = tmp_path / "save-schema-v2.json"
+    path.write_text(json.dumps(schema))
+    return str(path)
+
+@pytest.fixture
+def version_2(tmp_path, monkeypatch):
+    """Make the codec current at save version 2, with a registered 1 -> 2 migration"""
+    monkeypatch.setattr(save_codec, "SAVE_VERSION", 2)
+    monkeypatch.setattr(save_codec, "SCHEMA_HISTORY", {1: SCHEMA_V1, 2: _schema_v2(tmp_path)})
+    monkeypatch.setattr(save_codec, "MIGRATIONS", {})
+
+    @migration(1)
+    def rename_level(data):
+        player = data["player"]
+        player["xp_level"] = player.pop("level")
+        data["gold"] = 0
+        return data
+
+    return rename_level
+
+def test_migrate_runs_the_registered_chain(version_2):
+    assert save_codec.MIGRATIONS == {1: version_2}
+    upgraded = migrate(SAVE, 1)
+    assert upgraded["player"] == {"name": "Héro ✨", "xp_level": 12} and upgraded["gold"] == 0
+    assert SAVE["player"]["level"] == 12, "migrate must not modify its input"
+    assert migrate(upgraded, 2) == upgraded
+    with pytest.raises(SaveFormatError):
+        migrate(SAVE, 0)
+    with pytest.raises(SaveFormatError):
+        migrate(upgraded, 3)
+
+def test_old_files_decode_upgraded_and_can_be_rewritten(version_2, tmp_path):
+    blob = encode_save(SAVE, save_version=1)
+    assert decode_save(blob, upgrade=False) == (SAVE, 1)
+    data, version = decode_save(blob)
+    assert version == 2 and data["player"]["xp_level"] == 12
+
+    path = tmp_path / "savegame.djsav"
+    path.write_bytes(blob)
+    assert upgrade_save_file(str(path)) == 1
+    rewritten = path.read_bytes()
+    assert read_header(rewritten)[1] == 2
+    assert decode_save(rewritten) == (data, 2)
@@ -0,0 +1,40 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from PIL import Image
+
+from sprite_packer import pack_character
+
+def _frame(path, left, top):
+    pixels = np.zeros((32, 32, 4), dtype=np.uint8)
+    pixels[top:top + 4, left:left + 4] = (200, 30, 30, 255)
+    Image.fromarray(pixels, 'RGBA').save(path)
+
+def test_identical_frames_at_different_offsets_keep_their_margins(tmp_path, monkeypatch):
+    monkeypatch.setenv("DUNJON_CACHE", "0")
+    (tmp_path / "project.godot").write_text("")
+    walk_dir = tmp_path / "Hero" / "walk"
+    walk_dir.mkdir(parents=True)
+    _frame(walk_dir / "1.png", 2, 2)
+    _frame(walk_dir / "2.png", 20, 20)
+    out_dir = tmp_path / "sprites"
+
+    stats = pack_character((str(tmp_path / "Hero"), str(out_dir), {}, True))
+    assert "error" not in stats, stats
+
+    index = json.loads((out_dir / "Hero.json").read_text())
+    first, second = (index["frames"][name]["frame"] for name in ("1.png", "2.png"))
+    assert first != second
+    assert index["sheet_frames"][first]["margin"] == [2, 2, 28, 28]
+    assert index["sheet_frames"][second]["margin"] == [20, 20, 28, 28]
+    # The pixels are still stored once
+    assert index["sheet_frames"][first]["region"] == index["sheet_frames"][second]["region"]
+    assert [frame["frame"] for frame in index["animations"]["walk"]["frames"]] == [first, second]
+
+    tres = (out_dir / "Hero.tres").read_text()
+    assert "margin = Rect2(2, 2, 28, 28)" in tres
+    assert "margin = Rect2(20, 20, 28, 28)" in tres
@@ -0,0 +1,87 @@
+import multiprocessing
+import os
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tool_lock import FileLock, InstanceLock, read_lock
+
+def _dead_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+def _write_stale_lock(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(f"{_dead_pid()}\n")
+
+def _contend(locks_dir, start, done, results):
+    start.wait()
+    results.put((os.getpid(), InstanceLock("tool", locks_dir).acquire()))
+    # Keep holding (never release) until every contender has tried
+    done.wait()
+
+def test_two_processes_taking_over_one_stale_lock(tmp_path):
+    context = multiprocessing.get_context("spawn")
+    locks_dir = str(tmp_path)
+    for _ in range(10):
+        _write_stale_lock(os.path.join(locks_dir, "tool.lock"))
+        start, done, results = context.Event(), context.Event(), context.Queue()
+        processes = [context.Process(target=_contend, args=(locks_dir, start, done, results)) for _ in range(2)]
+        for process in processes:
+            process.start()
+        start.set()
+        outcomes = [results.get(timeout=30) for _ in processes]
+        winners = [pid for pid, acquired in outcomes if acquired]
+        assert len(winners) == 1, outcomes
+        assert read_lock(os.path.join(locks_dir, "tool.lock"))["pid"] == winners[0]
+        done.set()
+        for process in processes:
+            process.join()
+
+def _increment(target, locks_dir, start, rounds):
+    start.wait()
+    for _ in range(rounds):
+        with FileLock(target, locks_dir=locks_dir):
+            with open(target, 'r') as f:
+                count = int(f.read())
+            with open(target, 'w') as f:
+                f.write(str(count + 1))
+
+def test_file_lock_excludes_processes_after_a_stale_owner(tmp_path):
+    context = multiprocessing.get_context("spawn")
+    target = str(tmp_path / "counter.txt")
+    with open(target, 'w') as f:
+        f.write("0")
+    locks_dir = str(tmp_path / "locks")
+    _write_stale_lock(FileLock(target, locks_dir=locks_dir).path)
+
+    start = context.Event()
+    processes = [context.Process(target=_increment, args=(target, locks_dir, start, 50)) for _ in range(2)]
+    for process in processes:
+        process.start()
+    start.set()
+    for process in processes:
+        process.join(timeout=60)
+        assert process.exitcode == 0
+
+    with open(target, 'r') as f:
+        assert int(f.read()) == 100
+
+def test_missing_lock_is_created_not_taken_over(tmp_path):
+    lock = InstanceLock("tool", str(tmp_path))
+    assert lock.acquire()
+    assert read_lock(lock.path)["pid"] == os.getpid()
+    lock.release()
+    assert not os.path.exists(lock.path)
+
+def test_release_without_acquire_keeps_the_owners_lock(tmp_path):
+    target = str(tmp_path / "room.json")
+    owner = FileLock(target, locks_dir=str(tmp_path))
+    os.makedirs(os.path.dirname(owner.path), exist_ok=True)
+    with open(owner.path, 'w') as f:
+        f.write(f"{os.getppid()}\n")
+    FileLock(target, locks_dir=str(tmp_path)).release()
+    assert os.path.exists(owner.path)
@@ -0,0 +1,26 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json_to_tmx
+import tiled_workflow
+import verify_conversions
+from verify_conversions import case_room, run_check
+
+def test_every_check_passes_on_random_rooms(tmp_path):
+    assert verify_conversions.verify_conversions(200, seed=7, workers=1, repro_dir=str(tmp_path))
+
+def test_tmx_stream_catches_a_bug_in_the_writer_helpers(tmp_path, monkeypatch):
+    attributes = json_to_tmx._object_attributes
+    monkeypatch.setattr(json_to_tmx, "_object_attributes",
+                        lambda obj: [(name, value.upper() if name == "name" else value)
+                                     for name, value in attributes(obj)])
+    assert any(run_check("tmx_stream", case_room(5, index, 24), str(tmp_path)) for index in range(50))
+
+def test_tmx_to_json_catches_a_bug_in_the_parser(tmp_path, monkeypatch):
+    coerce = tiled_workflow.coerce_property
+    monkeypatch.setattr(tiled_workflow, "coerce_property",
+                        lambda value, prop_type: coerce(value, prop_type) + 1 if prop_type == "int"
+                        else coerce(value, prop_type))
+    assert any(run_check("tmx_to_json", case_room(5, index, 24), str(tmp_path)) for index in range(50))
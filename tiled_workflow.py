@@ -5,139 +5,200 @@ Manages the conversion between Tiled TMX files and Godot JSON files
 """
 
 import os
-import json
 import xml.etree.ElementTree as ET
 import sys
+import threading
+import time
 
-def tmx_to_json(tmx_file, json_file):
-    """Convert a Tiled TMX file to Godot JSON format"""
-    print(f"Converting {tmx_file} to {json_file}...")
+from autotile import autotile_room
+from export_trace import stage, traced_file
+from room_json import dumps as encode_json
+from room_objects import coerce_property
+from tool_lock import WATCHER_LOCK, FileLock, enqueue_job, running_instance
+
+def parse_tmx(tmx_file, stats=None):
+    """Parse a Tiled TMX file into a room dict (the Godot JSON structure)
+
+    Autotiling is applied. Raises on malformed input. If a stats dict is
+    given it receives parse_s.
+    """
+    stats = {} if stats is None else stats
     
-    try:
-        # Parse TMX file
-        tree = ET.parse(tmx_file)
-        root = tree.getroot()
-        
-        # Extract map properties
-        map_width = int(root.get('width'))
-        map_height = int(root.get('height'))
-        tile_width = int(root.get('tilewidth'))
-        tile_height = int(root.get('tileheight'))
-        
-        # Create JSON structure
-        json_data = {
-            "compressionlevel": -1,
+    # Parse TMX file
+    stage("parse")
+    parse_start = time.perf_counter()
+    tree = ET.parse(tmx_file)
+    root = tree.getroot()
+    stats["parse_s"] = time.perf_counter() - parse_start
+    stage("transform")
+    
+    # Extract map properties
+    map_width = int(root.get('width'))
+    map_height = int(root.get('height'))
+    tile_width = int(root.get('tilewidth'))
+    tile_height = int(root.get('tileheight'))
+    
+    # Create JSON structure
+    json_data = {
+        "compressionlevel": -1,
+        "height": map_height,
+        "infinite": False,
+        "layers": [],
+        "nextlayerid": 5,
+        "nextobjectid": 4,
+        "orientation": "orthogonal",
+        "renderorder": "right-down",
+        "tiledversion": "1.11.2",
+        "tileheight": tile_height,
+        "tilesets": [],
+        "tilewidth": tile_width,
+        "type": "map",
+        "version": "1.10",
+        "width": map_width,
+        "backgroundcolor": "#000000"
+    }
+    
+    # Process tilesets
+    for tileset in root.findall('tileset'):
+        tileset_data = {
+            "firstgid": int(tileset.get('firstgid')),
+            "source": tileset.get('source')
+        }
+        json_data["tilesets"].append(tileset_data)
+    
+    # Process layers
+    layer_id = 1
+    for layer in root.findall('layer'):
+        layer_data = {
+            "data": "",
+            "encoding": "csv",
             "height": map_height,
-            "infinite": False,
-            "layers": [],
-            "nextlayerid": 5,
-            "nextobjectid": 4,
-            "orientation": "orthogonal",
-            "renderorder": "right-down",
-            "tiledversion": "1.11.2",
-            "tileheight": tile_height,
-            "tilesets": [],
-            "tilewidth": tile_width,
-            "type": "map",
-            "version": "1.10",
+            "id": layer_id,
+            "name": layer.get('name'),
+            "opacity": 1,
+            "type": "tilelayer",
+            "visible": True,
             "width": map_width,
-            "backgroundcolor": "#000000"
+            "x": 0,
+            "y": 0,
+            "offsetx": 0,
+            "offsety": 0,
+            "parallaxx": 1.0,
+            "parallaxy": 1.0,
+            "tintcolor": "#000000"
         }
         
-        # Process tilesets
-        for tileset in root.findall('tileset'):
-            tileset_data = {
-                "firstgid": int(tileset.get('firstgid')),
-                "source": tileset.get('source')
-            }
-            json_data["tilesets"].append(tileset_data)
+        # Process tile data
+        data_element = layer.find('data')
+        if data_element is not None:
+            layer_data["data"] = data_element.text.strip()
         
-        # Process layers
-        layer_id = 1
-        for layer in root.findall('layer'):
-            layer_data = {
-                "data": "",
-                "encoding": "csv",
-                "height": map_height,
-                "id": layer_id,
-                "name": layer.get('name'),
-                "opacity": 1,
-                "type": "tilelayer",
-                "visible": True,
-                "width": map_width,
-                "x": 0,
-                "y": 0,
-                "offsetx": 0,
-                "offsety": 0,
-                "parallaxx": 1.0,
-                "parallaxy": 1.0,
-                "tintcolor": "#000000"
+        json_data["layers"].append(layer_data)
+        layer_id += 1
+    
+    # Process object groups
+    for objectgroup in root.findall('objectgroup'):
+        objects = []
+        for obj in objectgroup.findall('object'):
+            obj_data = {
+                "height": int(obj.get('height', 0)),
+                "id": int(obj.get('id', 0)),
+                "name": obj.get('name', ''),
+                "properties": [],
+                "rotation": float(obj.get('rotation', 0)),
+                "type": obj.get('type', ''),
+                "visible": obj.get('visible', 'true').lower() == 'true',
+                "width": int(obj.get('width', 0)),
+                "x": float(obj.get('x', 0)),
+                "y": float(obj.get('y', 0))
             }
             
-            # Process tile data
-            data_element = layer.find('data')
-            if data_element is not None:
-                layer_data["data"] = data_element.text.strip()
-            
-            json_data["layers"].append(layer_data)
-            layer_id += 1
-        
-        # Process object groups
-        for objectgroup in root.findall('objectgroup'):
-            objects = []
-            for obj in objectgroup.findall('object'):
-                obj_data = {
-                    "height": int(obj.get('height', 0)),
-                    "id": int(obj.get('id', 0)),
-                    "name": obj.get('name', ''),
-                    "properties": [],
-                    "rotation": float(obj.get('rotation', 0)),
-                    "type": obj.get('type', ''),
-                    "visible": obj.get('visible', 'true').lower() == 'true',
-                    "width": int(obj.get('width', 0)),
-                    "x": float(obj.get('x', 0)),
-                    "y": float(obj.get('y', 0))
+            # Process properties (values typed as declared: "3" -> 3, "true" -> true)
+            for prop in obj.findall('properties/property'):
+                prop_type = prop.get('type', 'string')
+                try:
+                    value = coerce_property(prop.get('value', prop.text or ''), prop_type)
+                except ValueError as e:
+                    raise ValueError(f"object {obj_data['id']} property {prop.get('name')!r}: {e}") from None
+                prop_data = {
+                    "name": prop.get('name'),
+                    "type": prop_type,
+                    "value": value
                 }
-                
-                # Process properties
-                for prop in obj.findall('properties/property'):
-                    prop_data = {
-                        "name": prop.get('name'),
-                        "type": prop.get('type', 'string'),
-                        "value": prop.get('value')
-                    }
-                    obj_data["properties"].append(prop_data)
-                
-                objects.append(obj_data)
-            
-            objectgroup_data = {
-                "draworder": objectgroup.get('draworder', 'topdown'),
-                "id": layer_id,
-                "name": objectgroup.get('name'),
-                "objects": objects,
-                "opacity": 1,
-                "type": "objectgroup",
-                "visible": True,
-                "x": 0,
-                "y": 0
-            }
+                obj_data["properties"].append(prop_data)
             
-            json_data["layers"].append(objectgroup_data)
-            layer_id += 1
+            objects.append(obj_data)
+        
+        objectgroup_data = {
+            "draworder": objectgroup.get('draworder', 'topdown'),
+            "id": layer_id,
+            "name": objectgroup.get('name'),
+            "objects": objects,
+            "opacity": 1,
+            "type": "objectgroup",
+            "visible": True,
+            "x": 0,
+            "y": 0
+        }
         
-        # Write JSON file
-        with open(json_file, 'w') as f:
-            json.dump(json_data, f, indent=2)
+        json_data["layers"].append(objectgroup_data)
+        layer_id += 1
+    
+    # Swap terrain tiles for their connected variants (rules live in the TSX)
+    autotile_room(json_data, os.path.dirname(tmx_file))
+    
+    return json_data
+
+def write_room_json(json_data, json_file, profile="pretty"):
+    """Encode a room dict with a room_json profile and write it; returns bytes written"""
+    stage("encode")
+    text = encode_json(json_data, profile)
+    
+    # Write JSON file (one writer at a time across tools). The temp file is
+    # moved into place, so readers never see half a room and a file
+    # hardlinked from the build cache is replaced rather than rewritten.
+    stage("write")
+    temp_file = f"{json_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with FileLock(json_file):
+        try:
+            with open(temp_file, 'w') as f:
+                f.write(text)
+            os.replace(temp_file, json_file)
+        finally:
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+    return os.path.getsize(json_file)
+
+@traced_file("tmx_to_json")
+def tmx_to_json(tmx_file, json_file, stats=None, profile="pretty"):
+    """Convert a Tiled TMX file to Godot JSON format
+
+    profile is a room_json output profile ("pretty" or "minified"). If a
+    stats dict is given it receives parse_s, bytes_written and, on failure,
+    error (the exception type name).
+    """
+    print(f"Converting {tmx_file} to {json_file}...")
+    stats = {} if stats is None else stats
+    
+    try:
+        json_data = parse_tmx(tmx_file, stats)
+        stats["bytes_written"] = write_room_json(json_data, json_file, profile)
         
         print(f"✅ Successfully converted {tmx_file} to {json_file}")
         return True
         
     except Exception as e:
+        stats["error"] = type(e).__name__
         print(f"❌ Error converting {tmx_file}: {e}")
         return False
 
-def convert_all_tmx_files():
-    """Convert all TMX files in tiles/ directory to JSON files in game-godot/data/rooms/"""
+def convert_all_tmx_files(handoff=True):
+    """Convert all TMX files in tiles/ directory to JSON files in game-godot/data/rooms/
+
+    If the auto-export watcher is running, the files are queued for it
+    instead (unless handoff is False) so two processes never convert them at
+    once.
+    """
     tiles_dir = "tiles"
     rooms_dir = "game-godot/data/rooms"
     
@@ -160,6 +221,18 @@ def convert_all_tmx_files():
     for tmx_file in tmx_files:
         print(f"  - {tmx_file}")
     
+    watcher = running_instance(WATCHER_LOCK) if handoff else None
+    if watcher and watcher["pid"] != os.getpid():
+        for tmx_file in tmx_files:
+            enqueue_job("tmx_to_json", os.path.join(tiles_dir, tmx_file),
+                        os.path.join(rooms_dir, tmx_file.replace('.tmx', '.json')))
+        print(f"\n🔄 Handed {len(tmx_files)} files to the running auto-export watcher (pid {watcher['pid']})")
+        return True
+    
+    # Every target in tiles/export_settings.json is written from one parse per file
+    from export_targets import export_room, load_export_targets, with_output
+    targets = load_export_targets()
+    
     print("\nConverting files...")
     success_count = 0
     
@@ -168,7 +241,13 @@ def convert_all_tmx_files():
         json_file = tmx_file.replace('.tmx', '.json')
         json_path = os.path.join(rooms_dir, json_file)
         
-        if tmx_to_json(tmx_path, json_path):
+        print(f"Converting {tmx_path}...")
+        results = export_room(tmx_path, with_output(targets, json_path))
+        errors = [(target, error) for target, _, error in results if error]
+        for target, error in errors:
+            print(f"❌ Error converting {tmx_path} for {target.name}: {error}")
+        if not errors:
+            print(f"✅ Successfully converted {tmx_path} to {', '.join(path for _, path, _ in results)}")
             success_count += 1
     
     print(f"\n✅ Conversion complete: {success_count}/{len(tmx_files)} files converted successfully")
@@ -1,24 +1,31 @@
-from PIL import Image
 import os
 
-# Load the individual tile images
-ground_img = Image.open('ground_tile.png')
-wall_img = Image.open('wall_tile.png')
+def create_tileset(tiles_dir="."):
+    """Build the legacy 16x16 tileset.png from ground_tile.png and wall_tile.png"""
+    # PIL is only needed here, keep it out of module import time
+    from PIL import Image
 
-# Resize to 16x16 if needed
-ground_img = ground_img.resize((16, 16), Image.Resampling.LANCZOS)
-wall_img = wall_img.resize((16, 16), Image.Resampling.LANCZOS)
+    # Load the individual tile images
+    ground_img = Image.open(os.path.join(tiles_dir, 'ground_tile.png'))
+    wall_img = Image.open(os.path.join(tiles_dir, 'wall_tile.png'))
 
-# Create a 48x16 combined image (3 tiles)
-combined = Image.new('RGBA', (48, 16), (0, 0, 0, 0))
+    # Resize to 16x16 if needed
+    ground_img = ground_img.resize((16, 16), Image.Resampling.LANCZOS)
+    wall_img = wall_img.resize((16, 16), Image.Resampling.LANCZOS)
 
-# Paste the tiles side by side
-# Tile 0: Empty/transparent
-# Tile 1: Ground
-combined.paste(ground_img, (16, 0))
-# Tile 2: Wall
-combined.paste(wall_img, (32, 0))
+    # Create a 48x16 combined image (3 tiles)
+    combined = Image.new('RGBA', (48, 16), (0, 0, 0, 0))
 
-# Save the combined tileset
-combined.save('tileset.png')
-print("Tileset created successfully!")
+    # Paste the tiles side by side
+    # Tile 0: Empty/transparent
+    # Tile 1: Ground
+    combined.paste(ground_img, (16, 0))
+    # Tile 2: Wall
+    combined.paste(wall_img, (32, 0))
+
+    # Save the combined tileset
+    combined.save(os.path.join(tiles_dir, 'tileset.png'))
+    print("Tileset created successfully!")
+
+if __name__ == "__main__":
+    create_tileset()
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Reference Converters
+The ElementTree TMX <-> JSON conversions, frozen as the definition of both formats
+
+These are the converters as they stood before the optimised paths
+(json_to_tmx.write_tmx_stream, room_json's orjson backend, the export
+targets) were written, kept deliberately naive and self-contained:
+nothing here is imported from json_to_tmx, tiled_workflow, room_json or
+room_objects, so a bug in a helper the optimised code uses can never show
+up on both sides of verify_conversions' comparison. Keep it that way -
+when the format changes on purpose, change it here by hand too.
+
+Deliberate format changes made since the original converters, and
+reproduced here:
+    - property values are typed as declared ("3" -> 3, "true" -> true), and
+      written back as Tiled text (true/false, not Python's True/False)
+    - tile data may be a flat GID list (Tiled's own JSON) as well as CSV text
+Autotiling is not part of the reference; it only runs for tilesets that
+declare rules, and the verification rooms have none.
+"""
+
+import json
+import xml.etree.ElementTree as ET
+
+def _csv_data(layer):
+    data = layer['data']
+    if not isinstance(data, str):
+        width = layer['width']
+        return '\n'.join(','.join(str(gid) for gid in data[start:start + width]) + ','
+                         for start in range(0, len(data), width))
+
+    # Fix CSV format - ensure proper line endings and trailing commas
+    lines = data.split('\n')
+    fixed_lines = []
+    for line in lines:
+        if line.strip() and not line.strip().endswith(','):
+            line = line.strip() + ','
+        fixed_lines.append(line)
+    return '\n'.join(fixed_lines)
+
+def _property_text(value):
+    if value is True:
+        return 'true'
+    if value is False:
+        return 'false'
+    if value is None:
+        return ''
+    return str(value)
+
+def render_tmx(data):
+    """TMX bytes for a room dict, built as an ElementTree"""
+    root = ET.Element('map')
+    root.set('version', '1.10')
+    root.set('tiledversion', '1.11.2')
+    root.set('orientation', 'orthogonal')
+    root.set('renderorder', 'right-down')
+    root.set('width', str(data['width']))
+    root.set('height', str(data['height']))
+    root.set('tilewidth', str(data['tilewidth']))
+    root.set('tileheight', str(data['tileheight']))
+    root.set('infinite', '0')
+    root.set('nextlayerid', str(data['nextlayerid']))
+    root.set('nextobjectid', str(data['nextobjectid']))
+
+    # Add tilesets
+    for tileset in data.get('tilesets', []):
+        tileset_elem = ET.SubElement(root, 'tileset')
+        tileset_elem.set('firstgid', str(tileset['firstgid']))
+        # Fix tileset path - remove ../tiles/ prefix if present
+        source_path = tileset['source']
+        if source_path.startswith('../tiles/'):
+            source_path = source_path.replace('../tiles/', '')
+        tileset_elem.set('source', source_path)
+
+    # Add layers
+    layer_id = 1
+    for layer in data.get('layers', []):
+        if layer['type'] == 'tilelayer':
+            layer_elem = ET.SubElement(root, 'layer')
+            layer_elem.set('id', str(layer_id))
+            layer_elem.set('name', layer['name'])
+            layer_elem.set('width', str(layer['width']))
+            layer_elem.set('height', str(layer['height']))
+
+            data_elem = ET.SubElement(layer_elem, 'data')
+            data_elem.set('encoding', layer['encoding'])
+            data_elem.text = _csv_data(layer) if layer['encoding'] == 'csv' else layer['data']
+
+            layer_id += 1
+
+        elif layer['type'] == 'objectgroup':
+            objectgroup_elem = ET.SubElement(root, 'objectgroup')
+            objectgroup_elem.set('id', str(layer_id))
+            objectgroup_elem.set('name', layer['name'])
+            objectgroup_elem.set('draworder', layer.get('draworder', 'topdown'))
+
+            for obj in layer.get('objects', []):
+                obj_elem = ET.SubElement(objectgroup_elem, 'object')
+                obj_elem.set('id', str(obj['id']))
+                obj_elem.set('name', obj['name'])
+                obj_elem.set('type', obj['type'])
+                obj_elem.set('x', str(obj['x']))
+                obj_elem.set('y', str(obj['y']))
+                obj_elem.set('width', str(obj['width']))
+                obj_elem.set('height', str(obj['height']))
+                obj_elem.set('visible', str(obj['visible']).lower())
+
+                if obj.get('rotation', 0) != 0:
+                    obj_elem.set('rotation', str(obj['rotation']))
+
+                if obj.get('properties'):
+                    properties_elem = ET.SubElement(obj_elem, 'properties')
+                    for prop in obj['properties']:
+                        prop_elem = ET.SubElement(properties_elem, 'property')
+                        prop_elem.set('name', prop['name'])
+                        prop_elem.set('type', prop['type'])
+                        prop_elem.set('value', _property_text(prop['value']))
+
+            layer_id += 1
+
+    tree = ET.ElementTree(root)
+    ET.indent(tree, space=" ", level=0)
+    return ET.tostring(root, encoding='utf-8', xml_declaration=True)
+
+def _typed_value(text, prop_type):
+    """A TMX property's text as the JSON value of its declared type"""
+    if prop_type in ('int', 'object'):
+        return int(text.strip() or 0)
+    if prop_type == 'float':
+        return float(text.strip() or 0)
+    if prop_type == 'bool':
+        text = text.strip().lower()
+        if text not in ('true', '1', 'false', '0', ''):
+            raise ValueError(f"{text!r} is not a valid bool")
+        return text in ('true', '1')
+    if prop_type == 'color':
+        text = text.strip()
+        if not text:
+            return ""
+        digits = text[1:] if text.startswith('#') else text
+        if len(digits) not in (6, 8) or any(c not in "0123456789abcdefABCDEF" for c in digits):
+            raise ValueError(f"{text!r} is not a valid color")
+        return "#" + digits.lower()
+    return text
+
+def parse_tmx(tmx_file):
+    """Room dict (the Godot JSON structure) for a TMX file"""
+    root = ET.parse(tmx_file).getroot()
+
+    map_width = int(root.get('width'))
+    map_height = int(root.get('height'))
+    tile_width = int(root.get('tilewidth'))
+    tile_height = int(root.get('tileheight'))
+
+    json_data = {
+        "compressionlevel": -1,
+        "height": map_height,
+        "infinite": False,
+        "layers": [],
+        "nextlayerid": 5,
+        "nextobjectid": 4,
+        "orientation": "orthogonal",
+        "renderorder": "right-down",
+        "tiledversion": "1.11.2",
+        "tileheight": tile_height,
+        "tilesets": [],
+        "tilewidth": tile_width,
+        "type": "map",
+        "version": "1.10",
+        "width": map_width,
+        "backgroundcolor": "#000000"
+    }
+
+    for tileset in root.findall('tileset'):
+        json_data["tilesets"].append({
+            "firstgid": int(tileset.get('firstgid')),
+            "source": tileset.get('source')
+        })
+
+    layer_id = 1
+    for layer in root.findall('layer'):
+        layer_data = {
+            "data": "",
+            "encoding": "csv",
+            "height": map_height,
+            "id": layer_id,
+            "name": layer.get('name'),
+            "opacity": 1,
+            "type": "tilelayer",
+            "visible": True,
+            "width": map_width,
+            "x": 0,
+            "y": 0,
+            "offsetx": 0,
+            "offsety": 0,
+            "parallaxx": 1.0,
+            "parallaxy": 1.0,
+            "tintcolor": "#000000"
+        }
+        data_element = layer.find('data')
+        if data_element is not None:
+            layer_data["data"] = data_element.text.strip()
+        json_data["layers"].append(layer_data)
+        layer_id += 1
+
+    for objectgroup in root.findall('objectgroup'):
+        objects = []
+        for obj in objectgroup.findall('object'):
+            obj_data = {
+                "height": int(obj.get('height', 0)),
+                "id": int(obj.get('id', 0)),
+                "name": obj.get('name', ''),
+                "properties": [],
+                "rotation": float(obj.get('rotation', 0)),
+                "type": obj.get('type', ''),
+                "visible": obj.get('visible', 'true').lower() == 'true',
+                "width": int(obj.get('width', 0)),
+                "x": float(obj.get('x', 0)),
+                "y": float(obj.get('y', 0))
+            }
+            for prop in obj.findall('properties/property'):
+                prop_type = prop.get('type', 'string')
+                obj_data["properties"].append({
+                    "name": prop.get('name'),
+                    "type": prop_type,
+                    "value": _typed_value(prop.get('value', prop.text or ''), prop_type)
+                })
+            objects.append(obj_data)
+
+        json_data["layers"].append({
+            "draworder": objectgroup.get('draworder', 'topdown'),
+            "id": layer_id,
+            "name": objectgroup.get('name'),
+            "objects": objects,
+            "opacity": 1,
+            "type": "objectgroup",
+            "visible": True,
+            "x": 0,
+            "y": 0
+        })
+        layer_id += 1
+
+    return json_data
+
+def tmx_to_json_text(tmx_file):
+    """The room JSON text tmx_to_json writes for a TMX file (pretty profile)"""
+    return json.dumps(parse_tmx(tmx_file), indent=2)
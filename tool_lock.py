@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Tool Locks
+Single-instance guard, per-output-file locks and a hand-off queue for the pipeline tools
+
+All state lives under .dunjon/ at the project root:
+
+    .dunjon/locks/<name>.lock        one running instance of a tool (e.g. the watcher)
+    .dunjon/locks/files/<hash>.lock  one writer per output file
+    .dunjon/queue/<hash>.json        conversions handed to the running watcher
+
+Lock files are created atomically (O_CREAT | O_EXCL). Their first line is the
+owner's PID so batch files can read it with `set /p`; the following lines are
+key=value details. A lock whose PID is no longer running is stale and is
+taken over (see _take_over_if_stale). PID checks use OpenProcess on Windows,
+where os.kill(pid, 0) would terminate the process instead of probing it.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# Anchored to the project root (this file's directory), not the current directory,
+# so a tool started from a subdirectory still sees the same locks and queue
+STATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".dunjon")
+LOCKS_DIR = os.path.join(STATE_DIR, "locks")
+FILE_LOCKS_DIR = os.path.join(LOCKS_DIR, "files")
+QUEUE_DIR = os.path.join(STATE_DIR, "queue")
+
+WATCHER_LOCK = "watcher"
+
+FILE_LOCK_TIMEOUT_S = 30.0
+POLL_INTERVAL_S = 0.05
+
+def pid_alive(pid):
+    """True if a process with this PID is running"""
+    if pid <= 0:
+        return False
+    if pid == os.getpid():
+        return True
+
+    if os.name == 'nt':
+        import ctypes
+
+        PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+        STILL_ACTIVE = 259
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            # Access denied means it exists but belongs to someone else
+            return ctypes.GetLastError() == 5
+        try:
+            exit_code = ctypes.c_ulong()
+            if not kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code)):
+                return True
+            return exit_code.value == STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def read_lock(path):
+    """Parse a lock file into a dict with at least 'pid', or None if missing/unreadable"""
+    try:
+        with open(path, 'r') as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return None
+    if not lines or not lines[0].strip().isdigit():
+        return None
+
+    info = {"pid": int(lines[0].strip())}
+    for line in lines[1:]:
+        key, _, value = line.partition('=')
+        if key:
+            info[key] = value
+    return info
+
+def _lock_text(details):
+    return f"{os.getpid()}\n" + "".join(f"{key}={value}\n" for key, value in details.items())
+
+def _try_create(path, details):
+    """Atomically create a lock file owned by this process; False if it already exists"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    try:
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return False
+    with os.fdopen(fd, 'w') as f:
+        f.write(_lock_text(details))
+    return True
+
+def _is_stale(path):
+    """True if the lock file exists and its owner is gone
+
+    A missing lock is free, not stale: there is nothing to take over.
+    """
+    info = read_lock(path)
+    if info is not None:
+        return not pid_alive(info["pid"])
+    # Half-written by a process that is creating it right now, or junk
+    try:
+        return time.time() - os.path.getmtime(path) >= 1.0
+    except OSError:
+        return False
+
+@contextmanager
+def _takeover_guard(path):
+    """Hold an OS lock on <lock>.takeover for the duration of a takeover
+
+    The OS releases it if this process dies, so a crashed takeover never
+    leaves the guard behind. The guard file itself is never deleted.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd = os.open(path + ".takeover", os.O_CREAT | os.O_RDWR)
+    try:
+        if os.name == 'nt':
+            import msvcrt
+            while True:
+                try:
+                    msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                    break
+                except OSError:
+                    time.sleep(POLL_INTERVAL_S)
+            try:
+                yield
+            finally:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+    finally:
+        os.close(fd)
+
+def _take_over_if_stale(path, details):
+    """Replace a lock whose owner is gone with one owned by this process
+
+    Returns True if this process now holds the lock. The stale file is
+    never deleted: under the takeover guard it is checked again and then
+    atomically replaced (os.replace) by the new lock, so the path is never
+    briefly free for a third process to claim. Nothing else can change a
+    stale lock meanwhile - its owner is dead, other takeovers wait for the
+    guard and _try_create fails while the file exists. A lock that has
+    disappeared is left alone; the caller simply tries to create it again.
+    """
+    if not _is_stale(path):
+        return False
+
+    with _takeover_guard(path):
+        if not _is_stale(path):
+            return False
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w') as f:
+            f.write(_lock_text(details))
+        try:
+            os.replace(temp_path, path)
+        except OSError:
+            # e.g. Windows refuses while a batch file has the lock open
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return False
+        return True
+
+class InstanceLock:
+    """Allow only one running instance of a named tool
+
+    Use acquire()/release() or a with block; acquire() returns False when
+    another live process holds the lock (see owner()).
+    """
+
+    def __init__(self, name, locks_dir=LOCKS_DIR):
+        self.name = name
+        self.path = os.path.join(locks_dir, name + ".lock")
+        self.held = False
+
+    def acquire(self):
+        details = {"started": time.strftime("%Y-%m-%dT%H:%M:%S"), "command": " ".join(sys.argv)}
+        for _ in range(3):
+            if _try_create(self.path, details) or _take_over_if_stale(self.path, details):
+                self.held = True
+                return True
+            if os.path.exists(self.path):
+                return False
+            # Released between the two attempts; try again
+        return False
+
+    def owner(self):
+        """Lock details of the live owner, or None"""
+        info = read_lock(self.path)
+        if info and pid_alive(info["pid"]):
+            return info
+        return None
+
+    def release(self):
+        if not self.held:
+            return
+        info = read_lock(self.path)
+        if info and info["pid"] == os.getpid():
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+        self.held = False
+
+    def __enter__(self):
+        if not self.acquire():
+            owner = self.owner()
+            raise RuntimeError(f"{self.name} is already running (pid {owner['pid'] if owner else '?'})")
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+def running_instance(name, locks_dir=LOCKS_DIR):
+    """Lock details if a live process holds the named instance lock, else None"""
+    return InstanceLock(name, locks_dir).owner()
+
+def _path_key(path):
+    return hashlib.sha1(os.path.normcase(os.path.abspath(path)).encode('utf-8')).hexdigest()[:20]
+
+class FileLock:
+    """Exclusive lock on one output file, shared by every tool that writes it
+
+    Blocks (polling) until the lock is free or timeout_s passes, then raises
+    TimeoutError. Re-entrant within a thread; other threads of the same
+    process wait like other processes do.
+    """
+
+    _held = {}
+
+    def __init__(self, target_path, timeout_s=FILE_LOCK_TIMEOUT_S, locks_dir=FILE_LOCKS_DIR):
+        self.target_path = target_path
+        self.path = os.path.join(locks_dir, _path_key(target_path) + ".lock")
+        self.timeout_s = timeout_s
+        self.key = (self.path, threading.get_ident())
+
+    def acquire(self):
+        if FileLock._held.get(self.key):
+            FileLock._held[self.key] += 1
+            return
+
+        deadline = time.monotonic() + self.timeout_s
+        details = {"target": os.path.abspath(self.target_path)}
+        while not (_try_create(self.path, details) or _take_over_if_stale(self.path, details)):
+            if time.monotonic() >= deadline:
+                info = read_lock(self.path) or {}
+                raise TimeoutError(f"{self.target_path} is locked by pid {info.get('pid', '?')}")
+            time.sleep(POLL_INTERVAL_S)
+        FileLock._held[self.key] = 1
+
+    def release(self):
+        count = FileLock._held.get(self.key, 0)
+        if count == 0:
+            return
+        if count > 1:
+            FileLock._held[self.key] = count - 1
+            return
+        del FileLock._held[self.key]
+        info = read_lock(self.path)
+        if info and info["pid"] == os.getpid():
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+def enqueue_job(action, source, target, queue_dir=QUEUE_DIR):
+    """Hand a conversion to the running watcher
+
+    Jobs are keyed by target, so queueing the same file twice before the
+    watcher picks it up results in one conversion.
+    """
+    os.makedirs(queue_dir, exist_ok=True)
+    job = {"action": action, "source": os.path.abspath(source), "target": os.path.abspath(target),
+           "queued_by": os.getpid(), "queued_at": time.time()}
+    path = os.path.join(queue_dir, _path_key(target) + ".json")
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(job, f)
+    os.replace(temp_path, path)
+    return path
+
+def take_jobs(queue_dir=QUEUE_DIR):
+    """Remove and return all queued jobs, oldest first"""
+    if not os.path.isdir(queue_dir):
+        return []
+
+    jobs = []
+    for name in os.listdir(queue_dir):
+        if not name.endswith(".json"):
+            continue
+        path = os.path.join(queue_dir, name)
+        try:
+            with open(path, 'r') as f:
+                job = json.load(f)
+            os.remove(path)
+        except (OSError, ValueError):
+            continue
+        jobs.append(job)
+    jobs.sort(key=lambda job: job.get("queued_at", 0))
+    return jobs
+
+def main():
+    """Show which tools hold locks and how many jobs are queued"""
+    if not os.path.isdir(LOCKS_DIR):
+        print("No locks held")
+        return
+
+    for name in sorted(os.listdir(LOCKS_DIR)):
+        if not name.endswith(".lock"):
+            continue
+        info = read_lock(os.path.join(LOCKS_DIR, name))
+        state = "running" if info and pid_alive(info["pid"]) else "stale"
+        print(f"{name[:-5]}: {state} {info or ''}")
+
+    queued = len([name for name in os.listdir(QUEUE_DIR) if name.endswith(".json")]) if os.path.isdir(QUEUE_DIR) else 0
+    print(f"Queued jobs: {queued}")
+
+if __name__ == "__main__":
+    main()
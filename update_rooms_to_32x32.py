@@ -7,6 +7,8 @@ import json
 import os
 import glob
 
+from room_json import write_json
+
 def update_room_file(file_path):
     """Update a single room file to use 32x32 tiles"""
     print(f"Updating {file_path}...")
@@ -42,8 +44,7 @@ def update_room_file(file_path):
                         obj['height'] = 32
     
     # Write back to file
-    with open(file_path, 'w') as f:
-        json.dump(data, f, indent=2)
+    write_json(file_path, data)
     
     print(f"✅ Updated {file_path}")
 
@@ -9,10 +9,15 @@ import os
 import glob
 import sys
 
+from export_trace import stage, traced_file
+from room_index import build_room_index
+
+@traced_file("validate_room")
 def validate_room_file(file_path):
     """Validate a single room file"""
     print(f"Validating {os.path.basename(file_path)}...")
     
+    stage("parse")
     try:
         with open(file_path, 'r') as f:
             data = json.load(f)
@@ -23,6 +28,7 @@ def validate_room_file(file_path):
         print(f"❌ File read error: {e}")
         return False
     
+    stage("check")
     errors = []
     warnings = []
     
@@ -80,6 +86,8 @@ def validate_room_file(file_path):
                     if 'width' in obj and 'height' in obj:
                         if obj['width'] != 32 or obj['height'] != 32:
                             warnings.append(f"Object {obj.get('name', 'unnamed')} size: {obj['width']}x{obj['height']} (should be 32x32)")
+        
+        warnings.extend(check_object_placement(build_room_index(data)))
     
     # Report results
     if errors:
@@ -97,20 +105,37 @@ def validate_room_file(file_path):
         print("✅ Validation passed")
         return True
 
-def main():
-    """Validate all room files"""
-    rooms_dir = "game-godot/data/rooms"
+def check_object_placement(index):
+    """Return placement warnings for spawns and doors using the room's spatial index"""
+    warnings = []
     
+    for entry in index.objects:
+        name = entry.obj.get('name', 'unnamed')
+        kind = entry.kind
+        
+        if kind in ('player_spawn', 'enemy_spawn', 'door') and not index.is_inside_room(entry):
+            warnings.append(f"Object {name} at ({entry.left:g}, {entry.top:g}) is outside the room")
+            continue
+        
+        if kind in ('player_spawn', 'enemy_spawn') and index.is_blocked(entry):
+            warnings.append(f"Spawn {name} at ({entry.left:g}, {entry.top:g}) overlaps a Collision tile")
+        elif kind == 'door' and not index.is_on_edge(entry):
+            warnings.append(f"Door {name} at ({entry.left:g}, {entry.top:g}) is not on the room edge")
+    
+    return warnings
+
+def validate_all_rooms(rooms_dir="game-godot/data/rooms"):
+    """Validate every room file in rooms_dir, returning True when all pass"""
     if not os.path.exists(rooms_dir):
         print(f"❌ Rooms directory not found: {rooms_dir}")
-        sys.exit(1)
+        return False
     
     # Find all JSON files
     room_files = glob.glob(os.path.join(rooms_dir, "*.json"))
     
     if not room_files:
         print(f"❌ No JSON files found in {rooms_dir}")
-        sys.exit(1)
+        return False
     
     print(f"Validating {len(room_files)} room files...")
     print("=" * 50)
@@ -129,10 +154,15 @@ def main():
     print(f"Validation complete: {valid_count} valid, {invalid_count} invalid")
     
     if invalid_count > 0:
+        return False
+    
+    print("🎉 All rooms are valid!")
+    return True
+
+def main():
+    """Validate all room files"""
+    if not validate_all_rooms():
         sys.exit(1)
-    else:
-        print("🎉 All rooms are valid!")
 
 if __name__ == "__main__":
     main()
-
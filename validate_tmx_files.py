@@ -8,14 +8,19 @@ import os
 import xml.etree.ElementTree as ET
 from pathlib import Path
 
+from export_trace import stage, traced_file
+
+@traced_file("validate_tmx")
 def validate_tmx_file(tmx_file):
     """Validate a single TMX file"""
     print(f"Validating {tmx_file.name}...")
     
     try:
         # Try to parse the TMX file
+        stage("parse")
         tree = ET.parse(tmx_file)
         root = tree.getroot()
+        stage("check")
         
         # Check basic structure
         if root.tag != 'map':
@@ -77,20 +82,20 @@ def validate_tmx_file(tmx_file):
         print(f"❌ Validation error: {e}")
         return False
 
-def main():
-    """Validate all TMX files"""
-    tiles_dir = Path("tiles")
+def validate_all_tmx_files(tiles_dir="tiles"):
+    """Validate every TMX file in tiles_dir, returning True when all pass"""
+    tiles_dir = Path(tiles_dir)
     
     if not tiles_dir.exists():
         print("❌ Tiles directory not found")
-        return
+        return False
     
     # Find all TMX files
     tmx_files = list(tiles_dir.glob("*.tmx"))
     
     if not tmx_files:
         print("❌ No TMX files found")
-        return
+        return False
     
     print(f"Validating {len(tmx_files)} TMX files...")
     print("=" * 40)
@@ -106,10 +111,14 @@ def main():
     
     if valid_count == len(tmx_files):
         print("🎉 All TMX files are valid and ready for Tiled!")
-    else:
-        print("❌ Some files have issues. Check the error messages above.")
+        return True
+    
+    print("❌ Some files have issues. Check the error messages above.")
+    return False
+
+def main():
+    """Validate all TMX files"""
+    validate_all_tmx_files()
 
 if __name__ == "__main__":
     main()
-
-
@@ -0,0 +1,524 @@
+#!/usr/bin/env python3
+"""
+Conversion Verification
+Differential fuzzing of the converters: optimised paths against their references
+
+Every case is a random room generated from (seed, case number): random map
+and tile sizes, CSV or GID-list tile data with flip flags, object groups
+with awkward names (markup, quotes, newlines, non-ASCII) and typed custom
+properties. Each case runs these checks:
+
+    tmx_stream        write_tmx_stream() bytes == tmx_reference.render_tmx() (ElementTree)
+    tmx_to_json       parse_tmx() + write_room_json() text == tmx_reference.tmx_to_json_text()
+    json_backends     room_json orjson output == stdlib output, both profiles
+    roundtrip         JSON -> TMX -> JSON keeps tiles and objects, and a second
+                      TMX -> JSON -> TMX pass changes nothing
+    export_encodings  array and base64 (none/zlib/gzip) export data decodes to the same GIDs,
+                      and columns/binary object groups expand to the same objects
+    layer_store       pack_room() + expand_room() == the (minified) room
+    object_table      ObjectTable columns, JSON and binary forms give back the objects
+
+The references live in tmx_reference.py, which shares no code with the
+paths it checks.
+
+Cases are run in batches on a process pool. A failing case is shrunk (drop
+layers, objects and properties, crop the map, blank strings and tiles) while
+it keeps failing, and the smallest room is saved to
+.dunjon/verify/<check>-<seed>-<case>.json in the repo root; --replay re-runs
+a saved file.
+"""
+
+import base64
+import copy
+import gzip
+import io
+import json
+import os
+import random
+import shutil
+import struct
+import sys
+import tempfile
+import time
+import traceback
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+from export_targets import ExportTarget, room_for_target
+from json_to_tmx import write_tmx_file, write_tmx_stream
+from layer_store import LayerStore, expand_room, pack_room
+from room_data import decode_tile_layer, encode_csv_rows, iter_tile_layers
+from room_json import dumps, minify_room, orjson
+from room_objects import ObjectTable, coerce_properties, expand_object_tables
+from tiled_workflow import parse_tmx, write_room_json
+import tmx_reference
+from tool_lock import STATE_DIR
+
+REPRO_DIR = os.path.join(STATE_DIR, "verify")
+
+BATCH_SIZE = 100
+MAX_SHRINK_STEPS = 2000
+
+# Strings chosen to trip escaping and encoding: markup, quotes, whitespace,
+# control characters (including DEL, which is ASCII but escaped by json), non-ASCII
+TEXT_PIECES = ("", "door_north", "enemy_spawn", "a&b", "<x>", '"q"', "it's", "tab\there", "new\nline",
+               "cr\rlf", "  spaced  ", "del\x7f", "esc\x1b[0m", "\x00nul", "\x0b\x0c\x1f",
+               "ü", "日本", "🙂", "]]>", "&amp;")
+LAYER_NAMES = ("Ground", "Collision", "Decor & <Props>", "Ünïcode", "")
+TILESET_SOURCES = ("dunjon_tileset.tsx", "../tiles/dunjon_tileset.tsx", "walls & floors.tsx")
+FLIP_FLAGS = (0x80000000, 0x40000000, 0x20000000, 0xE0000000)
+
+def random_text(rng):
+    return "".join(rng.choice(TEXT_PIECES) for _ in range(rng.randint(0, 2)))
+
+def random_number(rng):
+    """A coordinate: whole, a short decimal, or a float with an awkward repr"""
+    return rng.choice((
+        lambda: rng.randint(0, 2048),
+        lambda: round(rng.uniform(0, 2048), 2),
+        lambda: rng.uniform(0, 1) * 10 ** rng.randint(-7, 17),
+        lambda: 0.1 + 0.2,
+    ))()
+
+def random_property(rng):
+    prop_type = rng.choice(("string", "string", "int", "float", "bool", "color", "file", "object"))
+    value = {
+        "string": lambda: random_text(rng),
+        "int": lambda: rng.choice((0, -1, rng.randint(-2 ** 40, 2 ** 40))),
+        "float": lambda: random_number(rng),
+        "bool": lambda: rng.random() < 0.5,
+        "color": lambda: "#" + "".join(rng.choice("0123456789abcdef") for _ in range(rng.choice((6, 8)))),
+        "file": lambda: rng.choice(("", "sprites/brute.png", "a b/ü.png")),
+        "object": lambda: rng.randint(0, 50),
+    }[prop_type]()
+    return {"name": rng.choice(("type", "dir", "room_id", "hp", "target", random_text(rng))),
+            "type": prop_type, "value": value}
+
+def random_tile_rows(rng, width, height):
+    density = rng.random()
+    top_gid = rng.choice((8, 300, 0x1FFFFFFF))
+    rows = []
+    for _ in range(height):
+        row = []
+        for _ in range(width):
+            gid = rng.randint(1, top_gid) if rng.random() < density else 0
+            if gid and rng.random() < 0.05:
+                gid |= rng.choice(FLIP_FLAGS)
+            row.append(gid)
+        rows.append(row)
+    return rows
+
+def random_room(rng, max_size=24):
+    """A random room dict in the Godot JSON layout"""
+    width = rng.randint(1, max_size)
+    height = rng.randint(1, max_size)
+    tile_size = rng.choice((16, 32, 32))
+    room = {
+        "height": height,
+        "layers": [],
+        "nextlayerid": rng.randint(1, 9),
+        "nextobjectid": rng.randint(1, 99),
+        "tileheight": tile_size,
+        "tilesets": [{"firstgid": 1 + 512 * i, "source": rng.choice(TILESET_SOURCES)}
+                     for i in range(rng.randint(0, 2))],
+        "tilewidth": tile_size,
+        "type": "map",
+        "width": width,
+    }
+
+    layer_id = 1
+    for _ in range(rng.randint(0, 3)):
+        rows = random_tile_rows(rng, width, height)
+        if rng.random() < 0.3:
+            data = [gid for row in rows for gid in row]
+        elif rng.random() < 0.5:
+            data = encode_csv_rows(rows)
+        else:
+            data = ",\n".join(",".join(map(str, row)) for row in rows) + ","  # TMX style, trailing comma
+        room["layers"].append({"data": data, "encoding": "csv", "height": height, "id": layer_id,
+                               "name": rng.choice(LAYER_NAMES), "opacity": 1, "type": "tilelayer",
+                               "visible": True, "width": width, "x": 0, "y": 0})
+        layer_id += 1
+
+    object_id = 1
+    for _ in range(rng.randint(0, 2)):
+        objects = []
+        for _ in range(rng.randint(0, 6)):
+            objects.append({
+                "height": rng.choice((0, tile_size, rng.randint(1, 96))),
+                "id": object_id,
+                "name": random_text(rng),
+                "properties": [random_property(rng) for _ in range(rng.randint(0, 4))],
+                "rotation": rng.choice((0.0, 0.0, 90.0, round(rng.uniform(-360, 360), 3))),
+                "type": rng.choice(("", "door", "group", "meta", random_text(rng))),
+                "visible": rng.random() < 0.9,
+                "width": rng.choice((0, tile_size, rng.randint(1, 96))),
+                "x": random_number(rng),
+                "y": random_number(rng),
+            })
+            object_id += 1
+        room["layers"].append({"draworder": "topdown", "id": layer_id, "name": rng.choice(("Entities", "Metadata", random_text(rng))),
+                               "objects": objects, "opacity": 1, "type": "objectgroup", "visible": True, "x": 0, "y": 0})
+        layer_id += 1
+
+    if rng.random() < 0.5:
+        rng.shuffle(room["layers"])
+    return room
+
+def case_room(seed, index, max_size):
+    return random_room(random.Random(f"{seed}:{index}"), max_size)
+
+def _first_difference(expected, actual):
+    """Short description of where two byte/text values first differ"""
+    if len(expected) == len(actual) and expected == actual:
+        return None
+    at = next((i for i, (a, b) in enumerate(zip(expected, actual)) if a != b), min(len(expected), len(actual)))
+    return f"differs at offset {at}: expected {expected[max(0, at - 20):at + 20]!r}, got {actual[max(0, at - 20):at + 20]!r}"
+
+# XML 1.0 cannot hold these even as character references, so no TMX can carry them
+_XML_ILLEGAL = dict.fromkeys(c for c in range(0x20) if chr(c) not in "\t\n\r")
+
+def _xml_text(value):
+    """value with the characters XML 1.0 forbids removed from every string"""
+    if isinstance(value, str):
+        return value.translate(_XML_ILLEGAL)
+    if isinstance(value, list):
+        return [_xml_text(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _xml_text(item) for key, item in value.items()}
+    return value
+
+def check_tmx_stream(room, workdir):
+    out = io.StringIO()
+    write_tmx_stream(room, out)
+    return _first_difference(tmx_reference.render_tmx(room), out.getvalue().encode('utf-8'))
+
+def check_tmx_to_json(room, workdir):
+    tmx_path = os.path.join(workdir, "case.tmx")
+    with open(tmx_path, 'wb') as f:
+        f.write(tmx_reference.render_tmx(_xml_text(room)))
+    try:
+        expected = tmx_reference.tmx_to_json_text(tmx_path)
+    except Exception as e:
+        expected = e
+    json_path = os.path.join(workdir, "case.json")
+    try:
+        write_room_json(parse_tmx(tmx_path), json_path)
+        with open(json_path, 'r') as f:
+            actual = f.read()
+    except Exception as e:
+        actual = e
+    if isinstance(expected, Exception) or isinstance(actual, Exception):
+        if type(expected) is type(actual):
+            return None  # both reject the file
+        return f"reference gave {expected!r:.80}, optimised path gave {actual!r:.80}"
+    return _first_difference(expected, actual)
+
+def check_json_backends(room, workdir):
+    if orjson is None:
+        return None
+    for profile in ("pretty", "minified"):
+        problem = _first_difference(dumps(room, profile, "json"), dumps(room, profile, "orjson"))
+        if problem:
+            return f"{profile}: {problem}"
+    return None
+
+def _tile_grids(room):
+    return [decode_tile_layer(layer, keep_flags=True) for layer in iter_tile_layers(room)]
+
+def _object_rows(room):
+    rows = []
+    for layer in room["layers"]:
+        if layer["type"] != "objectgroup":
+            continue
+        for obj in layer["objects"]:
+            properties = coerce_properties(copy.deepcopy(obj.get("properties", [])))
+            rows.append((obj["id"], obj["name"], obj["type"], float(obj["x"]), float(obj["y"]), obj["width"],
+                         obj["height"], obj["visible"], float(obj.get("rotation", 0)),
+                         [(p["name"], p["type"], p["value"]) for p in properties]))
+    return rows
+
+def check_roundtrip(room, workdir):
+    room = _xml_text(room)
+    tmx_path = os.path.join(workdir, "case.tmx")
+    write_tmx_file(room, tmx_path)
+    first = parse_tmx(tmx_path)
+    if _tile_grids(first) != _tile_grids(room):
+        return "tile data changed in JSON -> TMX -> JSON"
+    if _object_rows(first) != _object_rows(room):
+        expected, actual = _object_rows(room), _object_rows(first)
+        bad = next((pair for pair in zip(expected, actual) if pair[0] != pair[1]), (len(expected), len(actual)))
+        return f"objects changed in JSON -> TMX -> JSON: {bad[0]!r} -> {bad[1]!r}"
+
+    write_tmx_file(first, tmx_path)
+    with open(tmx_path, 'rb') as f:
+        tmx_first = f.read()
+    second = parse_tmx(tmx_path)
+    if second != first:
+        return "second TMX -> JSON pass gave a different room"
+    write_tmx_file(second, tmx_path)
+    with open(tmx_path, 'rb') as f:
+        return _first_difference(tmx_first, f.read())
+
+def _decode_export_data(layer):
+    data = layer["data"]
+    if isinstance(data, list):
+        return data
+    raw = base64.b64decode(data)
+    if layer.get("compression") == "zlib":
+        raw = zlib.decompress(raw)
+    elif layer.get("compression") == "gzip":
+        raw = gzip.decompress(raw)
+    return list(struct.unpack(f"<{len(raw) // 4}I", raw))
+
+def check_export_encodings(room, workdir):
+    expected = [[gid for row in grid for gid in row] for grid in _tile_grids(room)]
+    for encoding, compression in (("array", "none"), ("base64", "none"), ("base64", "zlib"), ("base64", "gzip")):
+        target = ExportTarget("verify", workdir, encoding=encoding, compression=compression)
+        encoded = room_for_target(room, target)
+        actual = [_decode_export_data(layer) for layer in iter_tile_layers(encoded)]
+        if actual != expected:
+            return f"{encoding}/{compression} data does not decode to the source GIDs"
+        if _tile_grids(room) != [decode_tile_layer(layer, keep_flags=True) for layer in iter_tile_layers(room)]:
+            return f"{encoding}/{compression} export modified the source room"
+    expected_layers = [layer for layer in room["layers"] if layer["type"] == "objectgroup"]
+    for layer in expected_layers:
+        for obj in layer["objects"]:
+            coerce_properties(obj.get("properties", []))
+    for objects in ("columns", "binary"):
+        target = ExportTarget("verify", workdir, objects=objects)
+        encoded = json.loads(json.dumps(room_for_target(room, target)))
+        if any("objects" in layer for layer in encoded["layers"] if layer["type"] == "objectgroup"):
+            return f"{objects} objects export left an object list"
+        expanded = [layer["objects"] for layer in expand_object_tables(encoded)["layers"]
+                    if layer["type"] == "objectgroup"]
+        if expanded != [layer["objects"] for layer in expected_layers]:
+            return f"{objects} objects export does not expand to the source objects"
+    return None
+
+def check_layer_store(room, workdir):
+    for profile in ("pretty", "minified"):
+        store = LayerStore(os.path.join(workdir, "store-" + profile), profile)
+        packed, _ = pack_room(room, store)
+        store.cache.clear()
+        expected = minify_room(room) if profile == "minified" else room
+        problem = _first_difference(dumps(expected, profile), dumps(expand_room(packed, store), profile))
+        if problem:
+            return f"{profile}: {problem}"
+    return None
+
+def check_object_table(room, workdir):
+    for layer in room["layers"]:
+        if layer["type"] != "objectgroup":
+            continue
+        expected = copy.deepcopy(layer["objects"])
+        for obj in expected:
+            coerce_properties(obj.get("properties", []))
+        table = ObjectTable.from_layer(layer)
+        for form, rebuilt in (("table", table),
+                              ("columns", ObjectTable.from_columns(json.loads(json.dumps(table.to_columns())))),
+                              ("binary", ObjectTable.from_bytes(table.to_bytes()))):
+            if rebuilt.to_objects() != expected:
+                return f"layer {layer['name']!r}: {form} form does not give back the objects"
+    return None
+
+CHECKS = {
+    "tmx_stream": check_tmx_stream,
+    "tmx_to_json": check_tmx_to_json,
+    "json_backends": check_json_backends,
+    "roundtrip": check_roundtrip,
+    "export_encodings": check_export_encodings,
+    "layer_store": check_layer_store,
+    "object_table": check_object_table,
+}
+
+def run_check(name, room, workdir):
+    """Run one check on a copy of room; returns None or a failure message"""
+    try:
+        return CHECKS[name](copy.deepcopy(room), workdir)
+    except Exception as e:
+        frame = traceback.extract_tb(e.__traceback__)[-1]
+        return f"{type(e).__name__}: {e} ({os.path.basename(frame.filename)}:{frame.lineno})"
+
+def run_batch(job):
+    """Worker: run cases [start, stop) of a seed; returns (cases, seconds per check, failures)"""
+    seed, start, stop, check_names, max_size = job
+    workdir = tempfile.mkdtemp(prefix="dunjon-verify-")
+    timings = dict.fromkeys(check_names, 0.0)
+    failures = []
+    try:
+        for index in range(start, stop):
+            room = case_room(seed, index, max_size)
+            for name in check_names:
+                check_start = time.perf_counter()
+                message = run_check(name, room, workdir)
+                timings[name] += time.perf_counter() - check_start
+                if message:
+                    failures.append((index, name, message))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return stop - start, timings, failures
+
+def _reductions(room):
+    """Smaller variants of a room, roughly biggest cut first"""
+    layers = room["layers"]
+    for i in range(len(layers)):
+        yield dict(room, layers=layers[:i] + layers[i + 1:])
+    for i in range(len(room["tilesets"])):
+        yield dict(room, tilesets=room["tilesets"][:i] + room["tilesets"][i + 1:])
+
+    for new_width, new_height in ((room["width"] // 2, room["height"]), (room["width"], room["height"] // 2),
+                                  (room["width"] - 1, room["height"]), (room["width"], room["height"] - 1)):
+        if new_width >= 1 and new_height >= 1 and (new_width, new_height) != (room["width"], room["height"]):
+            yield _crop(room, new_width, new_height)
+
+    for i, layer in enumerate(layers):
+        def with_layer(new_layer):
+            return dict(room, layers=layers[:i] + [new_layer] + layers[i + 1:])
+
+        if layer["type"] == "tilelayer":
+            rows = decode_tile_layer(layer, keep_flags=True)
+            if any(any(row) for row in rows):
+                yield with_layer(_with_rows(layer, [[0] * len(row) for row in rows]))
+                yield with_layer(_with_rows(layer, [[gid if gid < 10 else 1 for gid in row] for row in rows]))
+            if layer["name"]:
+                yield with_layer(dict(layer, name=""))
+            continue
+
+        objects = layer["objects"]
+        for j in range(len(objects)):
+            yield with_layer(dict(layer, objects=objects[:j] + objects[j + 1:]))
+        if layer["name"]:
+            yield with_layer(dict(layer, name=""))
+        for j, obj in enumerate(objects):
+            def with_object(new_object):
+                return with_layer(dict(layer, objects=objects[:j] + [new_object] + objects[j + 1:]))
+
+            properties = obj["properties"]
+            for k in range(len(properties)):
+                yield with_object(dict(obj, properties=properties[:k] + properties[k + 1:]))
+            for key, simple in (("name", ""), ("type", ""), ("x", 0), ("y", 0), ("rotation", 0.0),
+                                ("width", 0), ("height", 0), ("visible", True)):
+                if obj[key] != simple:
+                    yield with_object(dict(obj, **{key: simple}))
+            for k, prop in enumerate(properties):
+                simple = {"name": "p", "type": "string", "value": ""}
+                if prop != simple:
+                    yield with_object(dict(obj, properties=properties[:k] + [simple] + properties[k + 1:]))
+
+def _with_rows(layer, rows):
+    data = [gid for row in rows for gid in row] if isinstance(layer["data"], list) else encode_csv_rows(rows)
+    return dict(layer, data=data, width=len(rows[0]) if rows else 0, height=len(rows))
+
+def _crop(room, width, height):
+    layers = [_with_rows(layer, [row[:width] for row in decode_tile_layer(layer, keep_flags=True)[:height]])
+              if layer["type"] == "tilelayer" else layer for layer in room["layers"]]
+    return dict(room, width=width, height=height, layers=layers)
+
+def shrink(room, name, workdir, max_steps=MAX_SHRINK_STEPS):
+    """Greedily reduce a failing room while check name still fails; returns (room, message, steps)"""
+    message = run_check(name, room, workdir)
+    steps = 0
+    progress = True
+    while progress and steps < max_steps:
+        progress = False
+        for candidate in _reductions(room):
+            steps += 1
+            candidate_message = run_check(name, candidate, workdir)
+            if candidate_message:
+                room, message, progress = candidate, candidate_message, True
+                break
+            if steps >= max_steps:
+                break
+    return room, message, steps
+
+def save_reproducer(name, seed, index, room, message, repro_dir=REPRO_DIR):
+    os.makedirs(repro_dir, exist_ok=True)
+    path = os.path.join(repro_dir, f"{name}-{seed}-{index}.json")
+    with open(path, 'w') as f:
+        json.dump({"check": name, "seed": seed, "case": index, "message": message, "room": room}, f, indent=2)
+    return path
+
+def replay(path):
+    """Re-run the check of a saved reproducer"""
+    with open(path, 'r') as f:
+        repro = json.load(f)
+    workdir = tempfile.mkdtemp(prefix="dunjon-verify-")
+    try:
+        message = run_check(repro["check"], repro["room"], workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    if message:
+        print(f"❌ {repro['check']} still fails: {message}")
+        return False
+    print(f"✅ {repro['check']} passes on {path}")
+    return True
+
+def verify_conversions(cases=2000, seed=None, workers=None, check_names=None, max_size=24,
+                       max_reproducers=3, repro_dir=REPRO_DIR):
+    """Run cases random rooms through every check in parallel and shrink the failures"""
+    check_names = list(check_names or CHECKS)
+    unknown = [name for name in check_names if name not in CHECKS]
+    if unknown:
+        print(f"❌ Unknown check(s): {', '.join(unknown)} (available: {', '.join(CHECKS)})")
+        return False
+    seed = int(time.time()) if seed is None else seed
+
+    print(f"Verifying {cases} random rooms, seed {seed}, checks: {', '.join(check_names)}")
+    if "json_backends" in check_names and orjson is None:
+        print("⚠️  orjson is not installed, json_backends passes trivially")
+    print("=" * 60)
+
+    jobs = [(seed, start, min(start + BATCH_SIZE, cases), check_names, max_size)
+            for start in range(0, cases, BATCH_SIZE)]
+    timings = dict.fromkeys(check_names, 0.0)
+    failures = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for _, batch_timings, batch_failures in pool.map(run_batch, jobs):
+            for name, seconds in batch_timings.items():
+                timings[name] += seconds
+            failures += batch_failures
+    elapsed = time.perf_counter() - start
+
+    failed_by_check = {}
+    for index, name, message in failures:
+        failed_by_check.setdefault(name, []).append((index, message))
+
+    print(f"{'check':<18} {'failed':>8} {'ms/case':>9}")
+    for name in check_names:
+        print(f"{name:<18} {len(failed_by_check.get(name, [])):>8} {timings[name] * 1000 / max(cases, 1):>9.3f}")
+    print("=" * 60)
+    print(f"{cases} cases in {elapsed:.1f} s ({cases * 60 / max(elapsed, 1e-9):.0f} cases/min)")
+
+    if not failures:
+        print("✅ Optimised paths match their references on every case")
+        return True
+
+    # Shrink the first failure of each check (up to max_reproducers)
+    workdir = tempfile.mkdtemp(prefix="dunjon-verify-")
+    try:
+        for name, cases_failed in list(failed_by_check.items())[:max_reproducers]:
+            index, message = cases_failed[0]
+            print(f"\n❌ {name}: {len(cases_failed)} failing case(s), first is case {index}: {message}")
+            room, message, steps = shrink(case_room(seed, index, max_size), name, workdir)
+            path = save_reproducer(name, seed, index, room, message, repro_dir)
+            objects = sum(len(layer.get("objects", [])) for layer in room["layers"])
+            print(f"   shrunk in {steps} steps to {room['width']}x{room['height']}, {len(room['layers'])} layers, "
+                  f"{objects} objects: {message}")
+            print(f"📝 Reproducer: {path} (re-run with --replay)")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return False
+
+def main():
+    """Run the differential checks on 2000 random rooms"""
+    if len(sys.argv) > 1 and sys.argv[1] == "--replay":
+        ok = all([replay(path) for path in sys.argv[2:]])
+    else:
+        ok = verify_conversions(cases=int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
+    if not ok:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()